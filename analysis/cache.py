@@ -0,0 +1,98 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AnalysisCache
+
+
+def is_cache_bypassed(request) -> bool:
+    """?no_cache=true 로 요청하면 캐시된 결과를 쓰지 않고 Gemini로 다시 분석합니다. (새 결과는 캐시에 저장됩니다)"""
+    return request.query_params.get("no_cache", "").lower() in ("1", "true", "yes")
+
+
+def analysis_cache_key(kind: str, chat_text: str, analysis_option: dict, prompt_version: int, model_name: str, **extra) -> str:
+    """
+    분석 결과 캐시의 키를 만듭니다.
+
+    Args:
+        kind (str): 분석 종류 (chem, some, mbti, contrib)
+        chat_text (str): 기간으로 걸러 프롬프트에 넣는 대화 내용
+        analysis_option (dict): 분석 옵션. 기간(start, end)은 chat_text에 이미 반영되어 있으므로 키에서 뺍니다.
+        prompt_version (int): 프롬프트 템플릿 버전
+        model_name (str): Gemini 모델 이름
+        **extra: 그 밖에 프롬프트에 들어가는 값 (예: people_num)
+
+    Returns:
+        str: SHA-256 hex 문자열
+    """
+    options = {key: value for key, value in analysis_option.items() if key not in ("start", "end")}
+    options.update(extra)
+    header = json.dumps(
+        {"kind": kind, "options": options, "prompt_version": prompt_version, "model": model_name},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    digest = hashlib.sha256(header.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(chat_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_cached_analysis(cache_key: str):
+    """캐시된 분석 결과를 반환합니다. 없거나 ANALYSIS_CACHE_TTL이 지났으면 None 입니다."""
+    if not settings.ANALYSIS_CACHE_TTL:
+        return None
+
+    try:
+        entry = AnalysisCache.objects.get(cache_key=cache_key)
+    except AnalysisCache.DoesNotExist:
+        return None
+
+    now = timezone.now()
+    if entry.created_at < now - timedelta(seconds=settings.ANALYSIS_CACHE_TTL):
+        entry.delete()
+        return None
+
+    AnalysisCache.objects.filter(cache_key=cache_key).update(hits=F("hits") + 1, last_used_at=now)
+    return entry.result
+
+
+def store_cached_analysis(cache_key: str, kind: str, result, prompt_version: int, model_name: str) -> None:
+    """분석 결과를 캐시에 저장하고, 만료되었거나 개수 제한을 넘는 항목을 정리합니다."""
+    if not settings.ANALYSIS_CACHE_TTL:
+        return
+
+    now = timezone.now()
+    AnalysisCache.objects.update_or_create(
+        cache_key=cache_key,
+        defaults={
+            "kind": kind,
+            "model_name": model_name,
+            "prompt_version": prompt_version,
+            "result": result,
+            "created_at": now,
+            "last_used_at": now,
+        },
+    )
+    evict_analysis_cache(now)
+
+
+def evict_analysis_cache(now=None) -> int:
+    """TTL이 지난 항목과, ANALYSIS_CACHE_MAX_ENTRIES를 넘는 가장 오래 쓰이지 않은 항목을 삭제합니다."""
+    now = now or timezone.now()
+    deleted, _ = AnalysisCache.objects.filter(
+        created_at__lt=now - timedelta(seconds=settings.ANALYSIS_CACHE_TTL),
+    ).delete()
+
+    stale_keys = list(
+        AnalysisCache.objects.order_by("-last_used_at")
+        .values_list("cache_key", flat=True)[settings.ANALYSIS_CACHE_MAX_ENTRIES:]
+    )
+    if stale_keys:
+        deleted += AnalysisCache.objects.filter(cache_key__in=stale_keys).delete()[0]
+    return deleted
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+from django.conf import settings
+from google import genai
+from google.genai import types
+
+_client = None
+_client_pid = None
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def create_gemini_client() -> genai.Client:
+    """
+    연결 풀 설정(GEMINI_MAX_CONNECTIONS 등)을 적용한 새 Gemini 클라이언트를 만듭니다.
+    요청을 처리할 때는 get_gemini_client()로 공용 클라이언트를 씁니다.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GEMINI_KEEPALIVE_EXPIRY,
+    )
+    return genai.Client(
+        api_key=settings.GEMINI_API_KEY,
+        http_options=types.HttpOptions(
+            base_url=settings.GEMINI_BASE_URL or None,
+            client_args={"limits": limits},
+            async_client_args={"limits": limits},
+        ),
+    )
+
+
+def get_gemini_client() -> genai.Client:
+    """
+    프로세스 공용 Gemini 클라이언트를 반환합니다. 처음 쓸 때 만듭니다.
+
+    클라이언트를 만들 때마다 반복되던 SSL 설정과 TLS 연결을 한 번만 하고, 이후 호출은 keep-alive 연결을 재사용합니다.
+    스레드 사이에서 같이 써도 됩니다. fork된 자식 프로세스에서는 부모의 연결을 쓰지 않도록 새로 만듭니다.
+    """
+    global _client, _client_pid
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = create_gemini_client()
+            _client_pid = os.getpid()
+        return _client
+
+
+def get_gemini_async_client():
+    """
+    현재 이벤트 루프에서 쓸 공용 비동기 Gemini 클라이언트(client.aio)를 반환합니다.
+    비동기 HTTP 연결은 이벤트 루프에 묶이므로 루프마다 하나씩 만들고, 루프가 사라지면 함께 정리됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = create_gemini_client()
+        return client.aio
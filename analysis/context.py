@@ -0,0 +1,146 @@
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from google import genai
+from google.genai import errors, types
+
+from chatlog.sampling import BYTES_PER_TOKEN
+
+from .gateway import generate_content, get_gemini_gateway
+from .models import ChatContext
+
+logger = logging.getLogger(__name__)
+
+# 캐시가 만료되기 직전에 쓰다가 실패하지 않도록, 만료 시각보다 이만큼(초) 일찍 새로 만듭니다.
+CACHE_EXPIRY_MARGIN = 60
+
+
+def chat_context_key(chat_text: str, model_name: str) -> str:
+    """대화 내용과 모델 이름으로 컨텍스트 키(SHA-256 hex)를 만듭니다."""
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(chat_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def register_chat_context(chat_text: str, model_name: str) -> str:
+    """
+    대화 구간을 컨텍스트로 등록하고 키를 반환합니다. 같은 내용이 이미 등록되어 있으면 그 키를 그대로 씁니다.
+
+    Args:
+        chat_text (str): 뒤따르는 호출에서 다시 쓸 대화 내용
+        model_name (str): 이 컨텍스트로 호출할 Gemini 모델 이름 (Gemini 캐시는 모델마다 따로 만들어집니다)
+
+    Returns:
+        str: 컨텍스트 키. 결과 행에 저장해 두었다가 get_chat_context()로 찾습니다.
+    """
+    context_key = chat_context_key(chat_text, model_name)
+    now = timezone.now()
+    _, created = ChatContext.objects.get_or_create(
+        context_key=context_key,
+        defaults={"model_name": model_name, "text": chat_text, "created_at": now, "last_used_at": now},
+    )
+    if created:
+        evict_chat_contexts(now)
+    else:
+        ChatContext.objects.filter(context_key=context_key).update(last_used_at=now)
+    return context_key
+
+
+def get_chat_context(context_key: str) -> ChatContext | None:
+    """등록된 컨텍스트를 반환합니다. 없거나 이미 지워졌으면 None 입니다."""
+    if not context_key:
+        return None
+    try:
+        context = ChatContext.objects.get(context_key=context_key)
+    except ChatContext.DoesNotExist:
+        return None
+    ChatContext.objects.filter(context_key=context_key).update(last_used_at=timezone.now())
+    return context
+
+
+def evict_chat_contexts(now=None) -> int:
+    """CHAT_CONTEXT_TTL 동안 쓰이지 않은 컨텍스트를 지웁니다. Gemini 쪽 캐시는 자체 TTL이 지나면 사라집니다."""
+    now = now or timezone.now()
+    deleted, _ = ChatContext.objects.filter(
+        last_used_at__lt=now - timedelta(seconds=settings.CHAT_CONTEXT_TTL),
+    ).delete()
+    return deleted
+
+
+def generate_with_chat_context(
+    client: genai.Client,
+    context: ChatContext,
+    prompt: str,
+    config: types.GenerateContentConfig | None = None,
+):
+    """
+    등록된 대화 컨텍스트를 참고해 prompt에 대한 응답을 생성합니다.
+
+    Gemini 캐시를 쓸 수 있으면 캐시 이름만 넘기고 prompt만 보냅니다. 쓸 수 없으면 대화를 prompt 앞에 붙여 보내는데,
+    같은 컨텍스트로 하는 호출들은 앞부분이 똑같으므로 Gemini의 암묵적 캐시(implicit caching)가 적용될 수 있습니다.
+
+    Args:
+        client (genai.Client): Gemini API 클라이언트
+        context (ChatContext): get_chat_context()로 찾은 컨텍스트
+        prompt (str): 대화 내용을 뺀 프롬프트
+        config (GenerateContentConfig): 추가 생성 설정
+
+    Returns:
+        GenerateContentResponse: Gemini 응답
+    """
+    cache_name = _get_cache_name(client, context)
+    if cache_name:
+        config = (config or types.GenerateContentConfig()).model_copy(update={"cached_content": cache_name})
+        return generate_content(client, model=context.model_name, contents=[prompt], config=config)
+    return generate_content(
+        client,
+        model=context.model_name,
+        contents=[_chat_context_text(context.text), prompt],
+        config=config,
+    )
+
+
+def _chat_context_text(chat_text: str) -> str:
+    return f"--- [카카오톡 대화 내용] ---\n{chat_text}\n--- [대화 끝] ---"
+
+
+def _get_cache_name(client: genai.Client, context: ChatContext) -> str:
+    """
+    컨텍스트의 Gemini 캐시 이름을 반환합니다. 아직 없거나 만료되었으면 새로 만듭니다.
+    캐시를 쓰지 않도록 설정했거나, 대화가 캐시 최소 크기보다 짧거나, 만들지 못했으면 빈 문자열입니다.
+    """
+    ttl = settings.GEMINI_CONTEXT_CACHE_TTL
+    if not ttl or len(context.text.encode("utf-8")) // BYTES_PER_TOKEN < settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+        return ""
+
+    now = timezone.now()
+    if context.cache_expires_at and context.cache_expires_at > now:
+        # cache_name이 비어 있으면 최근에 만들지 못한 것이므로 만료 시각까지는 다시 시도하지 않습니다.
+        return context.cache_name
+
+    try:
+        cached = get_gemini_gateway().call(
+            client.caches.create,
+            model=context.model_name,
+            config=types.CreateCachedContentConfig(
+                contents=[_chat_context_text(context.text)],
+                display_name=f"chat-context-{context.context_key[:16]}",
+                ttl=f"{ttl}s",
+            ),
+        )
+        cache_name = cached.name
+    except errors.APIError as e:
+        logger.warning("could not create Gemini context cache for %s: %s", context.context_key, e)
+        cache_name = ""
+
+    context.cache_name = cache_name
+    context.cache_expires_at = now + timedelta(seconds=max(ttl - CACHE_EXPIRY_MARGIN, 0))
+    ChatContext.objects.filter(context_key=context.context_key).update(
+        cache_name=context.cache_name,
+        cache_expires_at=context.cache_expires_at,
+    )
+    return cache_name
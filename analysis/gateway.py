@@ -0,0 +1,278 @@
+import logging
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from google import genai
+from google.genai import errors
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from .jobs import AnalysisFailed
+
+logger = logging.getLogger(__name__)
+
+_gateway = None
+_gateway_lock = threading.Lock()
+_EMPTY = object()
+
+
+class GeminiUnavailable(AnalysisFailed):
+    """
+    호출 한도나 서킷 브레이커 때문에 Gemini를 호출하지 않았을 때 발생합니다.
+    분석 뷰와 작업 일꾼이 이 메시지를 그대로 사용자에게 보여줍니다.
+    """
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """429(한도 초과), 5xx, 연결/타임아웃 오류는 잠시 뒤 다시 시도하면 성공할 수 있습니다."""
+    if isinstance(e, errors.APIError):
+        return e.code == 429 or (e.code or 0) >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷입니다.
+    토큰을 미리 예약하고 차례가 올 때까지 기다리므로, 먼저 온 호출이 먼저 나갑니다.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """토큰 하나를 얻을 때까지 기다립니다. timeout(초) 안에 얻을 수 없으면 기다리지 않고 False를 반환합니다."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(-(self.tokens - 1) / self.rate, 0.0)
+            if wait > timeout:
+                return False
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def available(self) -> float:
+        with self.lock:
+            return min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+
+
+class CircuitBreaker:
+    """
+    재시도까지 실패한 호출이 failure_threshold번 연속되면 reset_timeout(초) 동안 호출을 막습니다(open).
+    그 뒤에는 시험 호출 하나만 보내서(half_open) 성공하면 다시 열고(closed), 실패하면 다시 막습니다.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise GeminiUnavailable("Gemini 호출이 잇달아 실패해 잠시 멈췄습니다. 잠시 후 다시 시도해 주세요.")
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.probing:
+                    raise GeminiUnavailable("Gemini 호출이 잇달아 실패해 잠시 멈췄습니다. 잠시 후 다시 시도해 주세요.")
+                self.probing = True
+
+    def record(self, e: Exception | None) -> None:
+        """호출 결과를 기록합니다. e가 재시도할 수 있는 오류일 때만 실패로 칩니다."""
+        with self.lock:
+            self.probing = False
+            if e is None:
+                self.state = "closed"
+                self.failures = 0
+            elif is_retryable_error(e):
+                self.failures += 1
+                if self.state == "half_open" or self.failures >= self.failure_threshold:
+                    if self.state != "open":
+                        logger.warning("Gemini circuit opened after %d failures", self.failures)
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+
+
+class GeminiGateway:
+    """
+    모든 Gemini 호출이 지나가는 관문입니다.
+
+    - 토큰 버킷으로 호출 속도를 rate_per_minute 이하로 맞춥니다. (한도를 넘기 전에 기다립니다)
+    - 동시에 진행하는 호출 수를 max_in_flight개로 제한합니다.
+    - 429/5xx/연결 오류는 지수적으로 늘어나는 무작위 간격(full jitter)으로 max_attempts번까지 다시 시도합니다.
+    - 재시도까지 실패한 호출이 이어지면 서킷 브레이커가 잠시 호출을 막아 실패가 번지지 않게 합니다.
+    - 자리나 토큰을 queue_timeout초 안에 얻지 못하면 GeminiUnavailable을 발생시킵니다.
+
+    한도는 프로세스마다 따로 적용되므로, 전체 한도는 설정값에 웹 프로세스 수를 곱한 값입니다.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        max_in_flight: int,
+        queue_timeout: float,
+        max_attempts: int,
+        retry_max_wait: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.bucket = TokenBucket(rate_per_minute / 60, burst) if rate_per_minute else None
+        self.slots = threading.BoundedSemaphore(max(max_in_flight, 1))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.queue_timeout = queue_timeout
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_max_wait = retry_max_wait
+        self.lock = threading.Lock()
+        self.counters = {"waiting": 0, "in_flight": 0, "calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs)를 한도와 재시도 정책을 지켜 호출하고 결과를 반환합니다."""
+        self._before_call()
+        try:
+            result = self._retrying()(self._attempt, fn, args, kwargs)
+        except Exception as e:
+            self._after_call(e)
+            raise
+        self._after_call(None)
+        return result
+
+    def stream(self, fn, *args, **kwargs):
+        """
+        스트리밍 호출(fn이 조각들의 iterator를 반환)을 감싸는 generator입니다.
+        첫 조각을 받기 전에 실패하면 다시 시도하고, 받는 동안에는 동시 호출 자리를 하나 차지합니다.
+        """
+        self._before_call()
+        try:
+            iterator, first = self._retrying()(self._open_stream, fn, args, kwargs)
+        except Exception as e:
+            self._after_call(e)
+            raise
+
+        error = None
+        try:
+            if first is not _EMPTY:
+                yield first
+            yield from iterator
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release_slot()
+            self._after_call(error)
+
+    def metrics(self) -> dict:
+        """대기 중인 호출 수(waiting), 진행 중인 호출 수(in_flight), 누적 횟수와 서킷 상태를 반환합니다."""
+        with self.lock:
+            metrics = dict(self.counters)
+        metrics["circuit"] = self.breaker.state
+        metrics["tokens"] = round(self.bucket.available(), 2) if self.bucket else None
+        return metrics
+
+    def _retrying(self) -> Retrying:
+        return Retrying(
+            retry=retry_if_exception(is_retryable_error),
+            wait=wait_random_exponential(multiplier=1, max=self.retry_max_wait),
+            stop=stop_after_attempt(self.max_attempts),
+            before_sleep=self._count_retry,
+            reraise=True,
+        )
+
+    def _attempt(self, fn, args, kwargs):
+        self._acquire_slot()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._release_slot()
+
+    def _open_stream(self, fn, args, kwargs):
+        self._acquire_slot()
+        try:
+            iterator = iter(fn(*args, **kwargs))
+            return iterator, next(iterator, _EMPTY)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _acquire_slot(self) -> None:
+        self._count("waiting", 1)
+        started = time.monotonic()
+        try:
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                self._reject()
+            remaining = self.queue_timeout - (time.monotonic() - started)
+            if self.bucket and not self.bucket.acquire(max(remaining, 0.0)):
+                self.slots.release()
+                self._reject()
+        finally:
+            self._count("waiting", -1)
+        self._count("in_flight", 1)
+
+    def _release_slot(self) -> None:
+        self._count("in_flight", -1)
+        self.slots.release()
+
+    def _reject(self):
+        self._count("rejected", 1)
+        raise GeminiUnavailable("Gemini 호출이 몰려 처리하지 못했습니다. 잠시 후 다시 시도해 주세요.")
+
+    def _before_call(self) -> None:
+        try:
+            self.breaker.before_call()
+        except GeminiUnavailable:
+            self._count("rejected", 1)
+            raise
+        self._count("calls", 1)
+
+    def _after_call(self, e: Exception | None) -> None:
+        self.breaker.record(e)
+        if e is not None:
+            self._count("failures", 1)
+
+    def _count_retry(self, retry_state) -> None:
+        self._count("retries", 1)
+        logger.info("retrying Gemini call (attempt %d): %s", retry_state.attempt_number, retry_state.outcome.exception())
+
+    def _count(self, name: str, delta: int) -> None:
+        with self.lock:
+            self.counters[name] += delta
+
+
+def get_gemini_gateway() -> GeminiGateway:
+    """프로세스 공용 호출 관문입니다. 처음 쓸 때 설정값으로 만듭니다."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = GeminiGateway(
+                rate_per_minute=settings.GEMINI_RATE_PER_MINUTE,
+                burst=settings.GEMINI_RATE_BURST,
+                max_in_flight=settings.GEMINI_MAX_IN_FLIGHT,
+                queue_timeout=settings.GEMINI_QUEUE_TIMEOUT,
+                max_attempts=settings.GEMINI_RETRY_ATTEMPTS,
+                retry_max_wait=settings.GEMINI_RETRY_MAX_WAIT,
+                failure_threshold=settings.GEMINI_CIRCUIT_FAILURES,
+                reset_timeout=settings.GEMINI_CIRCUIT_RESET,
+            )
+    return _gateway
+
+
+def generate_content(client: genai.Client, **kwargs):
+    """client.models.generate_content(**kwargs)를 호출 관문을 거쳐 호출합니다."""
+    return get_gemini_gateway().call(client.models.generate_content, **kwargs)
+
+
+def generate_content_stream(client: genai.Client, **kwargs):
+    """client.models.generate_content_stream(**kwargs)를 호출 관문을 거쳐 호출하고 조각들을 차례로 돌려줍니다."""
+    return get_gemini_gateway().stream(client.models.generate_content_stream, **kwargs)
@@ -0,0 +1,107 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import AnalysisJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class AnalysisFailed(Exception):
+    """분석 함수가 사용자에게 보여줄 사유와 함께 실패를 알릴 때 발생시킵니다."""
+
+
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """
+    분석 작업을 실행하는 프로세스 공용 스레드 풀입니다. 처음 쓸 때 만듭니다.
+    ANALYSIS_WORKERS는 프로세스 하나가 동시에 진행하는 LLM 호출 수의 상한이 됩니다.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_WORKERS,
+                thread_name_prefix="analysis",
+            )
+    return _executor
+
+
+def is_async_request(request) -> bool:
+    """?async=true 로 요청하면 분석을 작업으로 넘기고 202를 응답합니다."""
+    return request.query_params.get("async", "").lower() in ("1", "true", "yes")
+
+
+def submit_analysis_job(user, target: str, kind: str, task, *args) -> AnalysisJob:
+    """
+    분석 작업을 만들고 일꾼 스레드 풀에 넣습니다.
+
+    Args:
+        user (User): 요청한 사용자
+        target (str): "play" 또는 "business"
+        kind (str): 분석 종류 (chem, some, mbti, contrib)
+        task (callable): task(*args)를 실행해 결과의 result_id를 반환하는 함수.
+                         사유를 남기고 실패하려면 AnalysisFailed를 발생시킵니다.
+        *args: task에 넘길 인자. 다른 스레드에서 쓰이므로 모델 객체 대신 id를 넘깁니다.
+
+    Returns:
+        AnalysisJob: queued 상태의 작업
+    """
+    job = AnalysisJob.objects.create(user=user, target=target, kind=kind)
+    # 트랜잭션 안에서 호출되더라도 작업 행이 커밋된 뒤에 일꾼이 찾도록 합니다.
+    transaction.on_commit(lambda: get_analysis_executor().submit(run_analysis_job, job.job_id, task, *args))
+    return job
+
+
+def run_analysis_job(job_id, task, *args) -> None:
+    """일꾼 스레드에서 작업 하나를 실행하고 결과를 AnalysisJob에 기록합니다."""
+    try:
+        started = AnalysisJob.objects.filter(job_id=job_id, status="queued").update(
+            status="running",
+            started_at=timezone.now(),
+        )
+        if not started:
+            return
+
+        try:
+            result_id = task(*args)
+        except AnalysisFailed as e:
+            _finish_job(job_id, "failed", error_message=str(e))
+        except Exception:
+            logger.exception("analysis job %s failed", job_id)
+            _finish_job(job_id, "failed", error_message="분석 중 오류가 발생했습니다.")
+        else:
+            _finish_job(job_id, "done", result_id=result_id)
+    finally:
+        # 스레드마다 열린 DB 연결이 풀의 스레드 수만큼 쌓여 남지 않도록 닫습니다.
+        connections.close_all()
+
+
+def fail_interrupted_jobs(before) -> int:
+    """
+    before 이전에 만들어졌는데 아직 끝나지 않은 작업을 실패로 표시합니다.
+    일꾼은 웹 프로세스 안의 스레드이므로, 프로세스가 재시작되면 진행 중이던 작업은 이어지지 않습니다.
+    """
+    return AnalysisJob.objects.filter(
+        status__in=["queued", "running"],
+        created_at__lt=before,
+    ).update(
+        status="failed",
+        error_message="분석이 중단되었습니다. 다시 요청해 주세요.",
+        finished_at=timezone.now(),
+    )
+
+
+def _finish_job(job_id, status: str, result_id: int | None = None, error_message: str = "") -> None:
+    AnalysisJob.objects.filter(job_id=job_id).update(
+        status=status,
+        result_id=result_id,
+        error_message=error_message,
+        finished_at=timezone.now(),
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from google import genai
+from google.genai import types
+
+from analysis.clients import create_gemini_client, get_gemini_async_client
+
+MODEL = "gemini-2.0-flash"
+STUB_RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}],
+}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """generateContent 요청에 고정된 응답을 주는 스텁. keep-alive를 위해 HTTP/1.1로 응답합니다."""
+
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘이 켜져 있으면 응답마다 지연(delayed ACK)이 생깁니다.
+    disable_nagle_algorithm = True
+    latency = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "로컬 스텁 서버를 상대로, 호출마다 Gemini 클라이언트를 새로 만들 때와 공용 클라이언트를 쓸 때의 호출당 시간을 비교합니다. "
+        "스텁은 평문 HTTP이므로 실제 API에서 추가로 아끼는 TLS 핸드셰이크 시간은 포함되지 않습니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=200, help="방식마다 보내는 호출 수")
+        parser.add_argument("--latency-ms", type=float, default=0, help="스텁 서버의 응답 지연(ms)")
+
+    def handle(self, *args, **options):
+        calls = options["calls"]
+        StubHandler.latency = options["latency_ms"] / 1000
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}/"
+
+        try:
+            with override_settings(GEMINI_BASE_URL=base_url):
+                self.stdout.write(f"스텁 서버: {base_url} (호출 {calls}번, 응답 지연 {options['latency_ms']:g}ms)")
+                self.stdout.write(f"{'방식':<24}{'호출당':>10}{'연결 수':>10}")
+
+                def new_client_per_call():
+                    client = genai.Client(api_key="stub", http_options=types.HttpOptions(base_url=base_url))
+                    client.models.generate_content(model=MODEL, contents=["ping"])
+
+                shared = create_gemini_client()
+
+                def shared_client():
+                    shared.models.generate_content(model=MODEL, contents=["ping"])
+
+                baseline = self._measure("sync, 호출마다 새 클라이언트", calls, new_client_per_call)
+                pooled = self._measure("sync, 공용 클라이언트", calls, shared_client)
+                self.stdout.write(f"호출당 {(baseline - pooled) * 1000:.2f}ms 절약 ({baseline / pooled:.1f}배)")
+
+                baseline = self._measure_async("async, 호출마다 새 클라이언트", calls, base_url, shared=False)
+                pooled = self._measure_async("async, 공용 클라이언트", calls, base_url, shared=True)
+                self.stdout.write(f"호출당 {(baseline - pooled) * 1000:.2f}ms 절약 ({baseline / pooled:.1f}배)")
+        finally:
+            server.shutdown()
+
+    def _measure(self, label: str, calls: int, call) -> float:
+        call()  # 준비 호출 (공용 클라이언트는 여기서 연결을 엽니다)
+        StubHandler.connections = 0
+        started = time.perf_counter()
+        for _ in range(calls):
+            call()
+        per_call = (time.perf_counter() - started) / calls
+        self.stdout.write(f"{label:<24}{per_call * 1000:>8.2f}ms{StubHandler.connections:>10}")
+        return per_call
+
+    def _measure_async(self, label: str, calls: int, base_url: str, shared: bool) -> float:
+        async def run() -> float:
+            pooled = get_gemini_async_client()
+
+            async def call():
+                client = pooled if shared else genai.Client(
+                    api_key="stub", http_options=types.HttpOptions(base_url=base_url),
+                ).aio
+                await client.models.generate_content(model=MODEL, contents=["ping"])
+
+            await call()
+            StubHandler.connections = 0
+            started = time.perf_counter()
+            for _ in range(calls):
+                await call()
+            return (time.perf_counter() - started) / calls
+
+        per_call = asyncio.run(run())
+        self.stdout.write(f"{label:<24}{per_call * 1000:>8.2f}ms{StubHandler.connections:>10}")
+        return per_call
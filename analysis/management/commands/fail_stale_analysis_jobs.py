@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analysis.jobs import fail_interrupted_jobs
+
+
+class Command(BaseCommand):
+    help = "재시작 등으로 끝나지 못하고 queued/running에 머문 분석 작업을 실패로 표시합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, default=30, help="만들어진 지 이 시간이 지난 작업을 정리합니다.")
+
+    def handle(self, *args, **options):
+        count = fail_interrupted_jobs(timezone.now() - timedelta(minutes=options["minutes"]))
+        self.stdout.write(f"분석 작업 {count}건을 실패로 표시했습니다.")
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from google import genai
+from google.genai import types
+
+from chatlog.sampling import BYTES_PER_TOKEN, split_chat_text
+
+from .gateway import generate_content, generate_content_stream
+
+# 분석 프롬프트에서 대화 내용이 들어갈 자리. 구간별로 나눠 분석할 때 이 자리만 바꿔 끼웁니다.
+CHAT_LOG_PLACEHOLDER = "<<CHAT_LOG>>"
+
+REDUCE_PROMPT = """
+당신은 여러 분석 결과를 하나로 종합하는 카카오톡 대화 분석 전문가 'Chatto'입니다.
+아래 [원래 지시]는 카카오톡 대화 하나를 분석하라는 지시입니다. 대화가 너무 길어서 시간 순서대로 {count}개 구간으로 나눠
+구간마다 같은 지시로 분석했습니다. [구간별 분석 결과]를 종합해서 대화 전체에 대한 분석 결과 하나를 작성해주세요.
+
+- 점수, 횟수, 비율은 구간의 메시지 수를 가중치로 삼아 종합해주세요.
+- 사람 이름(또는 P1, P2 같은 별칭)은 구간별 결과에 나온 것만 그대로 쓰고, 같은 사람은 하나로 합쳐주세요.
+- 대화 예시는 구간별 결과에 인용된 것 중에서 골라주세요.
+- 기간별 항목이 있다면 구간들이 시간 순서라는 점을 고려해 대화 전체 기간 기준으로 다시 나눠주세요.
+- 반드시 [원래 지시]의 출력 형식을 그대로 지키고, 다른 설명은 덧붙이지 마세요.
+
+--- [원래 지시] ---
+{instructions}
+--- [구간별 분석 결과] ---
+{partials}
+--- [종합 시작] ---
+"""
+
+
+def generate_chat_analysis(
+    client: genai.Client,
+    model: str,
+    prompt: str,
+    chat_text: str,
+    on_text=None,
+    config: types.GenerateContentConfig | None = None,
+) -> str:
+    """
+    분석 프롬프트(prompt의 CHAT_LOG_PLACEHOLDER 자리에 chat_text를 넣은 것)에 대한 Gemini 응답 문자열을 반환합니다.
+
+    chat_text가 프롬프트 하나의 예산(ANALYSIS_TOKEN_BUDGET)보다 길면 map-reduce로 처리합니다.
+    대화를 비슷한 크기의 구간으로 나눠 구간마다 같은 프롬프트로 동시에(ANALYSIS_MAP_WORKERS개씩) 분석하고,
+    구간별 응답을 종합 프롬프트로 한 번 더 보내 원래 출력 형식의 응답 하나로 합칩니다.
+    그래서 호출하는 쪽은 대화 길이와 상관없이 같은 파싱 코드를 쓸 수 있고, 걸리는 시간은 대화 길이가 아니라
+    동시에 처리하는 호출 수에 따라 정해집니다.
+
+    on_text가 주어지면 최종 응답(map-reduce에서는 종합 호출의 응답)을 스트리밍 API로 받으면서
+    조각이 올 때마다 지금까지 받은 응답 전체를 on_text에 넘깁니다.
+
+    Args:
+        client (genai.Client): Gemini API 클라이언트
+        model (str): Gemini 모델 이름
+        prompt (str): 대화 자리에 CHAT_LOG_PLACEHOLDER가 들어 있는 분석 프롬프트
+        chat_text (str): 분석할 대화 내용
+        on_text (callable): 스트리밍으로 받는 중간 응답 문자열을 받을 함수
+        config (types.GenerateContentConfig): 모든 호출(구간별, 종합)에 쓰는 생성 설정. 응답 JSON 스키마 등
+
+    Returns:
+        str: 원래 출력 형식의 응답 문자열
+    """
+    max_bytes = settings.ANALYSIS_TOKEN_BUDGET * BYTES_PER_TOKEN
+    if not max_bytes or len(chat_text.encode("utf-8")) <= max_bytes:
+        return _generate(client, model, prompt.replace(CHAT_LOG_PLACEHOLDER, chat_text), config, on_text)
+
+    chunks = split_chat_text(chat_text, max_bytes)
+    if len(chunks) == 1:
+        return _generate(client, model, prompt.replace(CHAT_LOG_PLACEHOLDER, chat_text), config, on_text)
+
+    with ThreadPoolExecutor(
+        max_workers=max(min(settings.ANALYSIS_MAP_WORKERS, len(chunks)), 1),
+        thread_name_prefix="analysis-map",
+    ) as executor:
+        partials = list(executor.map(
+            lambda chunk: _generate(client, model, prompt.replace(CHAT_LOG_PLACEHOLDER, chunk.text), config),
+            chunks,
+        ))
+
+    return _generate(client, model, build_reduce_prompt(prompt, chunks, partials), config, on_text)
+
+
+def build_reduce_prompt(prompt: str, chunks, partials: list[str]) -> str:
+    """구간별 응답들을 원래 출력 형식의 응답 하나로 합치게 하는 종합 프롬프트를 만듭니다."""
+    instructions = prompt.replace(CHAT_LOG_PLACEHOLDER, "(대화 내용은 구간별로 나눠 분석했습니다)")
+    partial_texts = [
+        f"### 구간 {i} (메시지 {chunk.num_chat}개)\n{partial.strip()}"
+        for i, (chunk, partial) in enumerate(zip(chunks, partials), start=1)
+    ]
+    return REDUCE_PROMPT.format(count=len(chunks), instructions=instructions, partials="\n\n".join(partial_texts))
+
+
+def _generate(client: genai.Client, model: str, prompt: str, config=None, on_text=None) -> str:
+    if on_text is None:
+        response = generate_content(client, model=model, contents=[prompt], config=config)
+        return response.text
+
+    text = ""
+    for chunk in generate_content_stream(client, model=model, contents=[prompt], config=config):
+        if chunk.text:
+            text += chunk.text
+            on_text(text)
+    return text
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analysis', '0002_analysiscache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatContext',
+            fields=[
+                ('context_key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('model_name', models.CharField(max_length=64)),
+                ('text', models.TextField()),
+                ('cache_name', models.CharField(blank=True, default='', max_length=255)),
+                ('cache_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+import uuid
+
+
+class AnalysisJob(models.Model):
+    """
+    백그라운드에서 실행되는 채팅 분석 작업입니다.
+
+    분석 요청은 작업을 만들고 바로 job_id를 돌려주며, 분석(Gemini 호출, 응답 파싱, 결과 저장)은
+    로컬 일꾼 스레드에서 진행됩니다. 클라이언트는 상태 조회 API로 status를 확인하다가
+    done이 되면 result_id로 결과를 조회합니다. 실패하면 error_message에 사유가 남습니다.
+    """
+    TARGET_CHOICES = [
+        ("play", "play"),
+        ("business", "business"),
+    ]
+    KIND_CHOICES = [
+        ("chem", "chem"),
+        ("some", "some"),
+        ("mbti", "mbti"),
+        ("contrib", "contrib"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "queued"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+    ]
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    target = models.CharField(max_length=16, choices=TARGET_CHOICES)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    result_id = models.IntegerField(null=True, blank=True)
+    error_message = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class AnalysisCache(models.Model):
+    """
+    Gemini 분석 결과(응답을 파싱한 딕셔너리)의 캐시입니다.
+
+    cache_key는 분석할 대화 구간의 내용, 분석 종류, 옵션, 프롬프트 버전, 모델 이름을 합쳐 만든 해시라서
+    같은 파일의 같은 기간을 같은 옵션으로 다시 분석하면 Gemini를 부르지 않고 이 결과로 Result 행을 만듭니다.
+    오래된 항목은 ANALYSIS_CACHE_TTL이 지나면 버리고, ANALYSIS_CACHE_MAX_ENTRIES를 넘으면
+    가장 오래 쓰이지 않은 항목부터 지웁니다.
+    """
+    cache_key = models.CharField(max_length=64, primary_key=True)
+    kind = models.CharField(max_length=16)
+    model_name = models.CharField(max_length=64)
+    prompt_version = models.IntegerField()
+    result = models.JSONField()
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class ChatContext(models.Model):
+    """
+    분석에 쓴 대화 구간을 퀴즈 생성 등 뒤따르는 Gemini 호출에서 다시 쓰기 위해 등록해 둔 컨텍스트입니다.
+
+    context_key는 대화 내용과 모델 이름의 해시이고, text는 프롬프트 앞에 붙이는 대화 내용입니다. (로컬 prefix 저장소)
+    대화가 충분히 길면 Gemini 컨텍스트 캐시(cached content)를 만들어 cache_name에 기록하고,
+    cache_expires_at까지는 대화를 다시 보내지 않고 캐시 이름만 넘깁니다.
+    CHAT_CONTEXT_TTL 동안 쓰이지 않은 항목은 지웁니다.
+    """
+    context_key = models.CharField(max_length=64, primary_key=True)
+    model_name = models.CharField(max_length=64)
+    text = models.TextField()
+    cache_name = models.CharField(max_length=255, blank=True, default="")
+    cache_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
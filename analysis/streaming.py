@@ -0,0 +1,100 @@
+import json
+import logging
+import queue
+
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+from .jobs import AnalysisFailed, get_analysis_executor
+
+logger = logging.getLogger(__name__)
+
+# 이벤트가 이 시간(초) 동안 없으면 프록시가 연결을 끊지 않도록 주석 줄을 보냅니다.
+KEEP_ALIVE_SECONDS = 15
+
+
+def is_stream_request(request) -> bool:
+    """?stream=true 로 요청하면 분석 결과를 Server-Sent Events로 나눠 보냅니다."""
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def stream_parsed_sections(parse, on_partial):
+    """
+    스트리밍으로 받는 응답 문자열을 parse로 파싱해서, 새로 채워지거나 바뀐 항목만 on_partial에 넘기는 함수를 만듭니다.
+    generate_chat_analysis()의 on_text로 넘깁니다. on_partial이 없으면 None을 반환해 스트리밍하지 않게 합니다.
+
+    Args:
+        parse (callable): 받는 중인 응답 문자열에서 끝까지 들어온 항목만 딕셔너리로 반환하는 함수
+                          (예: parse_partial_json)
+        on_partial (callable): 새로 파싱된 항목 딕셔너리를 받을 함수
+
+    Returns:
+        callable: 지금까지 받은 응답 문자열을 받는 함수
+    """
+    if on_partial is None:
+        return None
+
+    sent = {}
+
+    def on_text(text: str) -> None:
+        parsed = parse(text)
+        changed = {
+            key: value for key, value in parsed.items()
+            if value not in ("", 0, None, [], {}) and sent.get(key) != value
+        }
+        if changed:
+            sent.update(changed)
+            on_partial(changed)
+
+    return on_text
+
+
+def analysis_event_stream(task, *args) -> StreamingHttpResponse:
+    """
+    task(*args, on_partial=...)를 분석 스레드 풀에서 실행하면서 진행 상황을 Server-Sent Events로 보내는 응답을 만듭니다.
+
+    - event: section  새로 파싱된 항목들 (data: 항목 딕셔너리)
+    - event: done     결과 행이 저장됨 (data: {"result_id": ...})
+    - event: error    분석 실패 (data: {"detail": ...})
+
+    Args:
+        task (callable): 결과를 저장하고 result_id를 반환하는 분석 함수 (run_chem_analysis 등).
+                         사유를 남기고 실패하려면 AnalysisFailed를 발생시킵니다.
+        *args: task에 넘길 인자
+
+    Returns:
+        StreamingHttpResponse: text/event-stream 응답
+    """
+    events = queue.Queue()
+
+    def run() -> None:
+        try:
+            result_id = task(*args, on_partial=lambda fields: events.put(("section", fields)))
+        except AnalysisFailed as e:
+            events.put(("error", {"detail": str(e)}))
+        except Exception:
+            logger.exception("streaming analysis failed")
+            events.put(("error", {"detail": "분석 중 오류가 발생했습니다."}))
+        else:
+            events.put(("done", {"result_id": result_id}))
+        finally:
+            connections.close_all()
+
+    def generate():
+        # 동시에 진행하는 LLM 호출 수가 ANALYSIS_WORKERS를 넘지 않도록 작업과 같은 풀에서 실행합니다.
+        get_analysis_executor().submit(run)
+        while True:
+            try:
+                event, data = events.get(timeout=KEEP_ALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+            if event != "section":
+                return
+
+    response = StreamingHttpResponse(generate(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx가 응답을 모아서 보내지 않도록 합니다.
+    response["X-Accel-Buffering"] = "no"
+    return response
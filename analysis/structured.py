@@ -0,0 +1,100 @@
+import json
+
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+
+
+class StructuredResponseError(ValueError):
+    """Gemini 응답 JSON이 스키마와 맞지 않을 때 발생합니다. 빠졌거나 형식이 틀린 필드 이름을 담습니다."""
+
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+        super().__init__(f"응답에 빠졌거나 형식이 틀린 항목이 있습니다: {', '.join(fields)}")
+
+
+def json_response_config(schema: type[BaseModel]) -> types.GenerateContentConfig:
+    """응답을 schema 형식의 JSON으로만 받도록 하는 generate_content 설정을 만듭니다."""
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
+
+
+def parse_structured_response(schema: type[BaseModel], response_text: str) -> BaseModel:
+    """
+    응답 JSON을 한 번에 파싱하고 schema로 검증합니다.
+
+    Args:
+        schema (type[BaseModel]): 응답 스키마
+        response_text (str): Gemini 응답 문자열
+
+    Returns:
+        BaseModel: 검증된 응답
+
+    Raises:
+        StructuredResponseError: JSON이 아니거나, 필드가 빠졌거나, 타입이 맞지 않을 때
+    """
+    try:
+        return schema.model_validate_json(response_text)
+    except ValidationError as e:
+        fields = [".".join(str(part) for part in error["loc"]) or "(전체)" for error in e.errors()]
+        raise StructuredResponseError(fields) from e
+
+
+def parse_partial_json(text: str) -> dict:
+    """
+    스트리밍으로 받는 중인 JSON 객체 문자열에서 값이 끝까지 들어온 최상위 필드만 뽑습니다.
+    값이 아직 덜 들어온 배열 필드는 끝까지 들어온 원소들만 담습니다.
+    뒤에 글자가 더 붙을 수 있는 숫자 등이 잘린 채로 잡히지 않도록, 값 뒤에 문자가 더 와야 그 값을 씁니다.
+    """
+    result = {}
+    start = text.find("{")
+    if start < 0:
+        return result
+
+    pos = _skip(text, start + 1)
+    while pos < len(text) and text[pos] == '"':
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        pos = _skip(text, pos, " \t\r\n")
+        if pos >= len(text) or text[pos] != ":":
+            break
+        pos = _skip(text, pos + 1, " \t\r\n")
+
+        try:
+            value, end = _decoder.raw_decode(text, pos)
+        except ValueError:
+            if pos < len(text) and text[pos] == "[":
+                result[key] = _parse_partial_array(text, pos + 1)
+            break
+        if end >= len(text):
+            break
+        result[key] = value
+        pos = _skip(text, end)
+    return result
+
+
+def _parse_partial_array(text: str, pos: int) -> list:
+    items = []
+    pos = _skip(text, pos)
+    while pos < len(text) and text[pos] != "]":
+        try:
+            item, end = _decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        if end >= len(text):
+            break
+        items.append(item)
+        pos = _skip(text, end)
+    return items
+
+
+def _skip(text: str, pos: int, chars: str = _SEPARATORS) -> int:
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
@@ -0,0 +1,588 @@
+import asyncio
+import json
+import typing
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from google.genai import errors
+from pydantic import BaseModel
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from . import clients
+from .cache import analysis_cache_key, evict_analysis_cache, get_cached_analysis, store_cached_analysis
+from .context import evict_chat_contexts, generate_with_chat_context, get_chat_context, register_chat_context
+from .gateway import GeminiGateway, GeminiUnavailable, TokenBucket, is_retryable_error
+from .jobs import AnalysisFailed, fail_interrupted_jobs, run_analysis_job, submit_analysis_job
+from .mapreduce import CHAT_LOG_PLACEHOLDER, generate_chat_analysis
+from .models import AnalysisCache, AnalysisJob, ChatContext
+from .streaming import stream_parsed_sections
+from .structured import StructuredResponseError, json_response_config, parse_partial_json, parse_structured_response
+
+CHAT_TEXT = """--------------- 2024년 1월 3일 수요일 ---------------
+[김철수] [오후 3:12] 안녕하세요
+[이영희] [오후 3:13] 철수야 반가워
+[김철수] [오후 3:20] 영희야 점심 뭐 먹지
+--------------- 2024년 1월 4일 목요일 ---------------
+[박민수] [오전 9:00] 좋은 아침
+[이영희] [오전 9:05] 민수 안녕 ㅋㅋㅋ
+--------------- 2024년 1월 5일 금요일 ---------------
+[김철수] [오후 11:59] 다들 잘 자
+"""
+
+
+class FakeGeminiModels:
+    """
+    client.models 자리에 넣는 가짜 Gemini 모델입니다.
+    respond(contents, config)가 돌려준 문자열을 응답 text로 쓰고, 예외를 던지면 그대로 전달합니다.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def generate_content(self, model, contents, config=None):
+        self.calls.append(contents)
+        return mock.Mock(text=self.respond(contents, config))
+
+    def generate_content_stream(self, model, contents, config=None):
+        # 응답을 작은 조각으로 나눠 스트리밍 API처럼 차례로 돌려줍니다.
+        self.calls.append(contents)
+        text = self.respond(contents, config)
+        return (mock.Mock(text=text[i:i + 16]) for i in range(0, len(text), 16))
+
+
+def fake_gemini(module: str, respond):
+    """
+    module(예: "play.views")이 쓰는 공용 Gemini 클라이언트를 가짜 모델로 바꾸는 patch를 만듭니다.
+
+    Returns:
+        tuple: (FakeGeminiModels, 시작하지 않은 mock.patch)
+    """
+    models = FakeGeminiModels(respond)
+    client = mock.Mock(models=models)
+    return models, mock.patch(f"{module}.get_gemini_client", return_value=client)
+
+
+def unlimited_gateway(**options) -> GeminiGateway:
+    """호출 한도와 재시도 대기가 없는 테스트용 호출 관문을 만듭니다. options로 설정을 덮어씁니다."""
+    settings = {
+        "rate_per_minute": 0, "burst": 1, "max_in_flight": 8, "queue_timeout": 1, "max_attempts": 1,
+        "retry_max_wait": 0, "failure_threshold": 5, "reset_timeout": 30,
+    }
+    settings.update(options)
+    return GeminiGateway(**settings)
+
+
+def gemini_down(contents, config):
+    raise RuntimeError("Gemini 연결 실패")
+
+
+def schema_sample(schema: type[BaseModel], **values) -> dict:
+    """schema의 모든 필드를 채운 응답 딕셔너리를 만듭니다. 숫자는 50, 문자열은 "<필드> 값"이고 values로 덮어씁니다."""
+    sample = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if typing.get_origin(annotation) is list:
+            sample[name] = [schema_sample(typing.get_args(annotation)[0])]
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            sample[name] = schema_sample(annotation)
+        elif annotation in (int, float):
+            sample[name] = 50
+        else:
+            sample[name] = f"{name} 값"
+    sample.update(values)
+    return sample
+
+
+def json_reply(sample: dict):
+    """json_response_config로 요청한 호출에는 sample을 JSON으로 돌려주는 respond 함수를 만듭니다."""
+    return lambda contents, config: json.dumps(sample, ensure_ascii=False)
+
+
+class ImmediateExecutor:
+    """submit()한 함수를 바로 실행하는 테스트용 실행기"""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@contextmanager
+def run_jobs_inline():
+    """
+    분석 작업을 일꾼 스레드 대신 테스트 스레드에서 바로 실행합니다.
+    ?stream=true 분석도 같은 실행기를 씁니다.
+    작업이 끝에 DB 연결을 닫으면 테스트 트랜잭션이 끊기므로 연결 정리도 막습니다.
+    submit_analysis_job()은 커밋 뒤에 작업을 넣으므로 captureOnCommitCallbacks(execute=True)와 함께 씁니다.
+    """
+    with mock.patch("analysis.jobs.get_analysis_executor", return_value=ImmediateExecutor()), \
+            mock.patch("analysis.jobs.connections"), \
+            mock.patch("analysis.streaming.get_analysis_executor", return_value=ImmediateExecutor()), \
+            mock.patch("analysis.streaming.connections"):
+        yield
+
+
+class AnalysisJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester")
+
+    def run_job(self, task, *args) -> AnalysisJob:
+        with run_jobs_inline(), self.captureOnCommitCallbacks(execute=True):
+            job = submit_analysis_job(self.user, "play", "chem", task, *args)
+        job.refresh_from_db()
+        return job
+
+    def test_job_records_result_id(self):
+        job = self.run_job(lambda value: value * 2, 21)
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result_id, 42)
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_analysis_failed_keeps_reason(self):
+        def task():
+            raise AnalysisFailed("선택하신 기간에 해당하는 대화 내용이 없습니다.")
+
+        job = self.run_job(task)
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error_message, "선택하신 기간에 해당하는 대화 내용이 없습니다.")
+        self.assertIsNone(job.result_id)
+
+    def test_unexpected_error_hides_details(self):
+        def task():
+            raise KeyError("secret")
+
+        with self.assertLogs("analysis.jobs", level="ERROR"):
+            job = self.run_job(task)
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error_message, "분석 중 오류가 발생했습니다.")
+
+    def test_job_is_queued_until_commit(self):
+        with run_jobs_inline(), self.captureOnCommitCallbacks(execute=False) as callbacks:
+            job = submit_analysis_job(self.user, "play", "chem", lambda: 1)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(AnalysisJob.objects.get(pk=job.pk).status, "queued")
+
+    def test_only_queued_jobs_run(self):
+        job = AnalysisJob.objects.create(user=self.user, target="play", kind="chem", status="failed")
+        task = mock.Mock(return_value=1)
+        with run_jobs_inline():
+            run_analysis_job(job.job_id, task)
+        task.assert_not_called()
+
+    def test_fail_interrupted_jobs(self):
+        old = AnalysisJob.objects.create(
+            user=self.user, target="play", kind="chem", status="running",
+            created_at=timezone.now() - timedelta(hours=1),
+        )
+        done = AnalysisJob.objects.create(
+            user=self.user, target="play", kind="chem", status="done",
+            created_at=timezone.now() - timedelta(hours=1),
+        )
+        new = AnalysisJob.objects.create(user=self.user, target="play", kind="chem")
+
+        self.assertEqual(fail_interrupted_jobs(timezone.now() - timedelta(minutes=1)), 1)
+        old.refresh_from_db()
+        self.assertEqual(old.status, "failed")
+        self.assertEqual(AnalysisJob.objects.get(pk=done.pk).status, "done")
+        self.assertEqual(AnalysisJob.objects.get(pk=new.pk).status, "queued")
+
+
+class AnalysisCacheTests(TestCase):
+    def key(self, chat_text="대화", option=None, version=1, model="gemini", **extra):
+        option = {"start": "처음부터", "end": "끝까지", "relationship": "친구"} if option is None else option
+        return analysis_cache_key("chem", chat_text, option, version, model, **extra)
+
+    def test_key_depends_on_text_options_version_and_model(self):
+        key = self.key()
+        self.assertEqual(key, self.key(option={"start": "2024-01-01", "end": "2024-01-31", "relationship": "친구"}))
+        self.assertNotEqual(key, self.key(chat_text="다른 대화"))
+        self.assertNotEqual(key, self.key(option={"relationship": "연인"}))
+        self.assertNotEqual(key, self.key(version=2))
+        self.assertNotEqual(key, self.key(model="gemini-pro"))
+        self.assertNotEqual(key, self.key(people_num=3))
+
+    def test_store_and_get(self):
+        key = self.key()
+        self.assertIsNone(get_cached_analysis(key))
+        store_cached_analysis(key, "chem", {"score_main": 80}, 1, "gemini")
+
+        self.assertEqual(get_cached_analysis(key), {"score_main": 80})
+        self.assertEqual(get_cached_analysis(key), {"score_main": 80})
+        self.assertEqual(AnalysisCache.objects.get(cache_key=key).hits, 2)
+
+    @override_settings(ANALYSIS_CACHE_TTL=60)
+    def test_expired_entry_is_dropped(self):
+        key = self.key()
+        store_cached_analysis(key, "chem", {"score_main": 80}, 1, "gemini")
+        AnalysisCache.objects.filter(cache_key=key).update(created_at=timezone.now() - timedelta(minutes=2))
+
+        self.assertIsNone(get_cached_analysis(key))
+        self.assertFalse(AnalysisCache.objects.exists())
+
+    @override_settings(ANALYSIS_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        keys = [self.key(chat_text=str(i)) for i in range(3)]
+        for i, key in enumerate(keys[:2]):
+            store_cached_analysis(key, "chem", {"i": i}, 1, "gemini")
+        get_cached_analysis(keys[0])
+        store_cached_analysis(keys[2], "chem", {"i": 2}, 1, "gemini")
+
+        self.assertEqual(set(AnalysisCache.objects.values_list("cache_key", flat=True)), {keys[0], keys[2]})
+        self.assertEqual(evict_analysis_cache(), 0)
+
+    @override_settings(ANALYSIS_CACHE_TTL=0)
+    def test_zero_ttl_disables_cache(self):
+        key = self.key()
+        store_cached_analysis(key, "chem", {"score_main": 80}, 1, "gemini")
+        self.assertFalse(AnalysisCache.objects.exists())
+        self.assertIsNone(get_cached_analysis(key))
+
+
+@override_settings(ANALYSIS_MAP_WORKERS=2)
+class MapReduceTests(SimpleTestCase):
+    prompt = f"대화를 분석해주세요.\n{CHAT_LOG_PLACEHOLDER}\n끝"
+
+    def setUp(self):
+        patch = mock.patch("analysis.gateway.get_gemini_gateway", return_value=unlimited_gateway())
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def respond(self, contents, config):
+        return "종합 결과" if "구간별 분석 결과" in contents[0] else f"부분 {contents[0].count('[김철수]')}"
+
+    @override_settings(ANALYSIS_TOKEN_BUDGET=1000)
+    def test_short_chat_is_one_call(self):
+        models = FakeGeminiModels(self.respond)
+        text = generate_chat_analysis(mock.Mock(models=models), "gemini", self.prompt, CHAT_TEXT)
+
+        self.assertEqual(text, "부분 3")
+        self.assertEqual(models.calls, [[self.prompt.replace(CHAT_LOG_PLACEHOLDER, CHAT_TEXT)]])
+
+    @override_settings(ANALYSIS_TOKEN_BUDGET=60)
+    def test_long_chat_is_split_and_reduced(self):
+        models = FakeGeminiModels(self.respond)
+        text = generate_chat_analysis(mock.Mock(models=models), "gemini", self.prompt, CHAT_TEXT)
+
+        self.assertEqual(text, "종합 결과")
+        *maps, reduce = [contents[0] for contents in models.calls]
+        self.assertGreater(len(maps), 1)
+        self.assertTrue(all(len(prompt.encode("utf-8")) <= 180 + len(self.prompt.encode("utf-8")) for prompt in maps))
+        # 구간들을 이어 붙이면 원래 대화가 됩니다.
+        chunks = [prompt.removeprefix("대화를 분석해주세요.\n").removesuffix("\n끝") for prompt in maps]
+        self.assertEqual("".join(sorted(chunks, key=CHAT_TEXT.index)), CHAT_TEXT)
+
+        self.assertIn(f"{len(maps)}개 구간", reduce)
+        self.assertIn("대화를 분석해주세요.", reduce)
+        self.assertNotIn(CHAT_LOG_PLACEHOLDER, reduce)
+        self.assertIn("### 구간 1 (메시지 ", reduce)
+        self.assertEqual(sum(int(line.split()[-1]) for line in reduce.splitlines() if line.startswith("부분 ")), 3)
+
+    @override_settings(ANALYSIS_TOKEN_BUDGET=60)
+    def test_failed_chunk_fails_analysis(self):
+        def respond(contents, config):
+            if "[박민수]" in contents[0] and "구간별" not in contents[0]:
+                raise RuntimeError("Gemini 연결 실패")
+            return "부분"
+
+        with self.assertRaisesMessage(RuntimeError, "Gemini 연결 실패"):
+            generate_chat_analysis(mock.Mock(models=FakeGeminiModels(respond)), "gemini", self.prompt, CHAT_TEXT)
+
+
+class PartialJsonTests(SimpleTestCase):
+    def test_only_finished_fields_are_parsed(self):
+        text = '{"score": 80, "summary": "좋은 케미", "tips": ["먼저 연락하기", "자주 만나기"], "comment": "아직'
+        self.assertEqual(parse_partial_json(text), {
+            "score": 80, "summary": "좋은 케미", "tips": ["먼저 연락하기", "자주 만나기"],
+        })
+
+    def test_number_at_end_waits_for_next_character(self):
+        self.assertEqual(parse_partial_json('{"summary": "요약", "score": 8'), {"summary": "요약"})
+        self.assertEqual(parse_partial_json('{"summary": "요약", "score": 80,'), {"summary": "요약", "score": 80})
+
+    def test_unfinished_array_keeps_finished_items(self):
+        self.assertEqual(parse_partial_json('{"tips": ["하나", "둘", "셋'), {"tips": ["하나", "둘"]})
+
+    def test_whole_object_and_empty_text(self):
+        self.assertEqual(parse_partial_json('{"a": 1, "b": [2]}'), {"a": 1, "b": [2]})
+        self.assertEqual(parse_partial_json(""), {})
+        self.assertEqual(parse_partial_json("```json"), {})
+
+
+class StreamParsedSectionsTests(SimpleTestCase):
+    def test_only_new_or_changed_fields_are_sent(self):
+        sent = []
+        on_text = stream_parsed_sections(parse_partial_json, sent.append)
+        response = '{"score": 80, "summary": "", "tips": ["하나", "둘"], "comment": "끝"}'
+        for end in range(1, len(response) + 1):
+            on_text(response[:end])
+
+        self.assertEqual(sent, [{"score": 80}, {"tips": ["하나"]}, {"tips": ["하나", "둘"]}, {"comment": "끝"}])
+
+    def test_no_callback_means_no_streaming(self):
+        self.assertIsNone(stream_parsed_sections(parse_partial_json, None))
+
+
+class Sample(BaseModel):
+    score: int
+    summary: str
+    tips: list[str]
+
+
+class StructuredResponseTests(SimpleTestCase):
+    def test_valid_response(self):
+        result = parse_structured_response(Sample, '{"score": 80, "summary": "좋아요", "tips": ["하나"]}')
+        self.assertEqual(result, Sample(score=80, summary="좋아요", tips=["하나"]))
+
+    def test_missing_and_wrong_fields_are_named(self):
+        with self.assertRaises(StructuredResponseError) as caught:
+            parse_structured_response(Sample, '{"score": "높음", "tips": ["하나", 2]}')
+        self.assertEqual(caught.exception.fields, ["score", "summary", "tips.1"])
+        self.assertIn("score, summary, tips.1", str(caught.exception))
+
+    def test_not_json(self):
+        with self.assertRaises(StructuredResponseError) as caught:
+            parse_structured_response(Sample, "점수: 80")
+        self.assertEqual(caught.exception.fields, ["(전체)"])
+        self.assertIsInstance(caught.exception, ValueError)
+
+    def test_json_response_config(self):
+        config = json_response_config(Sample)
+        self.assertEqual(config.response_mime_type, "application/json")
+        self.assertIs(config.response_schema, Sample)
+
+
+@override_settings(GEMINI_MAX_CONNECTIONS=7, GEMINI_MAX_KEEPALIVE_CONNECTIONS=3, GEMINI_KEEPALIVE_EXPIRY=42)
+class GeminiClientTests(SimpleTestCase):
+    def setUp(self):
+        for patch in (
+            mock.patch.object(clients, "_client", None),
+            mock.patch.object(clients, "_async_clients", clients.weakref.WeakKeyDictionary()),
+            mock.patch.object(clients.genai, "Client", side_effect=lambda **kwargs: mock.Mock(kwargs=kwargs)),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_client_is_shared_in_process(self):
+        client = clients.get_gemini_client()
+        self.assertIs(clients.get_gemini_client(), client)
+        self.assertEqual(clients.genai.Client.call_count, 1)
+
+    def test_forked_process_gets_new_client(self):
+        client = clients.get_gemini_client()
+        with mock.patch.object(clients.os, "getpid", return_value=-1):
+            self.assertIsNot(clients.get_gemini_client(), client)
+
+    def test_pool_settings_are_applied(self):
+        limits = clients.create_gemini_client().kwargs["http_options"].client_args["limits"]
+        self.assertEqual(
+            (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry), (7, 3, 42),
+        )
+
+    def test_async_client_per_event_loop(self):
+        async def get_twice():
+            return clients.get_gemini_async_client(), clients.get_gemini_async_client()
+
+        first, again = asyncio.run(get_twice())
+        second, _ = asyncio.run(get_twice())
+        self.assertIs(first, again)
+        self.assertIsNot(first, second)
+
+
+def api_error(code: int) -> errors.APIError:
+    return errors.APIError(code, {"error": {"message": "오류", "status": str(code)}})
+
+
+class Flaky:
+    """errors를 차례로 던지고, 다 던진 뒤에는 "응답"을 반환하는 가짜 호출입니다."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "응답"
+
+
+class GeminiGatewayTests(SimpleTestCase):
+    def test_retryable_errors(self):
+        self.assertTrue(is_retryable_error(api_error(429)))
+        self.assertTrue(is_retryable_error(api_error(503)))
+        self.assertTrue(is_retryable_error(httpx.ConnectTimeout("timeout")))
+        self.assertFalse(is_retryable_error(api_error(400)))
+        self.assertFalse(is_retryable_error(ValueError("bad")))
+
+    def test_transient_errors_are_retried(self):
+        gateway = unlimited_gateway(max_attempts=3)
+        fn = Flaky(api_error(503), api_error(429))
+
+        self.assertEqual(gateway.call(fn), "응답")
+        self.assertEqual(fn.calls, 3)
+        metrics = gateway.metrics()
+        self.assertEqual((metrics["calls"], metrics["retries"], metrics["failures"]), (1, 2, 0))
+        self.assertEqual((metrics["waiting"], metrics["in_flight"]), (0, 0))
+
+    def test_client_errors_are_not_retried(self):
+        gateway = unlimited_gateway(max_attempts=3)
+        fn = Flaky(api_error(400))
+
+        with self.assertRaises(errors.APIError):
+            gateway.call(fn)
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(gateway.metrics()["circuit"], "closed")
+
+    def test_circuit_opens_after_failures_and_probes_after_reset(self):
+        gateway = unlimited_gateway(failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with self.assertRaises(errors.APIError):
+                gateway.call(Flaky(api_error(503)))
+        self.assertEqual(gateway.metrics()["circuit"], "open")
+
+        fn = Flaky()
+        with self.assertRaises(GeminiUnavailable):
+            gateway.call(fn)
+        self.assertEqual(fn.calls, 0)
+        self.assertEqual(gateway.metrics()["rejected"], 1)
+
+        # reset_timeout이 지나면 시험 호출 하나를 보내고, 성공하면 다시 닫힙니다.
+        gateway.breaker.opened_at -= 60
+        self.assertEqual(gateway.call(fn), "응답")
+        self.assertEqual(gateway.metrics()["circuit"], "closed")
+
+    def test_failed_probe_opens_circuit_again(self):
+        gateway = unlimited_gateway(failure_threshold=1, reset_timeout=60)
+        with self.assertRaises(errors.APIError):
+            gateway.call(Flaky(api_error(503)))
+        gateway.breaker.opened_at -= 60
+
+        with self.assertRaises(errors.APIError):
+            gateway.call(Flaky(api_error(503)))
+        self.assertEqual(gateway.metrics()["circuit"], "open")
+
+    def test_full_slots_reject_after_queue_timeout(self):
+        gateway = unlimited_gateway(max_in_flight=1, queue_timeout=0)
+        gateway._acquire_slot()
+
+        with self.assertRaises(GeminiUnavailable):
+            gateway.call(Flaky())
+        self.assertEqual(gateway.metrics()["rejected"], 1)
+
+    def test_stream_retries_before_first_chunk(self):
+        gateway = unlimited_gateway(max_attempts=2)
+        attempts = []
+
+        def open_stream():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise api_error(503)
+            return iter(["가", "나"])
+
+        self.assertEqual(list(gateway.stream(open_stream)), ["가", "나"])
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(gateway.metrics()["in_flight"], 0)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=0.001, capacity=2)
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
+        self.assertLess(bucket.available(), 1)
+
+
+class GatewayMetricsViewTests(TestCase):
+    url = "/api/analysis/gateway/metrics/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_requires_login(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username="tester"))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_sees_metrics(self):
+        self.client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+        with mock.patch("analysis.views.get_gemini_gateway", return_value=unlimited_gateway()):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["circuit"], "closed")
+        self.assertEqual(response.data["calls"], 0)
+
+
+class ChatContextTests(TestCase):
+    def setUp(self):
+        patch = mock.patch("analysis.gateway.get_gemini_gateway", return_value=unlimited_gateway())
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.models = FakeGeminiModels(lambda contents, config: "응답")
+        self.client = mock.Mock(models=self.models)
+        self.client.caches.create.return_value = mock.Mock()
+        self.client.caches.create.return_value.name = "cachedContents/chat"
+
+    def test_same_text_is_registered_once(self):
+        key = register_chat_context(CHAT_TEXT, "gemini")
+        self.assertEqual(register_chat_context(CHAT_TEXT, "gemini"), key)
+        self.assertNotEqual(register_chat_context(CHAT_TEXT, "gemini-pro"), key)
+        self.assertNotEqual(register_chat_context(CHAT_TEXT + "\n", "gemini"), key)
+        self.assertEqual(ChatContext.objects.count(), 3)
+        self.assertEqual(get_chat_context(key).text, CHAT_TEXT)
+
+    def test_unknown_key(self):
+        self.assertIsNone(get_chat_context(""))
+        self.assertIsNone(get_chat_context("0" * 64))
+
+    @override_settings(CHAT_CONTEXT_TTL=60)
+    def test_unused_contexts_are_evicted(self):
+        old = register_chat_context("오래된 대화", "gemini")
+        ChatContext.objects.filter(context_key=old).update(last_used_at=timezone.now() - timedelta(minutes=2))
+        new = register_chat_context(CHAT_TEXT, "gemini")
+
+        self.assertIsNone(get_chat_context(old))
+        self.assertIsNotNone(get_chat_context(new))
+        self.assertEqual(evict_chat_contexts(), 0)
+
+    @override_settings(GEMINI_CONTEXT_CACHE_TTL=0)
+    def test_prefix_is_sent_without_provider_cache(self):
+        context = get_chat_context(register_chat_context(CHAT_TEXT, "gemini"))
+        generate_with_chat_context(self.client, context, "퀴즈를 만들어주세요")
+        generate_with_chat_context(self.client, context, "문제 하나 더")
+
+        self.client.caches.create.assert_not_called()
+        prefixes = {contents[0] for contents in self.models.calls}
+        self.assertEqual(len(prefixes), 1)
+        self.assertIn(CHAT_TEXT, prefixes.pop())
+        self.assertEqual([contents[1] for contents in self.models.calls], ["퀴즈를 만들어주세요", "문제 하나 더"])
+
+    @override_settings(GEMINI_CONTEXT_CACHE_TTL=3600, GEMINI_CONTEXT_CACHE_MIN_TOKENS=1)
+    def test_provider_cache_is_created_once(self):
+        key = register_chat_context(CHAT_TEXT, "gemini")
+        with mock.patch.object(self.models, "generate_content", wraps=self.models.generate_content) as generate:
+            generate_with_chat_context(self.client, get_chat_context(key), "퀴즈를 만들어주세요")
+            generate_with_chat_context(self.client, get_chat_context(key), "문제 하나 더")
+
+        self.client.caches.create.assert_called_once()
+        self.assertEqual(self.models.calls, [["퀴즈를 만들어주세요"], ["문제 하나 더"]])
+        self.assertEqual(generate.call_args.kwargs["config"].cached_content, "cachedContents/chat")
+        self.assertEqual(ChatContext.objects.get(context_key=key).cache_name, "cachedContents/chat")
+
+    @override_settings(GEMINI_CONTEXT_CACHE_TTL=3600, GEMINI_CONTEXT_CACHE_MIN_TOKENS=1)
+    def test_failed_cache_falls_back_to_prefix(self):
+        self.client.caches.create.side_effect = api_error(400)
+        key = register_chat_context(CHAT_TEXT, "gemini")
+        with self.assertLogs("analysis.context", level="WARNING"):
+            generate_with_chat_context(self.client, get_chat_context(key), "퀴즈를 만들어주세요")
+        generate_with_chat_context(self.client, get_chat_context(key), "문제 하나 더")
+
+        # 만들지 못한 캐시는 만료 시각까지 다시 만들지 않습니다.
+        self.client.caches.create.assert_called_once()
+        self.assertTrue(all(len(contents) == 2 for contents in self.models.calls))
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import GeminiGatewayMetricsView
+
+urlpatterns = [
+    path('gateway/metrics/', GeminiGatewayMetricsView.as_view()),
+]
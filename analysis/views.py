@@ -0,0 +1,34 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from .gateway import get_gemini_gateway
+
+
+# Gemini 호출 관문 상태 조회
+class GeminiGatewayMetricsView(APIView):
+    @swagger_auto_schema(
+        tags=["Analysis"],
+        operation_id="Gemini 호출 관문 상태 조회",
+        operation_description="이 프로세스에서 차례를 기다리는 호출 수(waiting), 진행 중인 호출 수(in_flight), "
+                              "누적 호출/재시도/실패/거절 횟수, 서킷 상태(closed, open, half_open)와 남은 토큰 수를 조회합니다. "
+                              "관리자만 조회할 수 있습니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER,
+                description="access token",
+                type=openapi.TYPE_STRING),
+        ],
+        responses={200: "Gateway metrics", 401: "Unauthorized", 403: "Forbidden"},
+    )
+    def get(self, request):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if not author.is_staff:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(get_gemini_gateway().metrics(), status=status.HTTP_200_OK)
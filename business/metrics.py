@@ -0,0 +1,132 @@
+import re
+
+import numpy as np
+
+from chatlog.sampling import THREAD_GAP_MINUTES
+from chatlog.stats import ChatMessages, find_in_bodies, reply_mask
+
+# 평균 답장 시간이 이 값(분)이면 응답 속도 점수가 50점입니다. 바로 답하면 100점이고 늦을수록 0점에 가까워집니다.
+RESPONSE_HALF_SCORE_MINUTES = 10
+# 정보 공유로 세는 메시지: 링크가 들어 있거나, 본문이 사진/동영상/파일 전송 표시로 시작하는 메시지
+SHARE_LINK = b"http"
+SHARE_ATTACHMENTS = tuple(word.encode("utf-8") for word in ("사진", "동영상", "파일: "))
+SHARE_PATTERN = re.compile(b"|".join(re.escape(term) for term in (SHARE_LINK, *SHARE_ATTACHMENTS)))
+
+# 기간별 분석 종류와 계산 방법. 모두 구간마다 같은 구간의 참여자 중 가장 많은 사람을 100점으로 둔 점수입니다. (응답 속도는 제외)
+# 개인별 점수(participation, infoshare, probsolve, proposal, resptime)도 같은 방법으로 기간 전체에 대해 매깁니다.
+# - 종합 참여 점수: 보낸 메시지 수
+# - 정보 공유: 링크, 사진, 동영상, 파일을 보낸 메시지 수
+# - 문제 해결 참여: 다른 사람의 메시지에 답한 횟수
+# - 주도적 제안: 대화를 시작한 횟수 (앞 메시지와 THREAD_GAP_MINUTES 이상 떨어진 메시지)
+# - 응답 속도: 그 구간의 평균 답장 시간으로 매긴 점수 (RESPONSE_HALF_SCORE_MINUTES 참고)
+PERIOD_TYPES = ("종합 참여 점수", "정보 공유", "문제 해결 참여", "주도적 제안", "응답 속도")
+
+
+def compute_contrib_metrics(messages: ChatMessages, periods: int) -> dict:
+    """
+    기여도 분석에서 세어서 구할 수 있는 값들을 계산합니다.
+    기간 안의 첫 메시지부터 마지막 메시지까지를 같은 길이의 시간 구간 periods개로 나누고,
+    (참여자, 구간)별 횟수를 np.bincount 한 번씩으로 셉니다.
+
+    Args:
+        messages (ChatMessages): load_chat_messages()의 결과
+        periods (int): 기간별 분석의 구간 수
+
+    Returns:
+        dict: 대화 주도자(leader), 평균 답장 시간(avg_resp, 분), 메시지 수(total_talks),
+              말수가 많은 순서의 참여자별 점수와 종합 순위(people),
+              참여자와 분석 종류마다 구간별 점수 목록(periodic_specs)
+              예: {"leader": "김철수", "avg_resp": 4, "total_talks": 1200,
+                   "people": [{"name": "김철수", "rank": 1, "participation": 100, "infoshare": 80, "probsolve": 95,
+                               "proposal": 60, "resptime": 71}, ...],
+                   "periodic_specs": [{"name": "김철수", "analysis_type": "종합 참여 점수", "periods": [100, 80, ...]}, ...]}
+    """
+    sender = messages.sender.astype(np.intp)
+    timestamp = messages.timestamp
+    people = len(messages.senders)
+    periods = max(int(periods), 1)
+    if not len(sender):
+        return {"leader": "", "avg_resp": 0, "total_talks": 0, "people": [], "periodic_specs": []}
+
+    span = int(timestamp[-1] - timestamp[0]) + 1
+    bucket = (timestamp - timestamp[0]) * periods // span
+
+    def grid(index, weights=None) -> np.ndarray:
+        # index 메시지들을 (보낸 사람, 구간) 칸에 세어 people × periods 배열로 만듭니다.
+        cells = sender[index] * periods + bucket[index]
+        return np.bincount(cells, weights=weights, minlength=people * periods).reshape(people, periods)
+
+    everyone = np.arange(len(sender))
+    replies = reply_mask(sender, timestamp)
+    reply_index = np.flatnonzero(replies) + 1
+    reply_gaps = np.diff(timestamp)[replies]
+    starts = np.ones(len(sender), dtype=bool)
+    starts[1:] = np.diff(timestamp) >= THREAD_GAP_MINUTES
+
+    message_grid = grid(everyone)
+    share_grid = grid(_shared_messages(messages))
+    reply_grid = grid(reply_index)
+    reply_minutes = grid(reply_index, reply_gaps)
+    start_grid = grid(np.flatnonzero(starts))
+    period_scores = dict(zip(PERIOD_TYPES, (
+        _relative(message_grid),
+        _relative(share_grid),
+        _relative(reply_grid),
+        _relative(start_grid),
+        _speed(reply_minutes, reply_grid),
+    )))
+
+    # 개인별 점수는 구간을 합친 한 열로 같은 계산을 합니다.
+    def total(values) -> np.ndarray:
+        return values.sum(axis=1, keepdims=True)
+
+    scores = {
+        "participation": _relative(total(message_grid))[:, 0],
+        "infoshare": _relative(total(share_grid))[:, 0],
+        "probsolve": _relative(total(reply_grid))[:, 0],
+        "proposal": _relative(total(start_grid))[:, 0],
+        "resptime": _speed(total(reply_minutes), total(reply_grid))[:, 0],
+    }
+    counts = message_grid.sum(axis=1)
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    # 종합 순위는 다섯 점수의 합이 큰 순서입니다.
+    ranked = sorted(order, key=lambda i: -sum(int(score[i]) for score in scores.values()))
+    rank = {int(i): position for position, i in enumerate(ranked, start=1)}
+    # 대화를 가장 많이 시작한 사람을 주도자로 봅니다. 같으면 말수가 많은 사람입니다.
+    leader = max(order, key=lambda i: (start_grid[i].sum(), counts[i]))
+
+    return {
+        "leader": messages.senders[leader],
+        "avg_resp": round(float(reply_gaps.mean())) if len(reply_gaps) else 0,
+        "total_talks": len(sender),
+        "people": [
+            {"name": messages.senders[i], "rank": rank[int(i)], **{key: int(score[i]) for key, score in scores.items()}}
+            for i in order
+        ],
+        "periodic_specs": [
+            {"name": messages.senders[i], "analysis_type": analysis_type, "periods": scores[i].tolist()}
+            for i in order
+            for analysis_type, scores in period_scores.items()
+        ],
+    }
+
+
+def _shared_messages(messages: ChatMessages) -> np.ndarray:
+    # 링크는 본문 어디에 있어도, 사진/동영상/파일은 본문이 그 표시로 시작할 때만 셉니다.
+    message, position, matched = find_in_bodies(messages, SHARE_PATTERN)
+    is_link = np.array([term == SHARE_LINK for term in matched], dtype=bool)
+    return np.unique(message[is_link | (position == 0)])
+
+
+def _relative(counts: np.ndarray) -> np.ndarray:
+    # 열(구간)마다 가장 큰 값을 100으로 두고 0~100 정수로 바꿉니다.
+    top = counts.max(axis=0, keepdims=True)
+    return np.rint(np.divide(100 * counts, top, out=np.zeros(counts.shape), where=top > 0)).astype(np.int64)
+
+
+def _speed(minutes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # 평균 답장 시간을 100 × H / (H + 평균)으로 바꿉니다. 답장이 없으면 0점입니다.
+    average = np.divide(minutes, counts, out=np.zeros(counts.shape), where=counts > 0)
+    score = 100 * RESPONSE_HALF_SCORE_MINUTES / (RESPONSE_HALF_SCORE_MINUTES + average)
+    return np.where(counts > 0, np.rint(score), 0).astype(np.int64)
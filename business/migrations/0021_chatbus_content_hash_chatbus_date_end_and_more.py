@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0020_resultbuscontribspecpersonal_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatbus',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='chatbus',
+            name='date_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatbus',
+            name='date_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatbus',
+            name='num_chat',
+            field=models.IntegerField(default=0),
+        ),
+    ]
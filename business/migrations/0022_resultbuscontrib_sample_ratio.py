@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0021_chatbus_content_hash_chatbus_date_end_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultbuscontrib',
+            name='sample_ratio',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0022_resultbuscontrib_sample_ratio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultbuscontribspecperiod',
+            name='periods',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -1,13 +1,21 @@
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from chatlog.storage import release_chat_blob
+
 # Create your models here.
 class ChatBus(models.Model):
     chat_id = models.AutoField(primary_key=True)
     title = models.TextField()
     file = models.FileField(upload_to='chat_files_business/')
     people_num = models.IntegerField()
+    num_chat = models.IntegerField(default=0)
+    date_start = models.DateField(null=True, blank=True)
+    date_end = models.DateField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
     uploaded_at = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     
@@ -23,6 +31,7 @@ class ResultBusContrib(models.Model):
     analysis_date_end = models.TextField(default="")
     created_at = models.DateTimeField(default=timezone.now)
     num_chat = models.IntegerField(default=0)
+    sample_ratio = models.FloatField(default=1.0)
     chat = models.ForeignKey(ChatBus, on_delete=models.SET_NULL, null=True, blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=None)
 
@@ -63,4 +72,12 @@ class ResultBusContribSpecPeriod(models.Model):
     period_3 = models.IntegerField(default=0)
     period_4 = models.IntegerField(default=0)
     period_5 = models.IntegerField(default=0)
-    period_6 = models.IntegerField(default=0)
\ No newline at end of file
+    period_6 = models.IntegerField(default=0)
+    # 구간별 점수 전체 목록. 구간 수(CONTRIB_PERIODS 또는 요청의 periods)가 6이 아닐 수 있어 함께 저장합니다.
+    periods = models.JSONField(default=list)
+
+
+# 채팅이 삭제되면 공유 중인 채팅 파일(blob)의 참조 수를 내리고, 마지막 참조였다면 파일도 지운다
+@receiver(post_delete, sender=ChatBus)
+def release_chat_file(sender, instance, **kwargs):
+    release_chat_blob(instance.content_hash)
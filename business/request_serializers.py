@@ -3,11 +3,16 @@ from rest_framework import serializers
 class ChatUploadRequestSerializerBus(serializers.Serializer):
     file = serializers.FileField()
 
+class ChatChunkUploadRequestSerializerBus(serializers.Serializer):
+    file_name = serializers.CharField(required=False, allow_blank=True, default="")
+    size = serializers.IntegerField(required=False, min_value=1)
+
 class ChatAnalysisRequestSerializerBus(serializers.Serializer):
     project_type = serializers.CharField() 
     team_type = serializers.CharField()
     analysis_start = serializers.CharField()
     analysis_end = serializers.CharField()
+    periods = serializers.IntegerField(required=False, min_value=1, max_value=24)
 
 ###############################################################
 
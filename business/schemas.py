@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+
+# Gemini 기여도 분석 응답의 JSON 스키마.
+# response_schema로 넘겨 모델이 이 형식의 JSON만 출력하게 하고, 받은 응답은 같은 모델로 검증합니다.
+# 필드 이름은 결과 딕셔너리의 키와 같고, description은 프롬프트의 출력 형식 설명을 대신합니다.
+# 대화 주도자, 평균 응답 속도, 개인별 점수와 순위, 기간별 분석처럼 세어서 구하는 값은 business.metrics가 직접 계산하므로 받지 않습니다.
+
+
+class ContribSummary(BaseModel):
+    insights: str = Field(description="AI 생성 인사이트 (1~2 문장)")
+    recommendation: str = Field(description="AI 추천 솔루션 (1~2 문장)")
+
+
+class ContribPersonal(BaseModel):
+    name: str = Field(description="참여자 이름")
+    type: str = Field(description="담당자 유형: 주도형, 분석형, 아이디어형, 지원형, 관망형 중 하나")
+    analysis: str = Field(description="개인 분석 요약 (1 문장)")
+
+
+class ContribAnalysis(BaseModel):
+    summary_spec: ContribSummary = Field(description="전체 요약 분석")
+    personal_specs: list[ContribPersonal] = Field(description="참여자별 상세 분석")
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
+from analysis.models import AnalysisJob
+from chatlog.models import ChatUpload
 from .models import (
     ChatBus, 
     ResultBusContrib,
@@ -17,6 +19,16 @@ class ChatSerializerBus(ModelSerializer):
         model = ChatBus
         fields = "__all__"
 
+class ChatUploadSessionSerializerBus(ModelSerializer):
+    class Meta:
+        model = ChatUpload
+        fields = ["upload_id", "file_name", "size", "received", "created_at", "updated_at"]
+
+class AnalysisJobSerializerBus(ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ["job_id", "kind", "status", "result_id", "error_message", "created_at", "started_at", "finished_at"]
+
 class ContribResultSerializerBus(ModelSerializer):
     class Meta:
         model = ResultBusContrib
@@ -1,3 +1,160 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analysis.tests import fake_gemini, gemini_down, json_reply, run_jobs_inline, schema_sample, unlimited_gateway
+from chatlog.stats import load_chat_messages
+
+from .metrics import PERIOD_TYPES, compute_contrib_metrics
+from .models import ResultBusContrib, ResultBusContribSpecPeriod
+from .schemas import ContribAnalysis
+
+SAMPLE_CHAT = """멋사 운영진 님과 카카오톡 대화
+저장한 날짜 : 2024-01-10 00:00:00
+
+--------------- 2024년 1월 3일 수요일 ---------------
+[김철수] [오전 10:00] 이번 주 회의 안건 정리해서 올릴게요
+[이영희] [오전 10:02] 네 좋아요. 디자인 시안은 제가 공유할게요
+[박민수] [오전 10:30] 배포 스크립트에 버그가 있어서 고쳤습니다
+--------------- 2024년 1월 5일 금요일 ---------------
+[이영희] [오후 2:00] 시안 공유드려요 https://example.com/design
+[김철수] [오후 2:05] 확인했습니다. 회의 때 같이 봐요
+[박민수] [오후 3:10] 테스트 서버 다시 띄웠어요
+--------------- 2024년 1월 8일 월요일 ---------------
+[김철수] [오전 9:00] 다음 스프린트 일정 제안드립니다
+[박민수] [오전 9:20] 좋아요
+"""
+
+CONTRIB_OPTION = {"project_type": "개발", "team_type": "동아리", "analysis_start": "처음부터", "analysis_end": "끝까지"}
+
+
+@override_settings(GEMINI_CONTEXT_CACHE_TTL=0)
+class BusinessAPITestCase(TestCase):
+    """
+    업로드 파일을 임시 MEDIA_ROOT에 저장하고, 로그인한 APIClient로 요청하는 테스트의 기본 클래스
+    Gemini 호출은 테스트마다 새로 만든 한도 없는 호출 관문을 거칩니다.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        gateway = mock.patch("analysis.gateway.get_gemini_gateway", return_value=unlimited_gateway())
+        gateway.start()
+        self.addCleanup(gateway.stop)
+
+        self.user = User.objects.create_user(username="tester")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_chat(self, text: str = SAMPLE_CHAT):
+        file = SimpleUploadedFile("chat.txt", text.encode("utf-8"))
+        response = self.client.post("/api/business/chat/", {"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["chat_id"]
+
+
+class ContribAnalysisFailureTests(BusinessAPITestCase):
+    def setUp(self):
+        super().setUp()
+        _, patch = fake_gemini("business.views", gemini_down)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.url = f"/api/business/chat/{self.upload_chat()}/analyze/contrib/"
+
+    def test_sync_analysis_returns_500_without_result(self):
+        response = self.client.post(self.url, CONTRIB_OPTION, format="json")
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.data["detail"], "기여도 상세 분석 중 오류가 발생했습니다.")
+        self.assertFalse(ResultBusContrib.objects.exists())
+
+    def test_async_analysis_job_fails_with_reason(self):
+        with run_jobs_inline(), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{self.url}?async=true", CONTRIB_OPTION, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = self.client.get(f"/api/business/analysis/jobs/{response.data['job_id']}/").data
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error_message"], "기여도 상세 분석 중 오류가 발생했습니다.")
+        self.assertFalse(ResultBusContrib.objects.exists())
+
+    def test_empty_period_fails(self):
+        option = {**CONTRIB_OPTION, "analysis_start": "2000-01-01", "analysis_end": "2000-01-31"}
+        response = self.client.post(self.url, option, format="json")
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(ResultBusContrib.objects.exists())
+
+
+class ContribMetricsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "chat.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_CHAT)
+
+    def metrics(self, periods: int = 3, **option) -> dict:
+        option = {"start": "처음부터", "end": "끝까지", **option}
+        return compute_contrib_metrics(load_chat_messages(self.path, option), periods)
+
+    def test_people_scores_and_rank(self):
+        metrics = self.metrics()
+
+        self.assertEqual(metrics["leader"], "김철수")
+        self.assertEqual(metrics["avg_resp"], 24)
+        self.assertEqual(metrics["total_talks"], 8)
+        self.assertEqual(metrics["people"], [
+            {"name": "김철수", "rank": 2, "participation": 100, "infoshare": 0, "probsolve": 33, "proposal": 100, "resptime": 67},
+            {"name": "박민수", "rank": 3, "participation": 100, "infoshare": 0, "probsolve": 100, "proposal": 50, "resptime": 21},
+            {"name": "이영희", "rank": 1, "participation": 67, "infoshare": 100, "probsolve": 33, "proposal": 50, "resptime": 83},
+        ])
+
+    def test_periodic_specs(self):
+        specs = {(spec["name"], spec["analysis_type"]): spec["periods"] for spec in self.metrics()["periodic_specs"]}
+
+        self.assertEqual(len(specs), 3 * len(PERIOD_TYPES))
+        self.assertEqual(specs["김철수", "종합 참여 점수"], [100, 100, 100])
+        self.assertEqual(specs["이영희", "종합 참여 점수"], [100, 100, 0])
+        self.assertEqual(specs["이영희", "정보 공유"], [0, 100, 0])
+        self.assertTrue(all(len(periods) == 3 for periods in specs.values()))
+
+    def test_period_count_and_empty_period(self):
+        self.assertTrue(all(len(spec["periods"]) == 8 for spec in self.metrics(8)["periodic_specs"]))
+        self.assertTrue(all(len(spec["periods"]) == 1 for spec in self.metrics(0)["periodic_specs"]))
+        self.assertEqual(
+            self.metrics(start="2000-01-01", end="2000-01-02"),
+            {"leader": "", "avg_resp": 0, "total_talks": 0, "people": [], "periodic_specs": []},
+        )
+
+
+class ContribPeriodsTests(BusinessAPITestCase):
+    def test_requested_periods_are_stored(self):
+        _, patch = fake_gemini("business.views", json_reply(schema_sample(ContribAnalysis)))
+        chat_id = self.upload_chat()
+        with patch:
+            response = self.client.post(
+                f"/api/business/chat/{chat_id}/analyze/contrib/", {**CONTRIB_OPTION, "periods": 8}, format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        detail = self.client.get(f"/api/business/analysis/{response.data['result_id']}/detail/").data
+        self.assertEqual(len(detail["spec_period"]), 3 * len(PERIOD_TYPES))
+        self.assertTrue(all(len(period["periods"]) == 8 for period in detail["spec_period"]))
+        period = ResultBusContribSpecPeriod.objects.filter(name="김철수", analysis="종합 참여 점수").get()
+        self.assertEqual([period.period_1, period.period_6], period.periods[:1] + period.periods[5:6])
+
+    def test_invalid_periods_are_rejected(self):
+        chat_id = self.upload_chat()
+        response = self.client.post(
+            f"/api/business/chat/{chat_id}/analyze/contrib/", {**CONTRIB_OPTION, "periods": 0}, format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
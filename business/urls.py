@@ -2,8 +2,12 @@ from django.urls import path
 from .views import (
     BusChatView, 
     BusChatDetailView, 
+    BusChatUploadView,
+    BusChatUploadDetailView,
+    BusChatUploadCompleteView,
     BusChatContribAnalyzeView, 
     BusResultAllView, 
+    BusAnalysisJobDetailView,
     BusContribResultDetailView,
     GenerateUUIDView,
     UuidToTypeView,
@@ -14,9 +18,13 @@ app_name = 'business'
 
 urlpatterns = [
     path('chat/', BusChatView.as_view()),
+    path('chat/uploads/', BusChatUploadView.as_view()),
+    path('chat/uploads/<uuid:upload_id>/', BusChatUploadDetailView.as_view()),
+    path('chat/uploads/<uuid:upload_id>/complete/', BusChatUploadCompleteView.as_view()),
     path('chat/<int:chat_id>/delete/', BusChatDetailView.as_view()),  
     path('chat/<int:chat_id>/analyze/contrib/', BusChatContribAnalyzeView.as_view()),  
     path('analysis/all/', BusResultAllView.as_view()),  
+    path('analysis/jobs/<uuid:job_id>/', BusAnalysisJobDetailView.as_view()),
     path('analysis/<int:result_id>/detail/', BusContribResultDetailView.as_view()),  
     path('analysis/<uuid:uuid>/detail/', BusContribResultDetailGuestView.as_view()),
     
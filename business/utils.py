@@ -1,157 +1,70 @@
-import re
 from google import genai
 # import settings  # 실제 환경에서는 API 키를 포함한 settings 모듈을 임포트해야 합니다.
 from .models import ChatBus
 from django.conf import settings
-from datetime import datetime, date
-
-def extract_chat_title(path: str) -> str:
-    """
-    텍스트 파일 path의 첫 줄에서
-    “~님과” 앞부분만 가져옵니다.
-    """
-    with open(path, "r", encoding="utf-8") as f:
-        first_line = (
-            f.readline().strip()
-        )  # ex: "🦁멋사 13기 잡담방🦁 님과 카카오톡 대화"
-
-    # '(.*?)' : 가능한 한 짧게 매칭, '님과' 앞까지 캡쳐
-    match = re.match(r"^(.*?)\s*님과", first_line)
-    if match:
-        return match.group(1)
-    else:
-        # “님과” 패턴이 없으면 줄 전체를 리턴하거나 빈 문자열
-        return first_line
-
-def count_chat_participants(file_path: str) -> int:
-    """
-    채팅 파일(.txt)을 읽어 참여자 수를 계산하는 함수입니다.
-
-    Args:
-        file_path (str): 분석할 채팅 파일의 경로
-
-    Returns:
-        int: 중복을 제외한 총 참여자 수
-    """
-    participants = set()  # 중복을 허용하지 않는 set 자료구조 사용
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # 정규 표현식을 사용하여 '[이름]' 형식을 찾습니다.
-                match = re.match(r'\[(.*?)\]', line)
-                if match:
-                    # 찾은 이름(괄호 안의 내용)을 set에 추가합니다.
-                    participants.add(match.group(1))
-    except FileNotFoundError:
-        return "파일을 찾을 수 없습니다. 경로를 확인해주세요."
-    except Exception as e:
-        return f"파일을 읽는 중 오류가 발생했습니다: {e}"
-
-    return len(participants)
-    
-def parse_response(pattern, text, is_int=False):
-    match = re.search(pattern, text)
-    if not match:
-        return 0 if is_int else ""
-    
-    value = match.group(1).strip()
-    value = strip_helper(value)
-    return int(value) if is_int else value
-
-def filter_chat_by_date(lines: list, analysis_option: dict) -> tuple[list, int]:
-    """
-    채팅 로그(lines)를 사용자가 지정한 기간(analysis_option)으로 필터링하고,
-    필터링된 라인의 수를 함께 반환합니다.
-
-    Args:
-        lines (list): 전체 채팅 로그 리스트
-        analysis_option (dict): 시작일과 종료일이 담긴 딕셔너리
-
-    Returns:
-        tuple: (필터링된 채팅 로그 리스트, 필터링된 라인 수)
-    """
-    start_option = analysis_option.get("start")
-    end_option = analysis_option.get("end")
-
-    # analysis_option의 날짜 형식이 'YYYY-MM-DD' 문자열이라고 가정합니다.
-    # 만약 datetime.date 객체라면 .strptime() 부분을 제거해야 합니다.
-    start_date = None if start_option == "처음부터" else datetime.strptime(start_option, "%Y-%m-%d").date()
-    end_date = None if end_option == "끝까지" else datetime.strptime(end_option, "%Y-%m-%d").date()
-
-    filtered_lines = []
-    current_date = None
-    date_pattern = re.compile(r"--------------- (\d{4}년 \d{1,2}월 \d{1,2}일)")
-
-    for line in lines:
-        date_match = date_pattern.search(line)
-        if date_match:
-            date_str = date_match.group(1)
-            current_date = datetime.strptime(date_str, "%Y년 %m월 %d일").date()
-        
-        if not current_date:
-            continue
-        
-        is_after_start = start_date is None or current_date >= start_date
-        is_before_end = end_date is None or current_date <= end_date
-
-        if is_after_start and is_before_end:
-            filtered_lines.append(line)
-
-    # 필터링된 라인 리스트와 그 길이를 튜플로 반환
-    return filtered_lines, len(filtered_lines)
-
-def strip_helper(cleaned_text: str) -> str:
-    """
-    문자열에서 불필요한 부분들을 제거합니다.
-    1. 앞뒤의 마크다운 코드 블록(```)
-    2. 대괄호([])와 그 안의 내용 (이름, 시간 등)
-    3. 앞뒤의 불필요한 기호(따옴표, 공백 등)
-    """
-    # 1. '```json', '```' 등 코드 블록 제거
-    # cleaned_text = re.sub(r'^```[\w]*\n', '', cleaned_text)
-    # cleaned_text = re.sub(r'\n```$', '', cleaned_text)
-
-    # 2. [사람 이름] [시간] 이 연속된 헤더가 있을 경우 제거
-    cleaned_text = re.sub(r'^\[.*?\]\s*\[.*?\]\s*', '', cleaned_text)
-
-    # 3. 양 끝에 남은 공백, 백틱(`)을 모두 제거
-    chars_to_strip = "` "
-    previous_text = ""
-    while cleaned_text != previous_text:
-        previous_text = cleaned_text
-        cleaned_text = cleaned_text.strip(chars_to_strip)
-
-    # 4. (선택) 여러 개의 공백을 하나로 합치기
-    # cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
-
-    return cleaned_text
-
-
-def contrib_analysis_with_gemini(client: genai.Client, chat: ChatBus, analysis_option: dict) -> dict:
+from chatlog.aliases import SpeakerAliases
+from chatlog.sampling import sample_chat_by_date
+from chatlog.stats import compute_chat_stats, find_person_stats, format_chat_stats, load_chat_messages
+from analysis.cache import analysis_cache_key, get_cached_analysis, store_cached_analysis
+from analysis.mapreduce import CHAT_LOG_PLACEHOLDER, generate_chat_analysis
+from analysis.streaming import stream_parsed_sections
+from analysis.structured import json_response_config, parse_partial_json, parse_structured_response
+from .metrics import compute_contrib_metrics
+from .schemas import ContribAnalysis
+
+# 분석에 쓰는 Gemini 모델과 프롬프트 버전.
+# 프롬프트나 응답 파싱을 바꾸면 버전을 올려서 이전 프롬프트로 만든 캐시 결과를 쓰지 않게 합니다.
+GEMINI_MODEL = "gemini-2.0-flash"
+CONTRIB_PROMPT_VERSION = 5
+
+
+def contrib_analysis_with_gemini(client: genai.Client, chat: ChatBus, analysis_option: dict, use_cache: bool = True, on_partial=None) -> dict:
     """
     Gemini API를 사용해 채팅 참여자들의 기여도를 분석합니다.
 
     Args:
         chat (ChatBus): 분석할 채팅 객체
         client (genai.Client): Gemini API 클라이언트
-        analysis_option (dict): 분석 옵션
+        analysis_option (dict): 분석 옵션. periods는 기간별 분석의 구간 수입니다. (없으면 CONTRIB_PERIODS)
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): 주어지면 응답을 스트리밍으로 받고, 새로 파싱된 항목 딕셔너리를 받을 때마다 넘깁니다.
 
     Returns:
         dict: 모든 분석 항목을 포함하는 종합 결과 딕셔너리.
     """
     try:
-        file_path = chat.file.path
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        chat_content_sample, num_chat, _, sample_ratio = sample_chat_by_date(chat.file.path, analysis_option)
 
-        filtered_lines, num_chat = filter_chat_by_date(lines, analysis_option)
-
-        if not filtered_lines:
+        if not num_chat:
             return {"error_message": "선택하신 기간에 해당하는 대화 내용이 없습니다."}
 
-        chat_content_sample = "".join(filtered_lines) 
-        analysis_size = len(filtered_lines)
+        # 같은 대화 구간을 같은 옵션으로 분석한 결과가 있으면 Gemini를 다시 부르지 않습니다.
+        periods = analysis_option.get("periods") or settings.CONTRIB_PERIODS
+        cache_key = analysis_cache_key(
+            "contrib", chat_content_sample, analysis_option, CONTRIB_PROMPT_VERSION, GEMINI_MODEL, periods=periods,
+        )
+        if use_cache and (cached := get_cached_analysis(cache_key)) is not None:
+            if on_partial:
+                on_partial(cached)
+            return cached
+
+        # 주도자, 응답 속도, 개인별 점수와 순위, 기간별 분석은 기간 전체의 메시지를 세어 직접 계산하고 바로 넘깁니다.
+        # Gemini에는 이 값들을 사실로 주고, 담당자 유형과 글로 쓰는 분석만 맡깁니다.
+        messages = load_chat_messages(chat.file.path, analysis_option)
+        stats = compute_chat_stats(messages)
+        metrics = compute_contrib_metrics(messages, periods)
+        local_fields = {
+            "summary_spec": {
+                "leader": metrics["leader"],
+                "avg_resp": metrics["avg_resp"],
+                "total_talks": metrics["total_talks"],
+            },
+            "periodic_specs": metrics["periodic_specs"],
+        }
+        if on_partial:
+            on_partial(local_fields)
+        # 대화와 통계의 참여자 이름은 별칭(P1, P2, …)으로 바꿔 보내고, 응답의 별칭은 원래 이름으로 되돌립니다.
+        aliases = SpeakerAliases.for_chat(chat_content_sample, [person["name"] for person in metrics["people"]])
 
         project_type = analysis_option.get("project_type", "지정되지 않음")
         team_type = analysis_option.get("team_type", "지정되지 않음")
@@ -165,173 +78,88 @@ def contrib_analysis_with_gemini(client: genai.Client, chat: ChatBus, analysis_o
         - 프로젝트 종류: {project_type}
         - 팀 종류: {team_type}
 
+        [대화 통계]
+        아래 값은 기간 안의 전체 대화에서 직접 계산한 정확한 값입니다. 수치를 다시 추정하지 말고 분석의 근거로 활용해주세요.
+        {format_chat_stats(aliases.alias(stats))}
+        - 대화 주도자(대화를 가장 많이 시작한 사람): {aliases.alias(metrics["leader"])}
+        - 참여자별 종합 순위와 점수 (참여도 / 정보 공유 / 문제 해결 / 의견 제시 / 응답 속도, 0~100):
+        {_format_contrib_people(aliases.alias(metrics["people"]))}
+        {aliases.note}
+
         [분석 요청 항목]
         1.  **전체 요약 분석 (Overall Spec)**
-            -   `대화 주도자`: 전체 대화의 흐름을 가장 많이 이끈 사람의 이름.
-            -   `평균 응답 속도`: 전체 대화의 평균 응답 속도를 '분' 단위로 추정.
             -   `AI 생성 인사이트`: 대화에서 발견된 팀의 협업 특징, 강점, 약점에 대한 1-2 문장의 인사이트.
             -   `AI 추천 솔루션`: 발견된 문제점이나 협업 방식 개선을 위한 1-2 문장의 구체적인 솔루션.
 
-        2.  **기간별 분석 (Periodic Analysis)**
-            -   전체 대화를 시간 순서에 따라 6개의 구간으로 동일하게 나눕니다.
-            -   각 참여자별로 6개 구간에서의 점수(0~100)를 (1)종합 참여 점수, (2)정보 공유 점수, (3)문제 해결 참여 점수, (4)주도적 제안 점수, (5)응답 속도 점수에 대해 각각 평가합니다.
-
-        3.  **개인별 상세 분석 (Personal Analysis)**
-            -   채팅에 참여한 모든 주요 인물을 찾아냅니다.
-            -   각 참여자에 대해 아래 7가지 항목을 0~100점 척도로 평가하고 순위를 매깁니다.
-                -   `참여도 점수 (participation)`: 메시지 빈도와 총량 기반.
-                -   `정보 공유 점수 (infoshare)`: 새로운 정보, 자료, 링크 공유 기여도.
-                -   `문제 해결 점수 (probsolve)`: 문제 상황에서 해결책이나 대안을 제시하는 기여도.
-                -   `의견/아이디어 제시 점수 (proposal)`: 새로운 아이디어나 의견을 제시하는 기여도.
-                -   `응답 속도 점수 (resptime)`: 다른 사람의 메시지에 얼마나 빠르고 적극적으로 반응하는지.
+        2.  **개인별 상세 분석 (Personal Analysis)**
+            -   [대화 통계]의 참여자마다, 이름을 그대로 적고 아래 2가지 항목을 작성합니다.
                 -   `개인 분석 요약 (analysis)`: 각 참여자의 기여도에 대한 1 문장 요약.
-                -   `담당자 유형 (type)`: 분석을 바탕으로 각 참여자를 '주도형', '분석형', '아이디어형', '지원형', '관망형' 중 하나로 분류.
-            -   모든 점수를 합산하여 `종합 순위 (rank)`를 매깁니다.
+                -   `담당자 유형 (type)`: 통계와 대화 내용을 바탕으로 각 참여자를 '주도형', '분석형', '아이디어형', '지원형', '관망형' 중 하나로 분류.
 
         --- [출력 형식] ---
-        결과는 반드시 아래 형식을 정확히 지켜서 작성해주세요.
-
-        [전체 요약 분석]
-        대화 주도자: [이름]
-        평균 응답 속도(분): [숫자]
-        AI 생성 인사이트: [1-2 문장]
-        AI 추천 솔루션: [1-2 문장]
-        ###
-        [기간별 분석]
-        ---
-        이름: [참여자 이름]
-        분석 종류: 종합 참여 점수
-        period_1: [숫자]
-        period_2: [숫자]
-        period_3: [숫자]
-        period_4: [숫자]
-        period_5: [숫자]
-        period_6: [숫자]
-        ---
-        이름: [참여자 이름]
-        분석 종류: 정보 공유
-        period_1: [숫자]
-        period_2: [숫자]
-        period_3: [숫자]
-        period_4: [숫자]
-        period_5: [숫자]
-        period_6: [숫자]
-        ---
-        이름: [참여자 이름]
-        분석 종류: 문제 해결 참여
-        period_1: [숫자]
-        period_2: [숫자]
-        period_3: [숫자]
-        period_4: [숫자]
-        period_5: [숫자]
-        period_6: [숫자]
-        ---
-        이름: [참여자 이름]
-        분석 종류: 주도적 제안
-        period_1: [숫자]
-        period_2: [숫자]
-        period_3: [숫자]
-        period_4: [숫자]
-        period_5: [숫자]
-        period_6: [숫자]
-        ---
-        이름: [참여자 이름]
-        분석 종류: 응답 속도
-        period_1: [숫자]
-        period_2: [숫자]
-        period_3: [숫자]
-        period_4: [숫자]
-        period_5: [숫자]
-        period_6: [숫자]
-        ---
-        (참여자 수만큼 반복)
-        ###
-        [개인별 상세 분석]
-        ---
-        이름: [참여자 이름]
-        종합 순위: [숫자]
-        담당자 유형: [유형]
-        참여도 점수: [숫자]
-        정보 공유 점수: [숫자]
-        문제 해결 점수: [숫자]
-        의견/아이디어 제시 점수: [숫자]
-        응답 속도 점수: [숫자]
-        개인 분석 요약: [1 문장]
-        ---
-        (참여자 수만큼 반복)
-        ###
+        지정된 JSON 스키마의 모든 필드를 채운 JSON 객체 하나로만 응답해주세요. 각 필드의 설명을 따르고, 다른 설명은 덧붙이지 마세요.
 
         --- [카카오톡 대화 내용] ---
-        {chat_content_sample}
+        {CHAT_LOG_PLACEHOLDER}
         --- [분석 시작] ---
         """
 
-        # --- 단일 API 호출 ---
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=[comprehensive_prompt]
+        # --- API 호출 ---
+        # 대화가 프롬프트 하나에 들어가지 않으면 구간별로 나눠 동시에 분석한 뒤 하나로 합칩니다.
+        # on_partial이 있으면 응답을 스트리밍으로 받으면서 새로 파싱되는 항목을 바로 넘깁니다.
+        response_text = generate_chat_analysis(
+            client, GEMINI_MODEL, comprehensive_prompt, aliases.alias_chat(chat_content_sample),
+            on_text=stream_parsed_sections(aliases.restoring(parse_partial_json), on_partial),
+            config=json_response_config(ContribAnalysis),
         )
-        response_text = response.text
 
-        # --- 결과 파싱 ---    
-        # 1. 전체 요약 분석 파싱 (Spec)
-        summary_spec_text = parse_response(r"\[전체 요약 분석\]\n([\s\S]*?)\n###", response_text)
-        summary_spec = {
-            "total_talks": analysis_size, # 분석 메시지 수
-            "leader": parse_response(r"대화 주도자:\s*(.+)", summary_spec_text),
-            "avg_resp": parse_response(r"평균 응답 속도\(분\):\s*(\d+)", summary_spec_text, is_int=True),
-            "insights": parse_response(r"AI 생성 인사이트:\s*(.+)", summary_spec_text),
-            "recommendation": parse_response(r"AI 추천 솔루션:\s*(.+)", summary_spec_text)
-        }
-
-        # 2. 기간별 분석 파싱 (Period)
-        periodic_text_block = parse_response(r"\[기간별 분석\]\n([\s\S]*?)\n###", response_text)
-        periodic_specs = []
-        if periodic_text_block:
-            person_blocks = periodic_text_block.split('---')
-            for block in person_blocks:
-                if not block.strip(): continue
-                periodic_specs.append({
-                    "name": parse_response(r"이름:\s*(.+)", block),
-                    "analysis_type": parse_response(r"분석 종류:\s*(.+)", block),
-                    "period_1": parse_response(r"period_1:\s*(\d+)", block, is_int=True),
-                    "period_2": parse_response(r"period_2:\s*(\d+)", block, is_int=True),
-                    "period_3": parse_response(r"period_3:\s*(\d+)", block, is_int=True),
-                    "period_4": parse_response(r"period_4:\s*(\d+)", block, is_int=True),
-                    "period_5": parse_response(r"period_5:\s*(\d+)", block, is_int=True),
-                    "period_6": parse_response(r"period_6:\s*(\d+)", block, is_int=True),
-                })
-
-        # 3. 개인별 상세 분석 파싱 (Personal)
-        personal_text_block = parse_response(r"\[개인별 상세 분석\]\n([\s\S]*?)\n###", response_text)
-        personal_specs = []
-        if personal_text_block:
-            person_blocks = personal_text_block.split('---')
-            for block in person_blocks:
-                if not block.strip(): continue
-                personal_specs.append({
-                    "name": parse_response(r"이름:\s*(.+)", block),
-                    "rank": parse_response(r"종합 순위:\s*(\d+)", block, is_int=True),
-                    "type": parse_response(r"담당자 유형:\s*(.+)", block),
-                    "participation": parse_response(r"참여도 점수:\s*(\d+)", block, is_int=True),
-                    "infoshare": parse_response(r"정보 공유 점수:\s*(\d+)", block, is_int=True),
-                    "probsolve": parse_response(r"문제 해결 점수:\s*(\d+)", block, is_int=True),
-                    "proposal": parse_response(r"의견/아이디어 제시 점수:\s*(\d+)", block, is_int=True),
-                    "resptime": parse_response(r"응답 속도 점수:\s*(\d+)", block, is_int=True),
-                    "analysis": parse_response(r"개인 분석 요약:\s*(.+)", block)
-                })
-            
-            # 최종 결과 조합
-            final_results = {
-                "summary_spec": summary_spec,
-                "periodic_specs": periodic_specs,
-                "personal_specs": personal_specs,
-            }
-
-            final_results["num_chat"] = num_chat
-            return final_results
+        # --- 결과 파싱 ---
+        final_results = aliases.restore(parse_contrib_response(response_text, num_chat))
+        # 점수, 순위, 기간별 분석은 직접 계산한 값이므로 Gemini가 개인별 분석을 비워 보내도 모든 참여자를 저장합니다.
+        # 다만 그런 결과는 캐시하지 않아 다음 요청에서 다시 분석하게 합니다.
+        analyses = final_results["personal_specs"]
+        final_results["summary_spec"].update(local_fields["summary_spec"])
+        final_results["periodic_specs"] = local_fields["periodic_specs"]
+        final_results["personal_specs"] = _merge_contrib_people(metrics, analyses)
+        final_results["num_chat"] = num_chat
+        final_results["sample_ratio"] = sample_ratio
+        if analyses:
+            store_cached_analysis(cache_key, "contrib", final_results, CONTRIB_PROMPT_VERSION, GEMINI_MODEL)
+        return final_results
 
     except Exception as e:
         print(f"Gemini로 기여도 상세 분석 중 에러 발생: {e}")
         # 함수 시그니처(-> dict)에 맞춰 에러 메시지를 딕셔너리로 반환
         return {"error_message": "기여도 상세 분석 중 오류가 발생했습니다."}
+
+def parse_contrib_response(response_text: str, num_chat: int) -> dict:
+    """기여도 분석 JSON 응답을 검증해 결과 딕셔너리로 바꿉니다. 빠진 항목이 있으면 StructuredResponseError가 발생합니다."""
+    results = parse_structured_response(ContribAnalysis, response_text).model_dump()
+    results["summary_spec"]["total_talks"] = num_chat # 분석 메시지 수
+    return results
+
+
+def _format_contrib_people(people: list) -> str:
+    return "\n".join(
+        f"  - {person['rank']}위 {person['name']}: {person['participation']} / {person['infoshare']} / "
+        f"{person['probsolve']} / {person['proposal']} / {person['resptime']}"
+        for person in sorted(people, key=lambda person: person["rank"])
+    )
+
+
+def _merge_contrib_people(metrics: dict, analyses: list) -> list:
+    # 직접 계산한 참여자별 점수와 순위에, Gemini가 쓴 담당자 유형과 개인 분석을 이름으로 찾아 붙입니다.
+    # Gemini가 빠뜨린 참여자도 점수는 그대로 저장합니다.
+    by_name = {}
+    for analysis in analyses:
+        person = find_person_stats(metrics, analysis.get("name", ""))
+        if person is not None:
+            by_name.setdefault(person["name"], analysis)
+    return [
+        {
+            **person,
+            "type": by_name.get(person["name"], {}).get("type", ""),
+            "analysis": by_name.get(person["name"], {}).get("analysis", ""),
+        }
+        for person in sorted(metrics["people"], key=lambda person: person["rank"])
+    ]
@@ -12,12 +12,15 @@ import uuid
 
 from .request_serializers import (
     ChatUploadRequestSerializerBus,
+    ChatChunkUploadRequestSerializerBus,
     ChatAnalysisRequestSerializerBus,
     UuidRequestSerializerBus,
 )
 from .serializers import (
     AnalyseResponseSerializerBus,
+    AnalysisJobSerializerBus,
     ChatSerializerBus,
+    ChatUploadSessionSerializerBus,
     ContribResultSerializerBus,
     ContribAllSerializerBus,
     ContribUuidSerializerBus,
@@ -36,12 +39,25 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django.utils import timezone
 
 import re
-from google import genai
-from django.conf import settings
+from django.db import transaction
+
+from analysis.cache import is_cache_bypassed
+from analysis.clients import get_gemini_client
+from analysis.jobs import AnalysisFailed, is_async_request, submit_analysis_job
+from analysis.streaming import analysis_event_stream, is_stream_request
+from analysis.models import AnalysisJob
+from chatlog.chunked import (
+    UploadOffsetMismatch,
+    append_chat_chunk,
+    complete_chat_upload,
+    discard_chat_upload,
+    start_chat_upload,
+)
+from chatlog.models import ChatUpload
+from chatlog.storage import acquire_chat_blob
+from chatlog.upload import UploadRejected, install_chat_upload_handler
 
 from .utils import(
-    extract_chat_title,
-    count_chat_participants,
     contrib_analysis_with_gemini,
 )
 
@@ -62,37 +78,41 @@ class BusChatView(APIView):
                 openapi.IN_FORM,
                 type=openapi.TYPE_FILE,
                 required=True,
-                description="업로드할 채팅 파일",
+                description="업로드할 채팅 파일 (.txt, 또는 .zip/.gz로 압축한 파일)",
             ),
         ],
-        responses={201: ChatSerializerBus, 400: "Bad Request", 401: "Unauthorized"},
+        responses={201: ChatSerializerBus, 400: "Bad Request", 401: "Unauthorized", 413: "Request Entity Too Large"},
     )
     def post(self, request):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED,)
+
+        # 파일을 받는 동안 제목, 참여자, 날짜 범위, 메시지 수, 해시를 함께 계산한다
+        upload_handler = install_chat_upload_handler(request)
         serializer = ChatUploadRequestSerializerBus(data=request.data)
+        if upload_handler.too_large:
+            return Response({"detail": upload_handler.error}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if upload_handler.error:
+            return Response({"detail": upload_handler.error}, status=status.HTTP_400_BAD_REQUEST)
+
         if serializer.is_valid():
             file = serializer.validated_data["file"]
-            author = request.user
-            
-            if not author.is_authenticated:
-                return Response(status=status.HTTP_401_UNAUTHORIZED,)
-
-            # DB에 먼저 저장해서 경로를 얻는다
-            chat = ChatBus.objects.create(
-                title="임시 제목",
-                file=file,
-                people_num=12,  # 임시 값
-                user=request.user,
-            )
-
-            # 파일 경로에서 제목 추출
-            file_path = chat.file.path
-            chat.title = extract_chat_title(file_path)
-
-            # 참여 인원 수를 Gemini API로 계산
-            num_of_people = count_chat_participants(file_path)
-            chat.people_num = num_of_people
-
-            chat.save()
+            index = file.chat_index
+
+            # 내용 해시로 파일을 저장하고(같은 파일이 이미 있으면 공유) 업로드 중에 계산한 정보로 DB에 저장
+            with transaction.atomic():
+                blob = acquire_chat_blob(file)
+                chat = ChatBus.objects.create(
+                    title=index.title,
+                    file=blob.file.name,
+                    people_num=index.people_num,
+                    num_chat=len(index),
+                    date_start=index.date_start,
+                    date_end=index.date_end,
+                    content_hash=blob.content_hash,
+                    user=author,
+                )
 
             response = ChatSerializerBus(chat)
 
@@ -128,6 +148,211 @@ class BusChatView(APIView):
 
 
 
+# 분할 업로드 시작
+class BusChatUploadView(APIView):
+    @swagger_auto_schema(
+        operation_id="채팅 파일 분할 업로드 시작",
+        operation_description="큰 채팅 파일을 여러 조각으로 나눠 올리기 위한 업로드 세션을 만듭니다. size는 전체 파일 크기(바이트)입니다.",
+        request_body=ChatChunkUploadRequestSerializerBus,
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={201: ChatUploadSessionSerializerBus, 400: "Bad Request", 401: "Unauthorized", 413: "Request Entity Too Large"},
+    )
+    def post(self, request):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        serializer = ChatChunkUploadRequestSerializerBus(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = start_chat_upload(
+                author,
+                "business",
+                file_name=serializer.validated_data["file_name"],
+                size=serializer.validated_data.get("size"),
+            )
+        except UploadRejected as e:
+            return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response(ChatUploadSessionSerializerBus(upload).data, status=status.HTTP_201_CREATED)
+
+
+# 분할 업로드 조각 전송, 진행 상황 조회, 업로드 취소
+class BusChatUploadDetailView(APIView):
+    @swagger_auto_schema(
+        operation_id="채팅 파일 분할 업로드 상태 조회",
+        operation_description="지금까지 받은 바이트 수(received)를 조회합니다. 연결이 끊겼다면 received부터 이어서 보내면 됩니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={200: ChatUploadSessionSerializerBus, 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def get(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="business")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(ChatUploadSessionSerializerBus(upload).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_id="채팅 파일 조각 전송",
+        operation_description="요청 본문(application/octet-stream)의 바이트를 offset 위치에 이어 붙입니다. "
+                              "offset이 받은 위치와 맞지 않으면 409와 함께 received를 돌려줍니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "offset",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                required=True,
+                description="이 조각의 시작 위치 (바이트)",
+            ),
+        ],
+        responses={200: ChatUploadSessionSerializerBus, 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 409: "Conflict", 413: "Request Entity Too Large"},
+    )
+    def put(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="business")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            offset = int(request.query_params.get("offset", ""))
+        except ValueError:
+            return Response({"detail": "offset이 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if offset < 0 or request.stream is None:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = append_chat_chunk(upload, offset, request.stream)
+        except UploadOffsetMismatch as e:
+            return Response({"detail": str(e), "received": e.received}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as e:
+            return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response(ChatUploadSessionSerializerBus(upload).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_id="채팅 파일 분할 업로드 취소",
+        operation_description="업로드 세션과 지금까지 받은 조각을 삭제합니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={204: "No Content", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def delete(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="business")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        discard_chat_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# 분할 업로드 완료 (채팅 생성)
+class BusChatUploadCompleteView(APIView):
+    @swagger_auto_schema(
+        operation_id="채팅 파일 분할 업로드 완료",
+        operation_description="받은 조각을 합쳐 채팅을 생성합니다. 전체 크기(size)만큼 받지 못했다면 409와 함께 received를 돌려줍니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={201: ChatSerializerBus, 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 409: "Conflict", 413: "Request Entity Too Large"},
+    )
+    def post(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="business")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        # 1. 받은 조각을 합치기 (텍스트 파일은 조각을 받으며 만든 인덱스를 그대로 사용)
+        try:
+            file = complete_chat_upload(upload)
+        except UploadOffsetMismatch as e:
+            return Response({"detail": "아직 받지 못한 조각이 있습니다.", "received": e.received}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as e:
+            if e.too_large:
+                return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return Response({"detail": e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. 내용 해시로 파일을 저장하고 채팅 생성
+        try:
+            index = file.chat_index
+            with transaction.atomic():
+                blob = acquire_chat_blob(file)
+                chat = ChatBus.objects.create(
+                    title=index.title,
+                    file=blob.file.name,
+                    people_num=index.people_num,
+                    num_chat=len(index),
+                    date_start=index.date_start,
+                    date_end=index.date_end,
+                    content_hash=blob.content_hash,
+                    user=author,
+                )
+        finally:
+            file.close()
+
+        # 3. 조각 파일 정리
+        discard_chat_upload(upload)
+
+        return Response(ChatSerializerBus(chat).data, status=status.HTTP_201_CREATED)
+
+
 class BusChatDetailView(APIView):
     @swagger_auto_schema(
         operation_id="특정 채팅 삭제",
@@ -305,6 +530,96 @@ class TypeResultIdToUuidView(APIView):
 ###################################################################
 
 
+def run_contrib_analysis(chat_id: int, analysis_option: dict, use_cache: bool = True, on_partial=None) -> int:
+    """
+    채팅 기여 분석을 실행하고 결과를 저장합니다.
+    요청 처리 중에 바로 호출되거나, ?async=true 요청이면 분석 작업 일꾼 스레드에서 실행됩니다.
+
+    Args:
+        chat_id (int): 분석할 ChatBus의 chat_id
+        analysis_option (dict): project_type, team_type, start, end, periods(기간별 분석의 구간 수, 없으면 CONTRIB_PERIODS)
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): ?stream=true 요청이면 새로 파싱된 항목 딕셔너리를 받을 함수
+
+    Returns:
+        int: 저장된 ResultBusContrib의 result_id
+    """
+    chat = ChatBus.objects.get(chat_id=chat_id)
+    author = chat.user
+    project_type = analysis_option["project_type"]
+    team_type = analysis_option["team_type"]
+    analysis_start = analysis_option["start"]
+    analysis_end = analysis_option["end"]
+
+    client = get_gemini_client()
+    contrib_results = contrib_analysis_with_gemini(client, chat, analysis_option, use_cache, on_partial)
+
+    result = ResultBusContrib.objects.create(
+        type=1,
+        title=chat.title,
+        people_num=chat.people_num,
+        is_saved=1,
+        project_type=project_type,
+        team_type=team_type,
+        analysis_date_start=analysis_start,
+        analysis_date_end=analysis_end,
+        chat=chat,
+        num_chat=contrib_results.get("num_chat", 0),
+        sample_ratio=contrib_results.get("sample_ratio", 1.0),
+        user=author,
+    )
+
+    if "error_message" in contrib_results:
+        result.delete()
+        raise AnalysisFailed(contrib_results["error_message"])
+
+    size = 5 if chat.people_num >= 5 else chat.people_num
+
+    # 1. 전체 요약 분석 결과 (Summary Spec) 저장
+    summary_data = contrib_results.get("summary_spec", {})
+    spec = ResultBusContribSpec.objects.create(
+        result=result,
+        total_talks=summary_data.get("total_talks", 0),
+        leader=summary_data.get("leader", "N/A"),
+        avg_resp=summary_data.get("avg_resp", 0),
+        insights=summary_data.get("insights", ""),
+        recommendation=summary_data.get("recommendation", ""),
+        analysis_size=len(contrib_results.get("personal_specs", [])),
+    )
+
+    # 2. 개인별 상세 분석 결과 (Personal Specs) 저장
+    personal_specs = contrib_results.get("personal_specs", [])
+    for person_data in personal_specs:
+        ResultBusContribSpecPersonal.objects.create(
+            spec=spec,
+            name=person_data.get("name", "N/A"),
+            rank=person_data.get("rank", 0),
+            type=person_data.get("type", ""),
+            participation=person_data.get("participation", 0),
+            infoshare=person_data.get("infoshare", 0),
+            probsolve=person_data.get("probsolve", 0),
+            proposal=person_data.get("proposal", 0),
+            resptime=person_data.get("resptime", 0),
+            analysis=person_data.get("analysis", ""),
+        )
+
+    # 3. 기간별 분석 결과 (Periodic Specs) 저장
+    # 구간 수는 요청마다 다를 수 있어 전체 점수 목록은 periods에 저장하고, 앞의 6개 구간은 period_1~6에도 채웁니다.
+    periodic_specs = contrib_results.get("periodic_specs", [])
+    ResultBusContribSpecPeriod.objects.bulk_create([
+        ResultBusContribSpecPeriod(
+            spec=spec,
+            name=period_data.get("name", "N/A"),
+            analysis=period_data.get("analysis_type", ""),
+            periods=period_data.get("periods", []),
+            **{f"period_{i}": score for i, score in enumerate(period_data.get("periods", [])[:6], start=1)},
+        )
+        for period_data in periodic_specs
+    ])
+
+    return result.result_id
+
+
 # 채팅 기여 분석
 class BusChatContribAnalyzeView(APIView):
     @swagger_auto_schema(
@@ -317,9 +632,26 @@ class BusChatContribAnalyzeView(APIView):
                 openapi.IN_HEADER, 
                 description="access token", 
                 type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "async",
+                openapi.IN_QUERY,
+                description="true면 분석 작업을 만들고 바로 202와 job_id를 응답합니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="true면 text/event-stream으로 응답합니다. 파싱되는 대로 section 이벤트를 보내고, 결과가 저장되면 done 이벤트로 result_id를 보냅니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "no_cache",
+                openapi.IN_QUERY,
+                description="true면 캐시된 분석 결과를 쓰지 않고 다시 분석합니다.",
+                type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             201: AnalyseResponseSerializerBus,
+            200: "text/event-stream (stream=true)",
+            202: AnalysisJobSerializerBus,
             404: "Not Found",
             400: "Bad Request",
             403: "Forbidden",  # If the user does not have permission to analyze the chat
@@ -354,73 +686,27 @@ class BusChatContribAnalyzeView(APIView):
             "team_type": team_type,
             "start": analysis_start,
             "end": analysis_end,
+            "periods": serializer.validated_data.get("periods"),
         }
 
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        contrib_results = contrib_analysis_with_gemini(client, chat, analysis_option)
-
-        result = ResultBusContrib.objects.create(
-            type=1,
-            title=chat.title,
-            people_num=chat.people_num,
-            is_saved=1,
-            project_type=project_type,
-            team_type=team_type,
-            analysis_date_start=analysis_start,
-            analysis_date_end=analysis_end,
-            chat=chat,
-            num_chat=contrib_results.get("num_chat", 0),
-            user=author,
-        )
-
-        size = 5 if chat.people_num >= 5 else chat.people_num
-
-        # 1. 전체 요약 분석 결과 (Summary Spec) 저장
-        summary_data = contrib_results.get("summary_spec", {})
-        spec = ResultBusContribSpec.objects.create(
-            result=result,
-            total_talks=summary_data.get("total_talks", 0),
-            leader=summary_data.get("leader", "N/A"),
-            avg_resp=summary_data.get("avg_resp", 0),
-            insights=summary_data.get("insights", ""),
-            recommendation=summary_data.get("recommendation", ""),
-            analysis_size=len(contrib_results.get("personal_specs", [])),
-        )
+        use_cache = not is_cache_bypassed(request)
+        if is_async_request(request):
+            job = submit_analysis_job(author, "business", "contrib", run_contrib_analysis, chat.chat_id, analysis_option, use_cache)
+            return Response(AnalysisJobSerializerBus(job).data, status=status.HTTP_202_ACCEPTED)
+        if is_stream_request(request):
+            return analysis_event_stream(run_contrib_analysis, chat.chat_id, analysis_option, use_cache)
 
-        # 2. 개인별 상세 분석 결과 (Personal Specs) 저장
-        personal_specs = contrib_results.get("personal_specs", [])
-        for person_data in personal_specs:
-            ResultBusContribSpecPersonal.objects.create(
-                spec=spec,
-                name=person_data.get("name", "N/A"),
-                rank=person_data.get("rank", 0),
-                type=person_data.get("type", ""),
-                participation=person_data.get("participation", 0),
-                infoshare=person_data.get("infoshare", 0),
-                probsolve=person_data.get("probsolve", 0),
-                proposal=person_data.get("proposal", 0),
-                resptime=person_data.get("resptime", 0),
-                analysis=person_data.get("analysis", ""),
+        try:
+            result_id = run_contrib_analysis(chat.chat_id, analysis_option, use_cache)
+        except AnalysisFailed as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        # 3. 기간별 분석 결과 (Periodic Specs) 저장
-        periodic_specs = contrib_results.get("periodic_specs", [])
-        for period_data in periodic_specs:
-            ResultBusContribSpecPeriod.objects.create(
-                spec=spec,
-                name=period_data.get("name", "N/A"),
-                analysis=period_data.get("analysis_type", ""), 
-                period_1=period_data.get("period_1", 0),
-                period_2=period_data.get("period_2", 0),
-                period_3=period_data.get("period_3", 0),
-                period_4=period_data.get("period_4", 0),
-                period_5=period_data.get("period_5", 0),
-                period_6=period_data.get("period_6", 0),
-            )
-        
         return Response(
             {
-                "result_id": result.result_id,
+                "result_id": result_id,
             },
             status=status.HTTP_201_CREATED,
         )
@@ -529,6 +815,37 @@ class BusContribResultDetailGuestView(APIView):
 
 
 
+# 분석 작업 상태 조회
+class BusAnalysisJobDetailView(APIView):
+    @swagger_auto_schema(
+        operation_id="분석 작업 상태 조회",
+        operation_description="?async=true 로 요청한 분석 작업의 상태(queued, running, done, failed)를 조회합니다. "
+                              "done이면 result_id로 분석 결과를 조회하고, failed면 error_message에 사유가 담깁니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={200: AnalysisJobSerializerBus, 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def get(self, request, job_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            job = AnalysisJob.objects.get(job_id=job_id, target="business")
+        except AnalysisJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if job.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(AnalysisJobSerializerBus(job).data, status=status.HTTP_200_OK)
+
+
 class BusResultAllView(APIView):
     @swagger_auto_schema(
         operation_id="모든 분석 결과 조회",
@@ -0,0 +1,114 @@
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+
+from .formats import DETECT_BYTES, detect_chat_format
+
+# 별칭은 P1, P2, … 입니다. 앞뒤에 영문자나 숫자가 붙은 "MP3", "P10"의 "P1" 같은 부분은 별칭으로 보지 않습니다.
+ALIAS_PREFIX = "P"
+ALIAS_PATTERN = re.compile(rf"(?<![A-Za-z0-9]){ALIAS_PREFIX}(\d+)(?![0-9])")
+# 이 글자 수보다 짧은 이름은 이미 짧으므로 별칭으로 바꾸지 않습니다.
+MIN_ALIAS_NAME_LENGTH = 2
+# 프롬프트에 넣는 별칭 안내
+ALIAS_NOTE = "대화 참여자의 이름은 P1, P2 같은 별칭으로 바꿔 두었습니다. 사람 이름을 적는 항목에는 별칭을 그대로 적어주세요."
+# compact_chat_text()가 만든 입장/퇴장 표시 줄: "(김철수 입장)"
+NOTICE_PATTERN = re.compile(r"^\((?P<name>.+?) (?:입장|퇴장)\)$", re.M)
+
+logger = logging.getLogger(__name__)
+
+
+class SpeakerAliases:
+    """
+    Gemini에 보내는 대화와 사실(통계) 속 참여자 이름을 짧은 별칭(P1, P2, …)으로 바꾸고,
+    응답을 파싱한 결과의 별칭을 다시 원래 이름으로 되돌립니다.
+
+    - 대화 문자열에서는 메시지 헤더의 보낸 사람 이름과 입장/퇴장 표시의 이름만 바꿉니다. 본문은 그대로 둡니다.
+    - 별칭은 names 순서(말수가 많은 순서)대로 P1부터 매깁니다.
+    - 대화에 이미 별칭처럼 생긴 낱말(예: "P1 버그")이 있으면 되돌릴 때 헷갈리므로 별칭을 쓰지 않습니다. (enabled가 False)
+    """
+
+    def __init__(self, names: list[str], enabled: bool = True):
+        names = [name for name in dict.fromkeys(names) if len(name.strip()) >= MIN_ALIAS_NAME_LENGTH]
+        self.enabled = enabled and bool(names)
+        self.aliases = {name: f"{ALIAS_PREFIX}{i}" for i, name in enumerate(names, start=1)} if self.enabled else {}
+        self.names = {alias: name for name, alias in self.aliases.items()}
+
+    @classmethod
+    def for_chat(cls, chat_text: str, names: list[str] = ()) -> "SpeakerAliases":
+        """
+        대화 문자열 chat_text에 쓸 별칭을 만듭니다.
+        names(말수가 많은 순서의 참여자 이름)를 먼저 매기고, 대화 헤더에만 나오는 이름은 나온 횟수 순서로 뒤에 붙입니다.
+        """
+        if ALIAS_PATTERN.search(chat_text):
+            logger.info("speaker aliasing skipped: chat text already contains alias-like tokens")
+            return cls([], enabled=False)
+        counts = Counter(match.group("name") for match in _header_pattern(chat_text).finditer(chat_text))
+        return cls([*names, *(name for name, _ in counts.most_common())])
+
+    @property
+    def note(self) -> str:
+        """프롬프트에 넣을 별칭 안내. 별칭을 쓰지 않으면 빈 문자열입니다."""
+        return ALIAS_NOTE if self.enabled else ""
+
+    def alias_chat(self, chat_text: str) -> str:
+        """대화 문자열의 메시지 헤더와 입장/퇴장 표시에 있는 참여자 이름을 별칭으로 바꿉니다."""
+        if not self.enabled:
+            return chat_text
+
+        def replace(match):
+            start, end = match.span("name")
+            name = match.group("name")
+            if name not in self.aliases:
+                return match.group()
+            offset = match.start()
+            whole = match.group()
+            return whole[:start - offset] + self.aliases[name] + whole[end - offset:]
+
+        chat_text = _header_pattern(chat_text).sub(replace, chat_text)
+        return NOTICE_PATTERN.sub(replace, chat_text)
+
+    def alias(self, value):
+        """
+        통계 딕셔너리, 리스트, namedtuple 안에서 참여자 이름과 똑같은 문자열 값을 별칭으로 바꾼 사본을 반환합니다.
+        format_chat_stats() 같은 함수에 넘겨 프롬프트의 사실 항목도 별칭으로 적게 합니다.
+        """
+        if not self.enabled:
+            return value
+        if isinstance(value, str):
+            return self.aliases.get(value, value)
+        if isinstance(value, dict):
+            return {key: self.alias(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.alias(item) for item in value]
+        if isinstance(value, tuple):
+            items = [self.alias(item) for item in value]
+            return type(value)(*items) if hasattr(value, "_fields") else tuple(items)
+        return value
+
+    def restore(self, value):
+        """파싱한 응답(딕셔너리, 리스트, 문자열) 안의 모든 별칭을 원래 이름으로 되돌린 사본을 반환합니다."""
+        if not self.enabled:
+            return value
+        if isinstance(value, str):
+            return ALIAS_PATTERN.sub(lambda match: self.names.get(match.group(), match.group()), value)
+        if isinstance(value, dict):
+            return {key: self.restore(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.restore(item) for item in value]
+        return value
+
+    def restoring(self, parse):
+        """parse(text)의 결과에서 별칭을 되돌리는 함수를 반환합니다. stream_parsed_sections()에 파싱 함수로 넘깁니다."""
+        return lambda text: self.restore(parse(text))
+
+
+def _header_pattern(chat_text: str) -> re.Pattern:
+    # 대화의 내보내기 형식에서 메시지 첫 줄 패턴을 문자열용으로 다시 컴파일합니다. (ChatFormat의 패턴은 bytes용)
+    chat_format = detect_chat_format(chat_text[:DETECT_BYTES].encode("utf-8"))
+    return _compile_header(chat_format.message_pattern.pattern)
+
+
+@lru_cache(maxsize=None)
+def _compile_header(pattern: bytes) -> re.Pattern:
+    return re.compile(pattern.decode("utf-8"), re.M)
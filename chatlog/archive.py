@@ -0,0 +1,174 @@
+import struct
+import zlib
+
+# 한 번에 풀어내는 최대 크기. 압축 폭탄이 청크 하나로 메모리를 채우지 못하도록 제한합니다.
+DECODE_STEP = 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+ZIP_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_FLAG_ENCRYPTED = 0x1
+ZIP_FLAG_DATA_DESCRIPTOR = 0x8
+
+
+class ArchiveError(ValueError):
+    """업로드된 압축 파일을 읽을 수 없을 때 발생합니다."""
+
+
+class PlainDecoder:
+    """압축되지 않은 채팅 파일: 받은 그대로 돌려줍니다."""
+
+    def feed(self, data: bytes):
+        if data:
+            yield data
+
+    def finish(self) -> None:
+        pass
+
+
+class GzipDecoder:
+    """
+    .gz 업로드를 받는 대로 풉니다.
+    여러 gzip 멤버가 이어 붙은 파일(블록 압축 파일 포함)도 처리합니다.
+    """
+
+    def __init__(self):
+        self._inflater = zlib.decompressobj(wbits=31)
+        self._in_member = False
+
+    def feed(self, data: bytes):
+        while data:
+            self._in_member = True
+            chunk = self._inflater.decompress(data, DECODE_STEP)
+            data = self._inflater.unconsumed_tail
+            if chunk:
+                yield chunk
+            if self._inflater.eof:
+                data = self._inflater.unused_data + data
+                self._inflater = zlib.decompressobj(wbits=31)
+                self._in_member = False
+
+    def finish(self) -> None:
+        if self._in_member:
+            raise ArchiveError("gzip 파일이 중간에 잘렸습니다.")
+
+
+class ZipDecoder:
+    """
+    .zip 업로드를 받는 대로 풉니다.
+
+    중앙 디렉터리(파일 끝)를 기다리지 않고 로컬 파일 헤더를 순서대로 읽어,
+    처음 나오는 .txt 항목만 풀어서 돌려줍니다. 그 앞의 항목(사진 등)은 건너뜁니다.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._state = "header"
+        self._skip = 0
+        self._remaining = 0
+        self._method = None
+        self._inflater = None
+        self.found = False
+
+    def feed(self, data: bytes):
+        self._buffer += data
+        while self._buffer and self._state != "done":
+            if self._state == "header":
+                if not self._read_header():
+                    return
+            elif self._state == "skip":
+                skipped = min(self._skip, len(self._buffer))
+                self._buffer = self._buffer[skipped:]
+                self._skip -= skipped
+                if not self._skip:
+                    self._state = "header"
+            elif self._state == "entry":
+                yield from self._read_entry()
+
+    def finish(self) -> None:
+        if not self.found:
+            raise ArchiveError("압축 파일 안에 카카오톡 대화(.txt) 파일이 없습니다.")
+        if self._state != "done":
+            raise ArchiveError("zip 파일이 중간에 잘렸습니다.")
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        if self._buffer[:4] != ZIP_MAGIC:
+            # 중앙 디렉터리에 도달: 더 이상 파일 항목이 없습니다.
+            self._state = "done"
+            self._buffer = b""
+            return True
+        if len(self._buffer) < ZIP_LOCAL_HEADER.size:
+            return False
+
+        (_, _, flags, method, _, _, _, compressed_size, _,
+         name_length, extra_length) = ZIP_LOCAL_HEADER.unpack_from(self._buffer)
+        header_size = ZIP_LOCAL_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+        name = self._buffer[ZIP_LOCAL_HEADER.size:ZIP_LOCAL_HEADER.size + name_length]
+        self._buffer = self._buffer[header_size:]
+
+        if flags & ZIP_FLAG_ENCRYPTED:
+            raise ArchiveError("암호가 걸린 zip 파일은 업로드할 수 없습니다.")
+
+        if name.lower().endswith(b".txt"):
+            if method == ZIP_DEFLATED:
+                self._inflater = zlib.decompressobj(wbits=-15)
+            elif method != ZIP_STORED or flags & ZIP_FLAG_DATA_DESCRIPTOR:
+                raise ArchiveError("지원하지 않는 zip 압축 방식입니다.")
+            self._method = method
+            self._remaining = compressed_size
+            self._state = "entry"
+            self.found = True
+        else:
+            if flags & ZIP_FLAG_DATA_DESCRIPTOR:
+                # 크기가 헤더에 없어 건너뛸 수 없습니다.
+                raise ArchiveError("대화 파일 앞에 읽을 수 없는 항목이 있는 zip 파일입니다.")
+            self._skip = compressed_size
+            self._state = "skip" if compressed_size else "header"
+        return True
+
+    def _read_entry(self):
+        if self._method == ZIP_STORED:
+            chunk = self._buffer[:self._remaining]
+            self._buffer = self._buffer[len(chunk):]
+            self._remaining -= len(chunk)
+            if chunk:
+                yield chunk
+            if not self._remaining:
+                self._finish_entry()
+            return
+
+        data, self._buffer = self._buffer, b""
+        while data:
+            chunk = self._inflater.decompress(data, DECODE_STEP)
+            data = self._inflater.unconsumed_tail
+            if chunk:
+                yield chunk
+            if self._inflater.eof:
+                self._finish_entry()
+                return
+
+    def _finish_entry(self) -> None:
+        # 대화 파일 하나만 필요하므로 나머지 항목은 읽지 않습니다.
+        self._state = "done"
+        self._buffer = b""
+        self._inflater = None
+
+
+def detect_decoder(head: bytes, file_name: str = ""):
+    """
+    업로드의 첫 바이트(매직 넘버)와 파일 이름으로 알맞은 디코더를 고릅니다.
+    """
+    if head.startswith(ZIP_MAGIC):
+        return ZipDecoder()
+    if head.startswith(GZIP_MAGIC):
+        return GzipDecoder()
+    if file_name.lower().endswith((".zip", ".gz")):
+        raise ArchiveError("압축 파일 형식이 올바르지 않습니다.")
+    return PlainDecoder()
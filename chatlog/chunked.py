@@ -0,0 +1,178 @@
+import os
+import pickle
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+
+from .archive import ArchiveError, PlainDecoder, detect_decoder
+from .models import ChatUpload
+from .parser import ChatIndexBuilder
+from .upload import ChatIngest, UploadRejected, complete_ingested_file
+from .utils import READ_CHUNK_SIZE
+
+UPLOAD_DIR = "chat_uploads"
+
+
+class UploadOffsetMismatch(Exception):
+    """보낸 조각의 offset이 서버가 받은 위치와 맞지 않을 때 발생합니다. (409)"""
+
+    def __init__(self, received: int):
+        super().__init__("업로드 위치가 맞지 않습니다.")
+        self.received = received
+
+
+def upload_part_path(upload: ChatUpload) -> str:
+    return default_storage.path(f"{UPLOAD_DIR}/{upload.upload_id}.part")
+
+
+def upload_state_path(upload: ChatUpload) -> str:
+    """지금까지 받은 내용으로 만든 ChatIndexBuilder 상태가 저장되는 경로입니다."""
+    return f"{upload_part_path(upload)}.state"
+
+
+def start_chat_upload(user, target: str, file_name: str = "", size: int | None = None) -> ChatUpload:
+    """
+    분할 업로드 세션을 만들고 빈 .part 파일을 준비합니다.
+    미리 알려준 전체 크기가 CHAT_UPLOAD_MAX_SIZE를 넘으면 UploadRejected가 발생합니다.
+    """
+    if size is not None and size > settings.CHAT_UPLOAD_MAX_SIZE:
+        raise UploadRejected("채팅 파일이 너무 큽니다.", too_large=True)
+
+    upload = ChatUpload.objects.create(user=user, target=target, file_name=file_name, size=size)
+    part_path = upload_part_path(upload)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    open(part_path, "wb").close()
+    return upload
+
+
+def append_chat_chunk(upload: ChatUpload, offset: int, stream) -> ChatUpload:
+    """
+    stream(파일 객체)에서 읽은 조각을 offset 위치에 이어 붙입니다.
+
+    - offset이 지금까지 받은 위치보다 뒤면 UploadOffsetMismatch가 발생합니다. (클라이언트는 received부터 다시 보냅니다)
+    - 이미 받은 부분과 겹치면 겹친 앞부분은 버리고 나머지만 붙입니다. (재전송해도 안전)
+    - 요청 도중 연결이 끊겨도 그때까지 읽은 바이트는 저장되므로, 다음 요청은 received부터 이어서 보내면 됩니다.
+
+    압축되지 않은 텍스트 업로드는 받은 조각을 그때그때 파싱해 ChatIndexBuilder 상태를 .state 파일에 저장해 두므로,
+    완료 요청 때는 인덱스를 다시 만들 필요가 없습니다.
+    """
+    with transaction.atomic():
+        upload = ChatUpload.objects.select_for_update().get(pk=upload.pk)
+        received = upload.received
+        if offset > received:
+            raise UploadOffsetMismatch(received)
+
+        # 이미 받은 앞부분은 읽고 버립니다.
+        skip = received - offset
+        while skip:
+            skipped = stream.read(min(skip, READ_CHUNK_SIZE))
+            if not skipped:
+                return upload
+            skip -= len(skipped)
+
+        builder = None
+        loaded = False
+        with open(upload_part_path(upload), "r+b") as f:
+            # 이전 요청이 received를 기록하기 전에 쓰다 만 바이트가 있다면 잘라냅니다.
+            f.truncate(received)
+            f.seek(received)
+            while data := stream.read(READ_CHUNK_SIZE):
+                if received + len(data) > settings.CHAT_UPLOAD_MAX_SIZE:
+                    raise UploadRejected("채팅 파일이 너무 큽니다.", too_large=True)
+                if not loaded:
+                    builder = _load_builder(upload, received, data)
+                    loaded = True
+                f.write(data)
+                if builder:
+                    builder.feed(data)
+                received += len(data)
+
+        if received == upload.received:
+            return upload
+        if builder:
+            _save_builder(upload, builder, received)
+        upload.received = received
+        upload.save(update_fields=["received", "updated_at"])
+    return upload
+
+
+def complete_chat_upload(upload: ChatUpload):
+    """
+    받은 조각을 모두 모아 acquire_chat_blob()에 넘길 업로드 파일을 만듭니다.
+
+    텍스트 업로드는 조각을 받으며 만든 인덱스를 그대로 쓰고, 압축(.zip/.gz) 업로드는 여기서 풀면서 파싱합니다.
+    클라이언트가 알려준 전체 크기만큼 받지 못했으면 UploadOffsetMismatch가 발생합니다.
+
+    Returns:
+        TemporaryUploadedFile: chat_index, content_hash, block_writer 속성이 붙은 임시 파일 (사용 후 close() 필요)
+    """
+    upload = ChatUpload.objects.get(pk=upload.pk)
+    if upload.size is not None and upload.received != upload.size:
+        raise UploadOffsetMismatch(upload.received)
+    if not upload.received:
+        raise UploadRejected("업로드된 내용이 없습니다.")
+
+    builder = _load_builder(upload, upload.received)
+    file = TemporaryUploadedFile(upload.file_name or "chat.txt", "text/plain", 0, None)
+    try:
+        ingest = ChatIngest(file, upload.file_name, None if builder else ChatIndexBuilder())
+        with open(upload_part_path(upload), "rb") as f:
+            while chunk := f.read(READ_CHUNK_SIZE):
+                ingest.feed(chunk)
+        content_hash = ingest.finish()
+        return complete_ingested_file(file, ingest, content_hash, builder.close() if builder else None)
+    except Exception:
+        file.close()
+        raise
+
+
+def discard_chat_upload(upload: ChatUpload) -> None:
+    """세션과 디스크에 남은 조각 파일을 삭제합니다."""
+    for path in (upload_part_path(upload), upload_state_path(upload)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    upload.delete()
+
+
+def _load_builder(upload: ChatUpload, received: int, head: bytes = b"") -> ChatIndexBuilder | None:
+    """
+    지금까지 받은 received 바이트에 대한 ChatIndexBuilder를 불러옵니다. 압축 업로드면 None 입니다.
+    저장된 상태가 없거나 received와 맞지 않으면(중간에 프로세스가 죽은 경우) .part 파일을 다시 읽어 만듭니다.
+    """
+    part_path = upload_part_path(upload)
+    if received:
+        with open(part_path, "rb") as f:
+            head = f.read(4)
+    try:
+        if not isinstance(detect_decoder(head, upload.file_name), PlainDecoder):
+            return None
+    except ArchiveError:
+        return None  # 완료 요청 때 ChatIngest가 사유와 함께 거절합니다.
+
+    try:
+        with open(upload_state_path(upload), "rb") as f:
+            state_received, builder = pickle.load(f)
+        if state_received == received:
+            return builder
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    builder = ChatIndexBuilder()
+    with open(part_path, "rb") as f:
+        remaining = received
+        while remaining and (chunk := f.read(min(remaining, READ_CHUNK_SIZE))):
+            builder.feed(chunk)
+            remaining -= len(chunk)
+    return builder
+
+
+def _save_builder(upload: ChatUpload, builder: ChatIndexBuilder, received: int) -> None:
+    path = upload_state_path(upload)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((received, builder), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
@@ -0,0 +1,162 @@
+import re
+
+from .formats import PM, ChatFormat
+
+# 같은 사람이 이 시간(분) 안에 이어 보낸 메시지는 첫 메시지의 헤더 하나로 합칩니다.
+MERGE_GAP_MINUTES = 10
+# "ㅋㅋㅋㅋㅋㅋ"처럼 같은 자모가 이보다 길게 이어지면 이 길이로 줄입니다.
+MAX_REPEAT = 3
+
+# 본문 전체가 아래와 같은 메시지는 짧은 표시로 바꾸고, 같은 표시가 이어지면 "(사진×3)"처럼 개수로 합칩니다.
+MEDIA_MARKERS = {
+    "사진": "사진",
+    "동영상": "동영상",
+    "이모티콘": "이모티콘",
+    "삭제된 메시지입니다.": "삭제됨",
+    "메시지가 삭제되었습니다.": "삭제됨",
+}
+MEDIA_PATTERN = re.compile(
+    "(?:(?P<media>" + "|".join(re.escape(body) for body in MEDIA_MARKERS) + ")"
+    r"|사진 (?P<photos>\d+)장|(?P<file>파일): .*)"
+)
+# 입장/퇴장 같은 시스템 안내 줄. 모바일 내보내기의 "2024. 1. 3. 오후 3:12: " 같은 시각 머리말도 함께 지웁니다.
+SYSTEM_PREFIX = r"(?:\d{4}[^:\n]*?\d{1,2}:\d{2}:? )?"
+SYSTEM_NOTICES = [
+    (re.compile(SYSTEM_PREFIX + r"(?P<name>.+?)님이 들어왔습니다\.?"), "{name} 입장"),
+    (re.compile(SYSTEM_PREFIX + r"(?P<name>.+?)님이 나갔습니다\.?"), "{name} 퇴장"),
+    (re.compile(SYSTEM_PREFIX + r".+?님이 (?P<name>.+?)님을 초대했습니다\.?"), "{name} 입장"),
+    (re.compile(SYSTEM_PREFIX + r"(?P<name>.+?)님을 내보냈습니다\.?"), "{name} 퇴장"),
+]
+URL_PATTERN = re.compile(r"https?://\S+")
+REPEAT_PATTERN = re.compile(r"([ㅋㅎㅠㅜ!?.~])\1{%d,}" % MAX_REPEAT)
+
+
+def compact_chat_text(text: str, chat_format: ChatFormat) -> str:
+    """
+    프롬프트에 넣을 대화 문자열에서 정보가 적은 부분을 줄입니다. 대화의 순서와 내용은 바꾸지 않습니다.
+
+    - 본문이 사진/동영상/이모티콘/파일/삭제된 메시지뿐인 메시지는 "(사진)" 같은 짧은 표시로 바꾸고, 이어지면 "(사진×3)"으로 합칩니다.
+    - 입장/퇴장/초대/내보내기 안내 줄은 "(김철수 입장)"처럼 줄입니다.
+    - 링크는 "(링크)"로, 길게 이어지는 ㅋ/ㅎ/ㅠ/ㅜ와 문장 부호는 MAX_REPEAT자로 줄이고, 빈 줄은 뺍니다.
+    - 같은 사람이 MERGE_GAP_MINUTES 안에 이어 보낸 메시지는 헤더(이름과 시각)를 한 번만 적고 본문을 줄을 바꿔 이어 붙입니다.
+    - 모바일 형식처럼 메시지마다 날짜가 붙는 형식도 PC 형식("[이름] [오후 3:12] ")으로 바꿔, 날짜는 날이 바뀔 때
+      구분선("--- 2024년 1월 3일 ---")에 한 번만 적습니다. 결과는 항상 PC 형식으로 판별되고 split_chat_text()로 나눌 수 있습니다.
+
+    Args:
+        text (str): 채팅 파일에서 읽은 대화 문자열 (날짜 구분선과 메시지 줄)
+        chat_format (ChatFormat): text의 내보내기 형식
+
+    Returns:
+        str: 줄인 대화 문자열
+    """
+    match_message = chat_format.message_pattern.match
+    match_date = chat_format.date_pattern.match
+    lines = []
+    current_date = None
+    speaker = None  # 지금 이어 붙이고 있는 메시지의 (이름, 마지막 메시지 시각(분))
+    marker = None  # 바로 앞 줄의 미디어 표시와 개수: [표시, 개수]
+
+    for raw in text.split("\n"):
+        line = raw.rstrip("\r").encode("utf-8")
+        date_match = match_date(line)
+        if date_match:
+            day = tuple(int(value) for value in date_match.groups()[:3])
+            if day != current_date:
+                current_date = day
+                lines.append("--- {}년 {}월 {}일 ---".format(*day))
+            speaker = marker = None
+            continue
+
+        message_match = match_message(line)
+        if message_match is None:
+            body = raw.rstrip("\r")
+            notice = _system_notice(body)
+            if notice is not None:
+                lines.append(f"({notice})")
+                speaker = marker = None
+                continue
+        else:
+            groups = message_match.groupdict()
+            if chat_format.dated_messages:
+                day = (int(groups["year"]), int(groups["month"]), int(groups["day"]))
+                if day != current_date:
+                    current_date = day
+                    lines.append("--- {}년 {}월 {}일 ---".format(*day))
+                    speaker = marker = None
+            name = groups["name"].decode("utf-8", "replace")
+            minute = _minute_of_day(groups)
+            body = line[message_match.end():].decode("utf-8", "replace")
+            if speaker is None or speaker[0] != name or not 0 <= minute - speaker[1] <= MERGE_GAP_MINUTES:
+                ampm = groups["ampm"].decode("utf-8")
+                lines.append(f"[{name}] [{ampm} {int(groups['hour'])}:{groups['minute'].decode()}] ")
+                marker = None
+            else:
+                lines.append("")
+            speaker = (name, minute)
+
+            if _append_body(lines, body, marker):
+                continue
+            marker = _media_marker(body)
+            continue
+
+        # 여러 줄 메시지의 이어지는 줄, 또는 대화 앞의 제목 줄
+        body = body.strip()
+        if not body:
+            continue
+        lines.append("")
+        if not _append_body(lines, body, marker):
+            marker = _media_marker(body)
+
+    return "\n".join(line for line in lines if line) + "\n" if lines else ""
+
+
+def _append_body(lines: list[str], body: str, marker: list | None) -> bool:
+    """
+    마지막 줄(헤더만 있거나 빈 줄)에 본문을 이어 붙입니다.
+    앞 줄과 같은 미디어 표시이면 새 줄을 만들지 않고 앞 줄의 개수를 늘린 뒤 True를 반환합니다.
+    """
+    media = _media_marker(body)
+    if media is not None and marker is not None and marker[0] == media[0] and not lines[-1]:
+        lines.pop()
+        marker[1] += media[1]
+        lines[-1] = lines[-1][:lines[-1].rindex("(")] + _format_marker(marker)
+        return True
+
+    if media is not None:
+        lines[-1] += _format_marker(media)
+    else:
+        body = REPEAT_PATTERN.sub(lambda m: m.group(1) * MAX_REPEAT, URL_PATTERN.sub("(링크)", body.strip()))
+        lines[-1] += body
+    return False
+
+
+def _media_marker(body: str) -> list | None:
+    # 본문이 미디어뿐이면 [표시, 개수]를 반환합니다.
+    found = MEDIA_PATTERN.fullmatch(body.strip())
+    if found is None:
+        return None
+    if found.group("photos"):
+        return ["사진", int(found.group("photos"))]
+    if found.group("file"):
+        return ["파일", 1]
+    return [MEDIA_MARKERS[found.group("media")], 1]
+
+
+def _format_marker(marker: list) -> str:
+    return f"({marker[0]})" if marker[1] == 1 else f"({marker[0]}×{marker[1]})"
+
+
+def _system_notice(line: str) -> str | None:
+    line = line.strip()
+    for pattern, template in SYSTEM_NOTICES:
+        found = pattern.fullmatch(line)
+        if found:
+            return template.format(name=found.group("name"))
+    return None
+
+
+def _minute_of_day(groups: dict) -> int:
+    hour = int(groups["hour"]) % 12
+    if groups["ampm"] == PM:
+        hour += 12
+    return hour * 60 + int(groups["minute"])
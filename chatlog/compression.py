@@ -0,0 +1,158 @@
+import gzip
+import json
+import os
+import zlib
+from array import array
+from bisect import bisect_right
+
+BLOCK_MAGIC = b"CHATBLK\n"
+BLOCK_VERSION = 1
+BLOCK_SIZE = 1024 * 1024
+COMPRESSED_SUFFIX = ".gz"
+
+
+def is_compressed(file_path: str) -> bool:
+    return file_path.endswith(COMPRESSED_SUFFIX)
+
+
+def block_table_path(file_path: str) -> str:
+    """압축된 채팅 파일 옆에 저장되는 블록 표 경로를 반환합니다."""
+    return f"{file_path}.blk"
+
+
+class BlockGzipWriter:
+    """
+    받은 바이트를 block_size 단위의 독립된 gzip 멤버로 압축해 out(바이너리 파일 객체)에 씁니다.
+
+    멤버를 이어 붙인 파일이므로 일반 gzip 도구로도 그대로 풀 수 있고,
+    블록마다 원본/압축 오프셋을 블록 표(.blk)에 기록해 두어 원하는 바이트 범위만 풀 수 있습니다.
+    메모리에는 채워지는 중인 블록 하나만 남습니다.
+    """
+
+    def __init__(self, out, level: int = 6, block_size: int = BLOCK_SIZE):
+        self.out = out
+        self.level = level
+        self.block_size = block_size
+        self.raw_offset = array("q", [0])
+        self.packed_offset = array("q", [0])
+        self._block = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._block += data
+        while len(self._block) >= self.block_size:
+            self._flush_block(self._block[:self.block_size])
+            del self._block[:self.block_size]
+
+    def close(self) -> int:
+        """남은 블록을 쓰고 압축된 전체 크기를 반환합니다."""
+        if self._block:
+            self._flush_block(self._block)
+            self._block = bytearray()
+        return self.packed_offset[-1]
+
+    def save_table(self, path: str) -> None:
+        """블록 표를 path에 원자적으로 기록합니다."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            header = {"version": BLOCK_VERSION, "blocks": len(self.raw_offset)}
+            f.write(BLOCK_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            self.raw_offset.tofile(f)
+            self.packed_offset.tofile(f)
+        os.replace(tmp_path, path)
+
+    def _flush_block(self, block) -> None:
+        packed = gzip.compress(block, compresslevel=self.level, mtime=0)
+        self.out.write(packed)
+        self.raw_offset.append(self.raw_offset[-1] + len(block))
+        self.packed_offset.append(self.packed_offset[-1] + len(packed))
+
+
+def write_compressed_chat(src, dst_path: str, level: int = 6, block_size: int = BLOCK_SIZE) -> int:
+    """
+    src(바이너리 파일 객체)를 블록 압축해 dst_path에 쓰고, 옆에 블록 표(.blk)를 남깁니다.
+
+    Returns:
+        int: 압축된 파일 크기 (바이트)
+    """
+    tmp_path = f"{dst_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        writer = BlockGzipWriter(out, level, block_size)
+        while block := src.read(block_size):
+            writer.write(block)
+        packed_size = writer.close()
+
+    # 블록 표를 먼저 교체해야 압축 파일만 있고 표가 없는 순간이 생기지 않습니다.
+    writer.save_table(block_table_path(dst_path))
+    os.replace(tmp_path, dst_path)
+    return packed_size
+
+
+class CompressedChatReader:
+    """
+    write_compressed_chat()으로 만든 블록 압축 파일에서 원본 바이트 범위를 스트리밍으로 읽습니다.
+
+    요청한 범위에 걸친 블록만 찾아 하나씩 풀기 때문에, 파일 전체를 풀지 않고도
+    날짜 범위 선택(ChatIndex.select)의 결과를 그대로 읽을 수 있습니다.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(block_table_path(file_path), "rb") as f:
+            if f.readline() != BLOCK_MAGIC:
+                raise ValueError("채팅 블록 표 형식이 올바르지 않습니다.")
+            header = json.loads(f.readline())
+            if header.get("version") != BLOCK_VERSION:
+                raise ValueError("채팅 블록 표 버전이 맞지 않습니다.")
+            self.raw_offset = array("q")
+            self.raw_offset.fromfile(f, header["blocks"])
+            self.packed_offset = array("q")
+            self.packed_offset.fromfile(f, header["blocks"])
+
+    @property
+    def size(self) -> int:
+        return self.raw_offset[-1]
+
+    def iter_chunks(self, start: int = 0, end: int | None = None):
+        """원본 기준 [start, end) 범위를 블록 단위 bytes로 차례로 돌려줍니다."""
+        end = self.size if end is None else min(end, self.size)
+        if start >= end:
+            return
+
+        block = bisect_right(self.raw_offset, start) - 1
+        with open(self.file_path, "rb") as f:
+            f.seek(self.packed_offset[block])
+            while block < len(self.raw_offset) - 1 and self.raw_offset[block] < end:
+                packed = f.read(self.packed_offset[block + 1] - self.packed_offset[block])
+                data = zlib.decompress(packed, wbits=31)
+                block_start = self.raw_offset[block]
+                yield data[max(start - block_start, 0):end - block_start]
+                block += 1
+
+    def read(self, start: int = 0, end: int | None = None) -> bytes:
+        return b"".join(self.iter_chunks(start, end))
+
+    def read_ranges(self, ranges) -> list[bytes]:
+        """
+        오프셋 순으로 정렬된 여러 [start, end) 범위를 읽습니다.
+        가까이 붙은 범위들이 같은 블록에 걸쳐 있으면 그 블록은 한 번만 풉니다.
+        """
+        results = []
+        cached_block, cached_data = -1, b""
+        with open(self.file_path, "rb") as f:
+            for start, end in ranges:
+                end = min(end, self.size)
+                parts = []
+                block = bisect_right(self.raw_offset, start) - 1
+                while start < end:
+                    if block != cached_block:
+                        f.seek(self.packed_offset[block])
+                        packed = f.read(self.packed_offset[block + 1] - self.packed_offset[block])
+                        cached_block, cached_data = block, zlib.decompress(packed, wbits=31)
+                    block_start = self.raw_offset[block]
+                    piece = cached_data[start - block_start:end - block_start]
+                    parts.append(piece)
+                    start += len(piece)
+                    block += 1
+                results.append(b"".join(parts))
+        return results
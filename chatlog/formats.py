@@ -0,0 +1,110 @@
+import re
+
+# 포맷을 판별할 때 살펴보는 파일 앞부분 크기
+DETECT_BYTES = 8 * 1024
+
+PM = "오후".encode("utf-8")
+
+
+class ChatFormat:
+    """
+    채팅 내보내기 형식 하나를 나타냅니다.
+
+    message_pattern: 메시지 첫 줄. 이름 있는 그룹 name, ampm, hour, minute 가 필요하고,
+                     메시지마다 날짜가 붙는 형식이면 year, month, day 도 넣습니다.
+    date_pattern: 날짜 구분선 줄. 그룹 1~3이 연, 월, 일 입니다.
+    boundary_pattern: 날짜 구분선 줄의 시작(바로 앞 줄바꿈 뒤)을 찾는 패턴. 병렬 파싱 때 파일을 나누는 데 씁니다.
+
+    모든 형식은 같은 ChatIndexBuilder를 거쳐 같은 메시지 기록(발신자, 시각, 오프셋, 길이)을 만듭니다.
+    """
+
+    def __init__(self, name: str, description: str, message_pattern: str, date_pattern: str, boundary_pattern: str):
+        self.name = name
+        self.description = description
+        self.message_pattern = re.compile(message_pattern.encode("utf-8"))
+        self.date_pattern = re.compile(date_pattern.encode("utf-8"))
+        self.boundary_pattern = re.compile(boundary_pattern.encode("utf-8"))
+        self.dated_messages = "year" in self.message_pattern.groupindex
+
+    def score(self, head: bytes) -> int:
+        """파일 앞부분에서 메시지/날짜 줄로 인식되는 줄 수를 셉니다."""
+        score = 0
+        for line in head.split(b"\n"):
+            if self.message_pattern.match(line) or self.date_pattern.match(line):
+                score += 1
+        return score
+
+    def __repr__(self) -> str:
+        return f"<ChatFormat {self.name}>"
+
+
+CHAT_FORMATS = {}
+
+
+def register_chat_format(chat_format: ChatFormat) -> ChatFormat:
+    """새 내보내기 형식을 등록합니다. 먼저 등록된 형식이 판별 점수가 같을 때 우선합니다."""
+    CHAT_FORMATS[chat_format.name] = chat_format
+    return chat_format
+
+
+def get_chat_format(name: str) -> ChatFormat:
+    return CHAT_FORMATS[name]
+
+
+def detect_chat_format(head: bytes) -> ChatFormat:
+    """
+    파일 앞부분(DETECT_BYTES 정도)을 보고 가장 많은 줄을 인식하는 형식을 고릅니다.
+    어떤 형식으로도 인식되지 않으면 PC 형식으로 처리합니다.
+    """
+    head = head[:DETECT_BYTES]
+    best, best_score = PC_FORMAT, 0
+    for chat_format in CHAT_FORMATS.values():
+        score = chat_format.score(head)
+        if score > best_score:
+            best, best_score = chat_format, score
+    return best
+
+
+# 카카오톡 PC 버전
+# 날짜 구분선: "--------------- 2024년 1월 3일 수요일 ---------------"
+# 메시지: "[김철수] [오후 3:12] 안녕하세요"
+PC_FORMAT = register_chat_format(ChatFormat(
+    name="kakao_pc",
+    description="카카오톡 PC",
+    message_pattern=r"^\[(?P<name>.+?)\] \[(?P<ampm>오전|오후) (?P<hour>\d{1,2}):(?P<minute>\d{2})\] ",
+    date_pattern=r"^-+ (\d{4})년 (\d{1,2})월 (\d{1,2})일",
+    boundary_pattern=r"\n(?=-+ \d{4}년 \d{1,2}월 \d{1,2}일)",
+))
+
+# 모바일 형식의 날짜 구분선: "2024년 1월 3일 수요일" (요일이 없는 "2024년 1월 3일"도 인정)
+# "2024년 1월 3일 오후 3:12: 김철수님이 들어왔습니다." 같은 시스템 안내 줄은 날짜 구분선이 아닙니다.
+MOBILE_DATE_PATTERN = r"^(\d{4})년 (\d{1,2})월 (\d{1,2})일(?: (?:월|화|수|목|금|토|일)요일)?\r?$"
+MOBILE_BOUNDARY_PATTERN = r"\n(?=\d{4}년 \d{1,2}월 \d{1,2}일(?: (?:월|화|수|목|금|토|일)요일)?\r?\n)"
+
+# 카카오톡 모바일 (Android)
+# 날짜 구분선: "2024년 1월 3일 수요일"
+# 메시지: "2024. 1. 3. 오후 3:12, 김철수 : 안녕하세요"
+MOBILE_DOTTED_FORMAT = register_chat_format(ChatFormat(
+    name="kakao_mobile_dotted",
+    description="카카오톡 모바일 (2024. 1. 3. 오후 3:12, 이름 : 메시지)",
+    message_pattern=(
+        r"^(?P<year>\d{4})\. (?P<month>\d{1,2})\. (?P<day>\d{1,2})\. "
+        r"(?P<ampm>오전|오후) (?P<hour>\d{1,2}):(?P<minute>\d{2}), (?P<name>.+?) : "
+    ),
+    date_pattern=MOBILE_DATE_PATTERN,
+    boundary_pattern=MOBILE_BOUNDARY_PATTERN,
+))
+
+# 카카오톡 모바일 (iOS)
+# 날짜 구분선: "2024년 1월 3일 수요일"
+# 메시지: "2024년 1월 3일 오후 3:12, 김철수 : 안녕하세요"
+MOBILE_KOREAN_FORMAT = register_chat_format(ChatFormat(
+    name="kakao_mobile_korean",
+    description="카카오톡 모바일 (2024년 1월 3일 오후 3:12, 이름 : 메시지)",
+    message_pattern=(
+        r"^(?P<year>\d{4})년 (?P<month>\d{1,2})월 (?P<day>\d{1,2})일 "
+        r"(?P<ampm>오전|오후) (?P<hour>\d{1,2}):(?P<minute>\d{2}), (?P<name>.+?) : "
+    ),
+    date_pattern=MOBILE_DATE_PATTERN,
+    boundary_pattern=MOBILE_BOUNDARY_PATTERN,
+))
@@ -0,0 +1,146 @@
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date
+
+INDEX_MAGIC = b"CHATIDX\n"
+INDEX_VERSION = 2
+
+# 인덱스 파일에 저장되는 배열들: (이름, array typecode)
+INDEX_ARRAYS = (
+    ("sender", "I"),
+    ("timestamp", "q"),
+    ("offset", "q"),
+    ("length", "I"),
+)
+
+# 날짜 구분선 배열: 날짜 서수, 구분선의 바이트 오프셋, 구분선 다음 첫 메시지 번호
+DAY_ARRAYS = (
+    ("day", "I"),
+    ("day_offset", "q"),
+    ("day_message", "I"),
+)
+
+# 기간 선택 결과: 메시지 구간 [first, last) 와 바이트 범위 [start, end)
+ChatSlice = namedtuple("ChatSlice", ["first", "last", "start", "end"])
+
+
+class ChatIndex:
+    """
+    업로드된 채팅 파일 하나에 대한 메시지 인덱스입니다.
+
+    메시지마다 발신자 번호(sender), 분 단위 타임스탬프(timestamp),
+    파일 내 바이트 오프셋(offset)과 길이(length)를 배열로 보관하고,
+    채팅방 제목과 참여자 목록, 파일의 내보내기 형식(format_name)을 함께 가지고 있습니다.
+
+    날짜 구분선("--------------- 2024년 1월 3일 ...")마다 날짜(day), 구분선의 바이트 오프셋(day_offset),
+    그날 첫 메시지 번호(day_message)도 기록해 두어, 기간 선택을 이진 탐색으로 처리합니다.
+    """
+
+    def __init__(self, title, senders, sender, timestamp, offset, length,
+                 day, day_offset, day_message, line_count, size, format_name="kakao_pc"):
+        self.title = title
+        self.senders = senders
+        self.sender = sender
+        self.timestamp = timestamp
+        self.offset = offset
+        self.length = length
+        self.day = day
+        self.day_offset = day_offset
+        self.day_message = day_message
+        self.line_count = line_count
+        self.size = size
+        self.format_name = format_name
+
+    def __len__(self) -> int:
+        return len(self.offset)
+
+    @property
+    def participants(self) -> set:
+        return set(self.senders)
+
+    @property
+    def people_num(self) -> int:
+        return len(self.senders)
+
+    @property
+    def date_start(self) -> date | None:
+        return date.fromordinal(self.day[0]) if self.day else None
+
+    @property
+    def date_end(self) -> date | None:
+        return date.fromordinal(self.day[-1]) if self.day else None
+
+    def select(self, start_date: date | None, end_date: date | None) -> ChatSlice:
+        """
+        start_date ~ end_date (양 끝 포함) 사이의 대화를 날짜 구분선 단위로 선택합니다.
+        None 이면 해당 방향으로 제한이 없습니다. 첫 날짜 구분선 이전의 내용은 제외됩니다.
+
+        날짜 배열을 이진 탐색하므로 파일 크기와 상관없이 O(log 일수) 입니다.
+
+        Returns:
+            ChatSlice: 메시지 구간 [first, last) 와 파일 내 바이트 범위 [start, end)
+        """
+        first_day = 0 if start_date is None else bisect_left(self.day, start_date.toordinal())
+        last_day = len(self.day) if end_date is None else bisect_right(self.day, end_date.toordinal())
+
+        if first_day >= last_day:
+            return ChatSlice(0, 0, 0, 0)
+
+        first = self.day_message[first_day]
+        start = self.day_offset[first_day]
+        if last_day < len(self.day):
+            last = self.day_message[last_day]
+            end = self.day_offset[last_day]
+        else:
+            last = len(self)
+            end = self.size
+        return ChatSlice(first, last, start, end)
+
+    def save(self, path: str) -> None:
+        header = {
+            "version": INDEX_VERSION,
+            "title": self.title,
+            "senders": self.senders,
+            "line_count": self.line_count,
+            "size": self.size,
+            "format": self.format_name,
+            "count": len(self),
+            "days": len(self.day),
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            for name, _ in INDEX_ARRAYS + DAY_ARRAYS:
+                getattr(self, name).tofile(f)
+        # 다른 요청이 반쯤 쓰인 인덱스를 읽지 않도록 원자적으로 교체합니다.
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ChatIndex":
+        with open(path, "rb") as f:
+            if f.readline() != INDEX_MAGIC:
+                raise ValueError("채팅 인덱스 파일 형식이 올바르지 않습니다.")
+            header = json.loads(f.readline())
+            if header.get("version") != INDEX_VERSION:
+                raise ValueError("채팅 인덱스 버전이 맞지 않습니다.")
+
+            arrays = {}
+            for name, typecode in INDEX_ARRAYS:
+                arrays[name] = array(typecode)
+                arrays[name].fromfile(f, header["count"])
+            for name, typecode in DAY_ARRAYS:
+                arrays[name] = array(typecode)
+                arrays[name].fromfile(f, header["days"])
+
+        return cls(
+            title=header["title"],
+            senders=header["senders"],
+            line_count=header["line_count"],
+            size=header["size"],
+            format_name=header.get("format", "kakao_pc"),
+            **arrays,
+        )
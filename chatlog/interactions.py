@@ -0,0 +1,134 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from .stats import ChatMessages, find_in_bodies, reply_mask
+
+# 이름 부르기(멘션) 한 번을 답장 몇 번으로 칠지. 이름을 불러 말을 거는 쪽이 단순한 답장보다 뚜렷한 상호작용입니다.
+MENTION_WEIGHT = 2
+# 이 글자 수보다 짧은 이름은 다른 낱말에 섞여 잘못 잡히기 쉬우므로 멘션으로 찾지 않습니다.
+MIN_MENTION_LENGTH = 2
+# 세 글자 한글 이름은 성을 뺀 이름("김철수" -> "철수")으로 불러도 멘션으로 셉니다.
+KOREAN_FULL_NAME = re.compile(r"[가-힣]{3}")
+
+# 참여자 간 방향별 상호작용. 0이 아닌 칸만 (rows[k] -> columns[k]) 좌표 목록으로 담습니다.
+# names는 말수가 많은 순서의 참여자 이름이고, rows/columns는 names의 위치입니다.
+InteractionMatrix = namedtuple("InteractionMatrix", ["names", "rows", "columns", "replies", "mentions", "scores"])
+# 방향을 구분하지 않은 두 사람의 조합: 이름 두 개, 점수(0~100), 서로 주고받은 답장과 멘션 횟수
+InteractionPair = namedtuple("InteractionPair", ["name_A", "name_B", "score", "replies", "mentions"])
+
+
+def compute_interaction_matrix(messages: ChatMessages) -> InteractionMatrix:
+    """
+    기간 안에 말한 모든 참여자 사이의 방향별 상호작용을 계산합니다. 참여자 수에 제한이 없습니다.
+
+    - 답장: 다른 사람의 메시지 바로 뒤 REPLY_WINDOW_MINUTES 안에 보낸 메시지는 보낸 사람 -> 앞 메시지를 보낸 사람으로 셉니다.
+    - 멘션: 본문에 다른 참여자의 이름(세 글자 한글 이름은 성을 뺀 이름도)이 들어 있으면 보낸 사람 -> 그 사람으로 셉니다.
+      한 메시지에서 같은 사람을 여러 번 불러도 한 번만 셉니다.
+
+    점수는 (답장 + MENTION_WEIGHT × 멘션)을 가장 많이 주고받은 칸과 비교해 0~100으로 나타내고,
+    작은 값도 구분되도록 제곱근을 씌웁니다. N×N 배열을 만들지 않고 0이 아닌 칸만 담으므로 큰 단톡방도 메모리가 거의 늘지 않습니다.
+
+    Args:
+        messages (ChatMessages): load_chat_messages()의 결과
+
+    Returns:
+        InteractionMatrix: 참여자 이름 목록과 0이 아닌 칸들의 (행, 열, 답장 수, 멘션 수, 점수) 배열
+    """
+    sender = messages.sender.astype(np.intp)
+    counts = np.bincount(sender, minlength=len(messages.senders))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    rank = np.full(len(messages.senders), -1, dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    names = [messages.senders[i] for i in order]
+    size = len(names)
+
+    replies = reply_mask(sender, messages.timestamp)
+    reply_codes = rank[sender[1:][replies]] * size + rank[sender[:-1][replies]]
+    mention_codes = _mention_codes(messages, names, rank[sender])
+
+    cells, inverse = np.unique(np.concatenate((reply_codes, mention_codes)), return_inverse=True)
+    reply_counts = np.bincount(inverse[:len(reply_codes)], minlength=len(cells))
+    mention_counts = np.bincount(inverse[len(reply_codes):], minlength=len(cells))
+    return InteractionMatrix(
+        names=names,
+        rows=cells // size if size else cells,
+        columns=cells % size if size else cells,
+        replies=reply_counts,
+        mentions=mention_counts,
+        scores=_scale(reply_counts + MENTION_WEIGHT * mention_counts),
+    )
+
+
+def top_interaction_pairs(matrix: InteractionMatrix, limit: int = 3) -> list[InteractionPair]:
+    """방향을 합친 두 사람 조합을 상호작용이 많은 순서로 limit개까지 반환합니다. 점수는 가장 많이 주고받은 조합과 비교한 0~100입니다."""
+    size = len(matrix.names)
+    if not len(matrix.rows):
+        return []
+    low = np.minimum(matrix.rows, matrix.columns)
+    high = np.maximum(matrix.rows, matrix.columns)
+    pairs, inverse = np.unique(low * size + high, return_inverse=True)
+    replies = np.bincount(inverse, weights=matrix.replies).astype(np.int64)
+    mentions = np.bincount(inverse, weights=matrix.mentions).astype(np.int64)
+    weight = replies + MENTION_WEIGHT * mentions
+    scores = _scale(weight)
+    top = np.argsort(-weight, kind="stable")[:limit]
+    return [
+        InteractionPair(
+            matrix.names[pairs[k] // size], matrix.names[pairs[k] % size],
+            int(scores[k]), int(replies[k]), int(mentions[k]),
+        )
+        for k in top
+    ]
+
+
+def interaction_cells(matrix: InteractionMatrix) -> list[list[int]]:
+    """결과에 저장할 수 있도록 0이 아닌 칸을 [행, 열, 점수] 목록으로 바꿉니다."""
+    return [
+        [int(row), int(column), int(score)]
+        for row, column, score in zip(matrix.rows, matrix.columns, matrix.scores)
+        if score
+    ]
+
+
+def format_interaction_pairs(pairs: list[InteractionPair]) -> str:
+    """프롬프트에 사실로 넣을 수 있도록 조합 목록을 여러 줄 문자열로 만듭니다."""
+    return "\n".join(
+        f"{rank}. {pair.name_A} & {pair.name_B}: {pair.score}점 (서로 주고받은 답장 {pair.replies}번, 이름 부르기 {pair.mentions}번)"
+        for rank, pair in enumerate(pairs, start=1)
+    )
+
+
+def _mention_codes(messages: ChatMessages, names: list[str], message_rank: np.ndarray) -> np.ndarray:
+    """본문에서 다른 참여자의 이름을 찾아 (보낸 사람 위치 × 참여자 수 + 불린 사람 위치) 코드 배열을 반환합니다."""
+    terms = {}
+    for position, name in enumerate(names):
+        candidates = {name.strip()}
+        if KOREAN_FULL_NAME.fullmatch(name.strip()):
+            candidates.add(name.strip()[1:])
+        for term in candidates:
+            if len(term) >= MIN_MENTION_LENGTH:
+                # 두 사람이 같은 호칭을 쓰면 누구를 부른 것인지 알 수 없으므로 그 호칭은 쓰지 않습니다.
+                terms[term] = position if terms.get(term, position) == position else None
+    terms = {term.encode("utf-8"): position for term, position in terms.items() if position is not None}
+    if not terms:
+        return np.zeros(0, dtype=np.intp)
+
+    pattern = re.compile(b"|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+    message, _, matched = find_in_bodies(messages, pattern)
+    target = np.array([terms[term] for term in matched], dtype=np.intp)
+    source = message_rank[message]
+    keep = source != target
+    size = len(names)
+    # 한 메시지에서 같은 사람을 여러 번 부른 것은 한 번으로 셉니다.
+    _, first = np.unique(message[keep] * size + target[keep], return_index=True)
+    return (source[keep] * size + target[keep])[first]
+
+
+def _scale(weight: np.ndarray) -> np.ndarray:
+    # 가장 큰 값을 100으로 두고 제곱근으로 늘려 0~100 정수로 바꿉니다.
+    if not len(weight) or not weight.max():
+        return np.zeros(len(weight), dtype=np.int64)
+    return np.rint(100 * np.sqrt(weight / weight.max())).astype(np.int64)
@@ -0,0 +1,57 @@
+import random
+from datetime import date, timedelta
+
+NAMES = [
+    "김철수", "이영희", "박민수", "최지우", "정하늘", "강다은", "윤서준", "장예린",
+    "임도윤", "한지민", "오세훈", "서유나", "신동현", "권나래", "황민재", "송하린",
+]
+PHRASES = [
+    "ㅋㅋㅋㅋㅋㅋ", "오늘 저녁 뭐 먹을래?", "사진", "이모티콘", "내일 회의 몇 시였지?",
+    "https://example.com/notice", "그거 내가 정리해서 올릴게", "헐 대박",
+    "다들 과제 제출했어?", "주말에 같이 영화 보러 가자", "ㅇㅋㅇㅋ", "삭제된 메시지입니다.",
+]
+WEEKDAYS = "월화수목금토일"
+
+
+def _date_line(chat_format: str, day: date) -> str:
+    weekday = WEEKDAYS[day.weekday()]
+    if chat_format == "kakao_pc":
+        return f"--------------- {day.year}년 {day.month}월 {day.day}일 {weekday}요일 ---------------\n"
+    return f"{day.year}년 {day.month}월 {day.day}일 {weekday}요일\n"
+
+
+def _message_line(chat_format: str, day: date, name: str, ampm: str, hour: int, minute: int, text: str) -> str:
+    if chat_format == "kakao_pc":
+        return f"[{name}] [{ampm} {hour}:{minute:02d}] {text}\n"
+    if chat_format == "kakao_mobile_dotted":
+        return f"{day.year}. {day.month}. {day.day}. {ampm} {hour}:{minute:02d}, {name} : {text}\n"
+    return f"{day.year}년 {day.month}월 {day.day}일 {ampm} {hour}:{minute:02d}, {name} : {text}\n"
+
+
+def write_synthetic_chat(path: str, lines: int, people: int = 10, seed: int = 0, chat_format: str = "kakao_pc") -> None:
+    """
+    벤치마크용 가짜 카카오톡 내보내기 파일을 chat_format 형식으로 만듭니다.
+    약 200줄마다 날짜 구분선이 들어가고, 가끔 여러 줄 메시지가 섞입니다.
+    """
+    rng = random.Random(seed)
+    names = [NAMES[i % len(NAMES)] + (str(i // len(NAMES)) if i >= len(NAMES) else "") for i in range(people)]
+    day = date(2020, 1, 1)
+    minute = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("벤치마크 단톡방 님과 카카오톡 대화\n저장한 날짜 : 2024-01-01 00:00:00\n\n")
+        written = 3
+        while written < lines:
+            f.write(_date_line(chat_format, day))
+            written += 1
+            minute = rng.randint(0, 120)
+            for _ in range(min(200, lines - written)):
+                minute = min(minute + rng.randint(0, 6), 1439)
+                hour, mm = divmod(minute, 60)
+                ampm = "오전" if hour < 12 else "오후"
+                f.write(_message_line(chat_format, day, rng.choice(names), ampm, hour % 12 or 12, mm, rng.choice(PHRASES)))
+                written += 1
+                if rng.random() < 0.05 and written < lines:
+                    f.write("여러 줄로 이어지는 메시지\n")
+                    written += 1
+            day += timedelta(days=1)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatlog.compaction import compact_chat_text
+from chatlog.formats import CHAT_FORMATS, detect_chat_format
+from chatlog.sampling import estimate_tokens
+
+from ._synthetic import write_synthetic_chat
+
+
+class Command(BaseCommand):
+    help = "대화 줄이기(compact_chat_text) 전후의 추정 토큰 수와 처리량을 형식마다 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=100_000, help="형식마다 만들 가짜 채팅의 줄 수")
+        parser.add_argument("--file", help="가짜 채팅 대신 측정할 채팅 파일 경로 (압축하지 않은 .txt)")
+
+    def handle(self, *args, **options):
+        tmp_dir = tempfile.TemporaryDirectory()
+        if options["file"]:
+            files = [options["file"]]
+        else:
+            files = []
+            for name in CHAT_FORMATS:
+                file_path = os.path.join(tmp_dir.name, f"{name}.txt")
+                write_synthetic_chat(file_path, options["lines"], chat_format=name)
+                files.append(file_path)
+
+        self.stdout.write(f"{'format':<24}{'전':>12}{'후':>12}{'절감':>8}{'처리량':>14}")
+        for file_path in files:
+            with open(file_path, encoding="utf-8") as f:
+                text = f.read()
+            chat_format = detect_chat_format(text[:8192].encode("utf-8"))
+
+            started = time.perf_counter()
+            compacted = compact_chat_text(text, chat_format)
+            elapsed = time.perf_counter() - started
+
+            before, after = estimate_tokens(text), estimate_tokens(compacted)
+            mbps = len(text.encode("utf-8")) / 1024 / 1024 / elapsed
+            self.stdout.write(
+                f"{chat_format.name:<24}{before:>12,}{after:>12,}{100 * (before - after) / max(before, 1):>7.1f}%{mbps:>10.1f}MB/s"
+            )
+
+        tmp_dir.cleanup()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatlog.formats import CHAT_FORMATS, detect_chat_format
+from chatlog.parallel import parse_chat_segment
+
+from ._synthetic import write_synthetic_chat
+
+
+class Command(BaseCommand):
+    help = "등록된 채팅 내보내기 형식마다 판별 결과와 파싱 처리량을 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=300_000, help="형식마다 만들 가짜 채팅의 줄 수")
+        parser.add_argument("--min-mbps", type=float, default=0, help="이 처리량(MB/s)보다 느린 형식이 있으면 실패합니다.")
+        parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (가장 빠른 회차 기준)")
+
+    def handle(self, *args, **options):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.stdout.write(f"{'format':<24}{'크기':>10}{'처리량':>14}{'메시지':>12}  판별")
+
+        slow = []
+        for name in CHAT_FORMATS:
+            file_path = os.path.join(tmp_dir.name, f"{name}.txt")
+            write_synthetic_chat(file_path, options["lines"], chat_format=name)
+            size = os.path.getsize(file_path)
+            with open(file_path, "rb") as f:
+                detected = detect_chat_format(f.read(8192))
+
+            best = None
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                index = parse_chat_segment(file_path, 0, size)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+
+            mbps = size / 1024 / 1024 / best
+            if mbps < options["min_mbps"]:
+                slow.append(name)
+            self.stdout.write(
+                f"{name:<24}{size / 1024 / 1024:>8.1f}MB{mbps:>10.1f}MB/s{len(index):>12,}"
+                f"  {'OK' if detected.name == name else detected.name}"
+            )
+
+        tmp_dir.cleanup()
+        if slow:
+            raise CommandError(f"처리량이 {options['min_mbps']}MB/s보다 낮은 형식: {', '.join(slow)}")
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from chatlog.utils import load_chat_index, parse_analysis_period, read_chat_text
+
+from ._synthetic import write_synthetic_chat
+
+MODES = ("legacy", "buffered", "mmap")
+
+
+def _legacy_chat_sample(file_path: str, analysis_option: dict) -> str:
+    # 인덱스 도입 전 분석 함수들이 하던 방식: readlines() -> 줄 단위 필터링 -> "".join()
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    start_date, end_date = parse_analysis_period(analysis_option)
+    date_pattern = re.compile(r"--------------- (\d{4}년 \d{1,2}월 \d{1,2}일)")
+    filtered_lines = []
+    current_date = None
+    for line in lines:
+        date_match = date_pattern.search(line)
+        if date_match:
+            current_date = datetime.strptime(date_match.group(1), "%Y년 %m월 %d일").date()
+        if not current_date:
+            continue
+        if (start_date is None or current_date >= start_date) and (end_date is None or current_date <= end_date):
+            filtered_lines.append(line)
+    return "".join(filtered_lines)
+
+
+def _measure(mode: str, file_path: str, analysis_option: dict, queue) -> None:
+    # 새 프로세스에서 프롬프트 한 개를 만들 때까지의 최대 RSS(KB)를 잽니다.
+    if mode != "legacy":
+        index = load_chat_index(file_path)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    if mode == "legacy":
+        chat_sample = _legacy_chat_sample(file_path, analysis_option)
+    else:
+        chat_slice = index.select(*parse_analysis_period(analysis_option))
+        chat_sample = read_chat_text(file_path, chat_slice.start, chat_slice.end, mode=mode)
+    prompt = f"--- [카카오톡 대화 내용] ---\n{chat_sample}\n--- [분석 시작] ---"
+    elapsed = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((baseline, peak, len(prompt), elapsed))
+
+
+class Command(BaseCommand):
+    help = "분석 프롬프트를 만들 때의 최대 RSS를 채팅 읽기 방식(legacy/buffered/mmap)별로 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="측정할 채팅 파일 (없으면 가짜 채팅을 만듭니다)")
+        parser.add_argument("--lines", type=int, default=1_000_000, help="가짜 채팅의 줄 수")
+        parser.add_argument("--start", default="처음부터", help="분석 시작일 (YYYY-MM-DD)")
+        parser.add_argument("--end", default="끝까지", help="분석 종료일 (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        file_path = options["file"]
+        tmp_dir = None
+        if not file_path:
+            tmp_dir = tempfile.TemporaryDirectory()
+            file_path = os.path.join(tmp_dir.name, "chat.txt")
+            write_synthetic_chat(file_path, options["lines"])
+
+        analysis_option = {"start": options["start"], "end": options["end"]}
+        load_chat_index(file_path)  # 인덱스는 업로드 시점에 만들어지므로 측정에서 제외
+
+        size_mb = os.path.getsize(file_path) / 1024 / 1024
+        self.stdout.write(f"채팅 파일: {file_path} ({size_mb:.1f} MB)")
+        self.stdout.write(f"{'mode':<10}{'base RSS':>12}{'peak RSS':>12}{'증가분':>12}{'prompt':>14}{'시간':>10}")
+
+        context = multiprocessing.get_context("spawn")
+        for mode in MODES:
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(mode, file_path, analysis_option, queue))
+            process.start()
+            baseline, peak, prompt_len, elapsed = queue.get()
+            process.join()
+            self.stdout.write(
+                f"{mode:<10}{baseline / 1024:>10.1f}MB{peak / 1024:>10.1f}MB"
+                f"{(peak - baseline) / 1024:>10.1f}MB{prompt_len:>14,}{elapsed:>9.2f}s"
+            )
+
+        if tmp_dir:
+            tmp_dir.cleanup()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatlog.index import DAY_ARRAYS, INDEX_ARRAYS
+from chatlog.parallel import parse_chat_parallel, parse_chat_segment
+
+from ._synthetic import write_synthetic_chat
+
+
+class Command(BaseCommand):
+    help = "채팅 파일 파싱을 한 프로세스로 할 때와 프로세스 풀로 나눠 할 때의 시간을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="측정할 채팅 파일 (없으면 가짜 채팅을 만듭니다)")
+        parser.add_argument("--lines", type=int, default=1_000_000, help="가짜 채팅의 줄 수")
+        parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1], help="비교할 프로세스 수")
+
+    def handle(self, *args, **options):
+        file_path = options["file"]
+        tmp_dir = None
+        if not file_path:
+            tmp_dir = tempfile.TemporaryDirectory()
+            file_path = os.path.join(tmp_dir.name, "chat.txt")
+            write_synthetic_chat(file_path, options["lines"])
+
+        size = os.path.getsize(file_path)
+        self.stdout.write(f"채팅 파일: {file_path} ({size / 1024 / 1024:.1f} MB, CPU {os.cpu_count()}개)")
+
+        started = time.perf_counter()
+        serial = parse_chat_segment(file_path, 0, size)
+        serial_time = time.perf_counter() - started
+        self.stdout.write(f"{'workers':<10}{'시간':>10}{'처리량':>14}{'배속':>8}  결과")
+        self.stdout.write(f"{'serial':<10}{serial_time:>9.2f}s{size / 1024 / 1024 / serial_time:>10.1f}MB/s{1:>7.2f}x")
+
+        for workers in sorted(set(options["workers"])):
+            started = time.perf_counter()
+            merged = parse_chat_parallel(file_path, size, workers)
+            elapsed = time.perf_counter() - started
+            same = all(getattr(merged, name) == getattr(serial, name) for name, _ in INDEX_ARRAYS + DAY_ARRAYS)
+            same = same and merged.senders == serial.senders and merged.title == serial.title
+            self.stdout.write(
+                f"{workers:<10}{elapsed:>9.2f}s{size / 1024 / 1024 / elapsed:>10.1f}MB/s"
+                f"{serial_time / elapsed:>7.2f}x  {'일치' if same else '불일치'}"
+            )
+
+        if tmp_dir:
+            tmp_dir.cleanup()
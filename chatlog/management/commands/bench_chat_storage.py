@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatlog.compression import write_compressed_chat
+from chatlog.utils import build_chat_index, parse_analysis_period, read_chat_text
+
+from ._synthetic import write_synthetic_chat
+
+
+def _timed(func, *args, repeat: int = 3):
+    # 가장 빠른 회차를 씁니다 (디스크 캐시가 데워진 상태 기준)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+class Command(BaseCommand):
+    help = "평문 채팅 파일과 블록 압축(gzip) 채팅 파일의 크기와 읽기 처리량을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="측정할 채팅 파일 (없으면 가짜 채팅을 만듭니다)")
+        parser.add_argument("--lines", type=int, default=1_000_000, help="가짜 채팅의 줄 수")
+        parser.add_argument("--level", type=int, default=6, help="gzip 압축 레벨")
+        parser.add_argument("--start", default="처음부터", help="범위 읽기 시작일 (YYYY-MM-DD)")
+        parser.add_argument("--end", default="끝까지", help="범위 읽기 종료일 (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        tmp_dir = tempfile.TemporaryDirectory()
+        plain_path = options["file"]
+        if not plain_path:
+            plain_path = os.path.join(tmp_dir.name, "chat.txt")
+            write_synthetic_chat(plain_path, options["lines"])
+        packed_path = os.path.join(tmp_dir.name, "chat.txt.gz")
+
+        started = time.perf_counter()
+        with open(plain_path, "rb") as f:
+            write_compressed_chat(f, packed_path, level=options["level"])
+        compress_time = time.perf_counter() - started
+
+        plain_size = os.path.getsize(plain_path)
+        packed_size = os.path.getsize(packed_path)
+        mb = plain_size / 1024 / 1024
+        self.stdout.write(
+            f"원본 {mb:.1f} MB -> 압축 {packed_size / 1024 / 1024:.1f} MB "
+            f"({plain_size / packed_size:.1f}x, 압축 {mb / compress_time:.0f} MB/s)"
+        )
+
+        index, _ = _timed(build_chat_index, plain_path, repeat=1)
+        chat_slice = index.select(*parse_analysis_period({"start": options["start"], "end": options["end"]}))
+        self.stdout.write(f"범위 읽기: {(chat_slice.end - chat_slice.start) / 1024 / 1024:.1f} MB")
+        self.stdout.write(f"{'file':<10}{'전체 인덱싱':>14}{'범위 읽기':>14}")
+
+        for label, path in (("plain", plain_path), ("gzip", packed_path)):
+            _, index_time = _timed(build_chat_index, path)
+            _, read_time = _timed(read_chat_text, path, chat_slice.start, chat_slice.end)
+            self.stdout.write(
+                f"{label:<10}{mb / index_time:>10.0f}MB/s"
+                f"{(chat_slice.end - chat_slice.start) / 1024 / 1024 / read_time:>10.0f}MB/s"
+            )
+
+        tmp_dir.cleanup()
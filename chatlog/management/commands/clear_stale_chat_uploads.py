@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chatlog.chunked import discard_chat_upload
+from chatlog.models import ChatUpload
+
+
+class Command(BaseCommand):
+    help = "오랫동안 조각이 오지 않은 분할 업로드 세션과 조각 파일을 삭제합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="마지막 조각 이후 이 시간이 지난 세션을 삭제합니다.")
+
+    def handle(self, *args, **options):
+        expired_at = timezone.now() - timedelta(hours=options["hours"])
+        count = 0
+        for upload in ChatUpload.objects.filter(updated_at__lt=expired_at):
+            discard_chat_upload(upload)
+            count += 1
+        self.stdout.write(f"분할 업로드 {count}건을 삭제했습니다.")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatlog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatblob',
+            name='stored_size',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+import uuid
+
+
+class ChatBlob(models.Model):
+    """
+    내용 해시(SHA-256)로 저장되는 채팅 파일 원본입니다.
+
+    같은 내용의 채팅 파일은 몇 번을 올려도 blob 하나와 그 옆의 인덱스(.idx)를 함께 씁니다.
+    ref_count는 이 blob을 가리키는 ChatPlay/ChatBus 수이며, 0이 되면 파일과 함께 삭제됩니다.
+    size는 원본 크기, stored_size는 디스크에 실제로 저장된(압축된) 크기입니다.
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(upload_to="chat_blobs/")
+    size = models.BigIntegerField(default=0)
+    stored_size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+
+class ChatUpload(models.Model):
+    """
+    이어받기 가능한 분할 업로드 세션입니다.
+
+    클라이언트는 세션을 만든 뒤 offset과 함께 조각을 차례로 PUT하고, 마지막에 완료 요청을 보냅니다.
+    받은 조각은 디스크의 .part 파일 뒤에 이어 붙고, received는 지금까지 저장된 바이트 수입니다.
+    연결이 끊기면 received부터 다시 보내면 됩니다.
+    """
+    TARGET_CHOICES = [
+        ("play", "play"),
+        ("business", "business"),
+    ]
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    target = models.CharField(max_length=16, choices=TARGET_CHOICES)
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    size = models.BigIntegerField(null=True, blank=True)
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
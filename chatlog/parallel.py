@@ -0,0 +1,141 @@
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from .compression import CompressedChatReader, is_compressed
+from .formats import DETECT_BYTES, ChatFormat, detect_chat_format, get_chat_format
+from .index import ChatIndex
+from .parser import ChatIndexBuilder
+
+# 구간 경계를 찾을 때 한 번에 읽는 크기
+BOUNDARY_WINDOW = 1024 * 1024
+# 일꾼 하나가 맡는 구간 수. 날짜마다 대화량이 달라도 일꾼들이 비슷하게 끝나도록 잘게 나눕니다.
+SEGMENTS_PER_WORKER = 4
+
+
+def _iter_range(file_path: str, start: int, end: int, chunk_size: int = BOUNDARY_WINDOW):
+    if is_compressed(file_path):
+        yield from CompressedChatReader(file_path).iter_chunks(start, end)
+        return
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0 and (chunk := f.read(min(chunk_size, remaining))):
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _read_range(file_path: str, start: int, end: int) -> bytes:
+    return b"".join(_iter_range(file_path, start, end))
+
+
+def find_day_boundary(file_path: str, chat_format: ChatFormat, position: int, size: int) -> int:
+    """
+    position 이후 처음 나오는 날짜 구분선 줄의 시작 오프셋을 찾습니다. 없으면 size를 반환합니다.
+    날짜 구분선에서 자르면 여러 줄 메시지가 두 구간으로 갈라지지 않습니다.
+    """
+    # 바로 앞의 줄바꿈까지 보려고 한 바이트 앞에서부터 읽습니다.
+    window_start = max(position - 1, 0)
+    while window_start < size:
+        window = _read_range(file_path, window_start, min(window_start + BOUNDARY_WINDOW, size))
+        match = chat_format.boundary_pattern.search(window)
+        if match:
+            return window_start + match.end()
+        # 창 경계에 걸친 구분선을 놓치지 않도록 조금 겹쳐서 다음 창을 읽습니다.
+        window_start += max(len(window) - 64, 1)
+    return size
+
+
+def split_chat_segments(file_path: str, chat_format: ChatFormat, size: int, segments: int) -> list[tuple[int, int]]:
+    """파일을 날짜 구분선 경계에 맞춰 대략 같은 크기의 [start, end) 구간들로 나눕니다."""
+    bounds = [0]
+    for i in range(1, segments):
+        boundary = find_day_boundary(file_path, chat_format, size * i // segments, size)
+        if bounds[-1] < boundary < size:
+            bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def parse_chat_segment(file_path: str, start: int, end: int, format_name: str | None = None) -> ChatIndex:
+    """파일의 [start, end) 구간만 파싱합니다. 오프셋은 파일 기준으로 기록됩니다."""
+    builder = ChatIndexBuilder(start=start, chat_format=get_chat_format(format_name) if format_name else None)
+    for chunk in _iter_range(file_path, start, end):
+        builder.feed(chunk)
+    return builder.close()
+
+
+def merge_chat_indexes(parts: list[ChatIndex]) -> ChatIndex:
+    """
+    구간별 인덱스를 파일 순서대로 이어 붙여 하나의 인덱스로 만듭니다.
+    발신자 번호는 처음 등장한 순서대로 다시 매기므로, 한 번에 파싱한 결과와 같습니다.
+    """
+    senders = []
+    sender_ids = {}
+    merged = {name: array(typecode) for name, typecode in (
+        ("sender", "I"), ("timestamp", "q"), ("offset", "q"), ("length", "I"),
+        ("day", "I"), ("day_offset", "q"), ("day_message", "I"),
+    )}
+    line_count = 0
+
+    for part in parts:
+        mapping = []
+        for name in part.senders:
+            if name not in sender_ids:
+                sender_ids[name] = len(senders)
+                senders.append(name)
+            mapping.append(sender_ids[name])
+
+        first_message = len(merged["offset"])
+        if mapping == list(range(len(mapping))):
+            merged["sender"].extend(part.sender)
+        else:
+            merged["sender"].extend(mapping[s] for s in part.sender)
+        merged["timestamp"].extend(part.timestamp)
+        merged["offset"].extend(part.offset)
+        merged["length"].extend(part.length)
+        merged["day"].extend(part.day)
+        merged["day_offset"].extend(part.day_offset)
+        merged["day_message"].extend(m + first_message for m in part.day_message)
+        line_count += part.line_count
+
+    return ChatIndex(
+        title=parts[0].title,
+        senders=senders,
+        line_count=line_count,
+        size=parts[-1].size,
+        format_name=parts[0].format_name,
+        **merged,
+    )
+
+
+def parse_chat_parallel(file_path: str, size: int, workers: int) -> ChatIndex:
+    """
+    채팅 파일을 날짜 구분선 단위 구간으로 나눠 프로세스 풀에서 동시에 파싱한 뒤 합칩니다.
+    블록 압축된 파일도 구간마다 필요한 블록만 풀어서 읽습니다.
+
+    Args:
+        file_path (str): 채팅 파일 경로
+        size (int): 파일의 (압축을 푼) 전체 크기
+        workers (int): 프로세스 수
+
+    Returns:
+        ChatIndex: 한 번에 파싱한 것과 같은 인덱스
+    """
+    chat_format = detect_chat_format(_read_range(file_path, 0, min(DETECT_BYTES, size)))
+    segments = split_chat_segments(file_path, chat_format, size, workers * SEGMENTS_PER_WORKER)
+    if len(segments) == 1:
+        return parse_chat_segment(file_path, 0, size, chat_format.name)
+
+    # 요청을 처리하는 프로세스(스레드 포함)를 fork하지 않도록 spawn으로 일꾼을 띄웁니다.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(segments)), mp_context=context) as executor:
+        parts = list(executor.map(
+            parse_chat_segment,
+            [file_path] * len(segments),
+            [start for start, _ in segments],
+            [end for _, end in segments],
+            [chat_format.name] * len(segments),
+        ))
+    return merge_chat_indexes(parts)
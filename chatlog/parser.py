@@ -0,0 +1,165 @@
+import re
+from array import array
+from datetime import date
+
+from .formats import DETECT_BYTES, PM, detect_chat_format
+from .index import ChatIndex
+
+# 첫 줄: "🦁멋사 13기 잡담방🦁 님과 카카오톡 대화"
+TITLE_PATTERN = re.compile(r"^(.*?)\s*님과")
+
+
+def extract_title(first_line: str) -> str:
+    """
+    첫 줄에서 “~님과” 앞부분만 가져옵니다.
+    “님과” 패턴이 없으면 줄 전체를 리턴합니다.
+    """
+    first_line = first_line.lstrip("\ufeff").strip()
+    match = TITLE_PATTERN.match(first_line)
+    if match:
+        return match.group(1)
+    return first_line
+
+
+class ChatIndexBuilder:
+    """
+    채팅 파일을 청크 단위로 받아 한 번의 순회로 메시지 인덱스를 만듭니다.
+
+    파일 전체를 메모리에 올리지 않고, 줄 단위로 발신자·시각·바이트 오프셋·길이를 기록합니다.
+    업로드 중에 들어오는 청크를 그대로 feed() 해도 되고, 디스크의 파일을 읽어 feed() 해도 됩니다.
+
+    내보내기 형식(chat_format)을 주지 않으면 처음 DETECT_BYTES 만큼 모은 뒤 detect_chat_format()으로 판별합니다.
+    메시지마다 날짜가 붙는 형식(모바일)은 날짜 구분선이 없어도 날짜가 바뀌는 메시지에서 날짜 기록을 추가합니다.
+
+    파일의 중간 구간만 파싱할 때는 start(구간 시작 바이트 오프셋)를 넘기면 오프셋이 파일 기준으로 기록되고,
+    첫 줄을 채팅방 제목으로 읽지 않습니다.
+    """
+
+    def __init__(self, start: int = 0, chat_format=None):
+        self.title = ""
+        self.senders = []
+        self.sender = array("I")
+        self.timestamp = array("q")
+        self.offset = array("q")
+        self.length = array("I")
+        self.day = array("I")
+        self.day_offset = array("q")
+        self.day_message = array("I")
+        self.line_count = 0
+        self.size = start
+        self.format = chat_format
+
+        self._sender_ids = {}
+        self._pending = b""
+        self._current_day = 0  # 날짜 구분선이 나오기 전이면 0
+        self._message_start = None
+        self._read_title = start == 0
+        self._last_date_key = None
+        if chat_format is not None:
+            self._use_format(chat_format)
+
+    def feed(self, data: bytes) -> None:
+        if self._pending:
+            data = self._pending + data
+        if self.format is None:
+            if len(data) < DETECT_BYTES:
+                self._pending = data
+                return
+            self._use_format(detect_chat_format(data))
+        lines = data.split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._handle_line(line, len(line) + 1)
+
+    def close(self) -> ChatIndex:
+        if self.format is None:
+            self._use_format(detect_chat_format(self._pending))
+            pending, self._pending = self._pending, b""
+            self.feed(pending)
+        if self._pending:
+            self._handle_line(self._pending, len(self._pending))
+            self._pending = b""
+        self._close_message()
+        return ChatIndex(
+            title=self.title,
+            senders=self.senders,
+            sender=self.sender,
+            timestamp=self.timestamp,
+            offset=self.offset,
+            length=self.length,
+            day=self.day,
+            day_offset=self.day_offset,
+            day_message=self.day_message,
+            line_count=self.line_count,
+            size=self.size,
+            format_name=self.format.name,
+        )
+
+    def _use_format(self, chat_format) -> None:
+        # 줄마다 속성을 찾지 않도록 매칭 함수와 그룹 번호를 미리 꺼내 둡니다.
+        self.format = chat_format
+        self._match_message = chat_format.message_pattern.match
+        self._match_date = chat_format.date_pattern.match
+        groups = chat_format.message_pattern.groupindex
+        self._time_groups = (groups["ampm"], groups["hour"], groups["minute"])
+        self._name_group = groups["name"]
+        self._date_groups = (groups["year"], groups["month"], groups["day"]) if chat_format.dated_messages else None
+
+    def _handle_line(self, line: bytes, size: int) -> None:
+        if self.line_count == 0 and self._read_title:
+            self.title = extract_title(line.decode("utf-8", errors="replace"))
+
+        match = self._match_message(line)
+        if match:
+            self._close_message()
+            self._open_message(match)
+        else:
+            date_match = self._match_date(line)
+            if date_match:
+                self._close_message()
+                year, month, day = (int(x) for x in date_match.group(1, 2, 3))
+                self._start_day(date(year, month, day).toordinal())
+
+        self.size += size
+        self.line_count += 1
+
+    def _start_day(self, ordinal: int) -> None:
+        self._current_day = ordinal
+        self.day.append(ordinal)
+        self.day_offset.append(self.size)
+        self.day_message.append(len(self.offset))
+
+    def _open_message(self, match) -> None:
+        raw_name = match.group(self._name_group)
+        sender_id = self._sender_ids.get(raw_name)
+        if sender_id is None:
+            sender_id = len(self.senders)
+            self._sender_ids[raw_name] = sender_id
+            self.senders.append(raw_name.decode("utf-8", errors="replace"))
+
+        if self._date_groups:
+            date_key = match.group(*self._date_groups)
+            if date_key != self._last_date_key:
+                self._last_date_key = date_key
+                ordinal = date(*(int(x) for x in date_key)).toordinal()
+                if ordinal != self._current_day:
+                    # 날짜 구분선 없이 날짜가 바뀐 경우: 이 메시지부터 새 날짜로 기록합니다.
+                    self._start_day(ordinal)
+
+        ampm, hour, minute = match.group(*self._time_groups)
+        hour = int(hour) % 12
+        if ampm == PM:
+            hour += 12
+        minute = int(minute)
+
+        self.sender.append(sender_id)
+        # 분 단위 타임스탬프: 날짜 서수 * 1440 + 하루 중 분
+        self.timestamp.append(self._current_day * 1440 + hour * 60 + minute)
+        self.offset.append(self.size)
+        self._message_start = self.size
+
+    def _close_message(self) -> None:
+        # 메시지는 다음 메시지나 날짜 구분선이 나오기 전까지의 줄(여러 줄 메시지)을 모두 포함합니다.
+        if self._message_start is not None:
+            self.length.append(self.size - self._message_start)
+            self._message_start = None
@@ -0,0 +1,218 @@
+import logging
+from bisect import bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+
+from .compaction import compact_chat_text
+from .formats import DETECT_BYTES, detect_chat_format, get_chat_format
+from .index import ChatIndex
+from .utils import load_chat_index, parse_analysis_period, read_chat_ranges, read_chat_text
+
+# 토큰 수 추정에 쓰는 바이트당 토큰 비율. 한글은 UTF-8로 3바이트이고 대략 한 글자가 한 토큰이므로
+# 3바이트를 한 토큰으로 셉니다. 영문/숫자가 많으면 실제 토큰 수는 이보다 적습니다.
+BYTES_PER_TOKEN = 3
+# 앞 메시지와 이 시간(분) 이상 떨어진 메시지부터 새 대화 흐름(스레드)으로 봅니다.
+THREAD_GAP_MINUTES = 30
+# 스레드 하나가 예산에서 차지할 수 있는 최대 비율. 긴 스레드는 이 크기로 잘라 고르게 뽑히도록 합니다.
+MAX_THREAD_SHARE = 20
+# 뽑은 스레드 사이가 떨어져 있을 때 넣는 표시
+GAP_MARKER = "…(중략)…"
+
+# 프롬프트에 넣을 대화 표본: 본문, 기간 안의 전체 메시지 수, 표본에 담긴 메시지 수, 담긴 비율
+ChatSample = namedtuple("ChatSample", ["text", "num_chat", "sent_chat", "ratio"])
+# 프롬프트 하나에 들어가도록 나눈 표본의 한 구간: 본문과 그 안의 메시지 수
+ChatChunk = namedtuple("ChatChunk", ["text", "num_chat"])
+
+logger = logging.getLogger(__name__)
+
+
+def sample_chat_by_date(file_path: str, analysis_option: dict, token_budget: int | None = None) -> ChatSample:
+    """
+    사용자가 지정한 기간의 대화에서 토큰 예산(token_budget) 안에 들어가는 대표 표본을 골라 프롬프트용 문자열로 만듭니다.
+    기간 전체가 예산 안에 들어가면 그대로 보냅니다. 예산의 기본값은 프롬프트 하나의 예산(ANALYSIS_TOKEN_BUDGET)에
+    구간 수(ANALYSIS_MAP_REDUCE_CHUNKS)를 곱한 값이며, 프롬프트 하나보다 긴 표본은 split_chat_text()로 나눠 분석합니다.
+
+    - 대화는 THREAD_GAP_MINUTES 이상 끊긴 곳을 경계로 스레드로 나누고, 스레드 단위로 고르므로 대화 흐름이 끊기지 않습니다.
+    - 말수가 적은 사람부터 그 사람이 나오는 가장 짧은 스레드를 먼저 골라 모든 참여자가 표본에 들어가게 합니다.
+    - 남은 예산은 전체 기간에 걸쳐 일정한 간격으로 스레드를 뽑아 채웁니다. 대화가 많은 시기와 사람일수록 많이 뽑힙니다.
+    - 같은 기간, 같은 예산이면 항상 같은 표본이 나옵니다. (분석 결과 캐시의 키가 유지됩니다)
+    - CHAT_COMPACTION이 켜져 있으면 고른 대화를 compact_chat_text()로 줄여서 반환합니다. 예산은 줄이기 전 크기로 셉니다.
+
+    Args:
+        file_path (str): 채팅 파일 경로
+        analysis_option (dict): 시작일과 종료일이 담긴 딕셔너리
+        token_budget (int): 표본의 최대 토큰 수. 0이면 표본을 뽑지 않고 기간 전체를 보냅니다.
+
+    Returns:
+        ChatSample: (표본 문자열, 기간 안의 메시지 수, 표본에 담긴 메시지 수, 담긴 비율)
+    """
+    if token_budget is None:
+        token_budget = settings.ANALYSIS_TOKEN_BUDGET * max(settings.ANALYSIS_MAP_REDUCE_CHUNKS, 1)
+
+    start_date, end_date = parse_analysis_period(analysis_option)
+    index = load_chat_index(file_path)
+    chat_slice = index.select(start_date, end_date)
+    num_chat = chat_slice.last - chat_slice.first
+    if not num_chat:
+        return ChatSample("", 0, 0, 0.0)
+
+    budget_bytes = token_budget * BYTES_PER_TOKEN
+    if not token_budget or chat_slice.end - chat_slice.start <= budget_bytes:
+        text = read_chat_text(file_path, chat_slice.start, chat_slice.end)
+        return ChatSample(_join_chat_pieces(index, [text]), num_chat, num_chat, 1.0)
+
+    threads = split_chat_threads(index, chat_slice.first, chat_slice.last, max(budget_bytes // MAX_THREAD_SHARE, 1))
+    selected = select_chat_threads(index, threads, budget_bytes)
+
+    # 스레드마다 읽을 범위. 앞서 보낸 내용에 그날의 날짜 구분선이 없으면 구분선 줄도 함께 읽어 날짜를 알려 줍니다.
+    ranges = []
+    headers = []
+    previous_day = None
+    for first, last in selected:
+        day = bisect_right(index.day_message, first) - 1
+        has_header = day >= 0 and day != previous_day
+        if has_header:
+            ranges.append((index.day_offset[day], min(index.offset[index.day_message[day]], index.day_offset[day] + 256)))
+        ranges.append((index.offset[first], _thread_end(index, last)))
+        headers.append(has_header)
+        previous_day = bisect_right(index.day_message, last - 1) - 1
+    texts = iter(read_chat_ranges(file_path, ranges))
+
+    # 중략 표시 사이의 이어진 스레드들을 한 덩어리로 모아 덩어리마다 줄입니다.
+    pieces = []
+    lines = []
+    previous_last = None
+    for (first, last), has_header in zip(selected, headers):
+        if previous_last is not None and previous_last != first:
+            pieces.append("\n".join(lines) + "\n")
+            lines = []
+        if has_header:
+            lines.append(next(texts).split("\n", 1)[0].rstrip("\r"))
+        lines.append(next(texts).rstrip("\n"))
+        previous_last = last
+    pieces.append("\n".join(lines) + "\n")
+
+    sent_chat = sum(last - first for first, last in selected)
+    return ChatSample(_join_chat_pieces(index, pieces), num_chat, sent_chat, sent_chat / num_chat)
+
+
+def split_chat_text(text: str, max_bytes: int) -> list[ChatChunk]:
+    """
+    대화 문자열을 max_bytes 정도 이하의 비슷한 크기 구간들로 나눕니다.
+    메시지 첫 줄, 날짜 구분선, 중략 표시 앞에서만 자르므로 여러 줄 메시지가 두 구간으로 갈라지지 않습니다.
+    """
+    chat_format = detect_chat_format(text[:DETECT_BYTES].encode("utf-8"))
+    lines = [line.encode("utf-8") for line in text.splitlines(keepends=True)]
+    total = sum(len(line) for line in lines)
+    count = max(-(-total // max(max_bytes, 1)), 1)
+    target = -(-total // count)
+
+    chunks = []
+    current = []
+    size = 0
+    messages = 0
+    for line in lines:
+        is_message = chat_format.message_pattern.match(line) is not None
+        is_boundary = is_message or chat_format.date_pattern.match(line) or line.startswith(GAP_MARKER.encode("utf-8"))
+        # 마지막 구간이 자투리로 따로 생기지 않도록 구간 수는 count개까지만 만듭니다.
+        if current and is_boundary and size + len(line) > target and len(chunks) < count - 1:
+            chunks.append(ChatChunk(b"".join(current).decode("utf-8"), messages))
+            current, size, messages = [], 0, 0
+        current.append(line)
+        size += len(line)
+        messages += is_message
+    if current:
+        chunks.append(ChatChunk(b"".join(current).decode("utf-8"), messages))
+    return chunks
+
+
+def split_chat_threads(index: ChatIndex, first: int, last: int, max_bytes: int) -> list[tuple[int, int]]:
+    """
+    메시지 구간 [first, last)를 대화 흐름(스레드) 단위의 [first, last) 구간들로 나눕니다.
+    앞 메시지와 THREAD_GAP_MINUTES 이상 떨어지면 새 스레드를 시작하고, max_bytes를 넘는 스레드는 잘라서 나눕니다.
+    """
+    timestamp = index.timestamp
+    offset = index.offset
+    threads = []
+    thread_first = first
+    for i in range(first + 1, last):
+        if timestamp[i] - timestamp[i - 1] >= THREAD_GAP_MINUTES or offset[i] - offset[thread_first] > max_bytes:
+            threads.append((thread_first, i))
+            thread_first = i
+    threads.append((thread_first, last))
+    return threads
+
+
+def select_chat_threads(index: ChatIndex, threads: list[tuple[int, int]], budget_bytes: int) -> list[tuple[int, int]]:
+    """
+    스레드 중 budget_bytes 안에 들어가는 대표 스레드들을 골라 시간 순서대로 반환합니다.
+    모든 참여자가 적어도 한 번 나오도록 먼저 고른 뒤, 남은 예산은 전체 기간에서 일정한 간격으로 채웁니다.
+    """
+    sender = index.sender
+    sizes = [_thread_end(index, last) - index.offset[first] for first, last in threads]
+    thread_senders = [set(sender[first:last]) for first, last in threads]
+
+    activity = {}
+    best_thread = {}
+    for t, (first, last) in enumerate(threads):
+        for s in thread_senders[t]:
+            if s not in best_thread or sizes[t] < sizes[best_thread[s]]:
+                best_thread[s] = t
+        for s in sender[first:last]:
+            activity[s] = activity.get(s, 0) + 1
+
+    selected = [False] * len(threads)
+    used = 0
+    covered = set()
+
+    # 1. 말수가 적은 사람부터, 그 사람이 나오는 가장 짧은 스레드를 골라 모든 참여자를 담습니다.
+    for s in sorted(activity, key=activity.get):
+        t = best_thread[s]
+        if s in covered or used + sizes[t] > budget_bytes:
+            continue
+        selected[t] = True
+        used += sizes[t]
+        covered |= thread_senders[t]
+
+    # 2. 남은 예산은 아직 고르지 않은 스레드에서 바이트 비율만큼 일정한 간격으로 뽑습니다.
+    remaining_bytes = sum(size for t, size in enumerate(sizes) if not selected[t])
+    if remaining_bytes:
+        fraction = (budget_bytes - used) / remaining_bytes
+        carry = 0.0
+        for t, size in enumerate(sizes):
+            if selected[t]:
+                continue
+            carry += size * fraction
+            if carry >= size and used + size <= budget_bytes:
+                selected[t] = True
+                used += size
+                carry -= size
+
+    return [thread for t, thread in enumerate(threads) if selected[t]]
+
+
+def estimate_tokens(text: str) -> int:
+    """BYTES_PER_TOKEN으로 문자열의 토큰 수를 추정합니다."""
+    return len(text.encode("utf-8")) // BYTES_PER_TOKEN
+
+
+def _join_chat_pieces(index: ChatIndex, pieces: list[str]) -> str:
+    """
+    대화 덩어리들을 중략 표시(GAP_MARKER)로 이어 붙여 표본 문자열 하나로 만듭니다.
+    CHAT_COMPACTION이 켜져 있으면 덩어리마다 compact_chat_text()로 줄이고, 줄이기 전후의 추정 토큰 수를 로그로 남깁니다.
+    """
+    separator = GAP_MARKER + "\n"
+    text = separator.join(pieces)
+    if not settings.CHAT_COMPACTION:
+        return text
+
+    chat_format = get_chat_format(index.format_name)
+    compacted = separator.join(compact_chat_text(piece, chat_format) for piece in pieces)
+    before, after = estimate_tokens(text), estimate_tokens(compacted)
+    logger.info("chat compaction: %d -> %d tokens (%.1f%% saved)", before, after, 100 * (before - after) / max(before, 1))
+    return compacted
+
+
+def _thread_end(index: ChatIndex, last: int) -> int:
+    return index.offset[last - 1] + index.length[last - 1]
@@ -0,0 +1,206 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .formats import ChatFormat, get_chat_format
+from .sampling import THREAD_GAP_MINUTES
+from .utils import load_chat_index, parse_analysis_period, read_chat_bytes
+
+# 다른 사람의 메시지 뒤 이 시간(분) 안에 보낸 메시지를 답장으로 봅니다. 이보다 늦으면 답장이 아니라 새 대화입니다.
+REPLY_WINDOW_MINUTES = 6 * 60
+# 이 시간(분) 안에 온 답장을 즉각 응답으로 셉니다.
+IMMEDIATE_REPLY_MINUTES = 5
+# 메시지 첫 줄에서 헤더("[이름] [오후 3:12] ")를 찾을 때 살펴보는 최대 바이트 수
+HEADER_MAX_BYTES = 512
+# 프롬프트에 통계를 넣을 참여자 수. 말수가 많은 순서대로 넣습니다.
+PROMPT_STATS_PEOPLE = 20
+
+# 기간 안의 메시지별 배열: 참여자 이름 목록, 발신자 번호, 분 단위 시각, 본문 글자 수 (헤더와 줄바꿈 제외)와
+# 기간의 원본 bytes(data), 그 안에서 메시지 본문이 차지하는 범위 [body_start, body_end)
+ChatMessages = namedtuple("ChatMessages", ["senders", "sender", "timestamp", "chars", "data", "body_start", "body_end"])
+
+
+def load_chat_messages(file_path: str, analysis_option: dict) -> ChatMessages:
+    """
+    사용자가 지정한 기간의 메시지를 NumPy 배열로 불러옵니다.
+    발신자와 시각은 채팅 인덱스의 배열을 복사하지 않고 그대로 쓰고, 본문 글자 수는 기간의 바이트 범위를 한 번 읽어 계산합니다.
+
+    Args:
+        file_path (str): 채팅 파일 경로
+        analysis_option (dict): 시작일과 종료일이 담긴 딕셔너리
+
+    Returns:
+        ChatMessages: (참여자 이름 목록, 발신자 번호 배열, 시각 배열, 본문 글자 수 배열, 기간의 bytes, 본문 시작/끝 배열)
+    """
+    start_date, end_date = parse_analysis_period(analysis_option)
+    index = load_chat_index(file_path)
+    chat_slice = index.select(start_date, end_date)
+    first, last = chat_slice.first, chat_slice.last
+
+    sender = _as_array(index.sender)[first:last]
+    timestamp = _as_array(index.timestamp)[first:last]
+    if first == last:
+        empty = np.zeros(0, dtype=np.int64)
+        return ChatMessages(index.senders, sender, timestamp, empty, b"", empty, empty)
+
+    data = read_chat_bytes(file_path, chat_slice.start, chat_slice.end)
+    offset = _as_array(index.offset)[first:last] - chat_slice.start
+    length = _as_array(index.length)[first:last]
+    body_start, body_end = _body_ranges(data, offset, length, get_chat_format(index.format_name))
+    chars = _count_chars(data, body_start, body_end)
+    return ChatMessages(index.senders, sender, timestamp, chars, data, body_start, body_end)
+
+
+def compute_chat_stats(messages: ChatMessages) -> dict:
+    """
+    메시지 배열에서 답장 시간, 메시지 길이, 대화 시작 횟수 같은 통계를 계산합니다.
+    모두 타임스탬프와 글자 수만으로 정해지는 값이라 같은 기간이면 항상 같은 결과가 나옵니다.
+
+    - 답장: 바로 앞 메시지와 보낸 사람이 다르고 REPLY_WINDOW_MINUTES 안에 온 메시지. 앞 메시지와의 간격이 답장 시간입니다.
+    - 즉각 응답: IMMEDIATE_REPLY_MINUTES 안에 온 답장
+    - 대화 시작: 기간의 첫 메시지와, 앞 메시지와 THREAD_GAP_MINUTES 이상 떨어진 메시지
+    - 묻힌 메시지: 한 사람이 잇달아 보낸 메시지 묶음 뒤에 답장이 오지 않은 경우.
+      기간의 마지막 묶음은 뒤를 알 수 없으므로 세지 않습니다.
+
+    Args:
+        messages (ChatMessages): load_chat_messages()의 결과
+
+    Returns:
+        dict: 전체 통계와, 말수가 많은 순서로 정렬한 참여자별 통계 목록(people)
+              예: {"num_chat": 1200, "avg_reply": 3.4, "immediate_reply_ratio": 71.2, "ignored_ratio": 8.5,
+                   "people": [{"name": "김철수", "messages": 640, "avg_length": 12.3, "avg_reply": 2.9,
+                               "initiations": 31, "initiation_ratio": 55.4}, ...]}
+    """
+    sender = messages.sender.astype(np.intp)
+    timestamp = messages.timestamp
+    people = len(messages.senders)
+    num_chat = len(sender)
+
+    counts = np.bincount(sender, minlength=people)
+    char_totals = np.bincount(sender, weights=messages.chars, minlength=people)
+
+    gaps = np.diff(timestamp)
+    changed = sender[1:] != sender[:-1]
+    replies = reply_mask(sender, timestamp)
+    repliers = sender[1:][replies]
+    reply_gaps = gaps[replies]
+    reply_counts = np.bincount(repliers, minlength=people)
+    reply_totals = np.bincount(repliers, weights=reply_gaps, minlength=people)
+
+    starts = np.ones(num_chat, dtype=bool)
+    starts[1:] = gaps >= THREAD_GAP_MINUTES
+    initiations = np.bincount(sender[starts], minlength=people)
+    # changed[i]는 i번째 메시지가 한 묶음의 마지막 메시지라는 뜻이고, 그 뒤 메시지가 답장이 아니면 묻힌 묶음입니다.
+    runs = int(changed.sum())
+    ignored = int((changed & ~replies).sum())
+
+    people_stats = [
+        {
+            "name": messages.senders[i],
+            "messages": int(counts[i]),
+            "avg_length": _ratio(char_totals[i], counts[i]),
+            "avg_reply": _ratio(reply_totals[i], reply_counts[i]),
+            "initiations": int(initiations[i]),
+            "initiation_ratio": _ratio(initiations[i] * 100, starts.sum()),
+        }
+        for i in np.argsort(-counts, kind="stable")
+        if counts[i]
+    ]
+    return {
+        "num_chat": num_chat,
+        "avg_reply": _ratio(reply_gaps.sum(), len(reply_gaps)),
+        "immediate_reply_ratio": _ratio((reply_gaps <= IMMEDIATE_REPLY_MINUTES).sum() * 100, len(reply_gaps)),
+        "ignored_ratio": _ratio(ignored * 100, runs),
+        "people": people_stats,
+    }
+
+
+def reply_mask(sender: np.ndarray, timestamp: np.ndarray) -> np.ndarray:
+    """i+1번째 메시지가 i번째 메시지에 대한 답장이면 [i]가 True인 (메시지 수 - 1) 길이의 배열을 반환합니다."""
+    return (sender[1:] != sender[:-1]) & (np.diff(timestamp) <= REPLY_WINDOW_MINUTES)
+
+
+def find_in_bodies(messages: ChatMessages, pattern) -> tuple[np.ndarray, np.ndarray, list[bytes]]:
+    """
+    기간의 원본 bytes에서 bytes 정규식 pattern을 한 번에 찾고, 메시지 본문 안에서 찾은 것만 돌려줍니다.
+    헤더(보낸 사람 이름, 시각)나 날짜 구분선에서 찾은 것은 뺍니다.
+
+    Returns:
+        tuple: (찾은 메시지 번호 배열, 본문 시작에서 떨어진 바이트 수 배열, 찾은 bytes 목록)
+    """
+    found = [(match.start(), match.group()) for match in pattern.finditer(messages.data)]
+    if not found or not len(messages.body_start):
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64), []
+
+    position = np.array([start for start, _ in found], dtype=np.int64)
+    message = np.searchsorted(messages.body_start, position, side="right") - 1
+    inside = message >= 0
+    inside[inside] = position[inside] < messages.body_end[message[inside]]
+    keep = np.flatnonzero(inside)
+    message = message[keep]
+    return message, position[keep] - messages.body_start[message], [found[k][1] for k in keep]
+
+
+def find_person_stats(stats: dict, name: str) -> dict | None:
+    """
+    compute_chat_stats() 결과에서 이름이 name인 참여자의 통계를 찾습니다.
+    정확히 같은 이름이 없으면 한쪽 이름이 다른 쪽에 들어 있는 참여자가 한 명뿐일 때 그 사람을 돌려줍니다. (예: "철수"와 "김철수")
+    """
+    name = (name or "").strip()
+    if not name:
+        return None
+    for person in stats["people"]:
+        if person["name"] == name:
+            return person
+    candidates = [person for person in stats["people"] if name in person["name"] or person["name"] in name]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def format_chat_stats(stats: dict, limit: int = PROMPT_STATS_PEOPLE) -> str:
+    """프롬프트에 사실로 넣을 수 있도록 통계를 여러 줄 문자열로 만듭니다. 참여자는 말수가 많은 limit명까지 넣습니다."""
+    lines = [
+        f"- 기간 안의 메시지 수: {stats['num_chat']}개",
+        f"- 평균 답장 시간: {stats['avg_reply']}분",
+        f"- 즉각 응답률({IMMEDIATE_REPLY_MINUTES}분 이내 답장): {stats['immediate_reply_ratio']}%",
+        f"- 답장 없이 묻힌 메시지 비율: {stats['ignored_ratio']}%",
+        "- 참여자별 (메시지 수 / 평균 메시지 길이 / 평균 답장 시간 / 대화를 시작한 횟수와 비율):",
+    ]
+    for person in stats["people"][:limit]:
+        lines.append(
+            f"  - {person['name']}: {person['messages']}개 / {person['avg_length']}자 / {person['avg_reply']}분 / "
+            f"{person['initiations']}회 ({person['initiation_ratio']}%)"
+        )
+    return "\n".join(lines)
+
+
+def _as_array(values) -> np.ndarray:
+    # array.array는 버퍼 프로토콜을 지원하므로 복사하지 않고 같은 메모리를 NumPy 배열로 봅니다.
+    return np.frombuffer(values, dtype=values.typecode) if len(values) else np.zeros(0, dtype=values.typecode)
+
+
+def _body_ranges(data: bytes, offset: np.ndarray, length: np.ndarray, chat_format: ChatFormat) -> tuple[np.ndarray, np.ndarray]:
+    # 메시지 첫 줄의 헤더("[이름] [오후 3:12] ")를 건너뛴 본문의 [시작, 끝) 위치를 구합니다.
+    match = chat_format.message_pattern.match
+    header = np.fromiter(
+        ((found.end() if (found := match(data[pos:pos + HEADER_MAX_BYTES])) else 0) for pos in offset.tolist()),
+        dtype=np.int64, count=len(offset),
+    )
+    end = np.minimum(offset + length, len(data))
+    return np.minimum(offset + header, end), end
+
+
+def _count_chars(data: bytes, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    [start, end) 범위마다 글자 수를 셉니다.
+    UTF-8에서 이어지는 바이트(10xxxxxx)가 아닌 바이트가 글자 하나이므로, 그런 바이트의 누적 합을 한 번 만들어 두고
+    범위의 시작과 끝 위치에서 빼서 구합니다. 줄바꿈은 글자로 세지 않습니다.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    counted = ((buf & 0xC0) != 0x80) & (buf != 0x0A) & (buf != 0x0D)
+    cumulative = np.zeros(len(buf) + 1, dtype=np.int64)
+    np.cumsum(counted, out=cumulative[1:])
+    return cumulative[end] - cumulative[start]
+
+
+def _ratio(total, count) -> float:
+    return round(float(total) / int(count), 1) if count else 0.0
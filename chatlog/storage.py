@@ -0,0 +1,118 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+from .compression import COMPRESSED_SUFFIX, block_table_path, write_compressed_chat
+from .index import ChatIndex
+from .models import ChatBlob
+from .utils import index_path, load_chat_index
+
+BLOB_DIR = "chat_blobs"
+
+
+def blob_name(content_hash: str, compressed: bool = False) -> str:
+    """내용 해시로 blob 저장 경로를 만듭니다. 한 디렉터리에 파일이 몰리지 않도록 앞 두 글자로 나눕니다."""
+    name = f"{BLOB_DIR}/{content_hash[:2]}/{content_hash}.txt"
+    return name + COMPRESSED_SUFFIX if compressed else name
+
+
+def find_chat_blob(content_hash: str) -> ChatBlob | None:
+    if not content_hash:
+        return None
+    return ChatBlob.objects.filter(content_hash=content_hash).first()
+
+
+def acquire_chat_blob(file) -> ChatBlob:
+    """
+    업로드된 채팅 파일을 내용 해시 기준으로 저장하고 참조 수를 하나 올립니다.
+
+    같은 해시의 blob이 이미 있으면 파일을 다시 쓰지 않고 기존 blob(과 인덱스)을 그대로 씁니다.
+    처음 보는 내용이면 blob 파일과 업로드 중에 만든 인덱스를 함께 기록합니다.
+
+    Args:
+        file: ChatUploadHandler가 만든 업로드 파일 (content_hash, chat_index 속성 포함)
+
+    Returns:
+        ChatBlob: 업로드 파일이 가리키게 될 blob
+    """
+    content_hash = file.content_hash
+    with transaction.atomic():
+        blob, created = ChatBlob.objects.select_for_update().get_or_create(
+            content_hash=content_hash,
+            defaults={"size": file.size, "ref_count": 1},
+        )
+        if not created:
+            ChatBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+            return blob
+
+        block_writer = getattr(file, "block_writer", None)
+        compressed = block_writer is not None or settings.CHAT_COMPRESSION
+        name = blob_name(content_hash, compressed)
+        # 이전에 정리되지 못한 파일이 남아 있다면 내용이 같으므로 그대로 씁니다.
+        if not default_storage.exists(name):
+            file.seek(0)
+            if block_writer is not None:
+                # 업로드 중에 이미 블록 압축된 임시 파일을 그대로 옮깁니다.
+                _store_block_compressed(file, block_writer, default_storage.path(name))
+            elif compressed:
+                path = default_storage.path(name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_compressed_chat(file, path, level=settings.CHAT_COMPRESSION_LEVEL)
+            else:
+                name = default_storage.save(name, file)
+        blob.file.name = name
+        blob.stored_size = default_storage.size(name)
+        blob.save(update_fields=["file", "stored_size"])
+        file.chat_index.save(index_path(blob.file.path))
+    return blob
+
+
+def _store_block_compressed(file, block_writer, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        shutil.copyfileobj(file, out)
+    block_writer.save_table(block_table_path(path))
+    os.replace(tmp_path, path)
+
+
+def release_chat_blob(content_hash: str) -> None:
+    """
+    blob의 참조 수를 하나 내리고, 더 이상 가리키는 채팅이 없으면 파일과 인덱스를 삭제합니다.
+    파일 삭제는 트랜잭션이 커밋된 뒤에 수행합니다.
+    """
+    if not content_hash:
+        return
+
+    with transaction.atomic():
+        blob = ChatBlob.objects.select_for_update().filter(content_hash=content_hash).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ChatBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+            return
+
+        name = blob.file.name
+        blob.delete()
+        transaction.on_commit(lambda: _delete_blob_files(name))
+
+
+def _delete_blob_files(name: str) -> None:
+    if not name:
+        return
+    default_storage.delete(name)
+    path = default_storage.path(name)
+    for sidecar in (index_path(path), block_table_path(path)):
+        try:
+            os.remove(sidecar)
+        except FileNotFoundError:
+            pass
+
+
+def load_blob_index(blob: ChatBlob) -> ChatIndex:
+    """blob 옆에 저장된 인덱스를 불러옵니다. (없으면 다시 만듭니다)"""
+    return load_chat_index(blob.file.path)
@@ -0,0 +1,655 @@
+import gzip
+import hashlib
+import io
+import os
+import re
+import tempfile
+import zipfile
+from datetime import date
+
+from django.test import SimpleTestCase, override_settings
+
+from .aliases import ALIAS_NOTE, SpeakerAliases
+from .archive import ArchiveError, GzipDecoder, PlainDecoder, ZipDecoder, detect_decoder
+from .compaction import compact_chat_text
+from .compression import CompressedChatReader, write_compressed_chat
+from .formats import (
+    CHAT_FORMATS,
+    MOBILE_DOTTED_FORMAT,
+    MOBILE_KOREAN_FORMAT,
+    PC_FORMAT,
+    ChatFormat,
+    detect_chat_format,
+    get_chat_format,
+    register_chat_format,
+)
+from .interactions import (
+    InteractionPair,
+    compute_interaction_matrix,
+    format_interaction_pairs,
+    interaction_cells,
+    top_interaction_pairs,
+)
+from .management.commands._synthetic import write_synthetic_chat
+from .index import ChatIndex
+from .parallel import merge_chat_indexes, parse_chat_parallel, parse_chat_segment, split_chat_segments
+from .parser import ChatIndexBuilder
+from .sampling import GAP_MARKER, sample_chat_by_date, split_chat_text, split_chat_threads
+from .stats import compute_chat_stats, find_in_bodies, find_person_stats, format_chat_stats, load_chat_messages
+from .upload import ChatIngest, UploadRejected
+from .utils import filter_chat_by_date, index_path, read_chat_ranges, read_chat_text
+
+PC_CHAT = """🦁멋사 13기 잡담방🦁 님과 카카오톡 대화
+저장한 날짜 : 2024-01-06 00:00:00
+
+--------------- 2024년 1월 3일 수요일 ---------------
+[김철수] [오후 3:12] 안녕하세요
+[이영희] [오후 3:13] 반가워요
+두 줄짜리 메시지
+[김철수] [오후 3:20] 점심 뭐 먹지
+--------------- 2024년 1월 4일 목요일 ---------------
+[박민수] [오전 9:00] 좋은 아침
+[이영희] [오전 9:05] ㅋㅋㅋ
+--------------- 2024년 1월 5일 금요일 ---------------
+[김철수] [오후 11:59] 잘 자
+"""
+
+MOBILE_KOREAN_CHAT = """벤치마크 단톡방 님과 카카오톡 대화
+저장한 날짜 : 2024-01-05 00:00:00
+
+2024년 1월 3일 수요일
+2024년 1월 3일 오후 3:10, 김철수 : 안녕하세요
+2024년 1월 3일 오후 3:12: 박민수님이 들어왔습니다.
+2024년 1월 3일 오후 3:13, 박민수 : 반가워요
+2024년 1월 4일 목요일
+2024년 1월 4일 오전 9:00, 이영희 : 좋은 아침
+"""
+
+INDEX_ARRAYS = ("sender", "timestamp", "offset", "length", "day", "day_offset", "day_message")
+
+
+def build_index(text: str, chat_format=None):
+    builder = ChatIndexBuilder(chat_format=chat_format)
+    builder.feed(text.encode("utf-8"))
+    return builder.close()
+
+
+def write_chat(directory: str, text: str, name: str = "chat.txt") -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+class ChatIndexBuilderTests(SimpleTestCase):
+    def test_records_messages(self):
+        index = build_index(PC_CHAT)
+        self.assertEqual(index.title, "🦁멋사 13기 잡담방🦁")
+        self.assertEqual(index.senders, ["김철수", "이영희", "박민수"])
+        self.assertEqual(len(index), 6)
+        self.assertEqual(list(index.sender), [0, 1, 0, 2, 1, 0])
+        self.assertEqual(index.timestamp[0], date(2024, 1, 3).toordinal() * 1440 + 15 * 60 + 12)
+        self.assertEqual(index.timestamp[-1], date(2024, 1, 5).toordinal() * 1440 + 23 * 60 + 59)
+
+    def test_multi_line_message_keeps_following_lines(self):
+        index = build_index(PC_CHAT)
+        data = PC_CHAT.encode("utf-8")
+        message = data[index.offset[1]:index.offset[1] + index.length[1]].decode("utf-8")
+        self.assertEqual(message, "[이영희] [오후 3:13] 반가워요\n두 줄짜리 메시지\n")
+
+    def test_chunked_feed_matches_single_feed(self):
+        data = PC_CHAT.encode("utf-8")
+        builder = ChatIndexBuilder()
+        for i in range(0, len(data), 7):
+            builder.feed(data[i:i + 7])
+        index = builder.close()
+
+        expected = build_index(PC_CHAT)
+        for name in INDEX_ARRAYS:
+            self.assertEqual(getattr(index, name), getattr(expected, name), name)
+        self.assertEqual(index.size, len(data))
+
+    def test_save_and_load(self):
+        index = build_index(PC_CHAT)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "chat.txt.idx")
+            index.save(path)
+            loaded = ChatIndex.load(path)
+        self.assertEqual(loaded.title, index.title)
+        self.assertEqual(loaded.senders, index.senders)
+        self.assertEqual(loaded.format_name, "kakao_pc")
+        self.assertEqual(loaded.offset, index.offset)
+        self.assertEqual(loaded.day, index.day)
+
+    def test_load_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_chat(directory, PC_CHAT)
+            with self.assertRaises(ValueError):
+                ChatIndex.load(path)
+
+
+class ChatIndexSelectTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index(PC_CHAT)
+
+    def test_selects_whole_days(self):
+        chat_slice = self.index.select(date(2024, 1, 4), date(2024, 1, 4))
+        self.assertEqual((chat_slice.first, chat_slice.last), (3, 5))
+        text = PC_CHAT.encode("utf-8")[chat_slice.start:chat_slice.end].decode("utf-8")
+        self.assertTrue(text.startswith("--------------- 2024년 1월 4일"))
+        self.assertTrue(text.endswith("[이영희] [오전 9:05] ㅋㅋㅋ\n"))
+
+    def test_open_ended_range(self):
+        chat_slice = self.index.select(date(2024, 1, 4), None)
+        self.assertEqual((chat_slice.first, chat_slice.last), (3, 6))
+        self.assertEqual(chat_slice.end, self.index.size)
+
+        chat_slice = self.index.select(None, date(2024, 1, 3))
+        self.assertEqual((chat_slice.first, chat_slice.last), (0, 3))
+
+    def test_range_without_days_is_empty(self):
+        self.assertEqual(tuple(self.index.select(date(2023, 1, 1), date(2023, 12, 31))), (0, 0, 0, 0))
+        self.assertEqual(tuple(self.index.select(date(2024, 1, 5), date(2024, 1, 4))), (0, 0, 0, 0))
+
+    def test_filter_chat_by_date(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_chat(directory, PC_CHAT)
+            text, num_chat = filter_chat_by_date(path, {"start": "2024-01-04", "end": "끝까지"})
+            self.assertTrue(os.path.exists(index_path(path)))
+            empty = filter_chat_by_date(path, {"start": "2025-01-01", "end": "끝까지"})
+
+        self.assertEqual(num_chat, 3)
+        self.assertNotIn("안녕하세요", text)
+        self.assertIn("잘 자", text)
+        self.assertEqual(empty, ("", 0))
+
+
+class ReadChatTextTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = write_chat(self.directory, PC_CHAT)
+        self.data = PC_CHAT.encode("utf-8")
+
+    def test_mmap_matches_buffered(self):
+        index = build_index(PC_CHAT)
+        start, end = index.offset[1], index.offset[3]
+        self.assertEqual(read_chat_text(self.path, start, end, mode="mmap"), self.data[start:end].decode("utf-8"))
+        self.assertEqual(read_chat_text(self.path, start, end, mode="buffered"), self.data[start:end].decode("utf-8"))
+        self.assertEqual(read_chat_text(self.path), PC_CHAT)
+
+    def test_read_ranges(self):
+        index = build_index(PC_CHAT)
+        ranges = [(index.offset[i], index.offset[i] + index.length[i]) for i in (0, 3, 5)]
+        self.assertEqual(
+            read_chat_ranges(self.path, ranges),
+            ["[김철수] [오후 3:12] 안녕하세요\n", "[박민수] [오전 9:00] 좋은 아침\n", "[김철수] [오후 11:59] 잘 자\n"],
+        )
+
+    def test_empty_file(self):
+        path = write_chat(self.directory, "", name="empty.txt")
+        self.assertEqual(read_chat_text(path), "")
+        self.assertEqual(read_chat_ranges(path, [(0, 0)]), [""])
+
+
+class CompressedChatTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data = PC_CHAT.encode("utf-8")
+        self.path = os.path.join(directory.name, "chat.txt.gz")
+        # 블록 경계가 메시지와 글자 중간에 걸치도록 작은 블록을 씁니다.
+        write_compressed_chat(io.BytesIO(self.data), self.path, block_size=64)
+
+    def test_file_is_plain_gzip(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), self.data)
+
+    def test_reads_ranges_across_blocks(self):
+        reader = CompressedChatReader(self.path)
+        self.assertEqual(reader.size, len(self.data))
+        self.assertGreater(len(reader.raw_offset), 3)
+        self.assertEqual(reader.read(), self.data)
+        self.assertEqual(reader.read(50, 200), self.data[50:200])
+        self.assertEqual(reader.read_ranges([(0, 10), (60, 70), (70, 300)]), [self.data[0:10], self.data[60:70], self.data[70:300]])
+
+    def test_chat_helpers_read_compressed_files(self):
+        self.assertEqual(read_chat_text(self.path), PC_CHAT)
+        text, num_chat = filter_chat_by_date(self.path, {"start": "2024-01-04", "end": "2024-01-04"})
+        self.assertEqual(num_chat, 2)
+        self.assertTrue(text.startswith("--------------- 2024년 1월 4일"))
+
+
+def decode_in_chunks(decoder, data: bytes, size: int = 17) -> bytes:
+    decoded = b"".join(b"".join(decoder.feed(data[i:i + size])) for i in range(0, len(data), size))
+    decoder.finish()
+    return decoded
+
+
+def zip_archive(entries: list[tuple[str, bytes]]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class ArchiveDecoderTests(SimpleTestCase):
+    def setUp(self):
+        self.data = PC_CHAT.encode("utf-8")
+
+    def test_detects_decoder_from_magic_bytes(self):
+        self.assertIsInstance(detect_decoder(zip_archive([("a.txt", b"x")])), ZipDecoder)
+        self.assertIsInstance(detect_decoder(gzip.compress(b"x")), GzipDecoder)
+        self.assertIsInstance(detect_decoder(self.data, "chat.txt"), PlainDecoder)
+        with self.assertRaises(ArchiveError):
+            detect_decoder(self.data, "chat.zip")
+
+    def test_gzip_upload(self):
+        self.assertEqual(decode_in_chunks(GzipDecoder(), gzip.compress(self.data)), self.data)
+
+    def test_truncated_gzip_is_rejected(self):
+        with self.assertRaises(ArchiveError):
+            decode_in_chunks(GzipDecoder(), gzip.compress(self.data)[:-20])
+
+    def test_zip_upload_skips_entries_before_chat(self):
+        archive = zip_archive([("photo.jpg", os.urandom(300)), ("KakaoTalkChats.txt", self.data), ("other.txt", b"x")])
+        self.assertEqual(decode_in_chunks(ZipDecoder(), archive), self.data)
+
+    def test_zip_without_chat_is_rejected(self):
+        with self.assertRaises(ArchiveError):
+            decode_in_chunks(ZipDecoder(), zip_archive([("photo.jpg", b"jpg")]))
+
+    @override_settings(CHAT_COMPRESSION=False)
+    def test_compression_bomb_is_rejected(self):
+        ingest = ChatIngest(io.BytesIO(), "chat.gz", max_ratio=50)
+        with self.assertRaises(UploadRejected) as raised:
+            ingest.feed(gzip.compress(b"a" * (4 * 1024 * 1024)))
+        self.assertTrue(raised.exception.too_large)
+
+
+@override_settings(CHAT_COMPRESSION=False)
+class ChatIngestTests(SimpleTestCase):
+    def test_parses_while_receiving(self):
+        data = PC_CHAT.encode("utf-8")
+        out = io.BytesIO()
+        ingest = ChatIngest(out, "chat.txt", ChatIndexBuilder())
+        for i in range(0, len(data), 10):
+            ingest.feed(data[i:i + 10])
+        content_hash = ingest.finish()
+        index = ingest.builder.close()
+
+        self.assertEqual(out.getvalue(), data)
+        self.assertEqual(content_hash, hashlib.sha256(data).hexdigest())
+        self.assertEqual(ingest.decoded, len(data))
+        self.assertEqual(index.senders, ["김철수", "이영희", "박민수"])
+        self.assertEqual(len(index), 6)
+
+    def test_rejects_too_large_upload(self):
+        ingest = ChatIngest(io.BytesIO(), "chat.txt", ChatIndexBuilder(), max_size=16)
+        with self.assertRaises(UploadRejected) as raised:
+            ingest.feed(PC_CHAT.encode("utf-8"))
+        self.assertTrue(raised.exception.too_large)
+
+
+class ParallelParseTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def parse_once(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        return build_index(data.decode("utf-8")), data
+
+    def assertSameIndex(self, index, expected):
+        self.assertEqual(index.senders, expected.senders)
+        self.assertEqual(index.title, expected.title)
+        self.assertEqual(index.line_count, expected.line_count)
+        self.assertEqual(index.size, expected.size)
+        for name in INDEX_ARRAYS:
+            self.assertEqual(getattr(index, name), getattr(expected, name), name)
+
+    def test_segments_start_at_date_lines(self):
+        for format_name in ("kakao_pc", "kakao_mobile_korean"):
+            with self.subTest(format_name):
+                path = os.path.join(self.directory, f"{format_name}.txt")
+                write_synthetic_chat(path, 3000, chat_format=format_name)
+                expected, data = self.parse_once(path)
+                chat_format = get_chat_format(format_name)
+
+                segments = split_chat_segments(path, chat_format, len(data), 6)
+                self.assertGreater(len(segments), 1)
+                self.assertEqual(segments[0][0], 0)
+                self.assertEqual(segments[-1][1], len(data))
+                for (_, end), (start, _) in zip(segments, segments[1:]):
+                    self.assertEqual(end, start)
+                    self.assertIn(start, expected.day_offset)
+
+                parts = [parse_chat_segment(path, start, end, format_name) for start, end in segments]
+                self.assertSameIndex(merge_chat_indexes(parts), expected)
+
+    def test_process_pool_matches_single_pass(self):
+        path = os.path.join(self.directory, "chat.txt")
+        write_synthetic_chat(path, 2000)
+        expected, data = self.parse_once(path)
+        self.assertSameIndex(parse_chat_parallel(path, len(data), 2), expected)
+
+
+@override_settings(CHAT_COMPACTION=False)
+class ChatSamplingTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "chat.txt")
+        write_synthetic_chat(self.path, 5000)
+        # 한 번만 말한 참여자를 대화 중간에 넣습니다.
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        position = text.index("\n[", len(text) // 2) + 1
+        position = text.index("] [", position)
+        text = text[:text.rindex("\n[", 0, position) + 2] + "조용한사람" + text[position:]
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.option = {"start": "처음부터", "end": "끝까지"}
+
+    def test_small_period_is_sent_whole(self):
+        sample = sample_chat_by_date(self.path, {"start": "2020-01-02", "end": "2020-01-02"}, token_budget=100_000)
+        self.assertEqual(sample.num_chat, sample.sent_chat)
+        self.assertEqual(sample.ratio, 1.0)
+        self.assertNotIn(GAP_MARKER, sample.text)
+
+    def test_sample_fits_budget_and_covers_everyone(self):
+        budget = 3000
+        sample = sample_chat_by_date(self.path, self.option, token_budget=budget)
+        index = build_index(read_chat_text(self.path))
+
+        self.assertEqual(sample.num_chat, len(index))
+        self.assertLess(sample.sent_chat, sample.num_chat)
+        self.assertAlmostEqual(sample.ratio, sample.sent_chat / sample.num_chat)
+        self.assertIn(GAP_MARKER, sample.text)
+        self.assertLessEqual(len(sample.text.encode("utf-8")), budget * 3 * 1.2)
+        for name in index.senders:
+            self.assertIn(f"[{name}] ", sample.text)
+
+    def test_sample_is_deterministic(self):
+        first = sample_chat_by_date(self.path, self.option, token_budget=3000)
+        second = sample_chat_by_date(self.path, self.option, token_budget=3000)
+        self.assertEqual(first, second)
+
+    def test_compaction_shrinks_sample(self):
+        with override_settings(CHAT_COMPACTION=True):
+            compacted = sample_chat_by_date(self.path, self.option, token_budget=3000)
+        plain = sample_chat_by_date(self.path, self.option, token_budget=3000)
+
+        self.assertEqual((compacted.num_chat, compacted.sent_chat), (plain.num_chat, plain.sent_chat))
+        self.assertLess(len(compacted.text), len(plain.text))
+
+    def test_zero_budget_sends_everything(self):
+        sample = sample_chat_by_date(self.path, self.option, token_budget=0)
+        self.assertEqual(sample.ratio, 1.0)
+        self.assertEqual(sample.sent_chat, sample.num_chat)
+
+    def test_threads_split_on_silence(self):
+        index = build_index(PC_CHAT)
+        self.assertEqual(split_chat_threads(index, 0, len(index), 10_000), [(0, 3), (3, 5), (5, 6)])
+        self.assertEqual(split_chat_threads(index, 0, 3, 40), [(0, 1), (1, 2), (2, 3)])
+
+    def test_split_chat_text_keeps_messages_whole(self):
+        chunks = split_chat_text(PC_CHAT, 200)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunk.text for chunk in chunks), PC_CHAT)
+        self.assertEqual(sum(chunk.num_chat for chunk in chunks), 6)
+        for chunk in chunks[1:]:
+            self.assertTrue(chunk.text.startswith(("[", "-")), chunk.text)
+
+
+class ChatStatsTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = write_chat(directory.name, PC_CHAT)
+        self.messages = load_chat_messages(self.path, {"start": "처음부터", "end": "끝까지"})
+
+    def test_messages_arrays(self):
+        self.assertEqual(list(self.messages.sender), [0, 1, 0, 2, 1, 0])
+        # 헤더와 줄바꿈은 글자 수에 넣지 않습니다.
+        self.assertEqual(list(self.messages.chars), [5, 13, 7, 5, 3, 3])
+
+    def test_stats(self):
+        stats = compute_chat_stats(self.messages)
+        self.assertEqual(stats["num_chat"], 6)
+        self.assertEqual(stats["avg_reply"], 4.3)
+        self.assertEqual(stats["immediate_reply_ratio"], 66.7)
+        self.assertEqual(stats["ignored_ratio"], 40.0)
+        self.assertEqual(stats["people"], [
+            {"name": "김철수", "messages": 3, "avg_length": 5.0, "avg_reply": 7.0, "initiations": 2, "initiation_ratio": 66.7},
+            {"name": "이영희", "messages": 2, "avg_length": 8.0, "avg_reply": 3.0, "initiations": 0, "initiation_ratio": 0.0},
+            {"name": "박민수", "messages": 1, "avg_length": 5.0, "avg_reply": 0.0, "initiations": 1, "initiation_ratio": 33.3},
+        ])
+
+    def test_period_and_empty_period(self):
+        stats = compute_chat_stats(load_chat_messages(self.path, {"start": "2024-01-04", "end": "2024-01-04"}))
+        self.assertEqual(stats["num_chat"], 2)
+        # 말수가 같으면 대화에 먼저 나온 참여자가 앞에 옵니다.
+        self.assertEqual([person["name"] for person in stats["people"]], ["이영희", "박민수"])
+
+        empty = compute_chat_stats(load_chat_messages(self.path, {"start": "2000-01-01", "end": "2000-01-02"}))
+        self.assertEqual((empty["num_chat"], empty["avg_reply"], empty["people"]), (0, 0.0, []))
+
+    def test_find_person_stats(self):
+        stats = compute_chat_stats(self.messages)
+        self.assertEqual(find_person_stats(stats, "이영희")["messages"], 2)
+        self.assertEqual(find_person_stats(stats, " 철수 ")["name"], "김철수")
+        # "수"는 김철수와 박민수 둘 다에 들어 있으므로 찾지 않습니다.
+        self.assertIsNone(find_person_stats(stats, "수"))
+        self.assertIsNone(find_person_stats(stats, ""))
+
+    def test_format_chat_stats(self):
+        text = format_chat_stats(compute_chat_stats(self.messages), limit=1)
+        self.assertIn("- 기간 안의 메시지 수: 6개", text)
+        self.assertIn("  - 김철수: 3개 / 5.0자 / 7.0분 / 2회 (66.7%)", text)
+        self.assertNotIn("이영희", text)
+
+    def test_find_in_bodies_skips_headers(self):
+        message, position, found = find_in_bodies(self.messages, re.compile("(?:ㅋ)+".encode("utf-8")))
+        self.assertEqual((list(message), list(position), found), ([4], [0], ["ㅋㅋㅋ".encode("utf-8")]))
+        self.assertEqual(len(find_in_bodies(self.messages, re.compile("김철수".encode("utf-8")))[0]), 0)
+
+
+INTERACTION_CHAT = """멘션 테스트방 님과 카카오톡 대화
+저장한 날짜 : 2024-01-06 00:00:00
+
+--------------- 2024년 1월 3일 수요일 ---------------
+[김철수] [오전 10:00] 영희야 밥 먹었어?
+[이영희] [오전 10:01] 응 철수 너는?
+[김철수] [오전 10:02] 나도
+[박민수] [오전 10:03] 민수도 왔어 영희 영희
+"""
+
+
+class InteractionMatrixTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = write_chat(directory.name, INTERACTION_CHAT)
+        self.matrix = compute_interaction_matrix(load_chat_messages(path, {"start": "처음부터", "end": "끝까지"}))
+
+    def test_directed_cells(self):
+        # 답장과 멘션(성을 뺀 이름 포함)을 방향별로 셉니다. 자기 이름과 한 메시지 안의 같은 멘션은 한 번만 셉니다.
+        self.assertEqual(self.matrix.names, ["김철수", "이영희", "박민수"])
+        cells = {
+            (int(row), int(column)): (int(replies), int(mentions), int(score))
+            for row, column, replies, mentions, score in zip(*self.matrix[1:])
+        }
+        self.assertEqual(cells, {
+            (0, 1): (1, 1, 100),
+            (1, 0): (1, 1, 100),
+            (2, 0): (1, 0, 58),
+            (2, 1): (0, 1, 82),
+        })
+        self.assertEqual(interaction_cells(self.matrix), [[0, 1, 100], [1, 0, 100], [2, 0, 58], [2, 1, 82]])
+
+    def test_top_pairs(self):
+        pairs = top_interaction_pairs(self.matrix)
+        self.assertEqual(
+            [tuple(pair) for pair in pairs],
+            [("김철수", "이영희", 100, 2, 2), ("이영희", "박민수", 58, 0, 1), ("김철수", "박민수", 41, 1, 0)],
+        )
+        self.assertEqual(
+            format_interaction_pairs(pairs[:1]),
+            "1. 김철수 & 이영희: 100점 (서로 주고받은 답장 2번, 이름 부르기 2번)",
+        )
+        self.assertEqual(len(top_interaction_pairs(self.matrix, limit=1)), 1)
+
+    def test_empty_period(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = write_chat(directory.name, INTERACTION_CHAT)
+        matrix = compute_interaction_matrix(load_chat_messages(path, {"start": "2000-01-01", "end": "2000-01-02"}))
+        self.assertEqual(matrix.names, [])
+        self.assertEqual(top_interaction_pairs(matrix), [])
+        self.assertEqual(interaction_cells(matrix), [])
+
+
+class CompactChatTextTests(SimpleTestCase):
+    def test_pc_chat(self):
+        text = (
+            "--------------- 2024년 1월 3일 수요일 ---------------\n"
+            "[김철수] [오후 3:12] 안녕하세요\n"
+            "[김철수] [오후 3:13] 이거 봐 https://example.com/a?b=1\n"
+            "[김철수] [오후 3:14] 사진\n"
+            "[김철수] [오후 3:14] 사진 3장\n"
+            "[이영희] [오후 3:30] ㅋㅋㅋㅋㅋㅋㅋ 대박!!!!!\n"
+            "두 번째 줄\n"
+            "\n"
+            "박민수님이 들어왔습니다.\n"
+            "[박민수] [오후 3:40] 이모티콘\n"
+            "[김철수] [오후 3:55] 잘 자\n"
+        )
+        self.assertEqual(compact_chat_text(text, PC_FORMAT), (
+            "--- 2024년 1월 3일 ---\n"
+            "[김철수] [오후 3:12] 안녕하세요\n"
+            "이거 봐 (링크)\n"
+            "(사진×4)\n"
+            "[이영희] [오후 3:30] ㅋㅋㅋ 대박!!!\n"
+            "두 번째 줄\n"
+            "(박민수 입장)\n"
+            "[박민수] [오후 3:40] (이모티콘)\n"
+            "[김철수] [오후 3:55] 잘 자\n"
+        ))
+
+    def test_mobile_chat_becomes_pc_format(self):
+        text = MOBILE_KOREAN_CHAT.split("\n\n", 1)[1]
+        compacted = compact_chat_text(text, MOBILE_KOREAN_FORMAT)
+
+        self.assertEqual(compacted, (
+            "--- 2024년 1월 3일 ---\n"
+            "[김철수] [오후 3:10] 안녕하세요\n"
+            "(박민수 입장)\n"
+            "[박민수] [오후 3:13] 반가워요\n"
+            "--- 2024년 1월 4일 ---\n"
+            "[이영희] [오전 9:00] 좋은 아침\n"
+        ))
+        self.assertIs(detect_chat_format(compacted.encode("utf-8")), PC_FORMAT)
+        self.assertEqual(sum(chunk.num_chat for chunk in split_chat_text(compacted, 60)), 3)
+
+    def test_empty_text(self):
+        self.assertEqual(compact_chat_text("", PC_FORMAT), "")
+
+
+class SpeakerAliasesTests(SimpleTestCase):
+    def test_headers_are_aliased_by_message_count(self):
+        aliases = SpeakerAliases.for_chat(PC_CHAT)
+        self.assertEqual(aliases.aliases, {"김철수": "P1", "이영희": "P2", "박민수": "P3"})
+        self.assertEqual(aliases.note, ALIAS_NOTE)
+
+        text = aliases.alias_chat("[김철수] [오후 3:12] 영희야 김철수 여기\n(박민수 입장)\n[이영희] [오후 3:13] 응\n")
+        # 본문 속 이름은 그대로 둡니다.
+        self.assertEqual(text, "[P1] [오후 3:12] 영희야 김철수 여기\n(P3 입장)\n[P2] [오후 3:13] 응\n")
+
+    def test_given_names_come_first(self):
+        aliases = SpeakerAliases.for_chat(PC_CHAT, ["박민수"])
+        self.assertEqual(aliases.aliases, {"박민수": "P1", "김철수": "P2", "이영희": "P3"})
+
+    def test_restore(self):
+        aliases = SpeakerAliases.for_chat(PC_CHAT)
+        restored = aliases.restore({
+            "name_A": "P1", "comment": "P1와 P2는 MP3와 P10 이야기를 합니다", "people": [{"name": "P3"}], "score": 80,
+        })
+        self.assertEqual(restored, {
+            "name_A": "김철수", "comment": "김철수와 이영희는 MP3와 P10 이야기를 합니다", "people": [{"name": "박민수"}], "score": 80,
+        })
+
+    def test_alias_facts(self):
+        aliases = SpeakerAliases(["김철수", "이영희", "A"])
+        self.assertEqual(aliases.aliases, {"김철수": "P1", "이영희": "P2"})
+        pair = InteractionPair("김철수", "이영희", 100, 2, 2)
+        self.assertEqual(aliases.alias({"people": [{"name": "김철수"}], "pair": pair}), {
+            "people": [{"name": "P1"}], "pair": InteractionPair("P1", "P2", 100, 2, 2),
+        })
+        self.assertEqual(aliases.alias("김철수의 친구"), "김철수의 친구")
+
+    def test_alias_like_chat_is_left_alone(self):
+        chat = PC_CHAT.replace("좋은 아침", "P1 버그 고쳤어요")
+        aliases = SpeakerAliases.for_chat(chat)
+
+        self.assertFalse(aliases.enabled)
+        self.assertEqual(aliases.note, "")
+        self.assertEqual(aliases.alias_chat(chat), chat)
+        self.assertEqual(aliases.restore({"name": "P1"}), {"name": "P1"})
+
+
+class MobileDateLineTests(SimpleTestCase):
+    def test_weekday_line_is_date_line(self):
+        match = MOBILE_KOREAN_FORMAT.date_pattern.match("2024년 1월 3일 수요일".encode("utf-8"))
+        self.assertEqual(match.group(1, 2, 3), (b"2024", b"1", b"3"))
+
+    def test_system_notice_is_not_date_line(self):
+        line = "2024년 1월 3일 오후 3:12: 박민수님이 들어왔습니다.".encode("utf-8")
+        self.assertIsNone(MOBILE_KOREAN_FORMAT.date_pattern.match(line))
+
+    def test_system_notice_does_not_split_days(self):
+        index = build_index(MOBILE_KOREAN_CHAT)
+        self.assertEqual(index.format_name, "kakao_mobile_korean")
+        self.assertEqual([date.fromordinal(day) for day in index.day], [date(2024, 1, 3), date(2024, 1, 4)])
+
+        first_day = index.select(date(2024, 1, 3), date(2024, 1, 3))
+        self.assertEqual((first_day.first, first_day.last), (0, 2))
+
+
+
+class ChatFormatTests(SimpleTestCase):
+    def test_detects_each_format(self):
+        self.assertIs(detect_chat_format(PC_CHAT.encode("utf-8")), PC_FORMAT)
+        self.assertIs(detect_chat_format(MOBILE_KOREAN_CHAT.encode("utf-8")), MOBILE_KOREAN_FORMAT)
+        dotted = "2024년 1월 3일 수요일\n2024. 1. 3. 오후 3:10, 김철수 : 안녕하세요\n"
+        self.assertIs(detect_chat_format(dotted.encode("utf-8")), MOBILE_DOTTED_FORMAT)
+
+    def test_unknown_text_falls_back_to_pc(self):
+        self.assertIs(detect_chat_format("그냥 텍스트\n".encode("utf-8")), PC_FORMAT)
+
+    def test_mobile_messages_start_days_without_date_lines(self):
+        text = "2024. 1. 3. 오후 3:10, 김철수 : 안녕\n2024. 1. 4. 오전 9:00, 이영희 : 아침\n"
+        index = build_index(text, MOBILE_DOTTED_FORMAT)
+        self.assertEqual([date.fromordinal(day) for day in index.day], [date(2024, 1, 3), date(2024, 1, 4)])
+        self.assertEqual(list(index.day_message), [0, 1])
+
+    def test_registered_format_is_detected(self):
+        chat_format = ChatFormat(
+            name="test_tab",
+            description="탭으로 나눈 테스트 형식",
+            message_pattern=r"^(?P<ampm>오전|오후) (?P<hour>\d{1,2}):(?P<minute>\d{2})\t(?P<name>[^\t]+)\t",
+            date_pattern=r"^== (\d{4})-(\d{1,2})-(\d{1,2}) ==",
+            boundary_pattern=r"\n(?=== \d{4}-)",
+        )
+        register_chat_format(chat_format)
+        self.addCleanup(CHAT_FORMATS.pop, "test_tab")
+
+        text = "== 2024-01-03 ==\n오후 3:10\t김철수\t안녕\n오후 3:11\t이영희\t반가워\n"
+        self.assertIs(detect_chat_format(text.encode("utf-8")), chat_format)
+        index = build_index(text)
+        self.assertEqual(index.format_name, "test_tab")
+        self.assertEqual(index.senders, ["김철수", "이영희"])
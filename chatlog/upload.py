@@ -0,0 +1,184 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload, TemporaryFileUploadHandler
+
+from .archive import DECODE_STEP, ArchiveError, GzipDecoder, detect_decoder
+from .compression import BlockGzipWriter
+from .parser import ChatIndexBuilder
+from .storage import find_chat_blob, load_blob_index
+from .utils import READ_CHUNK_SIZE, build_chat_index
+
+
+class UploadRejected(Exception):
+    """업로드를 더 받을 수 없을 때 발생합니다. too_large면 413, 아니면 400으로 응답합니다."""
+
+    def __init__(self, message: str, too_large: bool = False):
+        super().__init__(message)
+        self.message = message
+        self.too_large = too_large
+
+
+class ChatIngest:
+    """
+    업로드된 바이트를 받아 저장용 임시 파일을 채우는 파이프라인입니다.
+
+    (압축 업로드라면 풀면서) 대화 내용을 ChatIndexBuilder와 SHA-256에 흘려보내고,
+    CHAT_COMPRESSION이 켜져 있으면 out에 바로 블록 압축해서 씁니다.
+    .zip/.gz 업로드는 첫 바이트로 알아보고 받는 대로 풀며, 원본 크기의 사본을 따로 만들지 않습니다.
+
+    풀린 크기가 max_size를 넘거나 압축률이 max_ratio를 넘으면 UploadRejected(too_large=True),
+    압축 파일을 읽을 수 없으면 UploadRejected를 발생시킵니다.
+    builder를 None으로 넘기면 파싱은 하지 않습니다. (이미 인덱스가 있거나 따로 만들고 있는 경우)
+    """
+
+    def __init__(self, out, file_name: str = "", builder=None, max_size=None, max_ratio=None):
+        self.out = out
+        self.file_name = file_name
+        self.builder = builder
+        self.max_size = max_size or settings.CHAT_UPLOAD_MAX_SIZE
+        self.max_ratio = max_ratio or settings.CHAT_UPLOAD_MAX_RATIO
+        self.hasher = hashlib.sha256()
+        self.decoder = None
+        self.block_writer = None
+        if settings.CHAT_COMPRESSION:
+            self.block_writer = BlockGzipWriter(out, level=settings.CHAT_COMPRESSION_LEVEL)
+        self.received = 0
+        self.decoded = 0
+
+    def feed(self, raw_data: bytes) -> None:
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            raise UploadRejected("채팅 파일이 너무 큽니다.", too_large=True)
+
+        try:
+            if self.decoder is None:
+                self.decoder = detect_decoder(raw_data, self.file_name)
+            for data in self.decoder.feed(raw_data):
+                self._write(data)
+        except ArchiveError as e:
+            raise UploadRejected(str(e))
+
+    def finish(self) -> str:
+        """남은 데이터를 모두 쓰고 내용 해시를 반환합니다."""
+        try:
+            if self.decoder is not None:
+                self.decoder.finish()
+        except ArchiveError as e:
+            raise UploadRejected(str(e))
+
+        if self.block_writer:
+            self.block_writer.close()
+        self.out.flush()
+        return self.hasher.hexdigest()
+
+    def _write(self, data: bytes) -> None:
+        self.decoded += len(data)
+        if self.decoded > self.max_size:
+            raise UploadRejected("채팅 파일이 너무 큽니다.", too_large=True)
+        # 작은 파일은 헤더 때문에 비율이 튀므로 어느 정도 풀린 뒤부터 검사합니다.
+        if self.decoded > DECODE_STEP and self.decoded > self.received * self.max_ratio:
+            raise UploadRejected("압축률이 비정상적으로 높은 파일입니다.", too_large=True)
+
+        if self.builder:
+            self.builder.feed(data)
+        self.hasher.update(data)
+        if self.block_writer:
+            self.block_writer.write(data)
+        else:
+            self.out.write(data)
+
+
+def complete_ingested_file(file, ingest: ChatIngest, content_hash: str, chat_index=None):
+    """
+    ChatIngest로 채운 임시 업로드 파일에 acquire_chat_blob()이 쓰는 속성을 붙입니다.
+
+    완료된 파일 객체에는 chat_index(ChatIndex), content_hash(str),
+    block_writer(블록 압축했다면 BlockGzipWriter, 아니면 None) 속성이 붙습니다.
+    size와 content_hash는 압축을 푼 대화 내용 기준입니다.
+    """
+    file.seek(0)
+    file.size = ingest.decoded
+    file.block_writer = ingest.block_writer
+    file.content_hash = content_hash
+    if chat_index is None:
+        chat_index = _rebuild_index(file) if ingest.builder is None else ingest.builder.close()
+    file.chat_index = chat_index
+    return file
+
+
+def _rebuild_index(file):
+    if not getattr(file, "block_writer", None):
+        return build_chat_index(file.temporary_file_path())
+
+    # 임시 파일이 블록 압축되어 있으므로 다시 풀면서 인덱스를 만듭니다.
+    builder = ChatIndexBuilder()
+    decoder = GzipDecoder()
+    while chunk := file.read(READ_CHUNK_SIZE):
+        for data in decoder.feed(chunk):
+            builder.feed(data)
+    file.seek(0)
+    return builder.close()
+
+
+class ChatUploadHandler(TemporaryFileUploadHandler):
+    """
+    채팅 파일 업로드용 핸들러입니다.
+
+    들어오는 청크를 ChatIngest로 흘려보내, 마지막 바이트가 도착하는 순간
+    제목·참여자·날짜 범위·메시지 수·내용 해시가 모두 준비됩니다.
+
+    클라이언트가 X-Chat-Content-Hash 헤더로 내용 해시를 미리 알려주고 같은 blob이 이미 저장되어 있으면,
+    파싱은 건너뛰고 해시만 계산한 뒤 저장된 인덱스를 그대로 씁니다. 해시가 다르면 임시 파일을 다시 읽어 인덱스를 만듭니다.
+
+    업로드를 받을 수 없으면 too_large(413)와 error(사유)를 남기고 업로드를 중단합니다.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+        self.error = None
+        self.claimed_hash = request.META.get("HTTP_X_CHAT_CONTENT_HASH", "").lower() if request else ""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.known_blob = find_chat_blob(self.claimed_hash)
+        builder = None if self.known_blob else ChatIndexBuilder()
+        self.ingest = ChatIngest(self.file, self.file_name or "", builder)
+        # 기본 핸들러(Memory/TemporaryFileUploadHandler)는 이 파일을 처리하지 않도록 합니다.
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.ingest.feed(raw_data)
+        except UploadRejected as e:
+            self._reject(e)
+        # 이 핸들러가 마지막이므로 다음 핸들러로 넘길 데이터는 없습니다.
+        return None
+
+    def file_complete(self, file_size):
+        try:
+            content_hash = self.ingest.finish()
+        except UploadRejected as e:
+            self._reject(e)
+
+        chat_index = None
+        if self.known_blob and content_hash == self.known_blob.content_hash:
+            chat_index = load_blob_index(self.known_blob)
+        return complete_ingested_file(self.file, self.ingest, content_hash, chat_index)
+
+    def _reject(self, rejected: UploadRejected) -> None:
+        self.error = rejected.message
+        self.too_large = rejected.too_large
+        self.file.close()
+        raise StopUpload()
+
+
+def install_chat_upload_handler(request) -> ChatUploadHandler:
+    """
+    request.data에 처음 접근하기 전에 호출해 업로드 핸들러를 맨 앞에 끼워 넣습니다.
+    뷰에서는 반환된 핸들러의 too_large와 error로 업로드 실패 여부를 확인합니다.
+    """
+    handler = ChatUploadHandler(request)
+    request.upload_handlers.insert(0, handler)
+    return handler
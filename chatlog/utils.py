@@ -0,0 +1,164 @@
+import mmap
+import os
+from datetime import datetime, date
+
+from django.conf import settings
+
+from .compression import CompressedChatReader, is_compressed
+from .index import ChatIndex
+from .parallel import parse_chat_parallel
+from .parser import ChatIndexBuilder
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def index_path(file_path: str) -> str:
+    """채팅 파일 옆에 저장되는 인덱스 파일 경로를 반환합니다."""
+    return f"{file_path}.idx"
+
+
+def build_chat_index(file_path: str) -> ChatIndex:
+    """
+    채팅 파일을 처음부터 끝까지 한 번만 읽어 메시지 인덱스를 만듭니다.
+    파일(압축을 푼 크기)이 CHAT_PARALLEL_PARSE_THRESHOLD 이상이면 날짜 구분선 단위로 나눠
+    CHAT_PARSE_WORKERS개의 프로세스에서 동시에 파싱합니다.
+
+    Args:
+        file_path (str): 채팅 파일 경로
+
+    Returns:
+        ChatIndex: 제목, 참여자, 메시지별 발신자/시각/오프셋/길이를 담은 인덱스
+    """
+    size = chat_file_size(file_path)
+    workers = settings.CHAT_PARSE_WORKERS or os.cpu_count() or 1
+    if workers > 1 and size >= settings.CHAT_PARALLEL_PARSE_THRESHOLD:
+        return parse_chat_parallel(file_path, size, workers)
+
+    builder = ChatIndexBuilder()
+    for chunk in iter_chat_chunks(file_path):
+        builder.feed(chunk)
+    return builder.close()
+
+
+def chat_file_size(file_path: str) -> int:
+    """채팅 파일의 (압축을 푼) 크기를 반환합니다."""
+    if is_compressed(file_path):
+        return CompressedChatReader(file_path).size
+    return os.path.getsize(file_path)
+
+
+def iter_chat_chunks(file_path: str):
+    """채팅 파일을 처음부터 끝까지 청크 단위 bytes로 읽습니다. 압축된 파일은 풀면서 읽습니다."""
+    if is_compressed(file_path):
+        yield from CompressedChatReader(file_path).iter_chunks()
+        return
+
+    with open(file_path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+def load_chat_index(file_path: str) -> ChatIndex:
+    """
+    채팅 파일의 인덱스를 불러옵니다.
+    인덱스가 없거나(이전 업로드) 형식이 맞지 않으면 한 번 만들어서 저장해 둡니다.
+    """
+    try:
+        return ChatIndex.load(index_path(file_path))
+    except (FileNotFoundError, ValueError):
+        index = build_chat_index(file_path)
+        index.save(index_path(file_path))
+        return index
+
+
+def read_chat_text(file_path: str, start: int = 0, end: int | None = None, mode: str | None = None) -> str:
+    """
+    채팅 파일의 [start, end) 바이트 범위만 읽어 문자열로 반환합니다.
+
+    mode가 "mmap"(기본값, settings.CHAT_READER_MODE)이면 파일을 메모리 맵으로 열고
+    선택한 범위를 bytes로 복사하지 않은 채 바로 디코딩합니다. 프롬프트에 들어갈 문자열 한 벌만 새로 만들어지므로,
+    큰 단톡방을 여러 개 동시에 분석해도 워커 메모리가 크게 늘지 않습니다.
+    "buffered"이면 해당 범위를 read() 로 읽어 디코딩합니다.
+    블록 압축된 파일(.gz)은 mode와 상관없이 범위에 걸친 블록만 풀어서 읽습니다.
+    """
+    if is_compressed(file_path):
+        return str(CompressedChatReader(file_path).read(start, end), "utf-8", "replace")
+
+    mode = mode or getattr(settings, "CHAT_READER_MODE", "mmap")
+
+    with open(file_path, "rb") as f:
+        if mode != "mmap":
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+            return data.decode("utf-8", errors="replace")
+
+        size = os.fstat(f.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return ""  # 빈 파일은 mmap 할 수 없음
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view, view[start:end] as selected:
+                return str(selected, "utf-8", "replace")
+
+
+def read_chat_bytes(file_path: str, start: int = 0, end: int | None = None) -> bytes:
+    """채팅 파일의 [start, end) 바이트 범위를 디코딩하지 않고 bytes로 반환합니다. 압축된 파일은 범위에 걸친 블록만 풉니다."""
+    if is_compressed(file_path):
+        return CompressedChatReader(file_path).read(start, end)
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return f.read() if end is None else f.read(max(end - start, 0))
+
+
+def read_chat_ranges(file_path: str, ranges) -> list[str]:
+    """
+    채팅 파일에서 오프셋 순으로 정렬된 여러 [start, end) 바이트 범위를 읽어 각각 문자열로 반환합니다.
+    파일은 한 번만 열고, 블록 압축된 파일은 범위들이 걸친 블록을 한 번씩만 풉니다.
+    """
+    if is_compressed(file_path):
+        return [str(data, "utf-8", "replace") for data in CompressedChatReader(file_path).read_ranges(ranges)]
+
+    with open(file_path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return ["" for _ in ranges]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [str(mm[start:end], "utf-8", "replace") for start, end in ranges]
+
+
+def parse_analysis_period(analysis_option: dict) -> tuple[date | None, date | None]:
+    """
+    analysis_option의 시작일/종료일('YYYY-MM-DD', '처음부터', '끝까지')을 date로 변환합니다.
+    제한이 없는 쪽은 None 입니다.
+    """
+    start_option = analysis_option.get("start")
+    end_option = analysis_option.get("end")
+
+    start_date = None if start_option == "처음부터" else datetime.strptime(start_option, "%Y-%m-%d").date()
+    end_date = None if end_option == "끝까지" else datetime.strptime(end_option, "%Y-%m-%d").date()
+    return start_date, end_date
+
+
+def filter_chat_by_date(file_path: str, analysis_option: dict) -> tuple[str, int]:
+    """
+    채팅 인덱스의 날짜 구분선 오프셋을 이진 탐색해 사용자가 지정한 기간(analysis_option)의
+    바이트 범위만 읽어오고, 해당 기간의 메시지 수를 함께 반환합니다.
+    파일 전체를 훑지 않으므로 비용은 선택한 기간의 크기에 비례합니다.
+
+    Args:
+        file_path (str): 채팅 파일 경로
+        analysis_option (dict): 시작일과 종료일이 담긴 딕셔너리
+
+    Returns:
+        tuple: (필터링된 채팅 내용 문자열, 필터링된 메시지 수)
+    """
+    start_date, end_date = parse_analysis_period(analysis_option)
+    index = load_chat_index(file_path)
+
+    chat_slice = index.select(start_date, end_date)
+    if chat_slice.first == chat_slice.last:
+        return "", 0
+
+    text = read_chat_text(file_path, chat_slice.start, chat_slice.end)
+    return text, chat_slice.last - chat_slice.first
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
     "account",
     "business",
     "play",
+    "chatlog",
+    "analysis",
     "corsheaders",
     'rest_framework_simplejwt',
     "rest_framework_simplejwt.token_blacklist",
@@ -195,4 +197,75 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
-]
\ No newline at end of file
+]
+
+# 채팅 파일 처리 설정
+# 분석 프롬프트를 만들 때 채팅 파일을 읽는 방식 ("mmap" 또는 "buffered")
+CHAT_READER_MODE = env("CHAT_READER_MODE", default="mmap")
+# 업로드 가능한 채팅 파일의 최대 크기 (바이트, .zip/.gz는 압축을 푼 크기 기준)
+CHAT_UPLOAD_MAX_SIZE = env.int("CHAT_UPLOAD_MAX_SIZE", default=300 * 1024 * 1024)
+# .zip/.gz 업로드에서 허용하는 최대 압축률 (풀린 크기 / 받은 크기)
+CHAT_UPLOAD_MAX_RATIO = env.int("CHAT_UPLOAD_MAX_RATIO", default=50)
+# 저장되는 채팅 파일을 블록 단위 gzip으로 압축할지 여부와 압축 레벨 (1~9)
+CHAT_COMPRESSION = env.bool("CHAT_COMPRESSION", default=True)
+CHAT_COMPRESSION_LEVEL = env.int("CHAT_COMPRESSION_LEVEL", default=6)
+# 이 크기(바이트) 이상인 채팅 파일은 여러 프로세스에서 나눠 파싱합니다. 일꾼 수가 0이면 CPU 수만큼 띄웁니다.
+CHAT_PARALLEL_PARSE_THRESHOLD = env.int("CHAT_PARALLEL_PARSE_THRESHOLD", default=32 * 1024 * 1024)
+CHAT_PARSE_WORKERS = env.int("CHAT_PARSE_WORKERS", default=0)
+
+# 분석 작업 설정
+# 프로세스 하나에서 동시에 실행하는 분석 작업(LLM 호출) 수
+ANALYSIS_WORKERS = env.int("ANALYSIS_WORKERS", default=4)
+# 분석 결과 캐시 유지 시간(초, 0이면 캐시를 쓰지 않음)과 최대 항목 수
+ANALYSIS_CACHE_TTL = env.int("ANALYSIS_CACHE_TTL", default=7 * 24 * 60 * 60)
+ANALYSIS_CACHE_MAX_ENTRIES = env.int("ANALYSIS_CACHE_MAX_ENTRIES", default=1000)
+# 분석 프롬프트 하나에 넣는 대화의 최대 토큰 수 (0이면 표본을 뽑지 않고 기간 전체를 한 번에 보냄)
+ANALYSIS_TOKEN_BUDGET = env.int("ANALYSIS_TOKEN_BUDGET", default=200_000)
+# 프롬프트 하나보다 긴 대화는 최대 이 개수의 구간으로 나눠 분석한 뒤 합칩니다. (1이면 표본 하나만 보냄)
+# 구간별 분석은 ANALYSIS_MAP_WORKERS개씩 동시에 호출합니다.
+ANALYSIS_MAP_REDUCE_CHUNKS = env.int("ANALYSIS_MAP_REDUCE_CHUNKS", default=8)
+ANALYSIS_MAP_WORKERS = env.int("ANALYSIS_MAP_WORKERS", default=4)
+# 프롬프트에 넣기 전에 사진/이모티콘/링크/입퇴장 줄을 짧은 표시로 바꾸고, 같은 사람이 이어 보낸 메시지를 합칠지 여부
+CHAT_COMPACTION = env.bool("CHAT_COMPACTION", default=True)
+
+# Gemini 클라이언트 설정
+# 프로세스마다 클라이언트 하나를 만들어 HTTP 연결을 재사용합니다.
+# 동시에 열 수 있는 최대 연결 수, 유휴 상태로 유지하는 keep-alive 연결 수와 유지 시간(초)
+GEMINI_MAX_CONNECTIONS = env.int("GEMINI_MAX_CONNECTIONS", default=20)
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = env.int("GEMINI_MAX_KEEPALIVE_CONNECTIONS", default=10)
+GEMINI_KEEPALIVE_EXPIRY = env.int("GEMINI_KEEPALIVE_EXPIRY", default=60)
+# API 주소를 바꿀 때만 지정합니다. (프록시, 로컬 스텁 서버 등. 비어 있으면 SDK 기본 주소)
+GEMINI_BASE_URL = env("GEMINI_BASE_URL", default="")
+
+# Gemini 호출 한도와 재시도 설정 (프로세스마다 따로 적용)
+# 분당 최대 호출 수(0이면 제한 없음)와 한 번에 몰아서 보낼 수 있는 호출 수
+GEMINI_RATE_PER_MINUTE = env.int("GEMINI_RATE_PER_MINUTE", default=60)
+GEMINI_RATE_BURST = env.int("GEMINI_RATE_BURST", default=10)
+# 동시에 진행하는 최대 호출 수와, 차례를 기다리는 최대 시간(초). 넘으면 호출하지 않고 실패합니다.
+GEMINI_MAX_IN_FLIGHT = env.int("GEMINI_MAX_IN_FLIGHT", default=8)
+GEMINI_QUEUE_TIMEOUT = env.int("GEMINI_QUEUE_TIMEOUT", default=60)
+# 429/5xx/연결 오류일 때 최대 시도 횟수와 재시도 간격의 최대값(초)
+GEMINI_RETRY_ATTEMPTS = env.int("GEMINI_RETRY_ATTEMPTS", default=4)
+GEMINI_RETRY_MAX_WAIT = env.int("GEMINI_RETRY_MAX_WAIT", default=20)
+# 재시도까지 실패한 호출이 이 횟수만큼 이어지면 GEMINI_CIRCUIT_RESET초 동안 호출을 막습니다.
+GEMINI_CIRCUIT_FAILURES = env.int("GEMINI_CIRCUIT_FAILURES", default=5)
+GEMINI_CIRCUIT_RESET = env.int("GEMINI_CIRCUIT_RESET", default=30)
+
+# 분석에 쓴 대화 구간을 퀴즈 생성에 다시 쓰는 컨텍스트 설정
+# 등록한 대화 구간을 보관하는 기간(초). 지나면 퀴즈를 만들 때 채팅 파일에서 다시 읽어 등록합니다.
+CHAT_CONTEXT_TTL = env.int("CHAT_CONTEXT_TTL", default=30 * 24 * 60 * 60)
+# Gemini 컨텍스트 캐시의 유지 시간(초). 0이면 캐시를 만들지 않고 매번 대화를 프롬프트 앞에 붙여 보냅니다.
+GEMINI_CONTEXT_CACHE_TTL = env.int("GEMINI_CONTEXT_CACHE_TTL", default=60 * 60)
+# 이보다 짧은(추정 토큰 수) 대화는 Gemini 캐시의 최소 크기에 못 미치므로 캐시를 만들지 않습니다.
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = env.int("GEMINI_CONTEXT_CACHE_MIN_TOKENS", default=4096)
+
+# 퀴즈 문제 추가에 쓰는 후보 문제 설정
+# 퀴즈를 만들 때 같은 호출에서 함께 만들어 두는 후보 문제 수
+QUIZ_POOL_SIZE = env.int("QUIZ_POOL_SIZE", default=5)
+# 후보 문제가 이보다 적게 남으면 백그라운드에서 QUIZ_POOL_REFILL개를 보충합니다. (0이면 보충하지 않음)
+QUIZ_POOL_MIN = env.int("QUIZ_POOL_MIN", default=2)
+QUIZ_POOL_REFILL = env.int("QUIZ_POOL_REFILL", default=5)
+
+# 기여도 분석의 기간별 분석 설정
+# 요청에 periods가 없을 때 분석 기간을 나누는 구간 수
+CONTRIB_PERIODS = env.int("CONTRIB_PERIODS", default=6)
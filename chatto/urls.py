@@ -39,6 +39,7 @@ urlpatterns = [
     path('api/account/', include('account.urls')),
     path('api/business/', include('business.urls')),
     path('api/play/', include('play.urls')),
+    path('api/analysis/', include('analysis.urls')),
     # swagger path
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('play', '0032_rename_chatto_levelup_resultplaychemspec_chatto_levelup1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatplay',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='chatplay',
+            name='date_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatplay',
+            name='date_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatplay',
+            name='num_chat',
+            field=models.IntegerField(default=0),
+        ),
+    ]
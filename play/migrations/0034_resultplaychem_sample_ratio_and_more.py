@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('play', '0033_chatplay_content_hash_chatplay_date_end_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultplaychem',
+            name='sample_ratio',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AddField(
+            model_name='resultplaymbti',
+            name='sample_ratio',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AddField(
+            model_name='resultplaysome',
+            name='sample_ratio',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('play', '0034_resultplaychem_sample_ratio_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultplaychem',
+            name='context_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resultplaymbti',
+            name='context_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resultplaysome',
+            name='context_key',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
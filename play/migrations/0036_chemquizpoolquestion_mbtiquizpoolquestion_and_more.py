@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('play', '0035_resultplaychem_context_key_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChemQuizPoolQuestion',
+            fields=[
+                ('pool_id', models.AutoField(primary_key=True, serialize=False)),
+                ('question', models.TextField(default='')),
+                ('choice1', models.TextField(default='')),
+                ('choice2', models.TextField(default='')),
+                ('choice3', models.TextField(default='')),
+                ('choice4', models.TextField(default='')),
+                ('answer', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='play.chemquiz')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MBTIQuizPoolQuestion',
+            fields=[
+                ('pool_id', models.AutoField(primary_key=True, serialize=False)),
+                ('question', models.TextField(default='')),
+                ('choice1', models.TextField(default='')),
+                ('choice2', models.TextField(default='')),
+                ('choice3', models.TextField(default='')),
+                ('choice4', models.TextField(default='')),
+                ('answer', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='play.mbtiquiz')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SomeQuizPoolQuestion',
+            fields=[
+                ('pool_id', models.AutoField(primary_key=True, serialize=False)),
+                ('question', models.TextField(default='')),
+                ('choice1', models.TextField(default='')),
+                ('choice2', models.TextField(default='')),
+                ('choice3', models.TextField(default='')),
+                ('choice4', models.TextField(default='')),
+                ('answer', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='play.somequiz')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('play', '0036_chemquizpoolquestion_mbtiquizpoolquestion_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultplaychemspec',
+            name='names',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -1,14 +1,22 @@
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
 
+from chatlog.storage import release_chat_blob
+
 # Create your models here.
 class ChatPlay(models.Model):
     chat_id = models.AutoField(primary_key=True)
     title = models.TextField()
     file = models.FileField(upload_to='chat_files_play/')
     people_num = models.IntegerField()
+    num_chat = models.IntegerField(default=0)
+    date_start = models.DateField(null=True, blank=True)
+    date_end = models.DateField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
     uploaded_at = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=None)
 
@@ -24,6 +32,8 @@ class ResultPlayChem(models.Model):
     analysis_date_end = models.TextField(default="")
     created_at = models.DateTimeField(default=timezone.now)
     num_chat = models.IntegerField(default=0)
+    sample_ratio = models.FloatField(default=1.0)
+    context_key = models.CharField(max_length=64, blank=True, default="")
     is_quized = models.BooleanField(default=False)
     chat = models.ForeignKey(ChatPlay, on_delete=models.SET_NULL, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=None)
@@ -40,6 +50,8 @@ class ResultPlaySome(models.Model):
     analysis_date_end = models.TextField(default="")
     created_at = models.DateTimeField(default=timezone.now)
     num_chat = models.IntegerField(default=0)
+    sample_ratio = models.FloatField(default=1.0)
+    context_key = models.CharField(max_length=64, blank=True, default="")
     is_quized = models.BooleanField(default=False)
     chat = models.ForeignKey(ChatPlay, on_delete=models.SET_NULL, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=None)
@@ -54,6 +66,8 @@ class ResultPlayMBTI(models.Model):
     analysis_date_end = models.TextField(default="")
     created_at = models.DateTimeField(default=timezone.now)
     num_chat = models.IntegerField(default=0)
+    sample_ratio = models.FloatField(default=1.0)
+    context_key = models.CharField(max_length=64, blank=True, default="")
     is_quized = models.BooleanField(default=False)
     chat = models.ForeignKey(ChatPlay, on_delete=models.SET_NULL, null=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=None)
@@ -109,7 +123,10 @@ class ResultPlayChemSpec(models.Model):
     name_2 = models.TextField(default="")
     name_3 = models.TextField(default="")
     name_4 = models.TextField(default="")
+    # 상호작용 매트릭스의 참여자 전원 (말수가 많은 순서). ResultPlayChemSpecTable의 row/column이 이 목록의 위치입니다.
+    names = models.JSONField(default=list)
 
+# 상호작용 매트릭스의 칸. 점수가 0이 아닌 칸만 저장하므로 없는 칸은 0점입니다.
 class ResultPlayChemSpecTable(models.Model):
     spectable_id = models.AutoField(primary_key=True)
     spec = models.ForeignKey(ResultPlayChemSpec, on_delete=models.CASCADE)
@@ -246,6 +263,18 @@ class ChemQuizQuestion(models.Model):
     count3 = models.IntegerField(default=0)
     count4 = models.IntegerField(default=0)
 
+# 문제 추가 요청에 바로 꺼내 쓰도록 미리 만들어 둔 후보 문제
+class ChemQuizPoolQuestion(models.Model):
+    pool_id = models.AutoField(primary_key=True)
+    quiz = models.ForeignKey(ChemQuiz, on_delete=models.CASCADE)
+    question = models.TextField(default="")
+    choice1 = models.TextField(default="")
+    choice2 = models.TextField(default="")
+    choice3 = models.TextField(default="")
+    choice4 = models.TextField(default="")
+    answer = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
 class ChemQuizPersonal(models.Model):
     QP_id = models.AutoField(primary_key=True)
     quiz = models.ForeignKey(ChemQuiz, on_delete=models.CASCADE)
@@ -283,6 +312,18 @@ class SomeQuizQuestion(models.Model):
     count3 = models.IntegerField(default=0)
     count4 = models.IntegerField(default=0)
 
+# 문제 추가 요청에 바로 꺼내 쓰도록 미리 만들어 둔 후보 문제
+class SomeQuizPoolQuestion(models.Model):
+    pool_id = models.AutoField(primary_key=True)
+    quiz = models.ForeignKey(SomeQuiz, on_delete=models.CASCADE)
+    question = models.TextField(default="")
+    choice1 = models.TextField(default="")
+    choice2 = models.TextField(default="")
+    choice3 = models.TextField(default="")
+    choice4 = models.TextField(default="")
+    answer = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
 class SomeQuizPersonal(models.Model):
     QP_id = models.AutoField(primary_key=True)
     quiz = models.ForeignKey(SomeQuiz, on_delete=models.CASCADE)
@@ -320,6 +361,18 @@ class MBTIQuizQuestion(models.Model):
     count3 = models.IntegerField(default=0)
     count4 = models.IntegerField(default=0)
 
+# 문제 추가 요청에 바로 꺼내 쓰도록 미리 만들어 둔 후보 문제
+class MBTIQuizPoolQuestion(models.Model):
+    pool_id = models.AutoField(primary_key=True)
+    quiz = models.ForeignKey(MBTIQuiz, on_delete=models.CASCADE)
+    question = models.TextField(default="")
+    choice1 = models.TextField(default="")
+    choice2 = models.TextField(default="")
+    choice3 = models.TextField(default="")
+    choice4 = models.TextField(default="")
+    answer = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
 class MBTIQuizPersonal(models.Model):
     QP_id = models.AutoField(primary_key=True)
     quiz = models.ForeignKey(MBTIQuiz, on_delete=models.CASCADE)
@@ -344,4 +397,10 @@ class UuidSome(models.Model):
 
 class UuidMBTI(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
-    result = models.ForeignKey(ResultPlayMBTI, on_delete=models.CASCADE, null=True, blank=True)
\ No newline at end of file
+    result = models.ForeignKey(ResultPlayMBTI, on_delete=models.CASCADE, null=True, blank=True)
+
+
+# 채팅이 삭제되면 공유 중인 채팅 파일(blob)의 참조 수를 내리고, 마지막 참조였다면 파일도 지운다
+@receiver(post_delete, sender=ChatPlay)
+def release_chat_file(sender, instance, **kwargs):
+    release_chat_blob(instance.content_hash)
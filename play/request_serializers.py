@@ -3,6 +3,10 @@ from rest_framework import serializers
 class ChatUploadRequestSerializerPlay(serializers.Serializer):
     file = serializers.FileField()
 
+class ChatChunkUploadRequestSerializerPlay(serializers.Serializer):
+    file_name = serializers.CharField(required=False, allow_blank=True, default="")
+    size = serializers.IntegerField(required=False, min_value=1)
+
 class ChatChemAnalysisRequestSerializerPlay(serializers.Serializer):
     relationship = serializers.CharField() 
     situation = serializers.CharField()
@@ -0,0 +1,108 @@
+from pydantic import BaseModel, Field
+
+# Gemini 분석 응답의 JSON 스키마.
+# response_schema로 넘겨 모델이 이 형식의 JSON만 출력하게 하고, 받은 응답은 같은 모델로 검증합니다.
+# 필드 이름은 결과 딕셔너리(와 DB 컬럼)의 키와 같고, description은 프롬프트의 출력 형식 설명을 대신합니다.
+# 답장 시간, 메시지 길이, 대화 시작 비율처럼 타임스탬프와 글자 수로 계산되는 값은 chatlog.stats가,
+# 케미 참여자와 Top3 조합, 상호작용 매트릭스는 chatlog.interactions가 직접 구하므로 받지 않습니다.
+
+
+# ------------------------- 썸 분석 ------------------------- #
+class SomeAnalysis(BaseModel):
+    score_main: int = Field(description="썸 지수 (0~100)")
+    comment_main: str = Field(description="전반적인 코멘트 (1~2 문장)")
+    name_A: str = Field(description="A의 실제 이름")
+    name_B: str = Field(description="B의 실제 이름")
+    score_A: int = Field(description="A->B 호감도 (0~100)")
+    score_B: int = Field(description="B->A 호감도 (0~100)")
+    trait_A: str = Field(description="A의 특징 (5~10자 어구 3개, 쉼표로 구분)")
+    trait_B: str = Field(description="B의 특징 (5~10자 어구 3개, 쉼표로 구분)")
+    summary: str = Field(description="호감도 요약 (2~3 문장)")
+
+    tone_score: int = Field(description="말투 점수 (0~100)")
+    tone_desc: str = Field(description="말투 한 줄 설명")
+    tone_ex: str = Field(description="말투 실제 대화 예시")
+    emo_score: int = Field(description="감정표현 점수 (0~100)")
+    emo_desc: str = Field(description="감정표현 한 줄 설명")
+    emo_ex: str = Field(description="감정표현 실제 대화 예시")
+    addr_score: int = Field(description="호칭 점수 (0~100)")
+    addr_desc: str = Field(description="호칭 한 줄 설명")
+    addr_ex: str = Field(description="호칭 실제 대화 예시")
+    reply_A_desc: str = Field(description="A 답장 특징 한 줄 설명")
+    reply_B_desc: str = Field(description="B 답장 특징 한 줄 설명")
+    rec_A: int = Field(description="A 약속 제안 횟수")
+    rec_B: int = Field(description="B 약속 제안 횟수")
+    rec_A_desc: str = Field(description="A 약속 제안 특징 한 줄 설명")
+    rec_B_desc: str = Field(description="B 약속 제안 특징 한 줄 설명")
+    rec_A_ex: str = Field(description="A 약속 제안 실제 대화 예시 (없으면 '없음')")
+    rec_B_ex: str = Field(description="B 약속 제안 실제 대화 예시 (없으면 '없음')")
+    atti_A_desc: str = Field(description="A 주제 시작 특징 한 줄 설명")
+    atti_B_desc: str = Field(description="B 주제 시작 특징 한 줄 설명")
+    atti_A_ex: str = Field(description="A 주제 시작 실제 대화 예시 (없으면 '없음')")
+    atti_B_ex: str = Field(description="B 주제 시작 실제 대화 예시 (없으면 '없음')")
+    len_A_desc: str = Field(description="A 메시지 특징 한 줄 설명")
+    len_B_desc: str = Field(description="B 메시지 특징 한 줄 설명")
+    len_A_ex: str = Field(description="A 메시지 실제 대화 예시 (없으면 '없음')")
+    len_B_ex: str = Field(description="B 메시지 실제 대화 예시 (없으면 '없음')")
+    pattern_analysis: str = Field(description="대화 패턴 분석 (2 문장 요약)")
+    chatto_counsel: str = Field(description="챗토의 연애상담 (3~4 문장)")
+    chatto_counsel_tips: str = Field(description="챗토의 연애상담 팁 (1~2 문장)")
+
+
+# ------------------------- MBTI 분석 ------------------------- #
+class MBTIPerson(BaseModel):
+    name: str = Field(description="대화에서 사용된 참여자 이름")
+    MBTI: str = Field(description="예측 MBTI (16가지 유형 중 하나, 대문자 4글자)")
+    summary: str = Field(description="성격 및 대화 스타일 한 줄 요약")
+    desc: str = Field(description="MBTI와 요약을 바탕으로 한 2~3 문장의 부가 설명")
+    position: str = Field(description="단톡 내 포지션 (한 단어)")
+    personality: str = Field(description="성향 키워드 3개 (#키워드1, #키워드2, #키워드3)")
+    style: str = Field(description="대화특징 키워드 3개 (#키워드1, #키워드2, #키워드3)")
+    moment_desc: str = Field(description="대표 MBTI 모먼트에 대한 한 문장 설명")
+    moment_ex: str = Field(description="대표 MBTI 모먼트의 실제 대화 예시")
+    momentIE_desc: str = Field(description="내향/외향 판단 이유 (1~2 문장)")
+    momentIE_ex: str = Field(description="내향/외향 판단 근거 실제 대화 예시")
+    momentSN_desc: str = Field(description="감각/직관 판단 이유 (1~2 문장)")
+    momentSN_ex: str = Field(description="감각/직관 판단 근거 실제 대화 예시")
+    momentFT_desc: str = Field(description="감정/사고 판단 이유 (1~2 문장)")
+    momentFT_ex: str = Field(description="감정/사고 판단 근거 실제 대화 예시")
+    momentJP_desc: str = Field(description="판단/인식 판단 이유 (1~2 문장)")
+    momentJP_ex: str = Field(description="판단/인식 판단 근거 실제 대화 예시")
+
+
+class MBTIAnalysis(BaseModel):
+    results: list[MBTIPerson] = Field(description="참여자별 MBTI 분석")
+
+
+# ------------------------- 케미 분석 ------------------------- #
+class ChemAnalysis(BaseModel):
+    score_main: int = Field(description="전체 케미 점수 (0~100)")
+    summary_main: str = Field(description="전체 케미 요약 (2~3 문장)")
+    top1_comment: str = Field(description="주어진 케미 Top1 조합의 케미가 좋은 이유 한 문장 (조합이 없으면 빈 문자열)")
+    top2_comment: str = Field(description="주어진 케미 Top2 조합의 케미가 좋은 이유 한 문장 (조합이 없으면 빈 문자열)")
+    top3_comment: str = Field(description="주어진 케미 Top3 조합의 케미가 좋은 이유 한 문장 (조합이 없으면 빈 문자열)")
+    tone_pos: int = Field(description="긍정 말투 비율(%)")
+    tone_humer: int = Field(description="유머 말투 비율(%)")
+    tone_crit: int = Field(description="비판 말투 비율(%)")
+    tone_else: int = Field(description="기타 말투 비율(%)")
+    tone_ex1: str = Field(description="말투 대표 예시1: 실제 대화 예시 (말한 사람)")
+    tone_ex2: str = Field(description="말투 대표 예시2: 실제 대화 예시 (말한 사람)")
+    tone_ex3: str = Field(description="말투 대표 예시3: 실제 대화 예시 (말한 사람)")
+    tone_analysis: str = Field(description="말투 분석 (1~2 문장 요약)")
+    resp_analysis: str = Field(description="응답 패턴 종합 분석 (1~2 문장 요약)")
+    topic1: str = Field(description="주요 토픽 1 이름")
+    topic1_ratio: int = Field(description="주요 토픽 1 비율(%)")
+    topic2: str = Field(description="주요 토픽 2 이름")
+    topic2_ratio: int = Field(description="주요 토픽 2 비율(%)")
+    topic3: str = Field(description="주요 토픽 3 이름")
+    topic3_ratio: int = Field(description="주요 토픽 3 비율(%)")
+    topic4: str = Field(description="주요 토픽 4 이름")
+    topic4_ratio: int = Field(description="주요 토픽 4 비율(%)")
+    topicelse_ratio: int = Field(description="기타 토픽 비율(%)")
+    chatto_analysis: str = Field(description="챗토의 종합 분석: 그룹 관계 진단")
+    chatto_levelup1: str = Field(description="챗토의 관계 레벨업 1: 솔루션 제목")
+    chatto_levelup_tips1: str = Field(description="챗토의 관계 레벨업 팁 1: 구체적인 팁")
+    chatto_levelup2: str = Field(description="챗토의 관계 레벨업 2: 솔루션 제목")
+    chatto_levelup_tips2: str = Field(description="챗토의 관계 레벨업 팁 2: 구체적인 팁")
+    chatto_levelup3: str = Field(description="챗토의 관계 레벨업 3: 솔루션 제목")
+    chatto_levelup_tips3: str = Field(description="챗토의 관계 레벨업 팁 3: 구체적인 팁")
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
+from analysis.models import AnalysisJob
+from chatlog.models import ChatUpload
 from .models import(
     ChatPlay, 
     ResultPlayChem,
@@ -40,6 +42,16 @@ class ChatSerializerPlay(ModelSerializer):
         model = ChatPlay
         fields = "__all__"
 
+class ChatUploadSessionSerializerPlay(ModelSerializer):
+    class Meta:
+        model = ChatUpload
+        fields = ["upload_id", "file_name", "size", "received", "created_at", "updated_at"]
+
+class AnalysisJobSerializerPlay(ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ["job_id", "kind", "status", "result_id", "error_message", "created_at", "started_at", "finished_at"]
+
 class ChemResultSerializerPlay(ModelSerializer):
     class Meta:
         model = ResultPlayChem
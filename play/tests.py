@@ -1,3 +1,502 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analysis.models import ChatContext
+from analysis.structured import StructuredResponseError
+from analysis.tests import ImmediateExecutor, fake_gemini, gemini_down, json_reply, run_jobs_inline, schema_sample, unlimited_gateway
+from chatlog.models import ChatBlob
+from chatlog.utils import index_path
+
+from .models import (
+    ChatPlay,
+    MBTIQuiz,
+    MBTIQuizPoolQuestion,
+    MBTIQuizQuestion,
+    ResultPlayChem,
+    ResultPlayChemSpecTable,
+    ResultPlayMBTI,
+    ResultPlayMBTISpecPersonal,
+    ResultPlaySome,
+)
+from .schemas import ChemAnalysis, MBTIAnalysis, MBTIPerson, SomeAnalysis
+from .utils import parse_chem_response, parse_mbti_response, parse_some_response
+
+SAMPLE_CHAT = """🦁멋사 13기 잡담방🦁 님과 카카오톡 대화
+저장한 날짜 : 2024-01-06 00:00:00
+
+--------------- 2024년 1월 3일 수요일 ---------------
+[김철수] [오후 3:12] 안녕하세요
+[이영희] [오후 3:13] 철수야 반가워
+[김철수] [오후 3:20] 영희야 점심 뭐 먹지
+--------------- 2024년 1월 4일 목요일 ---------------
+[박민수] [오전 9:00] 좋은 아침
+[이영희] [오전 9:05] 민수 안녕 ㅋㅋㅋ
+--------------- 2024년 1월 5일 금요일 ---------------
+[김철수] [오후 11:59] 다들 잘 자
+"""
+
+
+@override_settings(GEMINI_CONTEXT_CACHE_TTL=0)
+class PlayAPITestCase(TestCase):
+    """
+    업로드 파일을 임시 MEDIA_ROOT에 저장하고, 로그인한 APIClient로 요청하는 테스트의 기본 클래스
+    Gemini 호출은 테스트마다 새로 만든 한도 없는 호출 관문을 거칩니다.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        gateway = mock.patch("analysis.gateway.get_gemini_gateway", return_value=unlimited_gateway())
+        gateway.start()
+        self.addCleanup(gateway.stop)
+
+        self.user = User.objects.create_user(username="tester")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_chat(self, text: str = SAMPLE_CHAT, name: str = "chat.txt", **extra):
+        file = SimpleUploadedFile(name, text.encode("utf-8") if isinstance(text, str) else text)
+        return self.client.post("/api/play/chat/", {"file": file}, format="multipart", **extra)
+
+
+class PlayChatUploadTests(PlayAPITestCase):
+    def test_upload_reads_metadata(self):
+        response = self.upload_chat()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["title"], "🦁멋사 13기 잡담방🦁")
+        self.assertEqual(response.data["people_num"], 3)
+        self.assertEqual(response.data["num_chat"], 6)
+        self.assertEqual(response.data["date_start"], "2024-01-03")
+        self.assertEqual(response.data["date_end"], "2024-01-05")
+
+    def test_zip_upload_matches_plain_upload(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("KakaoTalkChats.txt", SAMPLE_CHAT)
+        zipped = self.upload_chat(buffer.getvalue(), name="KakaoTalk.zip")
+        plain = self.upload_chat()
+
+        self.assertEqual(zipped.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(zipped.data["content_hash"], plain.data["content_hash"])
+        self.assertEqual(zipped.data["num_chat"], 6)
+
+    def test_broken_archive_is_rejected(self):
+        response = self.upload_chat(b"not a zip file", name="KakaoTalk.zip")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ChatPlay.objects.exists())
+
+    def test_upload_requires_login(self):
+        self.client.force_authenticate(None)
+        response = self.upload_chat()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(ChatPlay.objects.exists())
+
+
+class ChatBlobStorageTests(PlayAPITestCase):
+    def test_same_content_shares_one_blob(self):
+        first = self.upload_chat(name="first.txt").data
+        second = self.upload_chat(name="second.txt").data
+
+        self.assertEqual(first["content_hash"], second["content_hash"])
+        self.assertEqual(first["file"], second["file"])
+        blob = ChatBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertTrue(os.path.exists(index_path(blob.file.path)))
+
+    def test_blob_is_deleted_with_last_chat(self):
+        first = self.upload_chat().data
+        second = self.upload_chat().data
+        path = ChatBlob.objects.get().file.path
+
+        self.client.delete(f"/api/play/chat/{first['chat_id']}/")
+        self.assertEqual(ChatBlob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/play/chat/{second['chat_id']}/")
+        self.assertFalse(ChatBlob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(index_path(path)))
+
+
+class ChunkedUploadTests(PlayAPITestCase):
+    def start_upload(self, data: bytes) -> str:
+        response = self.client.post("/api/play/chat/uploads/", {"file_name": "chat.txt", "size": len(data)}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return f"/api/play/chat/uploads/{response.data['upload_id']}/"
+
+    def put_chunk(self, url: str, offset: int, chunk: bytes):
+        return self.client.put(f"{url}?offset={offset}", chunk, content_type="application/octet-stream")
+
+    def test_resumed_upload_matches_single_upload(self):
+        data = SAMPLE_CHAT.encode("utf-8")
+        url = self.start_upload(data)
+
+        self.assertEqual(self.put_chunk(url, 0, data[:100]).data["received"], 100)
+        # 앞 조각을 다시 보내도 겹친 부분은 버리고 이어 붙입니다.
+        self.assertEqual(self.put_chunk(url, 50, data[50:200]).data["received"], 200)
+        self.assertEqual(self.client.get(url).data["received"], 200)
+        self.assertEqual(self.put_chunk(url, 200, data[200:]).data["received"], len(data))
+
+        response = self.client.post(f"{url}complete/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["num_chat"], 6)
+        self.assertEqual(response.data["content_hash"], self.upload_chat().data["content_hash"])
+
+    def test_offset_past_received_is_conflict(self):
+        data = SAMPLE_CHAT.encode("utf-8")
+        url = self.start_upload(data)
+        self.put_chunk(url, 0, data[:100])
+
+        response = self.put_chunk(url, 150, data[150:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["received"], 100)
+
+    def test_incomplete_upload_cannot_complete(self):
+        data = SAMPLE_CHAT.encode("utf-8")
+        url = self.start_upload(data)
+        self.put_chunk(url, 0, data[:100])
+
+        response = self.client.post(f"{url}complete/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(ChatPlay.objects.exists())
+
+    def test_other_users_cannot_append(self):
+        url = self.start_upload(b"x")
+        self.client.force_authenticate(User.objects.create_user(username="other"))
+        self.assertEqual(self.put_chunk(url, 0, b"x").status_code, status.HTTP_403_FORBIDDEN)
+
+
+CHEM_OPTION = {"relationship": "친구", "situation": "일상", "analysis_start": "처음부터", "analysis_end": "끝까지"}
+SOME_OPTION = {"relationship": "친구", "age": "20대", "analysis_start": "처음부터", "analysis_end": "끝까지"}
+MBTI_OPTION = {"analysis_start": "처음부터", "analysis_end": "끝까지"}
+ANALYSES = [
+    ("chem", CHEM_OPTION, ResultPlayChem),
+    ("some", SOME_OPTION, ResultPlaySome),
+    ("mbti", MBTI_OPTION, ResultPlayMBTI),
+]
+
+
+class AnalysisFailureTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        _, patch = fake_gemini("play.views", gemini_down)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.chat_id = self.upload_chat().data["chat_id"]
+
+    def test_sync_analysis_returns_500_without_result(self):
+        for kind, option, result_model in ANALYSES:
+            with self.subTest(kind):
+                response = self.client.post(f"/api/play/chat/{self.chat_id}/analyze/{kind}/", option, format="json")
+                self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+                self.assertIn("Gemini 연결 실패", str(response.data))
+                self.assertFalse(result_model.objects.exists())
+
+    def test_async_analysis_job_fails_with_reason(self):
+        for kind, option, result_model in ANALYSES:
+            with self.subTest(kind):
+                with run_jobs_inline(), self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        f"/api/play/chat/{self.chat_id}/analyze/{kind}/?async=true", option, format="json",
+                    )
+                self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+                job = self.client.get(f"/api/play/analysis/jobs/{response.data['job_id']}/").data
+                self.assertEqual(job["status"], "failed")
+                self.assertIn("Gemini 연결 실패", job["error_message"])
+                self.assertIsNone(job["result_id"])
+                self.assertFalse(result_model.objects.exists())
+
+    def test_empty_period_fails(self):
+        option = {"analysis_start": "2000-01-01", "analysis_end": "2000-01-31"}
+        for kind, base_option, result_model in ANALYSES:
+            with self.subTest(kind):
+                response = self.client.post(
+                    f"/api/play/chat/{self.chat_id}/analyze/{kind}/", {**base_option, **option}, format="json",
+                )
+                self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+                self.assertFalse(result_model.objects.exists())
+
+
+def mbti_sample() -> dict:
+    people = [schema_sample(MBTIPerson, name=name, MBTI=mbti) for name, mbti in (("김철수", "ENFP"), ("이영희", "ISTJ"))]
+    return schema_sample(MBTIAnalysis, results=people)
+
+
+class AnalysisCacheTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.gemini, patch = fake_gemini("play.views", json_reply(mbti_sample()))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.url = f"/api/play/chat/{self.upload_chat().data['chat_id']}/analyze/mbti/"
+
+    def test_same_slice_is_analysed_once(self):
+        first = self.client.post(self.url, MBTI_OPTION, format="json")
+        second = self.client.post(self.url, MBTI_OPTION, format="json")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(first.data["result_id"], second.data["result_id"])
+        self.assertEqual(len(self.gemini.calls), 1)
+        self.assertEqual(
+            list(ResultPlayMBTISpecPersonal.objects.filter(spec__result_id=second.data["result_id"]).values_list("name", "MBTI")),
+            [("김철수", "ENFP"), ("이영희", "ISTJ")],
+        )
+
+    def test_no_cache_calls_gemini_again(self):
+        self.client.post(self.url, MBTI_OPTION, format="json")
+        self.client.post(f"{self.url}?no_cache=true", MBTI_OPTION, format="json")
+        self.assertEqual(len(self.gemini.calls), 2)
+
+    def test_other_period_is_not_cached(self):
+        self.client.post(self.url, MBTI_OPTION, format="json")
+        self.client.post(self.url, {"analysis_start": "2024-01-04", "analysis_end": "끝까지"}, format="json")
+        self.assertEqual(len(self.gemini.calls), 2)
+
+
+def read_events(response) -> list[tuple[str, dict]]:
+    """text/event-stream 응답을 (event, data) 목록으로 읽습니다."""
+    body = b"".join(response.streaming_content).decode("utf-8")
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class AnalysisStreamTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/play/chat/{self.upload_chat().data['chat_id']}/analyze/mbti/?stream=true"
+
+    def stream(self, respond):
+        _, patch = fake_gemini("play.views", respond)
+        with patch, run_jobs_inline():
+            response = self.client.post(self.url, MBTI_OPTION, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            return read_events(response)
+
+    def test_sections_then_done(self):
+        events = self.stream(json_reply(mbti_sample()))
+
+        *sections, (last, data) = events
+        self.assertEqual(last, "done")
+        self.assertTrue(ResultPlayMBTI.objects.filter(result_id=data["result_id"]).exists())
+        self.assertTrue(sections)
+        self.assertTrue(all(event == "section" for event, _ in sections))
+        self.assertEqual([person["name"] for person in sections[-1][1]["results"]], ["김철수", "이영희"])
+
+    def test_failure_is_error_event(self):
+        events = self.stream(gemini_down)
+
+        self.assertEqual(events[-1][0], "error")
+        self.assertIn("Gemini 연결 실패", events[-1][1]["detail"])
+        self.assertFalse(ResultPlayMBTI.objects.exists())
+
+
+class StructuredResponseParsingTests(SimpleTestCase):
+    def test_some_and_chem_responses_keep_every_field(self):
+        for schema, parse in ((SomeAnalysis, parse_some_response), (ChemAnalysis, parse_chem_response)):
+            with self.subTest(schema.__name__):
+                sample = schema_sample(schema)
+                self.assertEqual(parse(json.dumps(sample, ensure_ascii=False)), sample)
+
+    def test_missing_field_is_an_error_not_a_default(self):
+        sample = schema_sample(ChemAnalysis)
+        del sample["score_main"]
+        with self.assertRaises(StructuredResponseError) as caught:
+            parse_chem_response(json.dumps(sample, ensure_ascii=False))
+        self.assertEqual(caught.exception.fields, ["score_main"])
+
+    def test_mbti_people_without_type_are_dropped(self):
+        sample = mbti_sample()
+        sample["results"].append(schema_sample(MBTIPerson, name="박민수", MBTI=""))
+        people = parse_mbti_response(json.dumps(sample, ensure_ascii=False))
+        self.assertEqual([(person["name"], person["MBTI"]) for person in people], [("김철수", "ENFP"), ("이영희", "ISTJ")])
+
+
+class InvalidResponseTests(PlayAPITestCase):
+    def test_invalid_response_fails_analysis(self):
+        _, patch = fake_gemini("play.views", lambda contents, config: '{"score_main": "높음"}')
+        chat_id = self.upload_chat().data["chat_id"]
+        with patch:
+            response = self.client.post(f"/api/play/chat/{chat_id}/analyze/chem/", CHEM_OPTION, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn("score_main", response.data["detail"])
+        self.assertFalse(ResultPlayChem.objects.exists())
+
+
+def quiz_text(count: int = 15, label: str = "문제") -> str:
+    """'문제N: / 선택지N-1~4: / 정답N:' 형식의 퀴즈 응답을 count문제 만듭니다."""
+    return "\n".join(
+        f"문제{i}: {label} {i}\n" + "".join(f"선택지{i}-{j}: 보기 {j}\n" for j in range(1, 5)) + f"정답{i}: {i % 4 + 1}"
+        for i in range(1, count + 1)
+    )
+
+
+def mbti_or_quiz(contents, config):
+    # 분석 호출은 JSON 응답 설정을 넘기고, 퀴즈 호출은 설정 없이 보냅니다.
+    return json.dumps(mbti_sample(), ensure_ascii=False) if config is not None else quiz_text()
+
+
+class QuizContextTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.gemini, patch = fake_gemini("play.views", mbti_or_quiz)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.chat_id = self.upload_chat().data["chat_id"]
+
+    def test_quiz_reuses_analysis_period(self):
+        option = {"analysis_start": "2024-01-04", "analysis_end": "끝까지"}
+        result_id = self.client.post(f"/api/play/chat/{self.chat_id}/analyze/mbti/", option, format="json").data["result_id"]
+        result = ResultPlayMBTI.objects.get(result_id=result_id)
+        self.assertEqual(len(result.context_key), 64)
+
+        response = self.client.post(f"/api/play/quiz/mbti/{result_id}/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        chat_prefix = self.gemini.calls[-1][0]
+        self.assertIn("좋은 아침", chat_prefix)
+        self.assertNotIn("안녕하세요", chat_prefix)
+        self.assertEqual(len(self.gemini.calls[-1]), 2)
+
+    def test_missing_context_is_registered_again(self):
+        result_id = self.client.post(f"/api/play/chat/{self.chat_id}/analyze/mbti/", MBTI_OPTION, format="json").data["result_id"]
+        ChatContext.objects.all().delete()
+
+        response = self.client.post(f"/api/play/quiz/mbti/{result_id}/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("다들 잘 자", self.gemini.calls[-1][0])
+        self.assertTrue(ChatContext.objects.exists())
+
+
+@override_settings(QUIZ_POOL_SIZE=5, QUIZ_POOL_MIN=2, QUIZ_POOL_REFILL=5)
+class QuizPoolTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.gemini, patch = fake_gemini("play.views", mbti_or_quiz)
+        patch.start()
+        self.addCleanup(patch.stop)
+        chat_id = self.upload_chat().data["chat_id"]
+        self.result_id = self.client.post(f"/api/play/chat/{chat_id}/analyze/mbti/", MBTI_OPTION, format="json").data["result_id"]
+        self.client.post(f"/api/play/quiz/mbti/{self.result_id}/")
+        self.quiz = MBTIQuiz.objects.get(result_id=self.result_id)
+
+    def add_question(self):
+        response = self.client.post(f"/api/play/quiz/mbti/{self.result_id}/add/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return MBTIQuizQuestion.objects.filter(quiz=self.quiz).order_by("question_index").last()
+
+    def test_quiz_creation_fills_pool(self):
+        self.assertEqual(MBTIQuizQuestion.objects.filter(quiz=self.quiz).count(), 10)
+        self.assertEqual(
+            list(MBTIQuizPoolQuestion.objects.filter(quiz=self.quiz).values_list("question", flat=True)),
+            [f"문제 {i}" for i in range(11, 16)],
+        )
+
+    def test_add_pops_pool_without_gemini(self):
+        calls = len(self.gemini.calls)
+        question = self.add_question()
+
+        self.assertEqual(len(self.gemini.calls), calls)
+        self.assertEqual((question.question_index, question.question, question.answer), (10, "문제 11", 4))
+        self.assertEqual(MBTIQuizPoolQuestion.objects.filter(quiz=self.quiz).count(), 4)
+
+    def test_empty_pool_generates_directly(self):
+        MBTIQuizPoolQuestion.objects.all().delete()
+        calls = len(self.gemini.calls)
+        with mock.patch("play.views.schedule_quiz_pool_refill"):
+            question = self.add_question()
+
+        self.assertEqual(len(self.gemini.calls), calls + 1)
+        self.assertEqual(question.question, "문제 1")
+
+    def test_low_pool_is_refilled_in_background(self):
+        # 후보를 2개만 남기고, 하나를 꺼내면 QUIZ_POOL_MIN(2)보다 적어지므로 QUIZ_POOL_REFILL개를 보충합니다.
+        MBTIQuizPoolQuestion.objects.exclude(pool_id__in=MBTIQuizPoolQuestion.objects.order_by("pool_id")[:2].values("pool_id")).delete()
+        _, refill_client = fake_gemini("play.utils", mbti_or_quiz)
+        with refill_client, \
+                mock.patch("play.utils.get_analysis_executor", return_value=ImmediateExecutor()), \
+                mock.patch("play.utils.connections"), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.add_question()
+
+        self.assertEqual(MBTIQuizPoolQuestion.objects.filter(quiz=self.quiz).count(), 1 + 5)
+
+
+SIX_PEOPLE_CHAT = "여섯 명 방 님과 카카오톡 대화\n저장한 날짜 : 2024-01-06 00:00:00\n\n--------------- 2024년 1월 3일 수요일 ---------------\n" + "".join(
+    f"[{name}] [오전 10:{minute:02d}] 메시지 {minute}\n"
+    for minute, name in enumerate(["김철수", "이영희", "박민수", "최지우", "정하늘"] * 2 + ["김철수", "강바다"])
+)
+
+
+class ChemTableTests(PlayAPITestCase):
+    def setUp(self):
+        super().setUp()
+        _, patch = fake_gemini("play.views", json_reply(schema_sample(ChemAnalysis)))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def analyse(self, text: str) -> dict:
+        chat_id = self.upload_chat(text).data["chat_id"]
+        result_id = self.client.post(f"/api/play/chat/{chat_id}/analyze/chem/", CHEM_OPTION, format="json").data["result_id"]
+        response = self.client.get(f"/api/play/analysis/chem/{result_id}/detail/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_table_is_dense_for_top_five(self):
+        data = self.analyse(SIX_PEOPLE_CHAT)
+
+        self.assertEqual(data["spec"]["tablesize"], 5)
+        self.assertEqual(data["spec"]["names"], ["김철수", "이영희", "박민수", "최지우", "정하늘", "강바다"])
+        self.assertEqual(
+            sorted((cell["row"], cell["column"]) for cell in data["spec_table"]),
+            [(i, j) for i in range(5) for j in range(5)],
+        )
+        # 표 밖의 참여자(강바다 -> 김철수 답장)는 저장하지만 상세 응답의 표에는 넣지 않습니다.
+        self.assertTrue(ResultPlayChemSpecTable.objects.filter(row=5, column=0, interaction__gt=0).exists())
+
+    def test_top_pairs_come_from_interactions(self):
+        data = self.analyse(SAMPLE_CHAT)
+
+        self.assertEqual(data["spec"]["tablesize"], 3)
+        self.assertEqual(len(data["spec_table"]), 9)
+        self.assertEqual({data["spec"]["top1_A"], data["spec"]["top1_B"]}, {"김철수", "이영희"})
+        self.assertEqual(data["spec"]["top1_score"], 100)
+
+
+class SpeakerAliasTests(PlayAPITestCase):
+    def test_prompt_uses_aliases_and_result_uses_names(self):
+        people = [schema_sample(MBTIPerson, name=name, MBTI=mbti) for name, mbti in (("P1", "ENFP"), ("P2", "ISTJ"))]
+        gemini, patch = fake_gemini("play.views", json_reply(schema_sample(MBTIAnalysis, results=people)))
+        chat_id = self.upload_chat().data["chat_id"]
+        with patch:
+            response = self.client.post(f"/api/play/chat/{chat_id}/analyze/mbti/", MBTI_OPTION, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        prompt = gemini.calls[0][0]
+        self.assertIn("[P1] [오후 3:12] 안녕하세요", prompt)
+        self.assertNotIn("[김철수]", prompt)
+        self.assertEqual(
+            list(ResultPlayMBTISpecPersonal.objects.values_list("name", "MBTI")), [("김철수", "ENFP"), ("이영희", "ISTJ")],
+        )
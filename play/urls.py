@@ -2,6 +2,9 @@ from django.urls import path
 from .views import (
     PlayChatView, 
     PlayChatDetailView, 
+    PlayChatUploadView,
+    PlayChatUploadDetailView,
+    PlayChatUploadCompleteView,
     PlayChatChemAnalyzeView, 
     PlayChatSomeAnalyzeView,
     PlayChatMBTIAnalyzeView,
@@ -9,6 +12,7 @@ from .views import (
     PlaySomeResultDetailView,
     PlayMBTIResultDetailView,
     PlayResultAllView,
+    PlayAnalysisJobDetailView,
     PlayChemQuizView,
     PlayChemQuizQuestionListDetailView,
     PlayChemQuizQuestionListGuestView,
@@ -58,6 +62,9 @@ app_name = 'play'
 
 urlpatterns = [
     path('chat/', PlayChatView.as_view()),
+    path('chat/uploads/', PlayChatUploadView.as_view()),
+    path('chat/uploads/<uuid:upload_id>/', PlayChatUploadDetailView.as_view()),
+    path('chat/uploads/<uuid:upload_id>/complete/', PlayChatUploadCompleteView.as_view()),
     path('chat/<int:chat_id>/', PlayChatDetailView.as_view()),
     path('chat/<int:chat_id>/analyze/chem/', PlayChatChemAnalyzeView.as_view()),  
     path('chat/<int:chat_id>/analyze/some/', PlayChatSomeAnalyzeView.as_view()),
@@ -66,6 +73,7 @@ urlpatterns = [
     path('analysis/some/<int:result_id>/detail/', PlaySomeResultDetailView.as_view()), 
     path('analysis/mbti/<int:result_id>/detail/', PlayMBTIResultDetailView.as_view()), 
     path('analysis/all/', PlayResultAllView.as_view()),
+    path('analysis/jobs/<uuid:job_id>/', PlayAnalysisJobDetailView.as_view()),
 
 
     path("chat/uuid/<int:result_id>/", GenerateUUIDView.as_view()),
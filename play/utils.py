@@ -1,55 +1,39 @@
+import logging
 import re
+import threading
+
 from google import genai
 # import settings  # 실제 환경에서는 API 키를 포함한 settings 모듈을 임포트해야 합니다.
-from .models import ChatPlay
+from .models import ChatPlay, ResultPlayChemSpecTable
 from django.conf import settings
-from datetime import datetime
-
-def extract_chat_title(path: str) -> str:
-    """
-    텍스트 파일 path의 첫 줄에서
-    “~님과” 앞부분만 가져옵니다.
-    """
-    with open(path, "r", encoding="utf-8") as f:
-        first_line = (
-            f.readline().strip()
-        )  # ex: "🦁멋사 13기 잡담방🦁 님과 카카오톡 대화"
-
-    # '(.*?)' : 가능한 한 짧게 매칭, '님과' 앞까지 캡쳐
-    match = re.match(r"^(.*?)\s*님과", first_line)
-    if match:
-        return match.group(1)
-    else:
-        # “님과” 패턴이 없으면 줄 전체를 리턴하거나 빈 문자열
-        return first_line
-
-def count_chat_participants(file_path: str) -> int:
-    """
-    채팅 파일(.txt)을 읽어 참여자 수를 계산하는 함수입니다.
-
-    Args:
-        file_path (str): 분석할 채팅 파일의 경로
-
-    Returns:
-        int: 중복을 제외한 총 참여자 수
-    """
-    participants = set()  # 중복을 허용하지 않는 set 자료구조 사용
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # 정규 표현식을 사용하여 '[이름]' 형식을 찾습니다.
-                match = re.match(r'\[(.*?)\]', line)
-                if match:
-                    # 찾은 이름(괄호 안의 내용)을 set에 추가합니다.
-                    participants.add(match.group(1))
-    except FileNotFoundError:
-        return "파일을 찾을 수 없습니다. 경로를 확인해주세요."
-    except Exception as e:
-        return f"파일을 읽는 중 오류가 발생했습니다: {e}"
-
-    return len(participants)
-
+from django.db import connections, models, transaction
+from chatlog.aliases import SpeakerAliases
+from chatlog.interactions import compute_interaction_matrix, format_interaction_pairs, interaction_cells, top_interaction_pairs
+from chatlog.sampling import BYTES_PER_TOKEN, sample_chat_by_date
+from chatlog.stats import compute_chat_stats, find_person_stats, format_chat_stats, load_chat_messages
+from analysis.clients import get_gemini_client
+from analysis.jobs import get_analysis_executor
+from analysis.cache import analysis_cache_key, get_cached_analysis, store_cached_analysis
+from analysis.context import get_chat_context, register_chat_context
+from analysis.mapreduce import CHAT_LOG_PLACEHOLDER, generate_chat_analysis
+from analysis.streaming import stream_parsed_sections
+from analysis.structured import json_response_config, parse_partial_json, parse_structured_response
+from .schemas import ChemAnalysis, MBTIAnalysis, SomeAnalysis
+
+# 분석에 쓰는 Gemini 모델과 분석별 프롬프트 버전.
+# 프롬프트나 응답 파싱을 바꾸면 버전을 올려서 이전 프롬프트로 만든 캐시 결과를 쓰지 않게 합니다.
+GEMINI_MODEL = "gemini-2.0-flash"
+SOME_PROMPT_VERSION = 5
+MBTI_PROMPT_VERSION = 4
+CHEM_PROMPT_VERSION = 6
+# 케미 퀴즈 프롬프트에 넣는 상호작용 매트릭스 칸 수. 점수가 높은 칸부터 넣습니다.
+CHEM_QUIZ_INTERACTIONS = 20
+
+logger = logging.getLogger(__name__)
+
+# 후보 문제를 보충하는 중인 (후보 문제 모델 이름, quiz_id). 같은 퀴즈를 동시에 두 번 보충하지 않도록 합니다.
+_refilling_pools = set()
+_refilling_lock = threading.Lock()
 
 def parse_response(pattern, text, is_int=False):
     match = re.search(pattern, text)
@@ -60,48 +44,6 @@ def parse_response(pattern, text, is_int=False):
     value = strip_helper(value)
     return int(value) if is_int else value
 
-def filter_chat_by_date(lines: list, analysis_option: dict) -> tuple[list, int]:
-    """
-    채팅 로그(lines)를 사용자가 지정한 기간(analysis_option)으로 필터링하고,
-    필터링된 라인의 수를 함께 반환합니다.
-
-    Args:
-        lines (list): 전체 채팅 로그 리스트
-        analysis_option (dict): 시작일과 종료일이 담긴 딕셔너리
-
-    Returns:
-        tuple: (필터링된 채팅 로그 리스트, 필터링된 라인 수)
-    """
-    start_option = analysis_option.get("start")
-    end_option = analysis_option.get("end")
-
-    # analysis_option의 날짜 형식이 'YYYY-MM-DD' 문자열이라고 가정합니다.
-    # 만약 datetime.date 객체라면 .strptime() 부분을 제거해야 합니다.
-    start_date = None if start_option == "처음부터" else datetime.strptime(start_option, "%Y-%m-%d").date()
-    end_date = None if end_option == "끝까지" else datetime.strptime(end_option, "%Y-%m-%d").date()
-
-    filtered_lines = []
-    current_date = None
-    date_pattern = re.compile(r"--------------- (\d{4}년 \d{1,2}월 \d{1,2}일)")
-
-    for line in lines:
-        date_match = date_pattern.search(line)
-        if date_match:
-            date_str = date_match.group(1)
-            current_date = datetime.strptime(date_str, "%Y년 %m월 %d일").date()
-        
-        if not current_date:
-            continue
-        
-        is_after_start = start_date is None or current_date >= start_date
-        is_before_end = end_date is None or current_date <= end_date
-
-        if is_after_start and is_before_end:
-            filtered_lines.append(line)
-
-    # 필터링된 라인 리스트와 그 길이를 튜플로 반환
-    return filtered_lines, len(filtered_lines)
-
 def strip_helper(cleaned_text: str) -> str:
     """
     문자열에서 불필요한 부분들을 제거합니다.
@@ -129,8 +71,165 @@ def strip_helper(cleaned_text: str) -> str:
     return cleaned_text
 
 
+def register_quiz_context(chat: ChatPlay, analysis_option: dict, chat_sample: str) -> str:
+    """
+    분석에 쓴 대화 구간을 퀴즈 생성에 다시 쓸 컨텍스트로 등록하고 키를 반환합니다.
+    표본이 프롬프트 하나(ANALYSIS_TOKEN_BUDGET)보다 길면 같은 기간에서 프롬프트 하나 분량의 표본을 다시 뽑아 등록합니다.
+    """
+    if len(chat_sample.encode("utf-8")) > settings.ANALYSIS_TOKEN_BUDGET * BYTES_PER_TOKEN:
+        chat_sample = sample_chat_by_date(chat.file.path, analysis_option, settings.ANALYSIS_TOKEN_BUDGET).text
+    return register_chat_context(chat_sample, GEMINI_MODEL)
+
+
+def get_quiz_context(result):
+    """
+    퀴즈 생성에 쓸 분석 결과의 대화 컨텍스트를 반환합니다.
+    등록된 컨텍스트가 없으면(이전에 만든 결과이거나 보관 기간이 지났으면) 분석 기간의 대화를 다시 읽어 등록합니다.
+
+    Args:
+        result (ResultPlayChem | ResultPlaySome | ResultPlayMBTI): 분석 결과
+
+    Returns:
+        ChatContext | None: 채팅 파일이 없거나 기간 안에 대화가 없으면 None
+    """
+    context = get_chat_context(result.context_key)
+    if context is not None:
+        return context
+
+    analysis_option = {"start": result.analysis_date_start, "end": result.analysis_date_end}
+    try:
+        chat_sample = sample_chat_by_date(result.chat.file.path, analysis_option).text
+    except FileNotFoundError:
+        return None
+    if not chat_sample:
+        return None
+
+    result.context_key = register_quiz_context(result.chat, analysis_option, chat_sample)
+    result.save(update_fields=["context_key"])
+    return get_chat_context(result.context_key)
+
+
+def format_chem_interactions(spec, limit: int = CHEM_QUIZ_INTERACTIONS) -> str:
+    """
+    케미 분석 결과의 상호작용 매트릭스에서 점수가 높은 칸 limit개를 "A --> B 케미 점수: 80" 줄들로 만듭니다.
+    참여자 목록(names)이 없는 이전 결과는 name_0~name_4를 씁니다.
+    """
+    names = spec.names or [spec.name_0, spec.name_1, spec.name_2, spec.name_3, spec.name_4]
+    cells = (
+        ResultPlayChemSpecTable.objects.filter(spec=spec, interaction__gt=0)
+        .exclude(row=models.F("column"))
+        .order_by("-interaction", "row", "column")
+    )
+    lines = [
+        f"{names[cell.row]} --> {names[cell.column]} 케미 점수: {cell.interaction}"
+        for cell in cells[:limit]
+        if cell.row < len(names) and cell.column < len(names)
+    ]
+    return "\n".join(lines) or "(주고받은 대화가 없습니다)"
+
+
+# ------------------------- quiz question pool ------------------------- #
+def parse_quiz_questions(response_text: str, first: int, last: int) -> list:
+    """
+    '문제N: / 선택지N-1~4: / 정답N:' 형식의 퀴즈 응답에서 first번부터 last번까지의 문제를 뽑습니다.
+    문제 내용이 없는 번호(모델이 만들지 않은 문제)는 건너뜁니다.
+
+    Returns:
+        list: 퀴즈 문제 모델의 필드(question, choice1~4, answer) 딕셔너리 리스트
+    """
+    questions = []
+    for i in range(first, last + 1):
+        question = {
+            "question": parse_response(rf"문제{i}:\s*(.+)", response_text),
+            "choice1": parse_response(rf"선택지{i}-1:\s*(.+)", response_text),
+            "choice2": parse_response(rf"선택지{i}-2:\s*(.+)", response_text),
+            "choice3": parse_response(rf"선택지{i}-3:\s*(.+)", response_text),
+            "choice4": parse_response(rf"선택지{i}-4:\s*(.+)", response_text),
+            "answer": parse_response(rf"정답{i}:\s*(\d+)", response_text, is_int=True),
+        }
+        if question["question"]:
+            questions.append(question)
+    return questions
+
+
+def store_quiz_pool(pool_model, quiz, questions: list) -> None:
+    """parse_quiz_questions()로 뽑은 문제들을 퀴즈의 후보 문제로 저장합니다."""
+    pool_model.objects.bulk_create([pool_model(quiz=quiz, **question) for question in questions])
+
+
+def pop_quiz_pool_question(pool_model, quiz) -> dict | None:
+    """
+    가장 먼저 만든 후보 문제 하나를 꺼내(삭제하고) 문제 필드 딕셔너리로 반환합니다. 후보가 없으면 None 입니다.
+    후보 행을 지우는 DELETE 한 번으로 꺼내므로, 동시에 들어온 두 요청이 같은 후보를 꺼내지 않습니다.
+    """
+    for candidate in pool_model.objects.filter(quiz=quiz).order_by("pool_id")[:5]:
+        deleted, _ = pool_model.objects.filter(pool_id=candidate.pool_id).delete()
+        if deleted:
+            return {
+                "question": candidate.question,
+                "choice1": candidate.choice1,
+                "choice2": candidate.choice2,
+                "choice3": candidate.choice3,
+                "choice4": candidate.choice4,
+                "answer": candidate.answer,
+            }
+    return None
+
+
+def schedule_quiz_pool_refill(pool_model, quiz, generate) -> None:
+    """
+    남은 후보 문제가 QUIZ_POOL_MIN개보다 적으면 분석 작업 스레드 풀에서 QUIZ_POOL_REFILL개를 보충합니다.
+
+    Args:
+        pool_model (Model): 후보 문제 모델 (ChemQuizPoolQuestion 등)
+        quiz (Model): 보충할 퀴즈
+        generate (callable): generate(result, client, count)로 문제 리스트를 만드는 함수 (generate_OneChemQuiz 등)
+    """
+    if not settings.QUIZ_POOL_REFILL or pool_model.objects.filter(quiz=quiz).count() >= settings.QUIZ_POOL_MIN:
+        return
+
+    key = (pool_model.__name__, quiz.quiz_id)
+    with _refilling_lock:
+        if key in _refilling_pools:
+            return
+    # 보충 중 표시는 트랜잭션이 커밋된 뒤에 겁니다. 롤백되면 콜백이 불리지 않으므로 표시가 남지 않습니다.
+    quiz_id = quiz.quiz_id
+    transaction.on_commit(lambda: _submit_quiz_pool_refill(key, pool_model, quiz_id, generate))
+
+
+def _submit_quiz_pool_refill(key, pool_model, quiz_id, generate) -> None:
+    with _refilling_lock:
+        if key in _refilling_pools:
+            return
+        _refilling_pools.add(key)
+    try:
+        get_analysis_executor().submit(_refill_quiz_pool, key, pool_model, quiz_id, generate)
+    except Exception:
+        # 종료 중인 스레드 풀이 작업을 받지 않으면 표시를 지워 다음 요청에서 다시 보충하게 합니다.
+        logger.exception("could not schedule quiz pool refill for %s", key)
+        with _refilling_lock:
+            _refilling_pools.discard(key)
+
+
+def _refill_quiz_pool(key, pool_model, quiz_id, generate) -> None:
+    try:
+        quiz_model = pool_model._meta.get_field("quiz").related_model
+        quiz = quiz_model.objects.filter(quiz_id=quiz_id).select_related("result").first()
+        if quiz is None:
+            return
+        questions = generate(quiz.result, get_gemini_client(), settings.QUIZ_POOL_REFILL)
+        if isinstance(questions, list):
+            store_quiz_pool(pool_model, quiz, questions)
+    except Exception:
+        logger.exception("quiz pool refill failed for %s", key)
+    finally:
+        with _refilling_lock:
+            _refilling_pools.discard(key)
+        connections.close_all()
+
+
 # ------------------------- some AI helper function ------------------------- #    
-def some_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict) -> dict:
+def some_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict, use_cache: bool = True, on_partial=None) -> dict:
     """
     사용자가 지정한 기간의 채팅을 필터링한 후,
     Gemini API를 여러 번 호출하여 각 항목을 분석하고 결과를 종합하여 반환합니다.
@@ -139,20 +238,32 @@ def some_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
         chat (ChatPlay): 분석할 채팅 객체.
         client (genai.Client): Gemini API 클라이언트.
         analysis_option (dict): 썸 분석 옵션 딕셔너리.
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): 주어지면 응답을 스트리밍으로 받고, 새로 파싱된 항목 딕셔너리를 받을 때마다 넘깁니다.
 
     Returns:
         dict: 모든 분석 항목을 포함하는 종합 결과 딕셔너리.
     """
     try:
-        with open(chat.file.path, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
+        chat_sample, num_chat, _, sample_ratio = sample_chat_by_date(chat.file.path, analysis_option)
 
-        filtered_lines, num_chat = filter_chat_by_date(all_lines, analysis_option)
-
-        if not filtered_lines:
+        if not num_chat:
              return {"error_message": "선택하신 기간에 해당하는 대화 내용이 없습니다."}
 
-        chat_sample = "".join(filtered_lines)
+        # 퀴즈를 만들 때 이 대화 구간을 다시 읽지 않도록 등록해 둡니다.
+        context_key = register_quiz_context(chat, analysis_option, chat_sample)
+
+        # 같은 대화 구간을 같은 옵션으로 분석한 결과가 있으면 Gemini를 다시 부르지 않습니다.
+        cache_key = analysis_cache_key("some", chat_sample, analysis_option, SOME_PROMPT_VERSION, GEMINI_MODEL)
+        if use_cache and (cached := get_cached_analysis(cache_key)) is not None:
+            if on_partial:
+                on_partial(cached)
+            return {**cached, "context_key": context_key}
+
+        # 답장 시간, 메시지 길이, 대화 시작 비율은 표본이 아닌 기간 전체에서 직접 계산하고, 프롬프트에는 사실로 넘깁니다.
+        stats = compute_chat_stats(load_chat_messages(chat.file.path, analysis_option))
+        # 대화와 통계의 참여자 이름은 별칭(P1, P2, …)으로 바꿔 보내고, 응답의 별칭은 원래 이름으로 되돌립니다.
+        aliases = SpeakerAliases.for_chat(chat_sample, [person["name"] for person in stats["people"]])
 
         age_info = analysis_option.get("age", "알 수 없음")
         relationship_info = analysis_option.get("relationship", "알 수 없음")
@@ -168,6 +279,11 @@ def some_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
         - 나이대: {age_info}
         - 상대방과의 관계: {relationship_info}
 
+        [대화 통계]
+        아래 값은 기간 안의 전체 대화에서 직접 계산한 정확한 값입니다. 수치를 다시 추정하지 말고 분석의 근거로 활용해주세요.
+        {format_chat_stats(aliases.alias(stats))}
+        {aliases.note}
+
         [당신의 임무]
         요청자가 제시한 관계에 편향되지 말고, 주어진 대화 내용만을 근거로 두 사람의 관계를 **매우 객관적으로 분석**해야 합니다.
         아래의 모든 분석 항목에 대해, 반드시 지정된 출력 형식에 맞춰 결과를 작성해주세요.
@@ -175,142 +291,82 @@ def some_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
 
         [분석 항목]
         1.  **주요 분석**: '썸'의 온도 점수를 0~100점 사이의 '썸 지수'로 평가하고, 전반적인 상황에 대한 1~2 문장의 코멘트를 작성해주세요.
-        2.  **호감도 분석**: 대화의 중심인물 두 명을 A와 B로 지정하세요. A가 B에게, B가 A에게 보이는 호감도를 각각 0~100점으로 평가하고, 각자가 상대를 대하는 대화상 특징을 5~10자 내외의 짧은 어구 3개로 설명해주세요. 마지막으로 관계를 2~3문장으로 요약해주세요.
+        2.  **호감도 분석**: 대화의 중심인물 두 명을 A와 B로 지정하고, 이름은 [대화 통계]의 참여자 이름 그대로 적어주세요. A가 B에게, B가 A에게 보이는 호감도를 각각 0~100점으로 평가하고, 각자가 상대를 대하는 대화상 특징을 5~10자 내외의 짧은 어구 3개로 설명해주세요. 마지막으로 관계를 2~3문장으로 요약해주세요.
         3.  **대화 스타일 분석**: 말투, 감정표현(이모티콘, ㅋㅋ 등), 호칭 세 가지 기준에 대해 각각 0~100점 점수, 한 줄 설명, 실제 대화 예시를 제시해주세요.
-        4.  **답장 패턴 분석**: 타임스탬프를 기반으로 대화자 A와 B의 평균 답장 시간을 '분' 단위로 추정하고, 각자의 답장 경향을 한 줄로 설명해주세요.
+        4.  **답장 패턴 분석**: [대화 통계]의 평균 답장 시간을 참고해 대화자 A와 B 각자의 답장 경향을 한 줄로 설명해주세요.
         5.  **약속 제안 분석**: 대화자 A와 B가 만남을 제안한 횟수를 각각 세고, 제안 스타일을 한 줄로 설명한 뒤, 가장 대표적인 실제 제안 예시를 각각 들어주세요. (예시가 없으면 '없음')
-        6.  **대화 주도권 분석**: 대화자 A와 B가 새로운 대화 주제를 시작한 비율을 합계 100%가 되도록 추정하고, 주제를 시작하는 스타일을 한 줄로 설명한 뒤, 실제 예시를 각각 들어주세요. (예시가 없으면 '없음'). 
-        7. **평균 메시지 길이 분석**: 대화자 A와 B의 평균 메시지 길이를 각각 계산하고, 메시지 스타일을 한 줄로 설명한 뒤, 실제 예시를 각각 들어주세요. (예시가 없으면 '없음'). 
+        6.  **대화 주도권 분석**: [대화 통계]의 대화를 시작한 횟수를 참고해, 대화자 A와 B가 주제를 시작하는 스타일을 한 줄로 설명한 뒤, 실제 예시를 각각 들어주세요. (예시가 없으면 '없음'). 
+        7. **평균 메시지 길이 분석**: [대화 통계]의 평균 메시지 길이를 참고해 대화자 A와 B의 메시지 스타일을 한 줄로 설명한 뒤, 실제 예시를 각각 들어주세요. (예시가 없으면 '없음'). 
         8. **대화 패턴 요약**: 분석한 메시지 길이와 내용을 바탕으로 두 사람의 대화 패턴을 2문장으로 요약해주세요.
         9. **종합 상담**: '챗토'의 입장에서, 두 사람의 현재 관계를 긍정적으로 요약하고 응원하는 3~4문장의 따뜻한 상담 메시지와, '썸' 관계 발전을 위한 1~2문장의 실용적인 팁을 작성해주세요.
 
         
 
         --- [출력 형식] ---
-        썸 지수: [숫자]
-        전반적인 코멘트: [코멘트 문장 1, 코멘트 문장 2]
-        ###
-        이름 A: [A의 실제 이름]
-        이름 B: [B의 실제 이름]
-        A->B 호감도: [숫자]
-        B->A 호감도: [숫자]
-        A의 특징: [특징1, 특징2, 특징3]
-        B의 특징: [특징1, 특징2, 특징3]
-        호감도 요약: [2-3 문장 요약]
-        ###
-        말투 점수: [숫자]
-        말투 설명: [한 줄 설명]
-        말투 예시: [실제 대화 예시]
-        감정표현 점수: [숫자]
-        감정표현 설명: [한 줄 설명]
-        감정표현 예시: [실제 대화 예시]
-        호칭 점수: [숫자]
-        호칭 설명: [한 줄 설명]
-        호칭 예시: [실제 대화 예시]
-        ###
-        A 평균 답장 시간(분): [숫자]
-        B 평균 답장 시간(분): [숫자]
-        A 답장 특징: [한 줄 설명]
-        B 답장 특징: [한 줄 설명]
-        ###
-        A 약속 제안 횟수: [숫자]
-        B 약속 제안 횟수: [숫자]
-        A 약속 제안 특징: [한 줄 설명]
-        B 약속 제안 특징: [한 줄 설명]
-        A 약속 제안 예시: [실제 대화 예시]
-        B 약속 제안 예시: [실제 대화 예시]
-        ###
-        A 주제 시작 비율(%): [숫자]
-        B 주제 시작 비율(%): [숫자]
-        A 주제 시작 특징: [한 줄 설명]
-        B 주제 시작 특징: [한 줄 설명]
-        A 주제 시작 예시: [실제 대화 예시]
-        B 주제 시작 예시: [실제 대화 예시]
-        ### 
-        A 평균 메시지 길이: [숫자]
-        B 평균 메시지 길이: [숫자]
-        A 메시지 특징: [한 줄 설명]
-        B 메시지 특징: [한 줄 설명]
-        A 메시지 예시: [실제 대화 예시]
-        B 메시지 예시: [실제 대화 예시]
-        ###
-        대화 패턴 분석: ["요약 문장 1", "요약 문장 2"]
-        ###
-        챗토의 연애상담: [상담 문장 1, 상담 문장 2, 상담 문장 3]
-        챗토의 연애상담 팁: [팁 문장 1, 팁 문장 2]
-        
+        지정된 JSON 스키마의 모든 필드를 채운 JSON 객체 하나로만 응답해주세요. 각 필드의 설명을 따르고, 다른 설명은 덧붙이지 마세요.
 
         --- [카카오톡 대화 내용] ---
-        {chat_sample}
+        {CHAT_LOG_PLACEHOLDER}
         --- [분석 시작] ---
         """
 
-        response = client.models.generate_content(
-            model='gemini-2.0-flash', contents=[prompt]
+        # 대화가 프롬프트 하나에 들어가지 않으면 구간별로 나눠 동시에 분석한 뒤 하나로 합칩니다.
+        # on_partial이 있으면 응답을 스트리밍으로 받으면서 새로 파싱되는 항목을 바로 넘깁니다.
+        response_text = generate_chat_analysis(
+            client, GEMINI_MODEL, prompt, aliases.alias_chat(chat_sample),
+            on_text=stream_parsed_sections(aliases.restoring(parse_partial_json), on_partial),
+            config=json_response_config(SomeAnalysis),
         )
-        response_text = response.text
-
-        results = {
-            "score_main": parse_response(r"썸 지수:\s*(\d+)", response.text, is_int=True),
-            "comment_main": parse_response(r"전반적인 코멘트:\s*(.+)", response.text),
-            "name_A": parse_response(r"이름 A:\s*(.+)", response.text),
-            "name_B": parse_response(r"이름 B:\s*(.+)", response.text),
-            "score_A": parse_response(r"A->B 호감도:\s*(\d+)", response.text, is_int=True),
-            "score_B": parse_response(r"B->A 호감도:\s*(\d+)", response.text, is_int=True),
-            "trait_A": parse_response(r"A의 특징:\s*(.+)", response.text),
-            "trait_B": parse_response(r"B의 특징:\s*(.+)", response.text),
-            "summary": parse_response(r"호감도 요약:\s*(.+)", response.text),
-            
-            "tone_score": parse_response(r"말투 점수:\s*(\d+)", response.text, is_int=True),
-            "tone_desc": parse_response(r"말투 설명:\s*(.+)", response.text),
-            "tone_ex": parse_response(r"말투 예시:\s*(.+)", response.text),
-            "emo_score": parse_response(r"감정표현 점수:\s*(\d+)", response.text, is_int=True),
-            "emo_desc": parse_response(r"감정표현 설명:\s*(.+)", response.text),
-            "emo_ex": parse_response(r"감정표현 예시:\s*(.+)", response.text),
-            "addr_score": parse_response(r"호칭 점수:\s*(\d+)", response.text, is_int=True),
-            "addr_desc": parse_response(r"호칭 설명:\s*(.+)", response.text),
-            "addr_ex": parse_response(r"호칭 예시:\s*(.+)", response.text),
-            "reply_A": parse_response(r"A 평균 답장 시간\(분\):\s*(\d+)", response.text, is_int=True),
-            "reply_B": parse_response(r"B 평균 답장 시간\(분\):\s*(\d+)", response.text, is_int=True),
-            "reply_A_desc": parse_response(r"A 답장 특징:\s*(.+)", response.text),
-            "reply_B_desc": parse_response(r"B 답장 특징:\s*(.+)", response.text),
-            "rec_A": parse_response(r"A 약속 제안 횟수:\s*(\d+)", response.text, is_int=True),
-            "rec_B": parse_response(r"B 약속 제안 횟수:\s*(\d+)", response.text, is_int=True),
-            "rec_A_desc": parse_response(r"A 약속 제안 특징:\s*(.+)", response.text),
-            "rec_B_desc": parse_response(r"B 약속 제안 특징:\s*(.+)", response.text),
-            "rec_A_ex": parse_response(r"A 약속 제안 예시:\s*(.+)", response.text),
-            "rec_B_ex": parse_response(r"B 약속 제안 예시:\s*(.+)", response.text),
-            "atti_A": parse_response(r"A 주제 시작 비율\(%\):\s*(\d+)", response.text, is_int=True),
-            "atti_B": parse_response(r"B 주제 시작 비율\(%\):\s*(\d+)", response.text, is_int=True),
-            "atti_A_desc": parse_response(r"A 주제 시작 특징:\s*(.+)", response.text),
-            "atti_B_desc": parse_response(r"B 주제 시작 특징:\s*(.+)", response.text),
-            "atti_A_ex": parse_response(r"A 주제 시작 예시:\s*(.+)", response.text),
-            "atti_B_ex": parse_response(r"B 주제 시작 예시:\s*(.+)", response.text),
-            "len_A": parse_response(r"A 평균 메시지 길이:\s*(\d+)", response.text, is_int=True),
-            "len_B": parse_response(r"B 평균 메시지 길이:\s*(\d+)", response.text, is_int=True),
-            "len_A_desc": parse_response(r"A 메시지 특징:\s*(.+)", response.text),
-            "len_B_desc": parse_response(r"B 메시지 특징:\s*(.+)", response.text),
-            "len_A_ex": parse_response(r"A 메시지 예시:\s*(.+)", response.text),
-            "len_B_ex": parse_response(r"B 메시지 예시:\s*(.+)", response.text),
-            "pattern_analysis": parse_response(r"대화 패턴 분석:\s*(.+)", response.text),
-            "chatto_counsel": parse_response(r"챗토의 연애상담:\s*(.+)", response.text),
-            "chatto_counsel_tips": parse_response(r"챗토의 연애상담 팁:\s*(.+)", response.text),
-            "num_chat": num_chat
-        }
-        return results
+
+        results = aliases.restore(parse_some_response(response_text))
+        results.update(_some_stat_fields(stats, results["name_A"], results["name_B"]))
+        results["num_chat"] = num_chat
+        results["sample_ratio"] = sample_ratio # 기간 안의 메시지 중 프롬프트에 담긴 비율
+        store_cached_analysis(cache_key, "some", results, SOME_PROMPT_VERSION, GEMINI_MODEL)
+        return {**results, "context_key": context_key}
 
     except Exception as e:
         print(f"Gemini로 종합 분석 중 에러 발생: {e}")
         return {"error_message": f"분석 중 오류가 발생했습니다: {e}"}
 
+def parse_some_response(response_text: str) -> dict:
+    """썸 분석 JSON 응답을 검증해 결과 딕셔너리로 바꿉니다. 빠진 항목이 있으면 StructuredResponseError가 발생합니다."""
+    return parse_structured_response(SomeAnalysis, response_text).model_dump()
+
+
+def _some_stat_fields(stats: dict, name_A: str, name_B: str) -> dict:
+    # A와 B의 평균 답장 시간, 평균 메시지 길이, 대화 시작 비율(합이 100)을 계산한 통계에서 채웁니다.
+    # 별칭을 되돌린 이름은 참여자 이름과 정확히 같습니다. 찾지 못하면(별칭을 쓰지 못한 대화 등) 남은 참여자 중 말수가 많은 사람으로 채웁니다.
+    person_A = find_person_stats(stats, name_A)
+    person_B = find_person_stats(stats, name_B)
+    if person_B is person_A:
+        person_B = None
+    others = [person for person in stats["people"] if person is not person_A and person is not person_B]
+    empty = {"avg_reply": 0, "avg_length": 0, "initiations": 0}
+    person_A = person_A or (others.pop(0) if others else empty)
+    person_B = person_B or (others.pop(0) if others else empty)
+
+    started = person_A["initiations"] + person_B["initiations"]
+    atti_A = round(person_A["initiations"] * 100 / started) if started else 50
+    return {
+        "reply_A": round(person_A["avg_reply"]),
+        "reply_B": round(person_B["avg_reply"]),
+        "len_A": round(person_A["avg_length"]),
+        "len_B": round(person_B["avg_length"]),
+        "atti_A": atti_A,
+        "atti_B": 100 - atti_A,
+    }
+
 # ------------------------- MBTI AI helper function ------------------------- #
-def mbti_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict) -> list:
+def mbti_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict, use_cache: bool = True, on_partial=None) -> list:
     """
     Gemini API를 사용해 채팅 참여자들의 MBTI를 분석합니다.
 
     Args:
         chat (ChatPlay): 분석할 채팅 객체
         client (genai.Client): Gemini API 클라이언트
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): 주어지면 응답을 스트리밍으로 받고, 새로 파싱된 항목 딕셔너리를 받을 때마다 넘깁니다.
 
     Returns:
         list: 각 참여자의 MBTI 분석 결과 딕셔너리가 담긴 리스트.
@@ -324,30 +380,43 @@ def mbti_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
                       "ie_desc": "...", "ie_ex": "...", ...
                   }
               ]
+              실제로는 (이 리스트, 기간 안의 메시지 수, 프롬프트에 담긴 메시지 비율, 퀴즈용 컨텍스트 키) 튜플로 반환합니다.
+              분석하지 못하면 ([{"error_message": "..."}], 0, 0.0, "")를 반환합니다.
     """
     try:
-        file_path = chat.file.path
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            
-            filtered_lines, num_chat = filter_chat_by_date(lines, analysis_option)
+        chat_content_sample, num_chat, _, sample_ratio = sample_chat_by_date(chat.file.path, analysis_option)
+
+        if not num_chat:
+            return [{"error_message": "유효한 대화 내용이 없습니다."}], 0, 0.0, ""
 
-            if not filtered_lines:
-                return {"error_message": "유효한 대화 내용이 없습니다."}
+        # 퀴즈를 만들 때 이 대화 구간을 다시 읽지 않도록 등록해 둡니다.
+        context_key = register_quiz_context(chat, analysis_option, chat_content_sample)
+
+        # 같은 대화 구간을 분석한 결과가 있으면 Gemini를 다시 부르지 않습니다.
+        cache_key = analysis_cache_key(
+            "mbti", chat_content_sample, analysis_option, MBTI_PROMPT_VERSION, GEMINI_MODEL,
+            people_num=chat.people_num,
+        )
+        if use_cache and (cached := get_cached_analysis(cache_key)) is not None:
+            if on_partial:
+                on_partial(cached)
+            return cached["results"], cached["num_chat"], cached["sample_ratio"], context_key
 
-            chat_content_sample = "".join(filtered_lines) 
+        # 대화의 참여자 이름은 별칭(P1, P2, …)으로 바꿔 보내고, 응답의 별칭은 원래 이름으로 되돌립니다.
+        aliases = SpeakerAliases.for_chat(chat_content_sample)
 
         # Gemini에게 보낼 프롬프트입니다.
-        # 각 참여자별로 분석을 반복하고, 명확한 구분자(--- PERSON ANALYSIS ---)를 사용하도록 지시합니다.
+        # 참여자별 분석은 응답 JSON의 results 배열로 받습니다.
         prompt = f"""
         당신은 카카오톡 대화 내용을 기반으로 MBTI를 분석하는 심리 분석 전문가 'Chatto' 입니다.
         사람들의 이목을 충분히 끌만큼 유쾌하고 자극적인 분석을 제공해주세요.
         이모티콘이나 비유를 활용하여 더욱 풍부한 표현을 사용해주세요.
         딱딱한 말투가 아닌 친근하고 위트있는 말투로 작성해주세요.
         주어진 카카오톡 대화 내용을 분석하여, {chat.people_num}명의 대화의 참여자 전원의 정보를 예측해주세요.
+        {aliases.note}
 
         각 참여자에 대해 다음 항목들을 분석하고, 반드시 지정된 출력 형식에 맞춰 작성해야 합니다.
-        1.  이름: 대화에서 사용된 참여자의 이름을 정확히 기재해주세요.
+        1.  이름: 대화에서 사용된 참여자의 이름(별칭)을 그대로 기재해주세요.
         2.  MBTI: 예측된 MBTI 유형 16가지 중 하나를 기재해주세요.
         3.  요약 (summary): 해당 참여자의 대화 스타일과 성격을 보여주는 한 줄 요약을 작성해주세요.
         4.  설명+부가설명 (desc): 예측된 MBTI와 요약을 바탕으로, 성격에 대한 2-3문장의 부가 설명을 작성해주세요.
@@ -357,116 +426,79 @@ def mbti_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
         8.  대표 MBTI 모먼트 (moment): 성격이 가장 잘 드러나는 대표적인 대화 순간 하나를 인용하고, 왜 그렇게 생각하는지 한 문장으로 설명해주세요.
         9.  각 MBTI 지표(I/E, S/N, F/T, J/P) 분석: 각 지표에 대해 왜 그렇게 판단했는지 1-2 문장으로 설명하고, 근거가 된 실제 대화 내용을 정확히 인용해주세요.
 
-        아래 출력 형식을 반드시 지켜주세요. 참여자별 분석은 '--- PERSON ANALYSIS ---'로 구분해주세요.
-        다른 부가적인 설명은 절대 추가하지 마세요.
-
-        --- PERSON ANALYSIS ---
-        이름: [참여자 이름]
-        MBTI: [예측 MBTI]
-        summary: [성격 및 대화 스타일 요약]
-        desc: [부가 설명 문장 1, 부가 설명 문장 2, 부가 설명 문장 3]
-        position: [한 단어로 표현된 포지션]
-        personality: [#키워드1, #키워드2, #키워드3]
-        style: [#키워드1, #키워드2, #키워드3]
-        moment_desc: [대표 모먼트에 대한 한 문장 설명]
-        moment_ex: [가장 대표적인 실제 대화 예시]
-        momentIE_desc: [내향/외향 판단 이유]
-        momentIE_ex: [실제 대화 예시]
-        momentSN_desc: [감각/직관 판단 이유]
-        momentSN_ex: [실제 대화 예시]
-        momentFT_desc: [감정/사고 판단 이유]
-        momentFT_ex: [실제 대화 예시]
-        momentJP_desc: [판단/인식 판단 이유]
-        momentJP_ex: [실제 대화 예시]
+        참여자별 분석은 results 배열에 한 명씩 담아주세요.
+        지정된 JSON 스키마의 모든 필드를 채운 JSON 객체 하나로만 응답해주세요. 각 필드의 설명을 따르고, 다른 설명은 덧붙이지 마세요.
 
         --- CHAT LOG ---
-        {chat_content_sample}
+        {CHAT_LOG_PLACEHOLDER}
         --- END CHAT LOG ---
         """
 
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=[prompt]
+        # 대화가 프롬프트 하나에 들어가지 않으면 구간별로 나눠 동시에 분석한 뒤 하나로 합칩니다.
+        response_text = generate_chat_analysis(
+            client, GEMINI_MODEL, prompt, aliases.alias_chat(chat_content_sample),
+            on_text=stream_parsed_sections(aliases.restoring(parse_partial_json), on_partial),
+            config=json_response_config(MBTIAnalysis),
         )
-        response_text = response.text
-
-        analyses = response_text.split('--- PERSON ANALYSIS ---')
-        results = []
-
-        for analysis_block in analyses:
-            if not analysis_block.strip():
-                continue
-
-            # DB 스키마에 맞게 모든 필드를 파싱합니다.
-            name = parse_response(r"이름:\s*(.+)", analysis_block)
-            mbti = parse_response(r"MBTI:\s*([A-Z]{4})", analysis_block)
-            summary = parse_response(r"summary:\s*(.+)", analysis_block)
-            desc = parse_response(r"desc:\s*(.+)", analysis_block)
-            position = parse_response(r"position:\s*(.+)", analysis_block)
-            personality = parse_response(r"personality:\s*(.+)", analysis_block)
-            style = parse_response(r"style:\s*(.+)", analysis_block)
-            moment_desc = parse_response(r"moment_desc:\s*(.+)", analysis_block)
-            moment_ex = parse_response(r"moment_ex:\s*(.+)", analysis_block)
-            momentIE_desc = parse_response(r"momentIE_desc:\s*(.+)", analysis_block)
-            momentIE_ex = parse_response(r"momentIE_ex:\s*(.+)", analysis_block)
-            momentSN_desc = parse_response(r"momentSN_desc:\s*(.+)", analysis_block)
-            momentSN_ex = parse_response(r"momentSN_ex:\s*(.+)", analysis_block)
-            momentFT_desc = parse_response(r"momentFT_desc:\s*(.+)", analysis_block)
-            momentFT_ex = parse_response(r"momentFT_ex:\s*(.+)", analysis_block)
-            momentJP_desc = parse_response(r"momentJP_desc:\s*(.+)", analysis_block)
-            momentJP_ex = parse_response(r"momentJP_ex:\s*(.+)", analysis_block)
-
-            if name and mbti:
-                results.append({
-                    "name": name,
-                    "MBTI": mbti,
-                    "summary": summary,
-                    "desc": desc,
-                    "position": position,
-                    "personality": personality,
-                    "style": style,
-                    "moment_desc": moment_desc,
-                    "moment_ex": moment_ex,
-                    "momentIE_desc": momentIE_desc,
-                    "momentIE_ex": momentIE_ex,
-                    "momentSN_desc": momentSN_desc,
-                    "momentSN_ex": momentSN_ex,
-                    "momentFT_desc": momentFT_desc,
-                    "momentFT_ex": momentFT_ex,
-                    "momentJP_desc": momentJP_desc,
-                    "momentJP_ex": momentJP_ex,
-                })
 
-        
-        return results, num_chat
+        results = aliases.restore(parse_mbti_response(response_text))
+
+        if results:
+            store_cached_analysis(
+                cache_key, "mbti", {"results": results, "num_chat": num_chat, "sample_ratio": sample_ratio}, MBTI_PROMPT_VERSION, GEMINI_MODEL,
+            )
+        return results, num_chat, sample_ratio, context_key
 
     except Exception as e:
         print(f"Gemini로 MBTI 상세 분석 중 에러 발생: {e}")
-        return [{"error_message": "MBTI 상세 분석 중 오류가 발생했습니다."}]
+        return [{"error_message": f"MBTI 상세 분석 중 오류가 발생했습니다: {e}"}], 0, 0.0, ""
+
+def parse_mbti_response(response_text: str) -> list:
+    """MBTI 분석 JSON 응답을 검증해 이름과 MBTI가 있는 참여자별 결과 리스트로 바꿉니다."""
+    analysis = parse_structured_response(MBTIAnalysis, response_text)
+    return [person.model_dump() for person in analysis.results if person.name and person.MBTI]
 
 # ------------------------- CHMI AI helper function ------------------------- #
-def chem_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict) -> dict:
+def chem_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_option: dict, use_cache: bool = True, on_partial=None) -> dict:
     """
     단체 채팅방의 '케미'를 종합적으로 분석합니다.
     사용자의 상황 정보를 참고하여 전반적인 점수, Top3 케미 조합, 대화 스타일,
     주요 토픽, 상호작용 매트릭스, 맞춤형 조언 등을 생성합니다.
     """
     try:
-        with open(chat.file.path, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
+        chat_content_sample, num_chat, _, sample_ratio = sample_chat_by_date(chat.file.path, analysis_option)
 
-        filtered_lines, num_chat = filter_chat_by_date(all_lines, analysis_option)
-
-        if not filtered_lines:
+        if not num_chat:
             return {"error_message": "선택하신 기간에 해당하는 대화 내용이 없습니다."}
 
-        chat_content_sample = "".join(filtered_lines)
+        # 퀴즈를 만들 때 이 대화 구간을 다시 읽지 않도록 등록해 둡니다.
+        context_key = register_quiz_context(chat, analysis_option, chat_content_sample)
+
+        # 같은 대화 구간을 같은 옵션으로 분석한 결과가 있으면 Gemini를 다시 부르지 않습니다.
+        cache_key = analysis_cache_key(
+            "chem", chat_content_sample, analysis_option, CHEM_PROMPT_VERSION, GEMINI_MODEL,
+            people_num=chat.people_num,
+        )
+        if use_cache and (cached := get_cached_analysis(cache_key)) is not None:
+            if on_partial:
+                on_partial(cached)
+            return {**cached, "context_key": context_key}
+
+        # 응답 패턴 수치와 참여자 전원의 상호작용 매트릭스, Top3 조합은 기간 전체에서 직접 계산해 바로 넘기고,
+        # 프롬프트에는 사실로 넣어 Gemini는 조합에 대한 설명만 씁니다.
+        messages = load_chat_messages(chat.file.path, analysis_option)
+        stats = compute_chat_stats(messages)
+        matrix = compute_interaction_matrix(messages)
+        top_pairs = top_interaction_pairs(matrix, 3)
+        local_fields = _chem_local_fields(stats, matrix, top_pairs)
+        if on_partial:
+            on_partial(local_fields)
+        # 대화와 통계의 참여자 이름은 별칭(P1, P2, …)으로 바꿔 보내고, 응답의 별칭은 원래 이름으로 되돌립니다.
+        aliases = SpeakerAliases.for_chat(chat_content_sample, matrix.names)
 
         relationship_info = analysis_option.get("relationship", "알 수 없음")
         situation_info = analysis_option.get("situation", "알 수 없음")
         people_num = chat.people_num
-        # 분석할 참여자 수를 최대 5명으로 제한
-        size = 5 if people_num >= 5 else people_num
 
         prompt = f"""
         당신은 그룹 커뮤니케이션 및 관계 분석 전문가 'Chatto'입니다.
@@ -479,154 +511,76 @@ def chem_analysis_with_gemini(chat: ChatPlay, client: genai.Client, analysis_opt
         - 관계 유형: {relationship_info}
         - 대화 상황: {situation_info}
 
+        [대화 통계]
+        아래 값은 기간 안의 전체 대화에서 직접 계산한 정확한 값입니다. 수치를 다시 추정하지 말고 분석의 근거로 활용해주세요.
+        {format_chat_stats(aliases.alias(stats))}
+        {aliases.note}
+
+        [케미 Top 3 조합]
+        아래 조합은 서로 주고받은 답장과 이름 부르기 횟수로 계산한 순위입니다. 순서를 바꾸지 말고 설명해주세요.
+        {format_interaction_pairs(aliases.alias(top_pairs)) or "(서로 주고받은 대화가 없습니다)"}
+
         [당신의 임무]
         주어진 단체 카톡방 대화 내용을 바탕으로, 그룹의 전반적인 '케미'와 멤버 간의 상호작용을 객관적으로 분석해야 합니다.
         아래의 모든 분석 항목에 대해, 반드시 지정된 출력 형식에 맞춰 결과를 작성해주세요.
 
         [분석 항목]
         1.  **핵심 분석**: 그룹 전체의 케미를 100점 만점으로 평가하고, 2-3문장으로 요약해주세요.
-        2.  **참여자 식별**: 대화에서 가장 활동적인 참여자 {size}명의 이름을 찾아주세요.
-        3.  **최고의 케미 조합 Top 3**: 가장 케미가 좋은 두 사람의 조합(Dyad) 3개를 찾아, 각 조합의 이름, 케미 점수, 긍정적인 이유를 한 문장으로 설명해주세요.
-        4.  **대화 스타일**: 그룹의 전체적인 말투를 '긍정적/다정함', '유머러스함', '기타(중립, 비판 등)' 세 가지로 나누어 비율(%)을 추정하고, 가장 특징적인 대화 예시를 말한 사람을 포함시켜서 3개 들어주세요. 또한 말투 분석을 1-2문장으로 요약해주세요.
-        5.  **응답 패턴**: 그룹의 평균 답장 시간(분), 즉각 응답률(%), 그리고 답을 받지 못하고 묻힌 메시지 비율(%)을 추정하고, 응답 패턴에 대한 종합 분석을 1-2문장으로 요약해주세요.
-        6.  **주요 토픽**: 대화에서 가장 많이 언급된 상위 4개 토픽과 각 토픽의 비율(%)을 분석해주세요.
-        7.  **상호작용 매트릭스**: 위에서 식별한 {size}명의 참여자 간 상호작용 점수(0~100)를 계산해주세요. A가 B에게 보낸 메시지의 긍정성, 응답률 등을 종합하여 점수를 매깁니다.
-        8.  **챗토의 종합 솔루션**: 그룹의 현재 상태를 진단하고, 관계를 더 좋게 만들기 위한 구체적인 팁 3개를 작성해주세요.
+        2.  **최고의 케미 조합 Top 3**: [케미 Top 3 조합]의 조합마다 케미가 좋은 이유를 대화 내용을 근거로 한 문장씩 설명해주세요.
+        3.  **대화 스타일**: 그룹의 전체적인 말투를 '긍정적/다정함', '유머러스함', '기타(중립, 비판 등)' 세 가지로 나누어 비율(%)을 추정하고, 가장 특징적인 대화 예시를 말한 사람을 포함시켜서 3개 들어주세요. 또한 말투 분석을 1-2문장으로 요약해주세요.
+        4.  **응답 패턴**: [대화 통계]의 평균 답장 시간, 즉각 응답률, 묻힌 메시지 비율을 바탕으로 응답 패턴에 대한 종합 분석을 1-2문장으로 요약해주세요.
+        5.  **주요 토픽**: 대화에서 가장 많이 언급된 상위 4개 토픽과 각 토픽의 비율(%)을 분석해주세요.
+        6.  **챗토의 종합 솔루션**: 그룹의 현재 상태를 진단하고, 관계를 더 좋게 만들기 위한 구체적인 팁 3개를 작성해주세요.
 
         --- [출력 형식] ---
-        전체 케미 점수: [숫자]
-        전체 케미 요약: [2-3 문장 요약]
-        ###
-        참여자 1: [이름]
-        참여자 2: [이름]
-        참여자 3: [이름]
-        참여자 4: [이름]
-        참여자 5: [이름]
-        ###
-        Top1 이름 A: [이름]
-        Top1 이름 B: [이름]
-        Top1 케미 점수: [숫자]
-        Top1 코멘트: [한 문장 설명]
-        ---
-        Top2 이름 A: [이름]
-        Top2 이름 B: [이름]
-        Top2 케미 점수: [숫자]
-        Top2 코멘트: [한 문장 설명]
-        ---
-        Top3 이름 A: [이름]
-        Top3 이름 B: [이름]
-        Top3 케미 점수: [숫자]
-        Top3 코멘트: [한 문장 설명]
-        ###
-        긍정 말투 비율(%): [숫자]
-        유머 말투 비율(%): [숫자]
-        비판 말투 비율(%): [숫자]
-        기타 말투 비율(%): [숫자]
-        말투 대표 예시1: [실제 대화 예시] (말한 사람)
-        말투 대표 예시2: [실제 대화 예시] (말한 사람)
-        말투 대표 예시3: [실제 대화 예시] (말한 사람)
-        말투 분석: [1-2 문장 요약]
-        ###
-        평균 답장 시간(분): [숫자]
-        응답률(%): [숫자]
-        메시지 무시 비율(%): [숫자]
-        응답 패턴 종합 분석: [1-2 문장 요약]
-        ###
-        주요 토픽 1: [토픽 이름]
-        주요 토픽 1 비율(%): [숫자]
-        주요 토픽 2: [토픽 이름]
-        주요 토픽 2 비율(%): [숫자]
-        주요 토픽 3: [토픽 이름]
-        주요 토픽 3 비율(%): [숫자]
-        주요 토픽 4: [토픽 이름]
-        주요 토픽 4 비율(%): [숫자]
-        기타 토픽 비율(%): [숫자]
-        ###
-        상호작용 매트릭스: [참여자1-참여자2: 점수, 참여자1-참여자3: 점수, ...]
-        ###
-        챗토의 종합 분석: [그룹 관계 진단]
-        챗토의 관계 레벨업 1: [솔루션 제목]
-        챗토의 관계 레벨업 팁 1: [구체적인 팁]
-        챗토의 관계 레벨업 2: [솔루션 제목]
-        챗토의 관계 레벨업 팁 2: [구체적인 팁]
-        챗토의 관계 레벨업 3: [솔루션 제목]
-        챗토의 관계 레벨업 팁 3: [구체적인 팁]
+        지정된 JSON 스키마의 모든 필드를 채운 JSON 객체 하나로만 응답해주세요. 각 필드의 설명을 따르고, 다른 설명은 덧붙이지 마세요.
 
         --- [카카오톡 대화 내용] ---
-        {chat_content_sample}
+        {CHAT_LOG_PLACEHOLDER}
         --- [분석 시작] ---
         """
 
-        response = client.models.generate_content(
-            model='gemini-2.0-flash', contents=[prompt]
+        # 대화가 프롬프트 하나에 들어가지 않으면 구간별로 나눠 동시에 분석한 뒤 하나로 합칩니다.
+        response_text = generate_chat_analysis(
+            client, GEMINI_MODEL, prompt, aliases.alias_chat(chat_content_sample),
+            on_text=stream_parsed_sections(aliases.restoring(parse_partial_json), on_partial),
+            config=json_response_config(ChemAnalysis),
         )
-        response_text = response.text
-
-        # 상호작용 매트릭스 파싱 로직
-        matrix_str = parse_response(r"상호작용 매트릭스:\s*(.+)", response_text)
-        interaction_matrix = {}
-        if matrix_str:
-            pairs = matrix_str.split(',')
-            for pair in pairs:
-                try:
-                    key, value = pair.split(':')
-                    interaction_matrix[key.strip()] = int(value.strip())
-                except ValueError:
-                    continue # 파싱 오류 시 해당 쌍은 건너뜀
-
-        results = {
-            "score_main": parse_response(r"전체 케미 점수:\s*(\d+)", response_text, is_int=True),
-            "summary_main": parse_response(r"전체 케미 요약:\s*(.+)", response_text),
-            "name_0": parse_response(r"참여자 1:\s*(.+)", response_text),
-            "name_1": parse_response(r"참여자 2:\s*(.+)", response_text),
-            "name_2": parse_response(r"참여자 3:\s*(.+)", response_text),
-            "name_3": parse_response(r"참여자 4:\s*(.+)", response_text),
-            "name_4": parse_response(r"참여자 5:\s*(.+)", response_text),
-            "top1_A": parse_response(r"Top1 이름 A:\s*(.+)", response_text),
-            "top1_B": parse_response(r"Top1 이름 B:\s*(.+)", response_text),
-            "top1_score": parse_response(r"Top1 케미 점수:\s*(\d+)", response_text, is_int=True),
-            "top1_comment": parse_response(r"Top1 코멘트:\s*(.+)", response_text),
-            "top2_A": parse_response(r"Top2 이름 A:\s*(.+)", response_text),
-            "top2_B": parse_response(r"Top2 이름 B:\s*(.+)", response_text),
-            "top2_score": parse_response(r"Top2 케미 점수:\s*(\d+)", response_text, is_int=True),
-            "top2_comment": parse_response(r"Top2 코멘트:\s*(.+)", response_text),
-            "top3_A": parse_response(r"Top3 이름 A:\s*(.+)", response_text),
-            "top3_B": parse_response(r"Top3 이름 B:\s*(.+)", response_text),
-            "top3_score": parse_response(r"Top3 케미 점수:\s*(\d+)", response_text, is_int=True),
-            "top3_comment": parse_response(r"Top3 코멘트:\s*(.+)", response_text),
-            "tone_pos": parse_response(r"긍정 말투 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "tone_humer": parse_response(r"유머 말투 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "tone_crit": parse_response(r"비판 말투 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "tone_else": parse_response(r"기타 말투 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "tone_ex1": parse_response(r"말투 대표 예시1:\s*(.+)", response_text),
-            "tone_ex2": parse_response(r"말투 대표 예시2:\s*(.+)", response_text),
-            "tone_ex3": parse_response(r"말투 대표 예시3:\s*(.+)", response_text),
-            "tone_analysis": parse_response(r"말투 분석:\s*(.+)", response_text),
-            "resp_time": parse_response(r"평균 답장 시간\(분\):\s*(\d+)", response_text, is_int=True),
-            "resp_ratio": parse_response(r"응답률\(%\):\s*(\d+)", response_text, is_int=True),
-            "ignore": parse_response(r"메시지 무시 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "resp_analysis": parse_response(r"응답 패턴 종합 분석:\s*(.+)", response_text),
-            "topic1": parse_response(r"주요 토픽 1:\s*(.+)", response_text),
-            "topic1_ratio": parse_response(r"주요 토픽 1 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "topic2": parse_response(r"주요 토픽 2:\s*(.+)", response_text),
-            "topic2_ratio": parse_response(r"주요 토픽 2 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "topic3": parse_response(r"주요 토픽 3:\s*(.+)", response_text),
-            "topic3_ratio": parse_response(r"주요 토픽 3 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "topic4": parse_response(r"주요 토픽 4:\s*(.+)", response_text),
-            "topic4_ratio": parse_response(r"주요 토픽 4 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "topicelse_ratio": parse_response(r"기타 토픽 비율\(%\):\s*(\d+)", response_text, is_int=True),
-            "chatto_analysis": parse_response(r"챗토의 종합 분석:\s*(.+)", response_text),
-            "chatto_levelup1": parse_response(r"챗토의 관계 레벨업 1:\s*(.+)", response_text),
-            "chatto_levelup_tips1": parse_response(r"챗토의 관계 레벨업 팁 1:\s*(.+)", response_text),
-            "chatto_levelup2": parse_response(r"챗토의 관계 레벨업 2:\s*(.+)", response_text),
-            "chatto_levelup_tips2": parse_response(r"챗토의 관계 레벨업 팁 2:\s*(.+)", response_text),
-            "chatto_levelup3": parse_response(r"챗토의 관계 레벨업 3:\s*(.+)", response_text),
-            "chatto_levelup_tips3": parse_response(r"챗토의 관계 레벨업 팁 3:\s*(.+)", response_text),
-            "interaction_matrix": interaction_matrix, # 파싱된 딕셔너리
-            "num_chat": num_chat
-        }
-        return results
+
+        results = aliases.restore(parse_chem_response(response_text))
+        results.update(local_fields)
+        results["num_chat"] = num_chat
+        results["sample_ratio"] = sample_ratio # 기간 안의 메시지 중 프롬프트에 담긴 비율
+        store_cached_analysis(cache_key, "chem", results, CHEM_PROMPT_VERSION, GEMINI_MODEL)
+        return {**results, "context_key": context_key}
 
     except Exception as e:
         print(f"Gemini로 케미 분석 중 에러 발생: {e}")
-        return {"error_message": f"케미 분석 중 오류가 발생했습니다: {e}"}
\ No newline at end of file
+        return {"error_message": f"케미 분석 중 오류가 발생했습니다: {e}"}
+
+def parse_chem_response(response_text: str) -> dict:
+    """케미 분석 JSON 응답을 검증해 결과 딕셔너리로 바꿉니다. 빠진 항목이 있으면 StructuredResponseError가 발생합니다."""
+    return parse_structured_response(ChemAnalysis, response_text).model_dump()
+
+
+def _chem_local_fields(stats: dict, matrix, top_pairs: list) -> dict:
+    # 직접 계산한 값들을 결과 필드 이름으로 옮깁니다.
+    # - 그룹 전체의 평균 답장 시간(분), 즉각 응답률(%), 묻힌 메시지 비율(%)
+    # - 말수가 많은 순서의 참여자 전원(names)과 그중 앞 5명(name_0~name_4)
+    # - 상호작용 매트릭스: 0이 아닌 칸의 [names 위치(행), names 위치(열), 점수] 목록
+    # - Top3 조합의 이름과 점수 (조합이 3개보다 적으면 빈 값)
+    fields = {
+        "resp_time": round(stats["avg_reply"]),
+        "resp_ratio": round(stats["immediate_reply_ratio"]),
+        "ignore": round(stats["ignored_ratio"]),
+        "names": matrix.names,
+        "interaction_matrix": interaction_cells(matrix),
+    }
+    for i in range(5):
+        fields[f"name_{i}"] = matrix.names[i] if i < len(matrix.names) else ""
+    for rank in range(1, 4):
+        pair = top_pairs[rank - 1] if rank <= len(top_pairs) else None
+        fields[f"top{rank}_A"] = pair.name_A if pair else ""
+        fields[f"top{rank}_B"] = pair.name_B if pair else ""
+        fields[f"top{rank}_score"] = pair.score if pair else 0
+    return fields
@@ -11,6 +11,7 @@ import uuid
 
 from .request_serializers import (
     ChatUploadRequestSerializerPlay,
+    ChatChunkUploadRequestSerializerPlay,
     ChatChemAnalysisRequestSerializerPlay,
     ChatSomeAnalysisRequestSerializerPlay,
     ChatMBTIAnalysisRequestSerializerPlay,
@@ -34,7 +35,9 @@ from .request_serializers import (
 )
 from .serializers import (
     AnalyseResponseSerializerPlay,
+    AnalysisJobSerializerPlay,
     ChatSerializerPlay,
+    ChatUploadSessionSerializerPlay,
     ChemResultSerializerPlay,
     SomeResultSerializerPlay,
     MBTIResultSerializerPlay,
@@ -74,14 +77,17 @@ from .models import(
     ResultPlayChemSpecTable,
     ChemQuiz,
     ChemQuizQuestion,
+    ChemQuizPoolQuestion,
     ChemQuizPersonal,
     ChemQuizPersonalDetail,
     SomeQuiz,
     SomeQuizQuestion,
+    SomeQuizPoolQuestion,
     SomeQuizPersonal,
     SomeQuizPersonalDetail,
     MBTIQuiz,
     MBTIQuizQuestion,
+    MBTIQuizPoolQuestion,
     MBTIQuizPersonal,
     MBTIQuizPersonalDetail,
     UuidChem,
@@ -96,14 +102,36 @@ from django.utils import timezone
 import re
 from google import genai
 from django.conf import settings
+from django.db import transaction
+
+from analysis.cache import is_cache_bypassed
+from analysis.clients import get_gemini_client
+from analysis.context import generate_with_chat_context
+from analysis.jobs import AnalysisFailed, is_async_request, submit_analysis_job
+from analysis.streaming import analysis_event_stream, is_stream_request
+from analysis.models import AnalysisJob
+from chatlog.chunked import (
+    UploadOffsetMismatch,
+    append_chat_chunk,
+    complete_chat_upload,
+    discard_chat_upload,
+    start_chat_upload,
+)
+from chatlog.models import ChatUpload
+from chatlog.storage import acquire_chat_blob
+from chatlog.upload import UploadRejected, install_chat_upload_handler
 
 from .utils import (
-    extract_chat_title,
-    count_chat_participants,
     some_analysis_with_gemini,
     mbti_analysis_with_gemini,
     chem_analysis_with_gemini,
+    format_chem_interactions,
     parse_response,
+    get_quiz_context,
+    parse_quiz_questions,
+    pop_quiz_pool_question,
+    schedule_quiz_pool_refill,
+    store_quiz_pool,
 )
 
     
@@ -125,40 +153,43 @@ class PlayChatView(APIView):
                 openapi.IN_FORM,
                 type=openapi.TYPE_FILE,
                 required=True,
-                description="업로드할 채팅 파일",
+                description="업로드할 채팅 파일 (.txt, 또는 .zip/.gz로 압축한 파일)",
             ),
         ],
-        responses={201: ChatSerializerPlay, 400: "Bad Request", 401: "Unauthorized"},
+        responses={201: ChatSerializerPlay, 400: "Bad Request", 401: "Unauthorized", 413: "Request Entity Too Large"},
     )
     def post(self, request):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        # 파일을 받는 동안 제목, 참여자, 날짜 범위, 메시지 수, 해시를 함께 계산한다
+        upload_handler = install_chat_upload_handler(request)
         serializer = ChatUploadRequestSerializerPlay(data=request.data)
+        if upload_handler.too_large:
+            return Response({"detail": upload_handler.error}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if upload_handler.error:
+            return Response({"detail": upload_handler.error}, status=status.HTTP_400_BAD_REQUEST)
+
         if serializer.is_valid():
             file = serializer.validated_data["file"]
-            author = request.user
-            
-            if not author.is_authenticated:
-                return Response(status=status.HTTP_401_UNAUTHORIZED)
-
-            # DB에 먼저 저장해서 경로를 얻는다
-            chat = ChatPlay.objects.create(
-                title="임시 제목",
-                file=file,
-                people_num=2,  # 초기값은 2로 설정
-                user=request.user,
-            )
-
-            # 파일 경로에서 제목과 인원 수를 추출
-            file_path = chat.file.path
-
-            # 1. 파일 경로에서 제목 추출
-            chat.title = extract_chat_title(file_path)
-
-            # 2. Gemini API를 호출하여 인원 수 계산
-            num_of_people = count_chat_participants(file_path)
-            chat.people_num = num_of_people
-            
-            # 3. 변경된 제목과 인원 수를 함께 DB에 최종 저장
-            chat.save()
+            index = file.chat_index
+
+            with transaction.atomic():
+                # 1. 내용 해시로 파일 저장 (같은 파일이 이미 있으면 그 파일과 인덱스를 공유)
+                blob = acquire_chat_blob(file)
+
+                # 2. 업로드 중에 계산한 정보로 바로 DB에 저장
+                chat = ChatPlay.objects.create(
+                    title=index.title,
+                    file=blob.file.name,
+                    people_num=index.people_num,
+                    num_chat=len(index),
+                    date_start=index.date_start,
+                    date_end=index.date_end,
+                    content_hash=blob.content_hash,
+                    user=author,
+                )
 
             response = ChatSerializerPlay(chat)
 
@@ -194,6 +225,216 @@ class PlayChatView(APIView):
         return Response(chat_data, status=status.HTTP_200_OK)
 
 
+# 분할 업로드 시작
+class PlayChatUploadView(APIView):
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="채팅 파일 분할 업로드 시작",
+        operation_description="큰 채팅 파일을 여러 조각으로 나눠 올리기 위한 업로드 세션을 만듭니다. size는 전체 파일 크기(바이트)입니다.",
+        request_body=ChatChunkUploadRequestSerializerPlay,
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={201: ChatUploadSessionSerializerPlay, 400: "Bad Request", 401: "Unauthorized", 413: "Request Entity Too Large"},
+    )
+    def post(self, request):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        serializer = ChatChunkUploadRequestSerializerPlay(data=request.data)
+        if not serializer.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = start_chat_upload(
+                author,
+                "play",
+                file_name=serializer.validated_data["file_name"],
+                size=serializer.validated_data.get("size"),
+            )
+        except UploadRejected as e:
+            return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response(ChatUploadSessionSerializerPlay(upload).data, status=status.HTTP_201_CREATED)
+
+
+# 분할 업로드 조각 전송, 진행 상황 조회, 업로드 취소
+class PlayChatUploadDetailView(APIView):
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="채팅 파일 분할 업로드 상태 조회",
+        operation_description="지금까지 받은 바이트 수(received)를 조회합니다. 연결이 끊겼다면 received부터 이어서 보내면 됩니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={200: ChatUploadSessionSerializerPlay, 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def get(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="play")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(ChatUploadSessionSerializerPlay(upload).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="채팅 파일 조각 전송",
+        operation_description="요청 본문(application/octet-stream)의 바이트를 offset 위치에 이어 붙입니다. "
+                              "offset이 받은 위치와 맞지 않으면 409와 함께 received를 돌려줍니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "offset",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                required=True,
+                description="이 조각의 시작 위치 (바이트)",
+            ),
+        ],
+        responses={200: ChatUploadSessionSerializerPlay, 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 409: "Conflict", 413: "Request Entity Too Large"},
+    )
+    def put(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="play")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            offset = int(request.query_params.get("offset", ""))
+        except ValueError:
+            return Response({"detail": "offset이 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if offset < 0 or request.stream is None:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            upload = append_chat_chunk(upload, offset, request.stream)
+        except UploadOffsetMismatch as e:
+            return Response({"detail": str(e), "received": e.received}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as e:
+            return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response(ChatUploadSessionSerializerPlay(upload).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="채팅 파일 분할 업로드 취소",
+        operation_description="업로드 세션과 지금까지 받은 조각을 삭제합니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={204: "No Content", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def delete(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="play")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        discard_chat_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# 분할 업로드 완료 (채팅 생성)
+class PlayChatUploadCompleteView(APIView):
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="채팅 파일 분할 업로드 완료",
+        operation_description="받은 조각을 합쳐 채팅을 생성합니다. 전체 크기(size)만큼 받지 못했다면 409와 함께 received를 돌려줍니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={201: ChatSerializerPlay, 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 409: "Conflict", 413: "Request Entity Too Large"},
+    )
+    def post(self, request, upload_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            upload = ChatUpload.objects.get(upload_id=upload_id, target="play")
+        except ChatUpload.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if upload.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        # 1. 받은 조각을 합치기 (텍스트 파일은 조각을 받으며 만든 인덱스를 그대로 사용)
+        try:
+            file = complete_chat_upload(upload)
+        except UploadOffsetMismatch as e:
+            return Response({"detail": "아직 받지 못한 조각이 있습니다.", "received": e.received}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as e:
+            if e.too_large:
+                return Response({"detail": e.message}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return Response({"detail": e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. 내용 해시로 파일을 저장하고 채팅 생성
+        try:
+            index = file.chat_index
+            with transaction.atomic():
+                blob = acquire_chat_blob(file)
+                chat = ChatPlay.objects.create(
+                    title=index.title,
+                    file=blob.file.name,
+                    people_num=index.people_num,
+                    num_chat=len(index),
+                    date_start=index.date_start,
+                    date_end=index.date_end,
+                    content_hash=blob.content_hash,
+                    user=author,
+                )
+        finally:
+            file.close()
+
+        # 3. 조각 파일 정리
+        discard_chat_upload(upload)
+
+        return Response(ChatSerializerPlay(chat).data, status=status.HTTP_201_CREATED)
+
+
 # 특정 채팅 삭제, 특정 채팅 제목 수정
 class PlayChatDetailView(APIView):
     @swagger_auto_schema(
@@ -287,6 +528,125 @@ class PlayChatDetailView(APIView):
 ##################################################################
 
 
+def run_chem_analysis(chat_id: int, analysis_option: dict, use_cache: bool = True, on_partial=None) -> int:
+    """
+    채팅 케미 분석을 실행하고 결과를 저장합니다.
+    요청 처리 중에 바로 호출되거나, ?async=true 요청이면 분석 작업 일꾼 스레드에서 실행됩니다.
+
+    Args:
+        chat_id (int): 분석할 ChatPlay의 chat_id
+        analysis_option (dict): start, end, relationship, situation
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): ?stream=true 요청이면 새로 파싱된 항목 딕셔너리를 받을 함수
+
+    Returns:
+        int: 저장된 ResultPlayChem의 result_id
+    """
+    chat = ChatPlay.objects.get(chat_id=chat_id)
+    author = chat.user
+    relationship = analysis_option["relationship"]
+    situation = analysis_option["situation"]
+    analysis_start = analysis_option["start"]
+    analysis_end = analysis_option["end"]
+
+    client = get_gemini_client()
+    chem_results = chem_analysis_with_gemini(chat, client, analysis_option, use_cache, on_partial)
+
+    result = ResultPlayChem.objects.create(
+        type=1,
+        is_saved=1,
+        title=chat.title,
+        people_num=chat.people_num,
+        relationship=relationship,
+        situation=situation,
+        analysis_date_start=analysis_start,
+        analysis_date_end=analysis_end,
+        chat=chat,
+        num_chat=chem_results.get("num_chat", 0),
+        sample_ratio=chem_results.get("sample_ratio", 1.0),
+        context_key=chem_results.get("context_key", ""),
+        user=author, 
+    )
+
+    if "error_message" in chem_results:
+        result.delete()
+        raise AnalysisFailed(chem_results["error_message"])
+
+    # 상호작용 매트릭스는 기간 안에 말한 참여자 전원을 대상으로 직접 계산한 것입니다.
+    # 결과 화면의 케미 표는 이전처럼 말수가 많은 앞 5명(name_0~name_4)까지만 보여줍니다.
+    names = chem_results.get("names", [])
+    size = min(len(names), 5)
+
+    spec = ResultPlayChemSpec.objects.create(
+        result=result,
+        score_main=chem_results.get("score_main", 0),
+        summary_main=chem_results.get("summary_main", ""),
+        tablesize=size,
+        top1_A=chem_results.get("top1_A", ""),
+        top1_B=chem_results.get("top1_B", ""),
+        top1_score=chem_results.get("top1_score", 0),
+        top1_comment=chem_results.get("top1_comment", ""),
+        top2_A=chem_results.get("top2_A", ""),
+        top2_B=chem_results.get("top2_B", ""),
+        top2_score=chem_results.get("top2_score", 0),
+        top2_comment=chem_results.get("top2_comment", ""),
+        top3_A=chem_results.get("top3_A", ""),
+        top3_B=chem_results.get("top3_B", ""),
+        top3_score=chem_results.get("top3_score", 0),
+        top3_comment=chem_results.get("top3_comment", ""),
+        tone_pos=chem_results.get("tone_pos", 0),
+        tone_humer=chem_results.get("tone_humer", 0),
+        tone_crit=chem_results.get("tone_crit", 0),
+        tone_else=chem_results.get("tone_else", 0),
+        tone_ex1=chem_results.get("tone_ex1", ""),
+        tone_ex2=chem_results.get("tone_ex2", ""),
+        tone_ex3=chem_results.get("tone_ex3", ""),
+        tone_analysis=chem_results.get("tone_analysis", ""),
+        resp_time=chem_results.get("resp_time", 0),
+        resp_ratio=chem_results.get("resp_ratio", 0),
+        ignore=chem_results.get("ignore", 0),
+        resp_analysis=chem_results.get("resp_analysis", ""),
+        topic1=chem_results.get("topic1", ""),
+        topic1_ratio=chem_results.get("topic1_ratio", 0),
+        topic2=chem_results.get("topic2", ""),
+        topic2_ratio=chem_results.get("topic2_ratio", 0),
+        topic3=chem_results.get("topic3", ""),
+        topic3_ratio=chem_results.get("topic3_ratio", 0),
+        topic4=chem_results.get("topic4", ""),
+        topic4_ratio=chem_results.get("topic4_ratio", 0),
+        topicelse_ratio=chem_results.get("topicelse_ratio", 0),
+        chatto_analysis=chem_results.get("chatto_analysis", ""),
+        chatto_levelup1=chem_results.get("chatto_levelup1", ""),
+        chatto_levelup_tips1=chem_results.get("chatto_levelup_tips1", ""),
+        chatto_levelup2=chem_results.get("chatto_levelup2", ""),
+        chatto_levelup_tips2=chem_results.get("chatto_levelup_tips2", ""),
+        chatto_levelup3=chem_results.get("chatto_levelup3", ""),
+        chatto_levelup_tips3=chem_results.get("chatto_levelup_tips3", ""),
+        name_0=chem_results.get("name_0", ""),
+        name_1=chem_results.get("name_1", ""),
+        name_2=chem_results.get("name_2", ""),
+        name_3=chem_results.get("name_3", ""),
+        name_4=chem_results.get("name_4", ""),
+        names=names,
+    )
+
+    # 점수가 0이 아닌 칸만 [행, 열, 점수]로 넘어옵니다.
+    # 케미 표(size × size)는 0점 칸까지 모두 저장하고, 표 밖의 참여자는 주고받은 조합만 저장합니다.
+    cells = {(row, column): score for row, column, score in chem_results.get("interaction_matrix", [])}
+    table = [
+        ResultPlayChemSpecTable(spec=spec, row=i, column=j, interaction=cells.pop((i, j), 0))
+        for i in range(size)
+        for j in range(size)
+    ]
+    table += [
+        ResultPlayChemSpecTable(spec=spec, row=row, column=column, interaction=score)
+        for (row, column), score in cells.items()
+    ]
+    ResultPlayChemSpecTable.objects.bulk_create(table)
+
+    return result.result_id
+
+
 # 채팅 케미 분석
 class PlayChatChemAnalyzeView(APIView):
     @swagger_auto_schema(
@@ -300,9 +660,26 @@ class PlayChatChemAnalyzeView(APIView):
                 openapi.IN_HEADER, 
                 description="access token", 
                 type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "async",
+                openapi.IN_QUERY,
+                description="true면 분석 작업을 만들고 바로 202와 job_id를 응답합니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="true면 text/event-stream으로 응답합니다. 파싱되는 대로 section 이벤트를 보내고, 결과가 저장되면 done 이벤트로 result_id를 보냅니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "no_cache",
+                openapi.IN_QUERY,
+                description="true면 캐시된 분석 결과를 쓰지 않고 다시 분석합니다.",
+                type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             201: AnalyseResponseSerializerPlay,
+            200: "text/event-stream (stream=true)",
+            202: AnalysisJobSerializerPlay,
             404: "Not Found",
             400: "Bad Request",
             403: "Forbidden",  # If the user does not have permission to analyze the chat
@@ -339,113 +716,120 @@ class PlayChatChemAnalyzeView(APIView):
             "situation": situation,
         }
 
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        chem_results = chem_analysis_with_gemini(chat, client, analysis_option)
-
-        result = ResultPlayChem.objects.create(
-            type=1,
-            is_saved=1,
-            title=chat.title,
-            people_num=chat.people_num,
-            relationship=relationship,
-            situation=situation,
-            analysis_date_start=analysis_start,
-            analysis_date_end=analysis_end,
-            chat=chat,
-            num_chat=chem_results.get("num_chat", 0),
-            user=author, 
-        )
+        use_cache = not is_cache_bypassed(request)
+        if is_async_request(request):
+            job = submit_analysis_job(author, "play", "chem", run_chem_analysis, chat.chat_id, analysis_option, use_cache)
+            return Response(AnalysisJobSerializerPlay(job).data, status=status.HTTP_202_ACCEPTED)
+        if is_stream_request(request):
+            return analysis_event_stream(run_chem_analysis, chat.chat_id, analysis_option, use_cache)
 
-        if "error_message" in chem_results:
-            result.delete()
+        try:
+            result_id = run_chem_analysis(chat.chat_id, analysis_option, use_cache)
+        except AnalysisFailed as e:
             return Response(
-                {"detail": chem_results["error_message"]},
+                {"detail": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-        size = 5 if result.people_num >= 5 else result.people_num
-
-        spec = ResultPlayChemSpec.objects.create(
-            result=result,
-            score_main=chem_results.get("score_main", 0),
-            summary_main=chem_results.get("summary_main", ""),
-            tablesize=size,
-            top1_A=chem_results.get("top1_A", ""),
-            top1_B=chem_results.get("top1_B", ""),
-            top1_score=chem_results.get("top1_score", 0),
-            top1_comment=chem_results.get("top1_comment", ""),
-            top2_A=chem_results.get("top2_A", ""),
-            top2_B=chem_results.get("top2_B", ""),
-            top2_score=chem_results.get("top2_score", 0),
-            top2_comment=chem_results.get("top2_comment", ""),
-            top3_A=chem_results.get("top3_A", ""),
-            top3_B=chem_results.get("top3_B", ""),
-            top3_score=chem_results.get("top3_score", 0),
-            top3_comment=chem_results.get("top3_comment", ""),
-            tone_pos=chem_results.get("tone_pos", 0),
-            tone_humer=chem_results.get("tone_humer", 0),
-            tone_crit=chem_results.get("tone_crit", 0),
-            tone_else=chem_results.get("tone_else", 0),
-            tone_ex1=chem_results.get("tone_ex1", ""),
-            tone_ex2=chem_results.get("tone_ex2", ""),
-            tone_ex3=chem_results.get("tone_ex3", ""),
-            tone_analysis=chem_results.get("tone_analysis", ""),
-            resp_time=chem_results.get("resp_time", 0),
-            resp_ratio=chem_results.get("resp_ratio", 0),
-            ignore=chem_results.get("ignore", 0),
-            resp_analysis=chem_results.get("resp_analysis", ""),
-            topic1=chem_results.get("topic1", ""),
-            topic1_ratio=chem_results.get("topic1_ratio", 0),
-            topic2=chem_results.get("topic2", ""),
-            topic2_ratio=chem_results.get("topic2_ratio", 0),
-            topic3=chem_results.get("topic3", ""),
-            topic3_ratio=chem_results.get("topic3_ratio", 0),
-            topic4=chem_results.get("topic4", ""),
-            topic4_ratio=chem_results.get("topic4_ratio", 0),
-            topicelse_ratio=chem_results.get("topicelse_ratio", 0),
-            chatto_analysis=chem_results.get("chatto_analysis", ""),
-            chatto_levelup1=chem_results.get("chatto_levelup1", ""),
-            chatto_levelup_tips1=chem_results.get("chatto_levelup_tips1", ""),
-            chatto_levelup2=chem_results.get("chatto_levelup2", ""),
-            chatto_levelup_tips2=chem_results.get("chatto_levelup_tips2", ""),
-            chatto_levelup3=chem_results.get("chatto_levelup3", ""),
-            chatto_levelup_tips3=chem_results.get("chatto_levelup_tips3", ""),
-            name_0=chem_results.get("name_0", ""),
-            name_1=chem_results.get("name_1", ""),
-            name_2=chem_results.get("name_2", ""),
-            name_3=chem_results.get("name_3", ""),
-            name_4=chem_results.get("name_4", ""),
-        )
-
-        names = [name for name in [
-            chem_results.get("name_0"), chem_results.get("name_1"),
-            chem_results.get("name_2"), chem_results.get("name_3"),
-            chem_results.get("name_4")
-        ] if name] # 이름이 있는 경우에만 리스트에 추가
-        
-        interaction_matrix = chem_results.get("interaction_matrix", {})
-
-        for i, name_row in enumerate(names):
-            for j, name_col in enumerate(names):
-                if i == j:
-                    val = 0 # 자기 자신과의 상호작용은 0
-                else:
-                    # 'A-B' 형식의 키로 점수 조회
-                    key = f"{name_row}-{name_col}"
-                    val = interaction_matrix.get(key, 0) # 값이 없으면 0점
-
-                ResultPlayChemSpecTable.objects.create(
-                    spec=spec,
-                    row=i,
-                    column=j,
-                    interaction=val,
-                )
 
         return Response(
-            {"result_id": result.result_id},
+            {"result_id": result_id},
             status=status.HTTP_201_CREATED,
         )
 
+def run_some_analysis(chat_id: int, analysis_option: dict, use_cache: bool = True, on_partial=None) -> int:
+    """
+    채팅 썸 분석을 실행하고 결과를 저장합니다.
+    요청 처리 중에 바로 호출되거나, ?async=true 요청이면 분석 작업 일꾼 스레드에서 실행됩니다.
+
+    Args:
+        chat_id (int): 분석할 ChatPlay의 chat_id
+        analysis_option (dict): start, end, relationship, age
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): ?stream=true 요청이면 새로 파싱된 항목 딕셔너리를 받을 함수
+
+    Returns:
+        int: 저장된 ResultPlaySome의 result_id
+    """
+    chat = ChatPlay.objects.get(chat_id=chat_id)
+    author = chat.user
+    relationship = analysis_option["relationship"]
+    age = analysis_option["age"]
+    analysis_start = analysis_option["start"]
+    analysis_end = analysis_option["end"]
+
+    # Gemini API 클라이언트를 사용하여 대화 내용을 분석
+    client = get_gemini_client()
+    some_results = some_analysis_with_gemini(chat, client, analysis_option, use_cache, on_partial)
+
+    result = ResultPlaySome.objects.create(
+        type=2,
+        title=chat.title,
+        people_num=chat.people_num,
+        is_saved=1,
+        relationship=relationship,
+        age=age,
+        analysis_date_start=analysis_start,
+        analysis_date_end=analysis_end,
+        num_chat=some_results.get("num_chat", 0),
+        sample_ratio=some_results.get("sample_ratio", 1.0),
+        context_key=some_results.get("context_key", ""),
+        chat=chat,
+        user=author,
+    )
+
+    if "error_message" in some_results:
+        result.delete()
+        raise AnalysisFailed(some_results["error_message"])
+
+    ResultPlaySomeSpec.objects.create(
+        result=result,
+        name_A=some_results.get("name_A", ""),
+        name_B=some_results.get("name_B", ""),
+        score_main=some_results.get("score_main", 0),    # score_A + score_B / 2 로 해도 좋을 듯
+        comment_main=some_results.get("comment_main", ""),
+        score_A=some_results.get("score_A", 0),
+        score_B=some_results.get("score_B", 0),
+        trait_A=some_results.get("trait_A", ""),
+        trait_B=some_results.get("trait_B", ""),
+        summary=some_results.get("summary", ""),
+        tone=some_results.get("tone_score", 0),
+        tone_desc=some_results.get("tone_desc", ""),
+        tone_ex=some_results.get("tone_ex", ""),
+        emo=some_results.get("emo_score", 0),
+        emo_desc=some_results.get("emo_desc", ""),
+        emo_ex=some_results.get("emo_ex", ""),
+        addr=some_results.get("addr_score", 0),
+        addr_desc=some_results.get("addr_desc", ""),
+        addr_ex=some_results.get("addr_ex", ""),
+        reply_A=some_results.get("reply_A", 0),
+        reply_B=some_results.get("reply_B", 0),
+        reply_A_desc=some_results.get("reply_A_desc", ""),
+        reply_B_desc=some_results.get("reply_B_desc", ""),
+        rec_A=some_results.get("rec_A", 0),
+        rec_B=some_results.get("rec_B", 0),
+        rec_A_desc=some_results.get("rec_A_desc", ""),
+        rec_B_desc=some_results.get("rec_B_desc", ""),
+        rec_A_ex=some_results.get("rec_A_ex", ""),
+        rec_B_ex=some_results.get("rec_B_ex", ""),
+        atti_A=some_results.get("atti_A", 0),
+        atti_B=some_results.get("atti_B", 0),
+        atti_A_desc=some_results.get("atti_A_desc", ""),
+        atti_B_desc = some_results.get("atti_B_desc", ""),
+        atti_A_ex = some_results.get("atti_A_ex", ""),
+        atti_B_ex = some_results.get("atti_B_ex", ""),
+        len_A=some_results.get("len_A", 0),
+        len_B=some_results.get("len_B", 0),
+        len_A_desc=some_results.get("len_A_desc", ""),
+        len_B_desc=some_results.get("len_B_desc", ""),
+        len_A_ex=some_results.get("len_A_ex", ""),
+        len_B_ex=some_results.get("len_B_ex", ""),
+        pattern_analysis = some_results.get("pattern_analysis", ""),
+        chatto_counsel = some_results.get("chatto_counsel", ""),
+        chatto_counsel_tips = some_results.get("chatto_counsel_tips", ""),
+    )
+
+    return result.result_id
+
       
 # 채팅 썸 분석
 class PlayChatSomeAnalyzeView(APIView):
@@ -460,9 +844,26 @@ class PlayChatSomeAnalyzeView(APIView):
                 openapi.IN_HEADER, 
                 description="access token", 
                 type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "async",
+                openapi.IN_QUERY,
+                description="true면 분석 작업을 만들고 바로 202와 job_id를 응답합니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="true면 text/event-stream으로 응답합니다. 파싱되는 대로 section 이벤트를 보내고, 결과가 저장되면 done 이벤트로 result_id를 보냅니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "no_cache",
+                openapi.IN_QUERY,
+                description="true면 캐시된 분석 결과를 쓰지 않고 다시 분석합니다.",
+                type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             201: AnalyseResponseSerializerPlay,
+            200: "text/event-stream (stream=true)",
+            202: AnalysisJobSerializerPlay,
             404: "Not Found",
             400: "Bad Request",
             403: "Forbidden",  # If the user does not have permission to analyze the chat
@@ -493,8 +894,6 @@ class PlayChatSomeAnalyzeView(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
 
-        # Gemini API 클라이언트를 사용하여 대화 내용을 분석
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
         # 분석에 필요한 모든 옵션을 딕셔너리로 구성
         analysis_option = {
             "start": analysis_start,
@@ -503,77 +902,171 @@ class PlayChatSomeAnalyzeView(APIView):
             "age": age,
         }
 
-        some_results = some_analysis_with_gemini(chat, client, analysis_option)
-
-        result = ResultPlaySome.objects.create(
-            type=2,
-            title=chat.title,
-            people_num=chat.people_num,
-            is_saved=1,
-            relationship=relationship,
-            age=age,
-            analysis_date_start=analysis_start,
-            analysis_date_end=analysis_end,
-            num_chat=some_results.get("num_chat", 0),
-            chat=chat,
-            user=author,
-        )
+        use_cache = not is_cache_bypassed(request)
+        if is_async_request(request):
+            job = submit_analysis_job(author, "play", "some", run_some_analysis, chat.chat_id, analysis_option, use_cache)
+            return Response(AnalysisJobSerializerPlay(job).data, status=status.HTTP_202_ACCEPTED)
+        if is_stream_request(request):
+            return analysis_event_stream(run_some_analysis, chat.chat_id, analysis_option, use_cache)
 
-        ResultPlaySomeSpec.objects.create(
-            result=result,
-            name_A=some_results.get("name_A", ""),
-            name_B=some_results.get("name_B", ""),
-            score_main=some_results.get("score_main", 0),    # score_A + score_B / 2 로 해도 좋을 듯
-            comment_main=some_results.get("comment_main", ""),
-            score_A=some_results.get("score_A", 0),
-            score_B=some_results.get("score_B", 0),
-            trait_A=some_results.get("trait_A", ""),
-            trait_B=some_results.get("trait_B", ""),
-            summary=some_results.get("summary", ""),
-            tone=some_results.get("tone_score", 0),
-            tone_desc=some_results.get("tone_desc", ""),
-            tone_ex=some_results.get("tone_ex", ""),
-            emo=some_results.get("emo_score", 0),
-            emo_desc=some_results.get("emo_desc", ""),
-            emo_ex=some_results.get("emo_ex", ""),
-            addr=some_results.get("addr_score", 0),
-            addr_desc=some_results.get("addr_desc", ""),
-            addr_ex=some_results.get("addr_ex", ""),
-            reply_A=some_results.get("reply_A", 0),
-            reply_B=some_results.get("reply_B", 0),
-            reply_A_desc=some_results.get("reply_A_desc", ""),
-            reply_B_desc=some_results.get("reply_B_desc", ""),
-            rec_A=some_results.get("rec_A", 0),
-            rec_B=some_results.get("rec_B", 0),
-            rec_A_desc=some_results.get("rec_A_desc", ""),
-            rec_B_desc=some_results.get("rec_B_desc", ""),
-            rec_A_ex=some_results.get("rec_A_ex", ""),
-            rec_B_ex=some_results.get("rec_B_ex", ""),
-            atti_A=some_results.get("atti_A", 0),
-            atti_B=some_results.get("atti_B", 0),
-            atti_A_desc=some_results.get("atti_A_desc", ""),
-            atti_B_desc = some_results.get("atti_B_desc", ""),
-            atti_A_ex = some_results.get("atti_A_ex", ""),
-            atti_B_ex = some_results.get("atti_B_ex", ""),
-            len_A=some_results.get("len_A", 0),
-            len_B=some_results.get("len_B", 0),
-            len_A_desc=some_results.get("len_A_desc", ""),
-            len_B_desc=some_results.get("len_B_desc", ""),
-            len_A_ex=some_results.get("len_A_ex", ""),
-            len_B_ex=some_results.get("len_B_ex", ""),
-            pattern_analysis = some_results.get("pattern_analysis", ""),
-            chatto_counsel = some_results.get("chatto_counsel", ""),
-            chatto_counsel_tips = some_results.get("chatto_counsel_tips", ""),
-        )
+        try:
+            result_id = run_some_analysis(chat.chat_id, analysis_option, use_cache)
+        except AnalysisFailed as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
         return Response(
             {
-                "result_id": result.result_id,
+                "result_id": result_id,
             },
             status=status.HTTP_201_CREATED,
         )
 
 
+def run_mbti_analysis(chat_id: int, analysis_option: dict, use_cache: bool = True, on_partial=None) -> int:
+    """
+    채팅 MBTI 분석을 실행하고 결과를 저장합니다.
+    요청 처리 중에 바로 호출되거나, ?async=true 요청이면 분석 작업 일꾼 스레드에서 실행됩니다.
+
+    Args:
+        chat_id (int): 분석할 ChatPlay의 chat_id
+        analysis_option (dict): start, end
+        use_cache (bool): False면 캐시된 분석 결과를 쓰지 않고 Gemini를 다시 호출합니다.
+        on_partial (callable): ?stream=true 요청이면 새로 파싱된 항목 딕셔너리를 받을 함수
+
+    Returns:
+        int: 저장된 ResultPlayMBTI의 result_id
+    """
+    chat = ChatPlay.objects.get(chat_id=chat_id)
+    author = chat.user
+    analysis_start = analysis_option["start"]
+    analysis_end = analysis_option["end"]
+
+    # 1. Gemini API 클라이언트 초기화 및 MBTI 분석 함수 호출
+    client = get_gemini_client()
+    mbti_results, num_chat, sample_ratio, context_key = mbti_analysis_with_gemini(chat, client, analysis_option, use_cache, on_partial)
+
+    # 2. ResultPlayMBTI 객체 생성
+    result = ResultPlayMBTI.objects.create(
+        type=3,
+        title=chat.title,
+        people_num=chat.people_num,
+        is_saved=1,
+        analysis_date_start=analysis_start,
+        analysis_date_end=analysis_end,
+        num_chat=num_chat,
+        sample_ratio=sample_ratio,
+        context_key=context_key,
+        chat=chat,
+        user=author,
+    )
+
+    # 3. 분석 결과가 비어있거나 에러가 있는 경우 처리
+    if not mbti_results:
+        result.delete()
+        raise AnalysisFailed("MBTI 분석에 실패했습니다.")
+    if "error_message" in mbti_results[0]:
+        result.delete()
+        raise AnalysisFailed(mbti_results[0]["error_message"])
+
+    # 4. 분석 결과를 바탕으로 DB 업데이트
+    spec = ResultPlayMBTISpec.objects.create(
+        result=result,
+        total_I=0,
+        total_E=0,
+        total_S=0,
+        total_N=0,
+        total_F=0,
+        total_T=0,
+        total_J=0,
+        total_P=0,
+        cnt_INTJ=0,
+        cnt_INTP=0,
+        cnt_ENTJ=0,
+        cnt_ENTP=0,
+        cnt_INFJ=0,
+        cnt_INFP=0,
+        cnt_ENFJ=0,
+        cnt_ENFP=0,
+        cnt_ISTJ=0,
+        cnt_ISFJ=0,
+        cnt_ESTJ=0,
+        cnt_ESFJ=0,
+        cnt_ISTP=0,
+        cnt_ISFP=0,
+        cnt_ESTP=0,
+        cnt_ESFP=0
+    )
+    totals = {
+        'I': 0, 'E': 0, 'S': 0, 'N': 0, 'F': 0, 'T': 0, 'J': 0, 'P': 0,
+        'INTJ': 0, 'INTP': 0, 'ENTJ': 0, 'ENTP': 0,
+        'INFJ': 0, 'INFP': 0, 'ENFJ': 0, 'ENFP': 0, 
+        'ISTJ': 0, 'ISFJ': 0, 'ESTJ': 0, 'ESFJ': 0, 
+        'ISTP': 0, 'ISFP': 0, 'ESTP': 0, 'ESFP': 0
+    }
+
+    # 각 참여자별 분석 결과를 ResultPlayMBTISpecPersonal에 저장
+    for person_data in mbti_results:
+        ResultPlayMBTISpecPersonal.objects.create(
+            spec=spec,
+            name=person_data.get("name", ""),
+            MBTI=person_data.get("MBTI", ""),
+            summary=person_data.get("summary", ""),
+            desc=person_data.get("desc", ""),
+            position=person_data.get("position", ""),
+            personality=person_data.get("personality", ""),
+            style=person_data.get("style", ""),
+            moment_ex=person_data.get("moment_ex", ""),
+            moment_desc=person_data.get("moment_desc", ""),
+            momentIE_ex=person_data.get("momentIE_ex", ""),
+            momentIE_desc=person_data.get("momentIE_desc", ""),
+            momentSN_ex=person_data.get("momentSN_ex", ""),
+            momentSN_desc=person_data.get("momentSN_desc", ""),
+            momentFT_ex=person_data.get("momentFT_ex", ""),
+            momentFT_desc=person_data.get("momentFT_desc", ""),
+            momentJP_ex=person_data.get("momentJP_ex", ""),
+            momentJP_desc=person_data.get("momentJP_desc", ""),
+        )
+        # MBTI 지표별 카운트 업데이트
+        mbti = person_data.get("MBTI", "")
+        for char in mbti:
+            if char in totals:
+                totals[char] += 1
+        # MBTI 유형별 카운트 업데이트
+        if mbti in totals:
+            totals[mbti] += 1
+
+    # spec 객체에 전체 카운트 업데이트
+    spec.total_I = totals['I']
+    spec.total_E = totals['E']
+    spec.total_S = totals['S']
+    spec.total_N = totals['N']
+    spec.total_F = totals['F']
+    spec.total_T = totals['T']
+    spec.total_J = totals['J']
+    spec.total_P = totals['P']
+    spec.cnt_INTJ = totals['INTJ']
+    spec.cnt_INTP = totals['INTP']
+    spec.cnt_ENTJ = totals['ENTJ']
+    spec.cnt_ENTP = totals['ENTP']
+    spec.cnt_INFJ = totals['INFJ']
+    spec.cnt_INFP = totals['INFP']
+    spec.cnt_ENFJ = totals['ENFJ']
+    spec.cnt_ENFP = totals['ENFP']
+    spec.cnt_ISTJ = totals['ISTJ']
+    spec.cnt_ISFJ = totals['ISFJ']
+    spec.cnt_ESTJ = totals['ESTJ']
+    spec.cnt_ESFJ = totals['ESFJ']
+    spec.cnt_ISTP = totals['ISTP']
+    spec.cnt_ISFP = totals['ISFP']
+    spec.cnt_ESTP = totals['ESTP']
+    spec.cnt_ESFP = totals['ESFP']
+    spec.save()
+
+    return result.result_id
+
 # 채팅 MBTI 분석
 class PlayChatMBTIAnalyzeView(APIView):
     @swagger_auto_schema(
@@ -587,9 +1080,26 @@ class PlayChatMBTIAnalyzeView(APIView):
                 openapi.IN_HEADER, 
                 description="access token", 
                 type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "async",
+                openapi.IN_QUERY,
+                description="true면 분석 작업을 만들고 바로 202와 job_id를 응답합니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="true면 text/event-stream으로 응답합니다. 파싱되는 대로 section 이벤트를 보내고, 결과가 저장되면 done 이벤트로 result_id를 보냅니다.",
+                type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter(
+                "no_cache",
+                openapi.IN_QUERY,
+                description="true면 캐시된 분석 결과를 쓰지 않고 다시 분석합니다.",
+                type=openapi.TYPE_BOOLEAN),
         ],
         responses={
             201: AnalyseResponseSerializerPlay,
+            200: "text/event-stream (stream=true)",
+            202: AnalysisJobSerializerPlay,
             404: "Not Found",
             400: "Bad Request",
             403: "Forbidden",  # If the user does not have permission to analyze the chat
@@ -618,129 +1128,27 @@ class PlayChatMBTIAnalyzeView(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
 
-        # 1. Gemini API 클라이언트 초기화 및 MBTI 분석 함수 호출
         analysis_option = {
             "start": analysis_start,
             "end": analysis_end
         }
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        mbti_results, num_chat = mbti_analysis_with_gemini(chat, client, analysis_option)
-
-        # 2. ResultPlayMBTI 객체 생성
-        result = ResultPlayMBTI.objects.create(
-            type=3,
-            title=chat.title,
-            people_num=chat.people_num,
-            is_saved=1,
-            analysis_date_start=analysis_start,
-            analysis_date_end=analysis_end,
-            num_chat=num_chat,
-            chat=chat,
-            user=author,
-        )
-
-        # 3. 분석 결과가 비어있거나 에러가 있는 경우 처리
-        if not mbti_results or "error_message" in mbti_results[0]:
-            # 에러 상황에 맞게 응답 처리
-            return Response({"error": "MBTI 분석에 실패했습니다."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # 4. 분석 결과를 바탕으로 DB 업데이트
-        spec = ResultPlayMBTISpec.objects.create(
-            result=result,
-            total_I=0,
-            total_E=0,
-            total_S=0,
-            total_N=0,
-            total_F=0,
-            total_T=0,
-            total_J=0,
-            total_P=0,
-            cnt_INTJ=0,
-            cnt_INTP=0,
-            cnt_ENTJ=0,
-            cnt_ENTP=0,
-            cnt_INFJ=0,
-            cnt_INFP=0,
-            cnt_ENFJ=0,
-            cnt_ENFP=0,
-            cnt_ISTJ=0,
-            cnt_ISFJ=0,
-            cnt_ESTJ=0,
-            cnt_ESFJ=0,
-            cnt_ISTP=0,
-            cnt_ISFP=0,
-            cnt_ESTP=0,
-            cnt_ESFP=0
-        )
-        totals = {
-            'I': 0, 'E': 0, 'S': 0, 'N': 0, 'F': 0, 'T': 0, 'J': 0, 'P': 0,
-            'INTJ': 0, 'INTP': 0, 'ENTJ': 0, 'ENTP': 0,
-            'INFJ': 0, 'INFP': 0, 'ENFJ': 0, 'ENFP': 0, 
-            'ISTJ': 0, 'ISFJ': 0, 'ESTJ': 0, 'ESFJ': 0, 
-            'ISTP': 0, 'ISFP': 0, 'ESTP': 0, 'ESFP': 0
-        }
+        use_cache = not is_cache_bypassed(request)
+        if is_async_request(request):
+            job = submit_analysis_job(author, "play", "mbti", run_mbti_analysis, chat.chat_id, analysis_option, use_cache)
+            return Response(AnalysisJobSerializerPlay(job).data, status=status.HTTP_202_ACCEPTED)
+        if is_stream_request(request):
+            return analysis_event_stream(run_mbti_analysis, chat.chat_id, analysis_option, use_cache)
 
-        # 각 참여자별 분석 결과를 ResultPlayMBTISpecPersonal에 저장
-        for person_data in mbti_results:
-            ResultPlayMBTISpecPersonal.objects.create(
-                spec=spec,
-                name=person_data.get("name", ""),
-                MBTI=person_data.get("MBTI", ""),
-                summary=person_data.get("summary", ""),
-                desc=person_data.get("desc", ""),
-                position=person_data.get("position", ""),
-                personality=person_data.get("personality", ""),
-                style=person_data.get("style", ""),
-                moment_ex=person_data.get("moment_ex", ""),
-                moment_desc=person_data.get("moment_desc", ""),
-                momentIE_ex=person_data.get("momentIE_ex", ""),
-                momentIE_desc=person_data.get("momentIE_desc", ""),
-                momentSN_ex=person_data.get("momentSN_ex", ""),
-                momentSN_desc=person_data.get("momentSN_desc", ""),
-                momentFT_ex=person_data.get("momentFT_ex", ""),
-                momentFT_desc=person_data.get("momentFT_desc", ""),
-                momentJP_ex=person_data.get("momentJP_ex", ""),
-                momentJP_desc=person_data.get("momentJP_desc", ""),
-            )
-            # MBTI 지표별 카운트 업데이트
-            mbti = person_data.get("MBTI", "")
-            for char in mbti:
-                if char in totals:
-                    totals[char] += 1
-            # MBTI 유형별 카운트 업데이트
-            if mbti in totals:
-                totals[mbti] += 1
-
-        # spec 객체에 전체 카운트 업데이트
-        spec.total_I = totals['I']
-        spec.total_E = totals['E']
-        spec.total_S = totals['S']
-        spec.total_N = totals['N']
-        spec.total_F = totals['F']
-        spec.total_T = totals['T']
-        spec.total_J = totals['J']
-        spec.total_P = totals['P']
-        spec.cnt_INTJ = totals['INTJ']
-        spec.cnt_INTP = totals['INTP']
-        spec.cnt_ENTJ = totals['ENTJ']
-        spec.cnt_ENTP = totals['ENTP']
-        spec.cnt_INFJ = totals['INFJ']
-        spec.cnt_INFP = totals['INFP']
-        spec.cnt_ENFJ = totals['ENFJ']
-        spec.cnt_ENFP = totals['ENFP']
-        spec.cnt_ISTJ = totals['ISTJ']
-        spec.cnt_ISFJ = totals['ISFJ']
-        spec.cnt_ESTJ = totals['ESTJ']
-        spec.cnt_ESFJ = totals['ESFJ']
-        spec.cnt_ISTP = totals['ISTP']
-        spec.cnt_ISFP = totals['ISFP']
-        spec.cnt_ESTP = totals['ESTP']
-        spec.cnt_ESFP = totals['ESFP']
-        spec.save()
+        try:
+            result_id = run_mbti_analysis(chat.chat_id, analysis_option, use_cache)
+        except AnalysisFailed as e:
+            # 에러 상황에 맞게 응답 처리
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response(
             {
-                "result_id": result.result_id,
+                "result_id": result_id,
             },
             status=status.HTTP_201_CREATED,
         )
@@ -776,7 +1184,7 @@ class PlayChemResultDetailView(APIView):
                 return Response(status=status.HTTP_403_FORBIDDEN)
             
             spec = ResultPlayChemSpec.objects.get(result=result)
-            spec_tables = ResultPlayChemSpecTable.objects.filter(spec=spec)
+            spec_tables = ResultPlayChemSpecTable.objects.filter(spec=spec, row__lt=spec.tablesize, column__lt=spec.tablesize)
             payload = {
                 "result": result,
                 "spec": spec,
@@ -955,6 +1363,38 @@ class PlayMBTIResultDetailView(APIView):
 ###################################################################
 
 
+# 분석 작업 상태 조회
+class PlayAnalysisJobDetailView(APIView):
+    @swagger_auto_schema(
+        tags=["Play"],
+        operation_id="분석 작업 상태 조회",
+        operation_description="?async=true 로 요청한 분석 작업의 상태(queued, running, done, failed)를 조회합니다. "
+                              "done이면 result_id로 분석 결과를 조회하고, failed면 error_message에 사유가 담깁니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Authorization",
+                openapi.IN_HEADER, 
+                description="access token", 
+                type=openapi.TYPE_STRING),
+        ],
+        responses={200: AnalysisJobSerializerPlay, 401: "Unauthorized", 403: "Forbidden", 404: "Not Found"},
+    )
+    def get(self, request, job_id):
+        author = request.user
+        if not author.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            job = AnalysisJob.objects.get(job_id=job_id, target="play")
+        except AnalysisJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if job.user != author:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        return Response(AnalysisJobSerializerPlay(job).data, status=status.HTTP_200_OK)
+
+
 # 모든 분석 결과 조회
 class PlayResultAllView(APIView):
     @swagger_auto_schema(
@@ -1013,7 +1453,7 @@ class PlayChemResultDetailViewGuest(APIView):
             share = UuidChem.objects.get(uuid=uuid)
             result = ResultPlayChem.objects.get(result_id=share.result.result_id)       
             spec = ResultPlayChemSpec.objects.get(result=result)
-            spec_tables = ResultPlayChemSpecTable.objects.filter(spec=spec)
+            spec_tables = ResultPlayChemSpecTable.objects.filter(spec=spec, row__lt=spec.tablesize, column__lt=spec.tablesize)
             payload = {
                 "result": result,
                 "spec": spec,
@@ -1269,8 +1709,6 @@ class TypeResultIdToUuidView(APIView):
 ###################################################################
 
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
-
 def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
     
     # 퀴즈 생성에 참고할 자료들 가져오기
@@ -1282,31 +1720,23 @@ def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
     except:
         return {"detail": "케미 분석 결과가 존재하지 않습니다."}
     
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
 
-    names = [spec.name_0, spec.name_1, spec.name_2, spec.name_3, spec.name_4]
-    scores = [[0 for _ in range(spec.tablesize)] for _ in range(spec.tablesize)]
-    for i in range(spec.tablesize):
-        for j in range(spec.tablesize):
-            if i == j:
-                scores[i][j] = 0
-            else:
-                x = ResultPlayChemSpecTable.objects.get(spec=spec, row=i, column=j)
-                scores[i][j] = x.interaction
+    interactions = format_chem_interactions(spec)
+
+    # 퀴즈 10문제와 함께, 문제 추가 요청에 쓸 후보 문제를 QUIZ_POOL_SIZE개 더 만듭니다.
+    total = 10 + settings.QUIZ_POOL_SIZE
+    pool_format = f"문제11부터 문제{total}까지도 같은 형식으로 번호를 이어서 작성해주세요." if total > 10 else ""
 
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 대화참여자들 사이의 케미를 평가하는 전문가입니다.
-        주어진 채팅 대화 내용과 케미 분석 결과를 바탕으로 두 사람에 대한 케미 퀴즈 10개를 생성해주세요.
+        주어진 채팅 대화 내용과 케미 분석 결과를 바탕으로 두 사람에 대한 케미 퀴즈 {total}개를 생성해주세요.
         썸 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         케미 분석 결과: 
         본 대화에는 총 {result.people_num}명의 참여자가 있으며, 톡방 제목은 '{chat.title}'입니다.
@@ -1314,30 +1744,8 @@ def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
 
         케미 분석 세부 결과:
         종합케미점수는 {spec.score_main}점, 그에 대한 요약은 {spec.summary_main}입니다.
-        총 {result.people_num}명의 참여자 중 상위 {spec.tablesize}명에 대한 분석이 중심이 됩니다.
-        상위 {spec.tablesize}명의 이름은 순서대로 {[name for name in names[:spec.tablesize]]}입니다.
-        상위 {spec.tablesize}명의 서로에 대한 케미 점수는 다음과 같습니다.
-        {spec.name_0} --> {spec.name_1} 케미 점수: {scores[0][1]}
-        {spec.name_0} --> {spec.name_2} 케미 점수: {scores[0][2]}
-        {spec.name_0} --> {spec.name_3} 케미 점수: {scores[0][3]}
-        {spec.name_0} --> {spec.name_4} 케미 점수: {scores[0][4]}
-        {spec.name_1} --> {spec.name_0} 케미 점수: {scores[1][0]}
-        {spec.name_1} --> {spec.name_2} 케미 점수: {scores[1][2]}
-        {spec.name_1} --> {spec.name_3} 케미 점수: {scores[1][3]}
-        {spec.name_1} --> {spec.name_4} 케미 점수: {scores[1][4]}
-        {spec.name_2} --> {spec.name_0} 케미 점수: {scores[2][0]}
-        {spec.name_2} --> {spec.name_1} 케미 점수: {scores[2][1]}
-        {spec.name_2} --> {spec.name_3} 케미 점수: {scores[2][3]}
-        {spec.name_2} --> {spec.name_4} 케미 점수: {scores[2][4]}
-        {spec.name_3} --> {spec.name_0} 케미 점수: {scores[3][0]}
-        {spec.name_3} --> {spec.name_1} 케미 점수: {scores[3][1]}
-        {spec.name_3} --> {spec.name_2} 케미 점수: {scores[3][2]}
-        {spec.name_3} --> {spec.name_4} 케미 점수: {scores[3][4]}
-        {spec.name_4} --> {spec.name_0} 케미 점수: {scores[4][0]}
-        {spec.name_4} --> {spec.name_1} 케미 점수: {scores[4][1]}
-        {spec.name_4} --> {spec.name_2} 케미 점수: {scores[4][2]}
-        {spec.name_4} --> {spec.name_3} 케미 점수: {scores[4][3]}
-        해당 케미점수 결과에서 케미 점수가 0점이거나 이름이 비어있는 경우는 무시해주세요.
+        참여자들 사이의 케미 점수(방향별, 0~100)는 높은 순서로 다음과 같습니다.
+        {interactions}
 
         케미 순위 1위는 {spec.top1_A}와 {spec.top1_B}이며, 이들의 케미 점수는 {spec.top1_score}점입니다.
         케미 순위 1위에 대한 간단한 설명은 {spec.top1_comment}입니다.
@@ -1358,7 +1766,7 @@ def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
         종합적인 사람들 간의 분석 결과는 {spec.chatto_analysis}입니다.
         케미를 더 올리기 위한 분석과 팁은 {spec.chatto_levelup1}, {spec.chatto_levelup_tips1}, {spec.chatto_levelup2}, {spec.chatto_levelup_tips2}, {spec.chatto_levelup3}, {spec.chatto_levelup_tips3}입니다.
 
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 케미 퀴즈 10개를 생성해야 합니다.
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 케미 퀴즈 {total}개를 생성해야 합니다.
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
         당신의 응답은 다음과 반드시 같은 형식을 따라야 합니다:
 
@@ -1422,12 +1830,10 @@ def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
         선택지10-3: [선택지 3 내용]
         선택지10-4: [선택지 4 내용]
         정답10: [정답 선택지 번호 (1, 2, 3, 4)]
+        {pool_format}
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
@@ -1494,6 +1900,7 @@ def generate_ChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
         "choice10-3": parse_response(r"선택지10-3:\s*(.+)", response_text),
         "choice10-4": parse_response(r"선택지10-4:\s*(.+)", response_text),
         "answer10": parse_response(r"정답10:\s*(\d+)", response_text, is_int=True),
+        "pool": parse_quiz_questions(response_text, 11, total),
     }
 
 # 케미 퀴즈 생성, 케미 퀴즈 조회, 케미 퀴즈 삭제
@@ -1535,7 +1942,7 @@ class PlayChemQuizView(APIView):
             return Response({"detail": "이미 해당 분석 결과에 대한 퀴즈가 존재합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
         # 케미 퀴즈 생성
-        quiz_data = generate_ChemQuiz(result, client)
+        quiz_data = generate_ChemQuiz(result, get_gemini_client())
 
         if quiz_data == {"detail": "채팅 파일이 존재하지 않습니다."}:
             return Response({"detail": "채팅 파일이 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
@@ -1566,6 +1973,8 @@ class PlayChemQuizView(APIView):
                 count4=0,
             )
         
+        store_quiz_pool(ChemQuizPoolQuestion, quiz, quiz_data["pool"])
+
         result.is_quized = True
         result.save()
         
@@ -2298,7 +2707,11 @@ class PlayChemQuizModifyView(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-def generate_OneChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
+def generate_OneChemQuiz(result: ResultPlayChem, client: genai.Client, count: int = 1) -> list:
+    """
+    퀴즈에 추가할 문제를 count개 생성합니다. 문제 추가 요청과 후보 문제 보충에 씁니다.
+    문제 모델의 필드(question, choice1~4, answer) 딕셔너리 리스트를 반환하고, 실패하면 {"detail": ...}를 반환합니다.
+    """
     
     # 퀴즈 생성에 참고할 자료들 가져오기
     chat = result.chat
@@ -2309,31 +2722,19 @@ def generate_OneChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
     except:
         return {"detail": "케미 분석 결과가 존재하지 않습니다."}
     
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
 
-    names = [spec.name_0, spec.name_1, spec.name_2, spec.name_3, spec.name_4]
-    scores = [[0 for _ in range(spec.tablesize)] for _ in range(spec.tablesize)]
-    for i in range(spec.tablesize):
-        for j in range(spec.tablesize):
-            if i == j:
-                scores[i][j] = 0
-            else:
-                x = ResultPlayChemSpecTable.objects.get(spec=spec, row=i, column=j)
-                scores[i][j] = x.interaction
+    interactions = format_chem_interactions(spec)
 
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 대화참여자들 사이의 케미를 평가하는 전문가입니다.
-        주어진 채팅 대화 내용과 케미 분석 결과를 바탕으로 두 사람에 대한 케미 퀴즈 1개를 생성해주세요.
+        주어진 채팅 대화 내용과 케미 분석 결과를 바탕으로 두 사람에 대한 케미 퀴즈 {count}개를 생성해주세요.
         썸 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         케미 분석 결과: 
         본 대화에는 총 {result.people_num}명의 참여자가 있으며, 톡방 제목은 '{chat.title}'입니다.
@@ -2341,30 +2742,8 @@ def generate_OneChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
 
         케미 분석 세부 결과:
         종합케미점수는 {spec.score_main}점, 그에 대한 요약은 {spec.summary_main}입니다.
-        총 {result.people_num}명의 참여자 중 상위 {spec.tablesize}명에 대한 분석이 중심이 됩니다.
-        상위 {spec.tablesize}명의 이름은 순서대로 {[name for name in names[:spec.tablesize]]}입니다.
-        상위 {spec.tablesize}명의 서로에 대한 케미 점수는 다음과 같습니다.
-        {spec.name_0} --> {spec.name_1} 케미 점수: {scores[0][1]}
-        {spec.name_0} --> {spec.name_2} 케미 점수: {scores[0][2]}
-        {spec.name_0} --> {spec.name_3} 케미 점수: {scores[0][3]}
-        {spec.name_0} --> {spec.name_4} 케미 점수: {scores[0][4]}
-        {spec.name_1} --> {spec.name_0} 케미 점수: {scores[1][0]}
-        {spec.name_1} --> {spec.name_2} 케미 점수: {scores[1][2]}
-        {spec.name_1} --> {spec.name_3} 케미 점수: {scores[1][3]}
-        {spec.name_1} --> {spec.name_4} 케미 점수: {scores[1][4]}
-        {spec.name_2} --> {spec.name_0} 케미 점수: {scores[2][0]}
-        {spec.name_2} --> {spec.name_1} 케미 점수: {scores[2][1]}
-        {spec.name_2} --> {spec.name_3} 케미 점수: {scores[2][3]}
-        {spec.name_2} --> {spec.name_4} 케미 점수: {scores[2][4]}
-        {spec.name_3} --> {spec.name_0} 케미 점수: {scores[3][0]}
-        {spec.name_3} --> {spec.name_1} 케미 점수: {scores[3][1]}
-        {spec.name_3} --> {spec.name_2} 케미 점수: {scores[3][2]}
-        {spec.name_3} --> {spec.name_4} 케미 점수: {scores[3][4]}
-        {spec.name_4} --> {spec.name_0} 케미 점수: {scores[4][0]}
-        {spec.name_4} --> {spec.name_1} 케미 점수: {scores[4][1]}
-        {spec.name_4} --> {spec.name_2} 케미 점수: {scores[4][2]}
-        {spec.name_4} --> {spec.name_3} 케미 점수: {scores[4][3]}
-        해당 케미점수 결과에서 케미 점수가 0점이거나 이름이 비어있는 경우는 무시해주세요.
+        참여자들 사이의 케미 점수(방향별, 0~100)는 높은 순서로 다음과 같습니다.
+        {interactions}
 
         케미 순위 1위는 {spec.top1_A}와 {spec.top1_B}이며, 이들의 케미 점수는 {spec.top1_score}점입니다.
         케미 순위 1위에 대한 간단한 설명은 {spec.top1_comment}입니다.
@@ -2383,37 +2762,28 @@ def generate_OneChemQuiz(result: ResultPlayChem, client: genai.Client) -> dict:
         {spec.topic3}가 {spec.topic3_ratio}%, {spec.topic4}가 {spec.topic4_ratio}%입니다.
         
         종합적인 사람들 간의 분석 결과는 {spec.chatto_analysis}입니다.
-        케미를 더 올리기 위한 분석과 팁은 {spec.chatto_levelup}, {spec.chatto_levelup_tips}입니다.
+        케미를 더 올리기 위한 분석과 팁은 {spec.chatto_levelup1}, {spec.chatto_levelup_tips1}, {spec.chatto_levelup2}, {spec.chatto_levelup_tips2}, {spec.chatto_levelup3}, {spec.chatto_levelup_tips3}입니다.
 
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 케미 퀴즈 1개를 생성해야 합니다.
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 케미 퀴즈 {count}개를 생성해야 합니다.
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
         당신의 응답은 다음과 반드시 같은 형식을 따라야 합니다:
 
-        문제: [문제 내용]
-        선택지1: [선택지 1 내용]
-        선택지2: [선택지 2 내용]
-        선택지3: [선택지 3 내용]
-        선택지4: [선택지 4 내용]
-        정답: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제1: [문제 내용]
+        선택지1-1: [선택지 1 내용]
+        선택지1-2: [선택지 2 내용]
+        선택지1-3: [선택지 3 내용]
+        선택지1-4: [선택지 4 내용]
+        정답1: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제가 여러 개이면 문제2, 선택지2-1, 정답2처럼 번호를 이어서 같은 형식으로 작성해주세요.
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
     print(f"Gemini로 생성된 케미 퀴즈 응답: {response_text}")
 
-    return {
-        "question": parse_response(r"문제:\s*(.+)", response_text),
-        "choice1": parse_response(r"선택지1:\s*(.+)", response_text),
-        "choice2": parse_response(r"선택지2:\s*(.+)", response_text),
-        "choice3": parse_response(r"선택지3:\s*(.+)", response_text),
-        "choice4": parse_response(r"선택지4:\s*(.+)", response_text),
-        "answer": parse_response(r"정답:\s*(\d+)", response_text, is_int=True),
-    }            
+    return parse_quiz_questions(response_text, 1, count)
 
 
 # 케미 퀴즈 문제 추가 생성
@@ -2421,7 +2791,7 @@ class PlayChemQuizAddView(APIView):
     @swagger_auto_schema(
         tags=["Play_Chem_Quiz"],
         operation_id="케미 퀴즈 문제 추가생성",
-        operation_description="케미 퀴즈에 새로운 문제를 추가 생성합니다.",
+        operation_description="케미 퀴즈에 새로운 문제를 추가 생성합니다. 퀴즈를 만들 때 함께 만들어 둔 후보 문제가 있으면 Gemini를 호출하지 않고 바로 추가합니다.",
         manual_parameters=[
             openapi.Parameter(
                 "Authorization",
@@ -2454,17 +2824,20 @@ class PlayChemQuizAddView(APIView):
         # 새로운 문제를 추가
         question_index = quiz.question_num  # 현재 문제 수를 인덱스로 사용
 
-        quiz_data = generate_OneChemQuiz(result, client)
+        # 미리 만들어 둔 후보 문제를 꺼내 쓰고, 후보가 없을 때만 바로 생성합니다.
+        quiz_data = pop_quiz_pool_question(ChemQuizPoolQuestion, quiz)
+        if quiz_data is None:
+            questions = generate_OneChemQuiz(result, get_gemini_client())
+            if not isinstance(questions, list):
+                return Response(questions, status=status.HTTP_404_NOT_FOUND)
+            if not questions:
+                return Response({"detail": "문제를 생성하지 못했습니다."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            quiz_data = questions[0]
 
         ChemQuizQuestion.objects.create(
             quiz=quiz,
             question_index=question_index,
-            question=quiz_data["question"],
-            choice1=quiz_data["choice1"],
-            choice2=quiz_data["choice2"],
-            choice3=quiz_data["choice3"],
-            choice4=quiz_data["choice4"],
-            answer=quiz_data["answer"],
+            **quiz_data,
             correct_num=0,
             count1=0,
             count2=0,
@@ -2490,6 +2863,9 @@ class PlayChemQuizAddView(APIView):
         # 이제 그동안 이 문제를 푼 기록은 지워야 함.
         ChemQuizPersonal.objects.filter(quiz=quiz).delete()
 
+        # 후보 문제가 QUIZ_POOL_MIN개보다 적게 남았으면 백그라운드에서 보충합니다.
+        schedule_quiz_pool_refill(ChemQuizPoolQuestion, quiz, generate_OneChemQuiz)
+
         return Response(status=status.HTTP_200_OK)
 
 
@@ -2507,21 +2883,21 @@ def generate_SomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
     except:
         return {"detail": "해당 분석 결과의 스펙이 존재하지 않습니다."}
     
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
 
+    # 퀴즈 10문제와 함께, 문제 추가 요청에 쓸 후보 문제를 QUIZ_POOL_SIZE개 더 만듭니다.
+    total = 10 + settings.QUIZ_POOL_SIZE
+    pool_format = f"문제11부터 문제{total}까지도 같은 형식으로 번호를 이어서 작성해주세요." if total > 10 else ""
+
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 두 사람 사이의 썸 기류를 평가하는 전문가입니다.
-        주어진 채팅 대화 내용과 썸 분석 결과를 바탕으로 두 사람에 대한 썸 퀴즈 10개를 생성해주세요.
+        주어진 채팅 대화 내용과 썸 분석 결과를 바탕으로 두 사람에 대한 썸 퀴즈 {total}개를 생성해주세요.
         썸 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         썸 분석 결과: 
         두 사람 {spec.name_A}와 {spec.name_B} 사이의 대화입니다. 
@@ -2558,7 +2934,7 @@ def generate_SomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
         {spec.chatto_counsel}
         {spec.chatto_counsel_tips}
 
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 10개 생성해야 합니다.
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 {total}개 생성해야 합니다.
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
         문제에 사람의 이름이 들어가는 경우, 반드시 {spec.name_A}, {spec.name_B}중에서만 사용해야 합니다.
 
@@ -2624,12 +3000,10 @@ def generate_SomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
         선택지10-3: [선택지 3 내용]
         선택지10-4: [선택지 4 내용]
         정답10: [정답 선택지 번호 (1, 2, 3, 4)]
+        {pool_format}
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
@@ -2696,6 +3070,7 @@ def generate_SomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
         "choice10-3": parse_response(r"선택지10-3:\s*(.+)", response_text),
         "choice10-4": parse_response(r"선택지10-4:\s*(.+)", response_text),
         "answer10": parse_response(r"정답10:\s*(\d+)", response_text, is_int=True),
+        "pool": parse_quiz_questions(response_text, 11, total),
     }
 
 # 썸 퀴즈 생성, 썸 퀴즈 조회, 썸 퀴즈 삭제
@@ -2737,7 +3112,7 @@ class PlaySomeQuizView(APIView):
             return Response({"detail": "이미 해당 분석 결과에 대한 퀴즈가 존재합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
         # 썸 퀴즈 생성
-        quiz_data = generate_SomeQuiz(result, client)
+        quiz_data = generate_SomeQuiz(result, get_gemini_client())
 
         if quiz_data == {"detail": "채팅 파일이 존재하지 않습니다."}:
             return Response({"detail": "채팅 파일이 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
@@ -2768,6 +3143,8 @@ class PlaySomeQuizView(APIView):
                 count4=0,
             )
 
+        store_quiz_pool(SomeQuizPoolQuestion, quiz, quiz_data["pool"])
+
         result.is_quized = True
         result.save()
         
@@ -3494,7 +3871,11 @@ class PlaySomeQuizModifyView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
-def generate_OneSomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
+def generate_OneSomeQuiz(result: ResultPlaySome, client: genai.Client, count: int = 1) -> list:
+    """
+    퀴즈에 추가할 문제를 count개 생성합니다. 문제 추가 요청과 후보 문제 보충에 씁니다.
+    문제 모델의 필드(question, choice1~4, answer) 딕셔너리 리스트를 반환하고, 실패하면 {"detail": ...}를 반환합니다.
+    """
     
     # 퀴즈 생성에 참고할 자료들 가져오기
     chat = result.chat
@@ -3505,21 +3886,17 @@ def generate_OneSomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
     except:
         return {"detail": "해당 분석 결과의 스펙이 존재하지 않습니다."}
     
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
 
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 두 사람 사이의 썸 기류를 평가하는 전문가입니다.
-        주어진 채팅 대화 내용과 썸 분석 결과를 바탕으로 두 사람에 대한 썸 퀴즈 1개를 생성해주세요.
+        주어진 채팅 대화 내용과 썸 분석 결과를 바탕으로 두 사람에 대한 썸 퀴즈 {count}개를 생성해주세요.
         썸 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         썸 분석 결과: 
         두 사람 {spec.name_A}와 {spec.name_B} 사이의 대화입니다. 
@@ -3556,37 +3933,28 @@ def generate_OneSomeQuiz(result: ResultPlaySome, client: genai.Client) -> dict:
         {spec.chatto_counsel}
         {spec.chatto_counsel_tips}
 
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 1개 생성해야 합니다:
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 {count}개 생성해야 합니다:
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
         문제에 사람의 이름이 들어가는 경우, 반드시 {spec.name_A}, {spec.name_B}중에서만 사용해야 합니다.
 
         당신의 응답은 다음과 반드시 같은 형식을 따라야 합니다:
 
-        문제: [문제 내용]
-        선택지1: [선택지 1 내용]
-        선택지2: [선택지 2 내용]
-        선택지3: [선택지 3 내용]
-        선택지4: [선택지 4 내용]
-        정답: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제1: [문제 내용]
+        선택지1-1: [선택지 1 내용]
+        선택지1-2: [선택지 2 내용]
+        선택지1-3: [선택지 3 내용]
+        선택지1-4: [선택지 4 내용]
+        정답1: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제가 여러 개이면 문제2, 선택지2-1, 정답2처럼 번호를 이어서 같은 형식으로 작성해주세요.
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
     print(f"Gemini로 생성된 썸 퀴즈 응답: {response_text}")
 
-    return {
-        "question": parse_response(r"문제:\s*(.+)", response_text),
-        "choice1": parse_response(r"선택지1:\s*(.+)", response_text),
-        "choice2": parse_response(r"선택지2:\s*(.+)", response_text),
-        "choice3": parse_response(r"선택지3:\s*(.+)", response_text),
-        "choice4": parse_response(r"선택지4:\s*(.+)", response_text),
-        "answer": parse_response(r"정답:\s*(\d+)", response_text, is_int=True),
-    }
+    return parse_quiz_questions(response_text, 1, count)
 
 
 # 썸 퀴즈 문제 추가 생성
@@ -3594,7 +3962,7 @@ class PlaySomeQuizAddView(APIView):
     @swagger_auto_schema(
         tags=["Play_Some_Quiz"],
         operation_id="썸 퀴즈 문제 추가생성",
-        operation_description="썸 퀴즈에 새로운 문제를 추가 생성합니다.",
+        operation_description="썸 퀴즈에 새로운 문제를 추가 생성합니다. 퀴즈를 만들 때 함께 만들어 둔 후보 문제가 있으면 Gemini를 호출하지 않고 바로 추가합니다.",
         manual_parameters=[
             openapi.Parameter(
                 "Authorization",
@@ -3627,17 +3995,20 @@ class PlaySomeQuizAddView(APIView):
         # 새로운 문제를 추가
         question_index = quiz.question_num  # 현재 문제 수를 인덱스로 사용
 
-        quiz_data = generate_OneSomeQuiz(result, client)
+        # 미리 만들어 둔 후보 문제를 꺼내 쓰고, 후보가 없을 때만 바로 생성합니다.
+        quiz_data = pop_quiz_pool_question(SomeQuizPoolQuestion, quiz)
+        if quiz_data is None:
+            questions = generate_OneSomeQuiz(result, get_gemini_client())
+            if not isinstance(questions, list):
+                return Response(questions, status=status.HTTP_404_NOT_FOUND)
+            if not questions:
+                return Response({"detail": "문제를 생성하지 못했습니다."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            quiz_data = questions[0]
 
         SomeQuizQuestion.objects.create(
             quiz=quiz,
             question_index=question_index,
-            question=quiz_data["question"],
-            choice1=quiz_data["choice1"],
-            choice2=quiz_data["choice2"],
-            choice3=quiz_data["choice3"],
-            choice4=quiz_data["choice4"],
-            answer=quiz_data["answer"],
+            **quiz_data,
             correct_num=0,
             count1=0,
             count2=0,
@@ -3663,6 +4034,9 @@ class PlaySomeQuizAddView(APIView):
         # 이제 그동안 이 문제를 푼 기록은 지워야 함.
         SomeQuizPersonal.objects.filter(quiz=quiz).delete()
 
+        # 후보 문제가 QUIZ_POOL_MIN개보다 적게 남았으면 백그라운드에서 보충합니다.
+        schedule_quiz_pool_refill(SomeQuizPoolQuestion, quiz, generate_OneSomeQuiz)
+
         return Response(status=status.HTTP_200_OK)
 
 
@@ -3681,12 +4055,9 @@ def generate_MBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
     except:
         return {"detail": "MBTI 분석 결과가 존재하지 않습니다."}
 
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
     
     total = spec.total_E + spec.total_I
@@ -3715,13 +4086,16 @@ def generate_MBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
             {names[i]}의 JP 성향 모먼트의 예시와 그에 대한 설명은 다음과 같습니다: {spec_personals[i].momentJP_ex}, {spec_personals[i].momentJP_desc}
             """
         
+    # 퀴즈 10문제와 함께, 문제 추가 요청에 쓸 후보 문제를 QUIZ_POOL_SIZE개 더 만듭니다.
+    total = 10 + settings.QUIZ_POOL_SIZE
+    pool_format = f"문제11부터 문제{total}까지도 같은 형식으로 번호를 이어서 작성해주세요." if total > 10 else ""
+
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 대화 참여자들의 MBTI를 분석하는 전문가입니다.
-        주어진 채팅 대화 내용과 MBTI 분석 결과를 바탕으로 두 사람에 대한 MBTI 퀴즈 10개를 생성해주세요.
+        주어진 채팅 대화 내용과 MBTI 분석 결과를 바탕으로 두 사람에 대한 MBTI 퀴즈 {total}개를 생성해주세요.
         MBTI 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         MBTI 분석 결과: 
         이 대화의 참여자는 {[name for name in names]}입니다.
@@ -3735,7 +4109,7 @@ def generate_MBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
 
         개인별 분석 결과:{[r for r in personal_results]}
         
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 10개 생성해야 합니다.
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 {total}개 생성해야 합니다.
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
 
         당신의 응답은 다음과 반드시 같은 형식을 따라야 합니다:
@@ -3800,12 +4174,10 @@ def generate_MBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
         선택지10-3: [선택지 3 내용]
         선택지10-4: [선택지 4 내용]
         정답10: [정답 선택지 번호 (1, 2, 3, 4)]
+        {pool_format}
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
@@ -3872,6 +4244,7 @@ def generate_MBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
         "choice10-3": parse_response(r"선택지10-3:\s*(.+)", response_text),
         "choice10-4": parse_response(r"선택지10-4:\s*(.+)", response_text),
         "answer10": parse_response(r"정답10:\s*(\d+)", response_text, is_int=True),
+        "pool": parse_quiz_questions(response_text, 11, total),
     }
 
 # MBTI 퀴즈 생성, MBTI 퀴즈 조회, MBTI 퀴즈 삭제
@@ -3913,7 +4286,7 @@ class PlayMBTIQuizView(APIView):
             return Response({"detail": "이미 해당 분석 결과에 대한 퀴즈가 존재합니다."}, status=status.HTTP_400_BAD_REQUEST)
 
         # MBTI 퀴즈 생성
-        quiz_data = generate_MBTIQuiz(result, client)
+        quiz_data = generate_MBTIQuiz(result, get_gemini_client())
 
         if quiz_data == {"detail": "채팅 파일이 존재하지 않습니다."}:
             return Response({"detail": "채팅 파일이 존재하지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
@@ -3944,6 +4317,8 @@ class PlayMBTIQuizView(APIView):
                 count4=0,
             )
 
+        store_quiz_pool(MBTIQuizPoolQuestion, quiz, quiz_data["pool"])
+
         result.is_quized = True
         result.save()
         
@@ -4671,7 +5046,11 @@ class PlayMBTIQuizModifyView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
-def generate_OneMBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
+def generate_OneMBTIQuiz(result: ResultPlayMBTI, client: genai.Client, count: int = 1) -> list:
+    """
+    퀴즈에 추가할 문제를 count개 생성합니다. 문제 추가 요청과 후보 문제 보충에 씁니다.
+    문제 모델의 필드(question, choice1~4, answer) 딕셔너리 리스트를 반환하고, 실패하면 {"detail": ...}를 반환합니다.
+    """
     
     # 퀴즈 생성에 참고할 자료들 가져오기
     chat = result.chat
@@ -4683,12 +5062,9 @@ def generate_OneMBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
     except:
         return {"detail": "MBTI 분석 결과가 존재하지 않습니다."}
 
-    # 채팅 파일 열기
-    file_path = chat.file.path
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            chat_content = f.read()  # 파일 전체 내용 읽기
-    except FileNotFoundError:
+    # 분석할 때 등록해 둔 분석 기간의 대화 컨텍스트
+    context = get_quiz_context(result)
+    if context is None:
         return {"detail": "채팅 파일이 존재하지 않습니다."}
     
     total = spec.total_E + spec.total_I
@@ -4719,11 +5095,10 @@ def generate_OneMBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
         
     prompt = f"""
         당신은 카카오톡 대화 파일을 분석하여 대화 참여자들의 MBTI를 분석하는 전문가입니다.
-        주어진 채팅 대화 내용과 MBTI 분석 결과를 바탕으로 두 사람에 대한 MBTI 퀴즈 1개를 생성해주세요.
+        주어진 채팅 대화 내용과 MBTI 분석 결과를 바탕으로 두 사람에 대한 MBTI 퀴즈 {count}개를 생성해주세요.
         MBTI 퀴즈는 4지선다형으로, 정답은 1개입니다.
 
-        주어진 채팅 대화 내용: 
-        {chat_content}
+        주어진 채팅 대화 내용: 앞에 첨부된 카카오톡 대화 내용
 
         MBTI 분석 결과: 
         이 대화의 참여자는 {[name for name in names]}입니다.
@@ -4737,36 +5112,27 @@ def generate_OneMBTIQuiz(result: ResultPlayMBTI, client: genai.Client) -> dict:
 
         개인별 분석 결과:{[r for r in personal_results]}
         
-        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 1개 생성해야 합니다.
+        당신은 지금까지 제공된 위의 정보를 바탕으로 다음과 같은 썸 퀴즈를 {count}개 생성해야 합니다.
         이때, 질문과 선택지는 모두 서로 중복되지 않아야 하며, 문법, 철자, 구두점 오류 없이 답변해주세요. 특히 이름 뒤에 들어가는 조사를 꼭 맞게 사용해주세요.
 
         당신의 응답은 다음과 반드시 같은 형식을 따라야 합니다:
 
-        문제: [문제 내용]
-        선택지1: [선택지 1 내용]
-        선택지1: [선택지 2 내용]
-        선택지3: [선택지 3 내용]
-        선택지4: [선택지 4 내용]
-        정답: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제1: [문제 내용]
+        선택지1-1: [선택지 1 내용]
+        선택지1-2: [선택지 2 내용]
+        선택지1-3: [선택지 3 내용]
+        선택지1-4: [선택지 4 내용]
+        정답1: [정답 선택지 번호 (1, 2, 3, 4)]
+        문제가 여러 개이면 문제2, 선택지2-1, 정답2처럼 번호를 이어서 같은 형식으로 작성해주세요.
         """
     
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[prompt]
-    )
+    response = generate_with_chat_context(client, context, prompt)
 
     response_text = response.text
     
     print(f"Gemini로 생성된 MBTI 퀴즈 응답: {response_text}")
 
-    return {
-        "question": parse_response(r"문제:\s*(.+)", response_text),
-        "choice1": parse_response(r"선택지1:\s*(.+)", response_text),
-        "choice2": parse_response(r"선택지2:\s*(.+)", response_text),
-        "choice3": parse_response(r"선택지3:\s*(.+)", response_text),
-        "choice4": parse_response(r"선택지4:\s*(.+)", response_text),
-        "answer": parse_response(r"정답:\s*(\d+)", response_text, is_int=True),
-    }
+    return parse_quiz_questions(response_text, 1, count)
 
 
 # MBTI 퀴즈 문제 추가
@@ -4774,7 +5140,7 @@ class PlayMBTIQuizAddView(APIView):
     @swagger_auto_schema(
         tags=["Play_MBTI_Quiz"],
         operation_id="MBTI 퀴즈 문제 추가",
-        operation_description="MBTI 퀴즈에 문제를 추가합니다.",
+        operation_description="MBTI 퀴즈에 문제를 추가합니다. 퀴즈를 만들 때 함께 만들어 둔 후보 문제가 있으면 Gemini를 호출하지 않고 바로 추가합니다.",
         manual_parameters=[
             openapi.Parameter(
                 "Authorization",
@@ -4807,17 +5173,20 @@ class PlayMBTIQuizAddView(APIView):
         # 새로운 문제를 추가
         question_index = quiz.question_num # 현재 문제 수를 인덱스로 사용
 
-        quiz_data = generate_OneMBTIQuiz(result, client)
+        # 미리 만들어 둔 후보 문제를 꺼내 쓰고, 후보가 없을 때만 바로 생성합니다.
+        quiz_data = pop_quiz_pool_question(MBTIQuizPoolQuestion, quiz)
+        if quiz_data is None:
+            questions = generate_OneMBTIQuiz(result, get_gemini_client())
+            if not isinstance(questions, list):
+                return Response(questions, status=status.HTTP_404_NOT_FOUND)
+            if not questions:
+                return Response({"detail": "문제를 생성하지 못했습니다."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            quiz_data = questions[0]
 
         MBTIQuizQuestion.objects.create(
             quiz=quiz,
             question_index=question_index,
-            question=quiz_data["question"],
-            choice1=quiz_data["choice1"],
-            choice2=quiz_data["choice2"],
-            choice3=quiz_data["choice3"],
-            choice4=quiz_data["choice4"],
-            answer=quiz_data["answer"],
+            **quiz_data,
             correct_num=0,
             count1=0,
             count2=0,
@@ -4843,5 +5212,8 @@ class PlayMBTIQuizAddView(APIView):
         # 이제 그동안 이 문제를 푼 기록은 지워야 함.
         MBTIQuizPersonal.objects.filter(quiz=quiz).delete()
 
+        # 후보 문제가 QUIZ_POOL_MIN개보다 적게 남았으면 백그라운드에서 보충합니다.
+        schedule_quiz_pool_refill(MBTIQuizPoolQuestion, quiz, generate_OneMBTIQuiz)
+
         return Response(status=status.HTTP_200_OK)
     